@@ -0,0 +1,644 @@
+#!/usr/bin/env python3
+"""
+Benchmark do compositor, precificador e geradores de saida
+
+Sintetiza escopos de varios tamanhos a partir das composicoes reais das
+bases, mede o tempo de cada etapa (mediana de N repeticoes) e o pico de
+memoria (uma execucao extra com tracemalloc, para nao distorcer os tempos)
+e grava o resultado em JSON. Dois resultados podem ser comparados para
+detectar regressoes entre commits.
+
+O comando "planilha" compara os motores da planilha interna (memoria x
+write_only) em um orcamento com N linhas, medindo tempo e pico de RSS de
+cada execucao em um processo novo.
+
+Uso:
+    python -m hvac.benchmark executar
+    python -m hvac.benchmark executar --tamanhos 10 100 --etapas compositor precificador
+    python -m hvac.benchmark comparar benchmarks/antes.json benchmarks/depois.json
+    python -m hvac.benchmark planilha --linhas 5000
+"""
+
+import argparse
+import json
+import math
+import multiprocessing
+import platform
+import random
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, Any, List, Optional
+
+from .compositor import processar as processar_compositor
+from .precificador import processar as processar_precificador
+from .utils.catalogo import IndiceCatalogo
+
+
+# Tamanhos padrao dos escopos sintetizados (itens)
+TAMANHOS_PADRAO = (10, 100, 1000, 10000)
+
+# Etapas medidas, na ordem de execucao
+ETAPAS = (
+    "compositor",
+    "precificador",
+    "proposta_pdf",
+    "proposta_fpdf",
+    "planilha_interna",
+    "planilha_streaming"
+)
+
+# Etapas que geram documentos (limitadas a max_itens_saida)
+ETAPAS_SAIDA = ("proposta_pdf", "proposta_fpdf", "planilha_interna", "planilha_streaming")
+
+# Geradores de saida sao lentos; acima deste tamanho sao pulados por padrao
+MAX_ITENS_SAIDA = 1000
+
+# Variacao (%) acima da qual a comparacao aponta regressao
+LIMITE_REGRESSAO = 10.0
+
+# Versao do formato do arquivo de resultados
+VERSAO_RESULTADO = 1
+
+# Linhas da aba de resumo no comparativo de motores da planilha interna
+LINHAS_PLANILHA = 5000
+
+# Motores da planilha interna: nome -> write_only
+MOTORES_PLANILHA = {"memoria": False, "write_only": True}
+
+# Diretorio padrao dos resultados
+DIR_RESULTADOS = Path(__file__).resolve().parent.parent / "benchmarks"
+
+
+def sintetizar_escopo(indice: IndiceCatalogo, tamanho: int, semente: int = 42) -> Dict[str, Any]:
+    """
+    Gera um escopo deterministico com composicoes reais das bases
+
+    Args:
+        indice: Indice do catalogo (fonte das composicoes)
+        tamanho: Quantidade de itens
+        semente: Semente do gerador aleatorio
+
+    Returns:
+        Escopo no formato de escopo.json
+    """
+    aleatorio = random.Random(semente)
+    codigos = sorted(indice.composicoes)
+    itens = [
+        {
+            "composicao": aleatorio.choice(codigos),
+            "variavel": round(aleatorio.uniform(0, 20), 1),
+            "quantidade": aleatorio.randint(1, 4)
+        }
+        for _ in range(tamanho)
+    ]
+    return {
+        "projeto": {"nome": f"Benchmark {tamanho} itens", "cliente": "BENCHMARK"},
+        "itens": itens
+    }
+
+
+def medir(funcao: Callable[[], Any], repeticoes: int) -> Dict[str, Any]:
+    """
+    Mede tempo (mediana das repeticoes) e pico de memoria de uma funcao
+
+    Args:
+        funcao: Funcao sem argumentos a medir
+        repeticoes: Execucoes cronometradas
+
+    Returns:
+        Dicionario com tempos_s, mediana_s, min_s e pico_memoria_kb
+    """
+    tempos = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        funcao()
+        tempos.append(time.perf_counter() - inicio)
+
+    # Pico medido a parte: tracemalloc deixa a execucao bem mais lenta
+    ja_rastreando = tracemalloc.is_tracing()
+    if not ja_rastreando:
+        tracemalloc.start()
+    tracemalloc.reset_peak()
+    base = tracemalloc.get_traced_memory()[0]
+    funcao()
+    pico = tracemalloc.get_traced_memory()[1] - base
+    if not ja_rastreando:
+        tracemalloc.stop()
+
+    return {
+        "tempos_s": [round(t, 6) for t in tempos],
+        "mediana_s": round(statistics.median(tempos), 6),
+        "min_s": round(min(tempos), 6),
+        "pico_memoria_kb": round(pico / 1024, 1)
+    }
+
+
+def commit_atual() -> Optional[str]:
+    """Hash curto do commit atual (None fora de um repositorio git)"""
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=Path(__file__).resolve().parent,
+            capture_output=True,
+            text=True,
+            check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _etapa_proposta_pdf(
+    precificado: Dict[str, Any],
+    saida: Path,
+    backend: str = "weasyprint"
+) -> Callable[[], Any]:
+    from .generators.proposta_pdf import gerar_proposta_pdf
+
+    def executar():
+        # Numero e revisao fixos: nao consome o contador nem varre revisoes;
+        # sem cache: mede sempre o layout
+        resultado = gerar_proposta_pdf(
+            precificado,
+            numero_orcamento="BENCH.000",
+            revisao="R00",
+            output_path=str(saida / "proposta.pdf"),
+            usar_cache=False,
+            backend=backend
+        )
+        if not resultado.get("sucesso"):
+            raise RuntimeError(resultado.get("erro"))
+    return executar
+
+
+def _etapa_planilha_interna(
+    precificado: Dict[str, Any],
+    saida: Path,
+    write_only: bool = False
+) -> Callable[[], Any]:
+    from .generators.planilha_interna import gerar_planilha_interna
+
+    def executar():
+        resultado = gerar_planilha_interna(
+            precificado,
+            "BENCH.000-R00",
+            output_path=str(saida / "planilha.xlsx"),
+            write_only=write_only
+        )
+        if not resultado.get("sucesso"):
+            raise RuntimeError(resultado.get("erro"))
+    return executar
+
+
+def _remover_pasta_cliente_vazia():
+    """gerar_proposta_pdf sempre cria a pasta do cliente; remove a do benchmark"""
+    from .generators.utils import BASE_DIR
+
+    pasta = BASE_DIR / "output" / "benchmark"
+    try:
+        pasta.rmdir()
+    except OSError:
+        pass
+
+
+def executar_benchmark(
+    tamanhos: List[int] = TAMANHOS_PADRAO,
+    etapas: List[str] = ETAPAS,
+    repeticoes: int = 3,
+    max_itens_saida: int = MAX_ITENS_SAIDA,
+    verbose: bool = True
+) -> Dict[str, Any]:
+    """
+    Executa o benchmark para cada tamanho e etapa
+
+    Etapas que falham (ex: WeasyPrint sem bibliotecas do sistema) sao
+    registradas com o erro e nao interrompem as demais.
+
+    Args:
+        tamanhos: Tamanhos dos escopos (itens)
+        etapas: Etapas a medir (subconjunto de ETAPAS)
+        repeticoes: Execucoes cronometradas por etapa
+        max_itens_saida: Limite de itens para as etapas de saida (ETAPAS_SAIDA)
+        verbose: Exibe progresso
+
+    Returns:
+        Dicionario de resultados (formato do arquivo JSON)
+    """
+    indice = IndiceCatalogo.carregar()
+    resultados = []
+    saida = Path(tempfile.mkdtemp(prefix="hvac_benchmark_"))
+
+    try:
+        for tamanho in tamanhos:
+            escopo = sintetizar_escopo(indice, tamanho)
+            composicao = processar_compositor(escopo, indice=indice)
+            precificado = processar_precificador(composicao, indice=indice)
+
+            funcoes = {
+                "compositor": lambda: processar_compositor(escopo, indice=indice),
+                "precificador": lambda: processar_precificador(composicao, indice=indice),
+                "proposta_pdf": lambda: _etapa_proposta_pdf(precificado, saida)(),
+                "proposta_fpdf": lambda: _etapa_proposta_pdf(precificado, saida, "fpdf")(),
+                "planilha_interna": lambda: _etapa_planilha_interna(precificado, saida)(),
+                "planilha_streaming": lambda: _etapa_planilha_interna(precificado, saida, True)()
+            }
+
+            for etapa in ETAPAS:
+                if etapa not in etapas:
+                    continue
+
+                registro = {"tamanho": tamanho, "etapa": etapa}
+                if etapa in ETAPAS_SAIDA and tamanho > max_itens_saida:
+                    registro["pulado"] = f"acima de {max_itens_saida} itens"
+                else:
+                    try:
+                        registro.update(medir(funcoes[etapa], repeticoes))
+                        registro["itens_por_s"] = round(tamanho / registro["mediana_s"], 1) \
+                            if registro["mediana_s"] else None
+                    except Exception as e:
+                        registro["erro"] = f"{type(e).__name__}: {e}"
+
+                resultados.append(registro)
+                if verbose:
+                    print(_formatar_registro(registro))
+    finally:
+        shutil.rmtree(saida, ignore_errors=True)
+        if "proposta_pdf" in etapas or "proposta_fpdf" in etapas:
+            _remover_pasta_cliente_vazia()
+
+    return {
+        "versao": VERSAO_RESULTADO,
+        "data": datetime.now().isoformat(timespec="seconds"),
+        "commit": commit_atual(),
+        "python": platform.python_version(),
+        "plataforma": platform.platform(),
+        "repeticoes": repeticoes,
+        "resultados": resultados
+    }
+
+
+def contar_linhas_resumo(precificado: Dict[str, Any]) -> int:
+    """Linhas de itens e subitens da aba de resumo da planilha interna"""
+    return sum(
+        1 + len(item.get("materiais", [])) + len(item.get("mao_de_obra", [])) + len(item.get("ferramentas", []))
+        for item in precificado.get("itens_precificados", [])
+    )
+
+
+def sintetizar_precificado_linhas(
+    indice: IndiceCatalogo,
+    linhas: int,
+    semente: int = 42
+) -> Dict[str, Any]:
+    """
+    Precifica um escopo sintetizado com pelo menos N linhas no resumo
+
+    Args:
+        indice: Indice do catalogo
+        linhas: Linhas minimas (itens + subitens) da aba de resumo
+        semente: Semente do gerador aleatorio
+
+    Returns:
+        Dados precificados
+    """
+    def precificar(tamanho):
+        escopo = sintetizar_escopo(indice, tamanho, semente)
+        return processar_precificador(processar_compositor(escopo, indice=indice), indice=indice)
+
+    # Estima linhas por item numa amostra; escopos maiores estendem o menor
+    amostra = 100
+    media = max(contar_linhas_resumo(precificar(amostra)) / amostra, 1.0)
+    tamanho = max(1, math.ceil(linhas / media))
+    while True:
+        precificado = precificar(tamanho)
+        faltam = linhas - contar_linhas_resumo(precificado)
+        if faltam <= 0:
+            return precificado
+        tamanho += math.ceil(faltam / media)
+
+
+def _rss_maximo_kb() -> float:
+    """Pico de memoria residente do processo atual (KB)"""
+    import resource
+
+    pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # macOS reporta bytes; Linux, KB
+    return pico / 1024 if sys.platform == "darwin" else float(pico)
+
+
+def _medir_planilha_processo(caminho_precificado: str, write_only: bool, saida: str) -> Dict[str, Any]:
+    """Gera a planilha uma vez no processo atual (recem-criado) e mede tempo e RSS"""
+    from .generators.planilha_interna import gerar_planilha_interna
+
+    with open(caminho_precificado, "r", encoding="utf-8") as f:
+        precificado = json.load(f)
+
+    dados = _rss_maximo_kb()
+    inicio = time.perf_counter()
+    resultado = gerar_planilha_interna(precificado, "BENCH.000-R00", output_path=saida, write_only=write_only)
+    tempo = time.perf_counter() - inicio
+    if not resultado.get("sucesso"):
+        raise RuntimeError(resultado.get("erro"))
+    pico = _rss_maximo_kb()
+
+    return {"tempo_s": tempo, "rss_dados_kb": dados, "pico_rss_kb": pico}
+
+
+def comparar_motores_planilha(
+    linhas: int = LINHAS_PLANILHA,
+    repeticoes: int = 3,
+    verbose: bool = True
+) -> Dict[str, Any]:
+    """
+    Compara os motores da planilha interna (memoria x write_only)
+
+    Cada execucao roda em um processo novo (spawn): o pico de RSS
+    (ru_maxrss) so cresce durante a vida do processo, entao medir no
+    mesmo processo misturaria os motores.
+
+    Args:
+        linhas: Linhas minimas da aba de resumo
+        repeticoes: Execucoes por motor
+        verbose: Exibe progresso
+
+    Returns:
+        Dicionario com metadados e, por motor, mediana_s, pico_rss_kb
+        e rss_dados_kb (pico ja atingido ao carregar o precificado)
+    """
+    indice = IndiceCatalogo.carregar()
+    precificado = sintetizar_precificado_linhas(indice, linhas)
+    saida = Path(tempfile.mkdtemp(prefix="hvac_benchmark_"))
+    contexto = multiprocessing.get_context("spawn")
+    motores = []
+
+    try:
+        caminho = saida / "precificado.json"
+        with open(caminho, "w", encoding="utf-8") as f:
+            json.dump(precificado, f, ensure_ascii=False)
+
+        for motor, write_only in MOTORES_PLANILHA.items():
+            execucoes = []
+            for _ in range(repeticoes):
+                with ProcessPoolExecutor(max_workers=1, mp_context=contexto) as executor:
+                    execucoes.append(executor.submit(
+                        _medir_planilha_processo, str(caminho), write_only, str(saida / f"{motor}.xlsx")
+                    ).result())
+
+            registro = {
+                "motor": motor,
+                "tempos_s": [round(e["tempo_s"], 6) for e in execucoes],
+                "mediana_s": round(statistics.median(e["tempo_s"] for e in execucoes), 6),
+                "pico_rss_kb": round(statistics.median(e["pico_rss_kb"] for e in execucoes), 1),
+                "rss_dados_kb": round(statistics.median(e["rss_dados_kb"] for e in execucoes), 1),
+                "arquivo_kb": round((saida / f"{motor}.xlsx").stat().st_size / 1024, 1)
+            }
+            motores.append(registro)
+            if verbose:
+                print(
+                    f"{motor:<10} {registro['mediana_s'] * 1000:>10.2f} ms  "
+                    f"pico RSS {registro['pico_rss_kb']:>10.1f} KB"
+                )
+    finally:
+        shutil.rmtree(saida, ignore_errors=True)
+
+    return {
+        "versao": VERSAO_RESULTADO,
+        "data": datetime.now().isoformat(timespec="seconds"),
+        "commit": commit_atual(),
+        "python": platform.python_version(),
+        "plataforma": platform.platform(),
+        "repeticoes": repeticoes,
+        "linhas": contar_linhas_resumo(precificado),
+        "itens": len(precificado.get("itens_precificados", [])),
+        "motores": motores
+    }
+
+
+def formatar_comparacao_motores(resultado: Dict[str, Any]) -> str:
+    """Formata o comparativo dos motores da planilha interna"""
+    linhas = [
+        f"Planilha interna: {resultado['linhas']} linhas ({resultado['itens']} itens)",
+        f"{'Motor':<10} {'Tempo ms':>10} {'Pico RSS KB':>12} {'RSS dados KB':>13} {'Arquivo KB':>11}",
+        "-" * 60
+    ]
+    for m in resultado["motores"]:
+        linhas.append(
+            f"{m['motor']:<10} {m['mediana_s'] * 1000:>10.2f} {m['pico_rss_kb']:>12.1f} "
+            f"{m['rss_dados_kb']:>13.1f} {m['arquivo_kb']:>11.1f}"
+        )
+    return "\n".join(linhas)
+
+
+def _formatar_registro(registro: Dict[str, Any]) -> str:
+    """Linha de progresso de um registro"""
+    rotulo = f"{registro['etapa']:<18} {registro['tamanho']:>6} itens"
+    if "pulado" in registro:
+        return f"{rotulo}  pulado ({registro['pulado']})"
+    if "erro" in registro:
+        return f"{rotulo}  ERRO {registro['erro']}"
+    return (
+        f"{rotulo}  {registro['mediana_s'] * 1000:>10.2f} ms  "
+        f"{registro['pico_memoria_kb']:>10.1f} KB"
+    )
+
+
+def comparar_resultados(
+    anterior: Dict[str, Any],
+    atual: Dict[str, Any],
+    limite: float = LIMITE_REGRESSAO
+) -> List[Dict[str, Any]]:
+    """
+    Compara dois resultados de benchmark por (etapa, tamanho)
+
+    Args:
+        anterior: Resultado de referencia
+        atual: Resultado novo
+        limite: Variacao percentual acima da qual ha regressao
+
+    Returns:
+        Lista de {etapa, tamanho, anterior_s, atual_s, variacao_pct,
+        memoria_variacao_pct, regressao}
+    """
+    def indexar(resultado):
+        return {
+            (r["etapa"], r["tamanho"]): r
+            for r in resultado.get("resultados", [])
+            if "mediana_s" in r
+        }
+
+    antes = indexar(anterior)
+    depois = indexar(atual)
+
+    comparacao = []
+    for chave, registro in depois.items():
+        if chave not in antes:
+            continue
+        referencia = antes[chave]
+        variacao = _variacao(referencia["mediana_s"], registro["mediana_s"])
+        comparacao.append({
+            "etapa": chave[0],
+            "tamanho": chave[1],
+            "anterior_s": referencia["mediana_s"],
+            "atual_s": registro["mediana_s"],
+            "variacao_pct": variacao,
+            "memoria_variacao_pct": _variacao(
+                referencia.get("pico_memoria_kb", 0), registro.get("pico_memoria_kb", 0)
+            ),
+            "regressao": variacao is not None and variacao > limite
+        })
+
+    ordem = {etapa: pos for pos, etapa in enumerate(ETAPAS)}
+    comparacao.sort(key=lambda c: (ordem.get(c["etapa"], len(ordem)), c["tamanho"]))
+    return comparacao
+
+
+def _variacao(anterior: float, atual: float) -> Optional[float]:
+    if not anterior:
+        return None
+    return round((atual - anterior) / anterior * 100, 1)
+
+
+def formatar_comparacao(comparacao: List[Dict[str, Any]]) -> str:
+    """Formata a comparacao para exibicao"""
+    linhas = [
+        f"{'Etapa':<18} {'Itens':>6} {'Antes ms':>10} {'Depois ms':>10} {'Tempo':>8} {'Memoria':>8}",
+        "-" * 65
+    ]
+    for c in comparacao:
+        tempo = f"{c['variacao_pct']:+.1f}%" if c["variacao_pct"] is not None else "N/A"
+        memoria = f"{c['memoria_variacao_pct']:+.1f}%" if c["memoria_variacao_pct"] is not None else "N/A"
+        marca = "  << REGRESSAO" if c["regressao"] else ""
+        linhas.append(
+            f"{c['etapa']:<18} {c['tamanho']:>6} {c['anterior_s'] * 1000:>10.2f} "
+            f"{c['atual_s'] * 1000:>10.2f} {tempo:>8} {memoria:>8}{marca}"
+        )
+    return "\n".join(linhas)
+
+
+def main():
+    """CLI principal"""
+    parser = argparse.ArgumentParser(
+        description="Benchmark do compositor, precificador e geradores HVAC"
+    )
+    subparsers = parser.add_subparsers(dest="comando", help="Comando a executar")
+
+    parser_executar = subparsers.add_parser("executar", help="Executa o benchmark")
+    parser_executar.add_argument(
+        "--tamanhos", "-n",
+        type=int,
+        nargs="+",
+        default=list(TAMANHOS_PADRAO),
+        help="Tamanhos dos escopos em itens (padrao: 10 100 1000 10000)"
+    )
+    parser_executar.add_argument(
+        "--etapas", "-e",
+        nargs="+",
+        choices=ETAPAS,
+        default=list(ETAPAS),
+        help="Etapas a medir"
+    )
+    parser_executar.add_argument(
+        "--repeticoes", "-r",
+        type=int,
+        default=3,
+        help="Execucoes cronometradas por etapa (padrao: 3)"
+    )
+    parser_executar.add_argument(
+        "--max-itens-saida",
+        type=int,
+        default=MAX_ITENS_SAIDA,
+        help=f"Limite de itens para PDF/planilha (padrao: {MAX_ITENS_SAIDA})"
+    )
+    parser_executar.add_argument(
+        "--output", "-o",
+        help="Arquivo JSON de saida (padrao: benchmarks/<data>_<commit>.json)"
+    )
+
+    parser_comparar = subparsers.add_parser("comparar", help="Compara dois resultados")
+    parser_comparar.add_argument("anterior", help="Resultado de referencia (JSON)")
+    parser_comparar.add_argument("atual", help="Resultado novo (JSON)")
+    parser_comparar.add_argument(
+        "--limite",
+        type=float,
+        default=LIMITE_REGRESSAO,
+        help=f"Variacao %% de tempo considerada regressao (padrao: {LIMITE_REGRESSAO})"
+    )
+
+    parser_planilha = subparsers.add_parser(
+        "planilha",
+        help="Compara os motores da planilha interna (memoria x write_only)"
+    )
+    parser_planilha.add_argument(
+        "--linhas", "-l",
+        type=int,
+        default=LINHAS_PLANILHA,
+        help=f"Linhas da aba de resumo (padrao: {LINHAS_PLANILHA})"
+    )
+    parser_planilha.add_argument(
+        "--repeticoes", "-r",
+        type=int,
+        default=3,
+        help="Execucoes por motor (padrao: 3)"
+    )
+    parser_planilha.add_argument("--output", "-o", help="Arquivo JSON de saida")
+
+    args = parser.parse_args()
+
+    if not args.comando:
+        parser.print_help()
+        sys.exit(1)
+
+    if args.comando == "executar":
+        resultado = executar_benchmark(
+            tamanhos=args.tamanhos,
+            etapas=args.etapas,
+            repeticoes=args.repeticoes,
+            max_itens_saida=args.max_itens_saida
+        )
+
+        if args.output:
+            output_path = Path(args.output)
+        else:
+            carimbo = datetime.now().strftime("%Y%m%d_%H%M%S")
+            output_path = DIR_RESULTADOS / f"{carimbo}_{resultado['commit'] or 'sem_commit'}.json"
+        output_path.parent.mkdir(parents=True, exist_ok=True)
+
+        with open(output_path, "w", encoding="utf-8") as f:
+            json.dump(resultado, f, ensure_ascii=False, indent=2)
+        print(f"\nResultado salvo em: {output_path}")
+        return
+
+    if args.comando == "planilha":
+        resultado = comparar_motores_planilha(linhas=args.linhas, repeticoes=args.repeticoes)
+        print(f"\n{formatar_comparacao_motores(resultado)}")
+
+        if args.output:
+            output_path = Path(args.output)
+            output_path.parent.mkdir(parents=True, exist_ok=True)
+            with open(output_path, "w", encoding="utf-8") as f:
+                json.dump(resultado, f, ensure_ascii=False, indent=2)
+            print(f"\nResultado salvo em: {output_path}")
+        return
+
+    with open(args.anterior, "r", encoding="utf-8") as f:
+        anterior = json.load(f)
+    with open(args.atual, "r", encoding="utf-8") as f:
+        atual = json.load(f)
+
+    comparacao = comparar_resultados(anterior, atual, args.limite)
+    print(f"Comparando {anterior.get('commit')} -> {atual.get('commit')}\n")
+    print(formatar_comparacao(comparacao))
+
+    if any(c["regressao"] for c in comparacao):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
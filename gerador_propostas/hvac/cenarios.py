@@ -0,0 +1,384 @@
+#!/usr/bin/env python3
+"""
+Cenarios de sensibilidade do orcamento (BDI e choques de preco)
+
+A composicao e expandida uma unica vez. As linhas sao reduzidas a um vetor
+de quantidades por insumo usado (o custo de cada categoria e linear nas
+quantidades), e N cenarios viram uma matriz insumos x cenarios de
+multiplicadores de preco: custos por categoria saem de um unico produto
+matricial e o BDI de cada cenario e aplicado coluna a coluna. Mil cenarios
+custam poucos milissegundos, sem regravar bdi.json nem rodar o
+precificador de novo.
+
+Cada cenario pode:
+- substituir percentuais de BDI ("bdi": {"MO": 1.10}) ou apontar para
+  outro arquivo no formato de bases/bdi.json ("bdi": "bdi_agressivo.json");
+- aplicar choques de preco ("choques": {"MAT/Tubulacao": 0.15, "MO": 0.08}).
+  O seletor e um tipo (MO), tipo:codigo com curingas (MAT:TUB_*) ou
+  tipo/categoria do catalogo (MAT/Tubulacao). Choques que atingem o mesmo
+  insumo se acumulam por multiplicacao.
+
+O cenario "base" (catalogo e BDI atuais) reproduz o resumo_financeiro do
+precificador; como a soma e feita por insumo e nao por linha, valores
+podem diferir no ultimo centavo.
+
+Uso:
+    python -m hvac.cenarios -i composicao.json -c cenarios.json
+    python -m hvac.cenarios -i composicao.json --grade "MO=0,0.08" "MAT/Tubulacao=0,0.15,0.3" --bdi-grade "MAT=0.5,0.6"
+"""
+
+import argparse
+import itertools
+import json
+import sys
+from dataclasses import dataclass, field
+from fnmatch import fnmatchcase
+from pathlib import Path
+from typing import Dict, Any, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .precificador import CATEGORIAS, montar_resumo_financeiro
+from .utils.catalogo import IndiceCatalogo, TIPOS, CODIGO_TIPO
+
+
+# Nome do cenario de referencia (catalogo e BDI atuais)
+NOME_BASE = "base"
+
+# Colunas da tabela comparativa
+COLUNAS_COMPARACAO = ("custo_direto", "total_bdi", "valor_total")
+
+
+@dataclass
+class Cenario:
+    """Conjunto de alteracoes de BDI e precos avaliado contra a base"""
+
+    nome: str
+    # Percentual de BDI por tipo (substitui o de bdi.json)
+    bdi: Dict[str, float] = field(default_factory=dict)
+    # Seletor de insumos -> variacao do preco (0.15 = +15%)
+    choques: Dict[str, float] = field(default_factory=dict)
+
+
+def carregar_bdi_arquivo(caminho: Path) -> Dict[str, float]:
+    """Percentuais de BDI de um arquivo no formato de bases/bdi.json"""
+    with open(caminho, "r", encoding="utf-8") as f:
+        dados = json.load(f)
+    return {tipo: valores.get("percentual", 0.0) for tipo, valores in dados.get("bdi", {}).items()}
+
+
+def carregar_cenarios(caminho: Path) -> List[Cenario]:
+    """
+    Le cenarios de um JSON ({"cenarios": [{"nome", "bdi", "choques"}]})
+
+    Um "bdi" em texto e o caminho de um arquivo no formato de bdi.json,
+    relativo ao arquivo de cenarios.
+    """
+    caminho = Path(caminho)
+    with open(caminho, "r", encoding="utf-8") as f:
+        dados = json.load(f)
+
+    cenarios = []
+    for idx, registro in enumerate(dados.get("cenarios", []), 1):
+        bdi = registro.get("bdi", {})
+        if isinstance(bdi, str):
+            bdi = carregar_bdi_arquivo(caminho.parent / bdi)
+        cenarios.append(Cenario(
+            nome=registro.get("nome", f"Cenario {idx}"),
+            bdi=bdi,
+            choques=registro.get("choques", {})
+        ))
+    return cenarios
+
+
+def combinar_cenarios(
+    choques: Optional[Dict[str, Sequence[float]]] = None,
+    bdi: Optional[Dict[str, Sequence[float]]] = None
+) -> List[Cenario]:
+    """
+    Grade de cenarios: produto cartesiano das variacoes informadas
+
+    Args:
+        choques: Seletor -> variacoes de preco (ex: {"MO": [0, 0.08]})
+        bdi: Tipo -> percentuais de BDI (ex: {"MAT": [0.5, 0.6]})
+
+    Returns:
+        Um cenario por combinacao, com nome descritivo
+    """
+    choques = choques or {}
+    bdi = bdi or {}
+    eixos = [("choque", chave, valores) for chave, valores in choques.items()]
+    eixos += [("bdi", chave, valores) for chave, valores in bdi.items()]
+
+    cenarios = []
+    for combinacao in itertools.product(*(valores for _, _, valores in eixos)):
+        cenario = Cenario(nome="")
+        partes = []
+        for (eixo, chave, _), valor in zip(eixos, combinacao):
+            if eixo == "choque":
+                cenario.choques[chave] = valor
+                partes.append(f"{chave} {valor * 100:+.0f}%")
+            else:
+                cenario.bdi[chave] = valor
+                partes.append(f"BDI {chave} {valor * 100:.0f}%")
+        cenario.nome = ", ".join(partes) or NOME_BASE
+        cenarios.append(cenario)
+    return cenarios
+
+
+class MotorCenarios:
+    """Avalia cenarios sobre uma composicao ja expandida"""
+
+    def __init__(self, composicao: Dict[str, Any], indice: IndiceCatalogo):
+        """
+        Args:
+            composicao: Composicao (saida do compositor)
+            indice: Indice do catalogo (precos, BDI e categorias base)
+        """
+        self.indice = indice
+        self.itens = composicao.get("itens_orcamento", [])
+
+        # Insumos usados pela composicao (coluna -> id do catalogo)
+        colunas: Dict[int, int] = {}
+        linhas_item: List[int] = []
+        linhas_coluna: List[int] = []
+        linhas_qtd: List[float] = []
+
+        obter_id = indice.ids.get
+        for pos_item, item in enumerate(self.itens):
+            for tipo, categoria in zip(TIPOS, CATEGORIAS):
+                for linha in item.get(categoria, []):
+                    item_id = obter_id((tipo, linha["codigo"]), -1)
+                    # Insumo fora do catalogo custa 0 em qualquer cenario
+                    if item_id < 0:
+                        continue
+                    linhas_item.append(pos_item)
+                    linhas_coluna.append(colunas.setdefault(item_id, len(colunas)))
+                    linhas_qtd.append(linha["quantidade"])
+
+        self.ids = np.fromiter(colunas, dtype=np.intp, count=len(colunas))
+        self.tipos = np.asarray([indice.tipos[i] for i in self.ids], dtype=np.intp)
+        self.precos = np.asarray([indice.precos[i] for i in self.ids], dtype=np.float64)
+
+        # Linhas achatadas (item, coluna do insumo, quantidade)
+        self.linhas_item = np.asarray(linhas_item, dtype=np.intp)
+        self.linhas_coluna = np.asarray(linhas_coluna, dtype=np.intp)
+        self.linhas_qtd = np.asarray(linhas_qtd, dtype=np.float64)
+
+        # Quantidade total por insumo (linhas do mesmo insumo se somam)
+        self.quantidades = np.bincount(self.linhas_coluna, weights=self.linhas_qtd, minlength=len(colunas))
+
+        # Indicadora tipo x insumo para somar custos por categoria
+        self.por_tipo = np.zeros((len(TIPOS), len(colunas)), dtype=np.float64)
+        self.por_tipo[self.tipos, np.arange(len(colunas))] = 1.0
+
+        self._mascaras: Dict[str, np.ndarray] = {}
+
+    @classmethod
+    def de_escopo(cls, escopo: Dict[str, Any], indice: IndiceCatalogo) -> "MotorCenarios":
+        """Expande o escopo uma vez e prepara o motor"""
+        from .compositor import processar as processar_compositor
+        return cls(processar_compositor(escopo, indice=indice), indice)
+
+    def selecionar(self, seletor: str) -> np.ndarray:
+        """
+        Mascara dos insumos usados que casam com o seletor
+
+        Args:
+            seletor: "TIPO", "TIPO:padrao_codigo" ou "TIPO/categoria"
+
+        Returns:
+            Vetor booleano por insumo usado
+        """
+        mascara = self._mascaras.get(seletor)
+        if mascara is not None:
+            return mascara
+
+        tipo, separador, filtro = seletor, "", ""
+        for candidato in (":", "/"):
+            if candidato in seletor:
+                tipo, filtro = seletor.split(candidato, 1)
+                separador = candidato
+                break
+
+        codigo_tipo = CODIGO_TIPO.get(tipo.strip().upper())
+        if codigo_tipo is None:
+            raise ValueError(f"Seletor invalido: {seletor} (tipo deve ser {', '.join(TIPOS)})")
+
+        mascara = self.tipos == codigo_tipo
+        if separador == ":":
+            codigos = self.indice.codigos
+            mascara &= np.asarray([fnmatchcase(codigos[i], filtro.strip()) for i in self.ids], dtype=bool)
+        elif separador == "/":
+            categorias = self.indice.categorias
+            alvo = filtro.strip().lower()
+            mascara &= np.asarray([categorias[i].lower() == alvo for i in self.ids], dtype=bool)
+
+        self._mascaras[seletor] = mascara
+        return mascara
+
+    def matrizes(self, cenarios: Sequence[Cenario]) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Multiplicadores de preco e percentuais de BDI dos cenarios
+
+        Returns:
+            Tupla (multiplicadores insumos x cenarios, bdi tipos x cenarios)
+        """
+        multiplicadores = np.ones((len(self.ids), len(cenarios)), dtype=np.float64)
+        bdi = np.repeat(np.asarray(self.indice.bdi, dtype=np.float64)[:, None], len(cenarios), axis=1)
+
+        for coluna, cenario in enumerate(cenarios):
+            for seletor, variacao in cenario.choques.items():
+                multiplicadores[self.selecionar(seletor), coluna] *= 1.0 + variacao
+            for tipo, percentual in cenario.bdi.items():
+                codigo_tipo = CODIGO_TIPO.get(tipo)
+                if codigo_tipo is None:
+                    raise ValueError(f"Tipo de BDI invalido no cenario {cenario.nome}: {tipo}")
+                bdi[codigo_tipo, coluna] = percentual
+
+        return multiplicadores, bdi
+
+    def totais(self, multiplicadores: np.ndarray) -> np.ndarray:
+        """Custo direto por tipo x cenario"""
+        return self.por_tipo @ ((self.quantidades * self.precos)[:, None] * multiplicadores)
+
+    def avaliar(self, cenarios: Sequence[Cenario]) -> Dict[str, Any]:
+        """
+        Avalia a base e os cenarios
+
+        Args:
+            cenarios: Cenarios a avaliar
+
+        Returns:
+            {"cenarios": [{"nome", "resumo_financeiro"}], "comparacao": [...]}
+            com a base na primeira posicao
+        """
+        todos = [Cenario(NOME_BASE)] + list(cenarios)
+        multiplicadores, bdi = self.matrizes(todos)
+        totais = self.totais(multiplicadores).T.tolist()
+        percentuais = bdi.T.tolist()
+
+        resultados = [
+            {
+                "nome": cenario.nome,
+                "resumo_financeiro": montar_resumo_financeiro(tuple(total), None, tuple(percentual))
+            }
+            for cenario, total, percentual in zip(todos, totais, percentuais)
+        ]
+        return {"cenarios": resultados, "comparacao": comparar_cenarios(resultados)}
+
+
+def comparar_cenarios(resultados: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Tabela comparativa contra o primeiro cenario (base)
+
+    Returns:
+        Uma linha por cenario com custo_direto, total_bdi, valor_total e a
+        variacao do valor_total (absoluta e percentual)
+    """
+    if not resultados:
+        return []
+    valor_base = resultados[0]["resumo_financeiro"]["valor_total"]
+
+    tabela = []
+    for resultado in resultados:
+        resumo = resultado["resumo_financeiro"]
+        linha = {"nome": resultado["nome"]}
+        linha.update((coluna, resumo[coluna]) for coluna in COLUNAS_COMPARACAO)
+        linha["variacao"] = round(resumo["valor_total"] - valor_base, 2)
+        linha["variacao_percentual"] = (
+            round((resumo["valor_total"] / valor_base - 1) * 100, 2) if valor_base else 0.0
+        )
+        tabela.append(linha)
+    return tabela
+
+
+def avaliar_cenarios(
+    composicao: Dict[str, Any],
+    cenarios: Sequence[Cenario],
+    indice: Optional[IndiceCatalogo] = None
+) -> Dict[str, Any]:
+    """
+    Avalia cenarios sobre uma composicao (ver MotorCenarios.avaliar)
+
+    Args:
+        composicao: Composicao (saida do compositor)
+        cenarios: Cenarios a avaliar
+        indice: Indice do catalogo (carregado se nao informado)
+    """
+    if indice is None:
+        indice = IndiceCatalogo.carregar()
+    return MotorCenarios(composicao, indice).avaliar(cenarios)
+
+
+def formatar_comparacao(tabela: List[Dict[str, Any]], limite: Optional[int] = None) -> str:
+    """Tabela comparativa para o terminal"""
+    largura = max([len("Cenario")] + [len(linha["nome"]) for linha in tabela])
+    linhas = [
+        f"{'Cenario':<{largura}}  {'Custo direto':>15}  {'BDI':>15}  {'Valor total':>15}  {'Variacao':>9}",
+        "-" * (largura + 63)
+    ]
+    for linha in tabela[:limite]:
+        linhas.append(
+            f"{linha['nome']:<{largura}}  {linha['custo_direto']:>15,.2f}  {linha['total_bdi']:>15,.2f}  "
+            f"{linha['valor_total']:>15,.2f}  {linha['variacao_percentual']:>+8.2f}%"
+        )
+    if limite is not None and len(tabela) > limite:
+        linhas.append(f"... {len(tabela) - limite} cenario(s) omitido(s)")
+    return "\n".join(linhas)
+
+
+def _ler_grade(especificacoes: List[str]) -> Dict[str, List[float]]:
+    """Converte ["MO=0,0.08", ...] em {"MO": [0.0, 0.08]}"""
+    grade: Dict[str, List[float]] = {}
+    for especificacao in especificacoes:
+        chave, _, valores = especificacao.partition("=")
+        if not valores:
+            raise ValueError(f"Grade invalida: {especificacao} (use CHAVE=v1,v2,...)")
+        grade[chave.strip()] = [float(valor) for valor in valores.split(",")]
+    return grade
+
+
+def main():
+    """CLI principal"""
+    parser = argparse.ArgumentParser(description="Cenarios de sensibilidade do orcamento HVAC")
+    parser.add_argument("--input", "-i", required=True, help="Arquivo JSON de entrada (composicao)")
+    parser.add_argument("--cenarios", "-c", help="Arquivo JSON com a lista de cenarios")
+    parser.add_argument("--grade", nargs="*", default=[], help="Choques em grade: SELETOR=v1,v2,...")
+    parser.add_argument("--bdi-grade", nargs="*", default=[], help="BDI em grade: TIPO=p1,p2,...")
+    parser.add_argument("--output", "-o", help="Arquivo JSON de saida (resumos e comparacao)")
+    parser.add_argument("--bases-dir", help="Diretorio das bases de dados (opcional)")
+    parser.add_argument("--limite", type=int, default=50, help="Cenarios exibidos na tabela")
+
+    args = parser.parse_args()
+
+    input_path = Path(args.input)
+    if not input_path.exists():
+        print(f"Erro: Arquivo de entrada nao encontrado: {input_path}", file=sys.stderr)
+        sys.exit(1)
+
+    with open(input_path, "r", encoding="utf-8") as f:
+        composicao = json.load(f)
+
+    try:
+        cenarios: List[Cenario] = carregar_cenarios(Path(args.cenarios)) if args.cenarios else []
+        if args.grade or args.bdi_grade:
+            cenarios += combinar_cenarios(_ler_grade(args.grade), _ler_grade(args.bdi_grade))
+        indice = IndiceCatalogo.carregar(Path(args.bases_dir) if args.bases_dir else None)
+        resultado = avaliar_cenarios(composicao, cenarios, indice)
+    except ValueError as erro:
+        print(f"Erro: {erro}", file=sys.stderr)
+        sys.exit(1)
+
+    if args.output:
+        output_path = Path(args.output)
+        output_path.parent.mkdir(parents=True, exist_ok=True)
+        with open(output_path, "w", encoding="utf-8") as f:
+            json.dump(resultado, f, ensure_ascii=False, indent=2)
+        print(f"Cenarios gravados: {output_path}")
+
+    print(formatar_comparacao(resultado["comparacao"], args.limite))
+
+
+if __name__ == "__main__":
+    main()
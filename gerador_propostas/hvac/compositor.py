@@ -11,10 +11,22 @@ import json
 import sys
 from datetime import date
 from pathlib import Path
-from typing import Dict, Any, List, Optional
-from collections import defaultdict
+from typing import Dict, Any, List, Optional, Tuple
 
-from .utils.loader import carregar_bases, obter_composicao, obter_item
+from .utils.catalogo import IndiceCatalogo, compilar_descricao, formatar_descricao
+from .utils.perfil import contar, span
+
+
+# Categoria de saida por codigo de tipo (mesma ordem de catalogo.TIPOS)
+CATEGORIAS = ("materiais", "mao_de_obra", "ferramentas", "equipamentos")
+
+# Chave do resumo consolidado de cada categoria na composicao
+CHAVES_RESUMO = {
+    "materiais": "resumo_materiais",
+    "mao_de_obra": "resumo_mao_obra",
+    "ferramentas": "resumo_ferramentas",
+    "equipamentos": "resumo_equipamentos"
+}
 
 
 def gerar_descricao(composicao: Dict, variavel: float) -> str:
@@ -28,27 +40,8 @@ def gerar_descricao(composicao: Dict, variavel: float) -> str:
     Returns:
         Descricao formatada
     """
-    desc_var = composicao.get("descricao_variavel")
-
-    if not desc_var:
-        return composicao.get("descricao", "")
-
-    prefixo = desc_var.get("prefixo", "")
-    sufixo = desc_var.get("sufixo", "")
-
-    # Escolhe singular ou plural
-    if variavel == 1:
-        unidade = desc_var.get("unidade_singular", "")
-    else:
-        unidade = desc_var.get("unidade_plural", "")
-
-    # Formata numero (inteiro se possivel)
-    if variavel == int(variavel):
-        var_str = str(int(variavel))
-    else:
-        var_str = f"{variavel:.1f}"
-
-    return f"{prefixo}{var_str} {unidade}{sufixo}".strip()
+    fixa, partes = compilar_descricao(composicao)
+    return formatar_descricao(fixa, partes, variavel)
 
 
 def calcular_quantidade(item: Dict, variavel: float) -> float:
@@ -73,7 +66,8 @@ def expandir_composicao(
     codigo_comp: str,
     variavel: float,
     quantidade: int,
-    bases: Dict
+    bases: Optional[Dict] = None,
+    indice: Optional[IndiceCatalogo] = None
 ) -> Optional[Dict[str, Any]]:
     """
     Expande uma composicao em seus itens com quantidades calculadas
@@ -83,17 +77,22 @@ def expandir_composicao(
         variavel: Valor da variavel (ex: metros de linha)
         quantidade: Quantidade de vezes que a composicao sera executada
         bases: Bases de dados carregadas
+        indice: Indice do catalogo (obtido de bases via IndiceCatalogo.de_bases
+            se nao informado)
 
     Returns:
         Dicionario com a composicao expandida ou None se nao encontrada
     """
-    composicao = obter_composicao(bases, codigo_comp)
+    if indice is None:
+        indice = IndiceCatalogo.de_bases(bases, relatar=True)
+
+    composicao = indice.obter_composicao(codigo_comp)
     if not composicao:
         return None
 
     resultado = {
         "codigo": codigo_comp,
-        "descricao": gerar_descricao(composicao, variavel),
+        "descricao": composicao.descricao(variavel),
         "quantidade": quantidade,
         "variavel": variavel,
         "materiais": [],
@@ -102,41 +101,93 @@ def expandir_composicao(
         "equipamentos": []
     }
 
-    for item in composicao.get("itens", []):
-        tipo = item.get("tipo")
-        codigo = item.get("codigo")
-        qtd_unitaria = calcular_quantidade(item, variavel)
-        qtd_total = qtd_unitaria * quantidade
-
+    # Mesma formula de calcular_quantidade, sobre os vetores do nucleo
+    nucleo = composicao.nucleo
+    for codigo_tipo, codigo, descricao, unidade, qtd_total in zip(
+        nucleo.categorias,
+        nucleo.codigos,
+        nucleo.descricoes,
+        nucleo.unidades,
+        nucleo.quantidades(variavel, quantidade)
+    ):
         if qtd_total <= 0:
             continue
 
-        # Busca dados do item na base correspondente
-        dados_item = obter_item(bases, tipo, codigo)
-        if not dados_item:
-            print(f"Aviso: Item {codigo} ({tipo}) nao encontrado na base", file=sys.stderr)
-            dados_item = {"descricao": f"[NAO ENCONTRADO] {codigo}"}
-
-        item_expandido = {
+        resultado[CATEGORIAS[codigo_tipo]].append({
             "codigo": codigo,
-            "descricao": dados_item.get("descricao", ""),
+            "descricao": descricao,
             "quantidade": round(qtd_total, 2),
-            "unidade": dados_item.get("unidade", "UN")
-        }
-
-        # Adiciona na categoria correta
-        if tipo == "MAT":
-            resultado["materiais"].append(item_expandido)
-        elif tipo == "MO":
-            resultado["mao_de_obra"].append(item_expandido)
-        elif tipo == "FER":
-            resultado["ferramentas"].append(item_expandido)
-        elif tipo == "EQP":
-            resultado["equipamentos"].append(item_expandido)
+            "unidade": unidade
+        })
 
     return resultado
 
 
+class AcumuladorCategoria:
+    """
+    Consolida os itens de uma categoria conforme sao expandidos
+
+    Cada codigo recebe um slot na primeira ocorrencia; as quantidades sao
+    somadas em um vetor indexado pelo slot. Descricao e unidade vem do
+    catalogo e sao gravadas so uma vez por codigo.
+    """
+
+    __slots__ = ("slots", "codigos", "descricoes", "unidades", "quantidades")
+
+    def __init__(self):
+        self.slots: Dict[str, int] = {}
+        self.codigos: List[str] = []
+        self.descricoes: List[str] = []
+        self.unidades: List[str] = []
+        self.quantidades: List[float] = []
+
+    def adicionar(self, itens: List[Dict]):
+        """Soma os itens (codigo, descricao, quantidade, unidade) aos slots"""
+        slots = self.slots
+        quantidades = self.quantidades
+        for item in itens:
+            codigo = item["codigo"]
+            slot = slots.get(codigo)
+            if slot is None:
+                slot = slots[codigo] = len(self.codigos)
+                self.codigos.append(codigo)
+                self.descricoes.append(item["descricao"])
+                self.unidades.append(item["unidade"])
+                quantidades.append(0)
+            quantidades[slot] += item["quantidade"]
+
+    def resumo(self) -> List[Dict]:
+        """Itens consolidados, ordenados por codigo"""
+        return [
+            {
+                "codigo": self.codigos[slot],
+                "descricao": self.descricoes[slot],
+                "quantidade": round(self.quantidades[slot], 2),
+                "unidade": self.unidades[slot]
+            }
+            for slot in sorted(range(len(self.codigos)), key=self.codigos.__getitem__)
+        ]
+
+
+class ConsolidadorResumos:
+    """Acumuladores das quatro categorias de uma composicao"""
+
+    def __init__(self):
+        self.categorias = {categoria: AcumuladorCategoria() for categoria in CATEGORIAS}
+
+    def adicionar_item(self, item_orcamento: Dict[str, Any]):
+        """Acumula os insumos de um item de orcamento expandido"""
+        for categoria, acumulador in self.categorias.items():
+            acumulador.adicionar(item_orcamento[categoria])
+
+    def resumos(self) -> Dict[str, List[Dict]]:
+        """Resumos consolidados (resumo_materiais, resumo_mao_obra, ...)"""
+        return {
+            CHAVES_RESUMO[categoria]: acumulador.resumo()
+            for categoria, acumulador in self.categorias.items()
+        }
+
+
 def consolidar_itens(lista_itens: List[Dict]) -> List[Dict]:
     """
     Consolida itens repetidos somando quantidades
@@ -147,101 +198,129 @@ def consolidar_itens(lista_itens: List[Dict]) -> List[Dict]:
     Returns:
         Lista consolidada com quantidades somadas
     """
-    consolidado = defaultdict(lambda: {"quantidade": 0, "descricao": "", "unidade": ""})
+    acumulador = AcumuladorCategoria()
+    acumulador.adicionar(lista_itens)
+    return acumulador.resumo()
 
-    for item in lista_itens:
-        codigo = item["codigo"]
-        consolidado[codigo]["quantidade"] += item["quantidade"]
-        consolidado[codigo]["descricao"] = item["descricao"]
-        consolidado[codigo]["unidade"] = item["unidade"]
 
-    return [
-        {
-            "codigo": codigo,
-            "descricao": dados["descricao"],
-            "quantidade": round(dados["quantidade"], 2),
-            "unidade": dados["unidade"]
-        }
-        for codigo, dados in sorted(consolidado.items())
-    ]
+def expandir_item_escopo(
+    idx: int,
+    item: Dict[str, Any],
+    indice: IndiceCatalogo
+) -> Tuple[Optional[Dict[str, Any]], Optional[str]]:
+    """
+    Expande um item do escopo no item de orcamento correspondente
 
+    Args:
+        idx: Posicao do item no escopo (1-based, vira o id)
+        item: Item do escopo
+        indice: Indice do catalogo
 
-def processar(escopo: Dict[str, Any], bases: Optional[Dict] = None) -> Dict[str, Any]:
+    Returns:
+        Tupla (item_orcamento, observacao); um dos dois e None
     """
-    Processa um escopo e gera a composicao completa
+    codigo_comp = item.get("composicao")
+    variavel = item.get("variavel", 0)
+    quantidade = item.get("quantidade", 1)
+
+    if not codigo_comp:
+        return None, f"Item {idx}: sem composicao definida"
+
+    comp_expandida = expandir_composicao(codigo_comp, variavel, quantidade, indice=indice)
+
+    if not comp_expandida:
+        return None, f"Item {idx}: composicao {codigo_comp} nao encontrada"
+
+    return {
+        "id": idx,
+        "descricao": item.get("descricao", comp_expandida["descricao"]),
+        "composicao": codigo_comp,
+        "quantidade": quantidade,
+        "variavel": variavel,
+        "materiais": comp_expandida["materiais"],
+        "mao_de_obra": comp_expandida["mao_de_obra"],
+        "ferramentas": comp_expandida["ferramentas"],
+        "equipamentos": comp_expandida["equipamentos"]
+    }, None
+
+
+def montar_composicao(
+    escopo: Dict[str, Any],
+    itens_orcamento: List[Dict[str, Any]],
+    observacoes: List[str],
+    consolidador: Optional[ConsolidadorResumos] = None
+) -> Dict[str, Any]:
+    """
+    Monta a composicao a partir dos itens ja expandidos, consolidando resumos
 
     Args:
-        escopo: Dicionario com o escopo do orcamento
-        bases: Bases de dados (carrega automaticamente se nao informado)
+        escopo: Escopo do orcamento (dados do projeto)
+        itens_orcamento: Itens expandidos, na ordem do escopo
+        observacoes: Observacoes geradas na expansao
+        consolidador: Resumos ja acumulados durante a expansao (se None,
+            os itens sao acumulados aqui)
 
     Returns:
-        Dicionario com a composicao gerada
+        Dicionario com a composicao
     """
-    if bases is None:
-        bases = carregar_bases()
-
     projeto = escopo.get("projeto", {})
 
-    resultado = {
+    with span("consolidar"):
+        if consolidador is None:
+            consolidador = ConsolidadorResumos()
+            for item in itens_orcamento:
+                consolidador.adicionar_item(item)
+        resumos = consolidador.resumos()
+
+    return {
         "projeto": projeto.get("nome", "Sem nome"),
         "cliente": projeto.get("cliente"),
         "data_composicao": date.today().isoformat(),
-        "itens_orcamento": [],
-        "resumo_materiais": [],
-        "resumo_mao_obra": [],
-        "resumo_ferramentas": [],
-        "resumo_equipamentos": [],
-        "observacoes": []
+        "itens_orcamento": itens_orcamento,
+        **resumos,
+        "observacoes": observacoes
     }
 
-    # Acumuladores para consolidacao
-    todos_materiais = []
-    toda_mao_obra = []
-    todas_ferramentas = []
-    todos_equipamentos = []
-
-    # Processa cada item do escopo
-    for idx, item in enumerate(escopo.get("itens", []), start=1):
-        codigo_comp = item.get("composicao")
-        variavel = item.get("variavel", 0)
-        quantidade = item.get("quantidade", 1)
 
-        if not codigo_comp:
-            resultado["observacoes"].append(f"Item {idx}: sem composicao definida")
-            continue
+def processar(
+    escopo: Dict[str, Any],
+    bases: Optional[Dict] = None,
+    indice: Optional[IndiceCatalogo] = None
+) -> Dict[str, Any]:
+    """
+    Processa um escopo e gera a composicao completa
 
-        comp_expandida = expandir_composicao(codigo_comp, variavel, quantidade, bases)
+    Args:
+        escopo: Dicionario com o escopo do orcamento
+        bases: Bases de dados (carrega automaticamente se nao informado)
+        indice: Indice do catalogo (construido a partir de bases se nao informado)
 
-        if not comp_expandida:
-            resultado["observacoes"].append(f"Item {idx}: composicao {codigo_comp} nao encontrada")
-            continue
+    Returns:
+        Dicionario com a composicao gerada
+    """
+    if indice is None:
+        if bases is None:
+            indice = IndiceCatalogo.carregar()
+        else:
+            indice = IndiceCatalogo.de_bases(bases, relatar=True)
 
-        # Adiciona item expandido
-        resultado["itens_orcamento"].append({
-            "id": idx,
-            "descricao": item.get("descricao", comp_expandida["descricao"]),
-            "composicao": codigo_comp,
-            "quantidade": quantidade,
-            "variavel": variavel,
-            "materiais": comp_expandida["materiais"],
-            "mao_de_obra": comp_expandida["mao_de_obra"],
-            "ferramentas": comp_expandida["ferramentas"],
-            "equipamentos": comp_expandida["equipamentos"]
-        })
+    itens_orcamento = []
+    observacoes = []
+    consolidador = ConsolidadorResumos()
 
-        # Acumula para consolidacao
-        todos_materiais.extend(comp_expandida["materiais"])
-        toda_mao_obra.extend(comp_expandida["mao_de_obra"])
-        todas_ferramentas.extend(comp_expandida["ferramentas"])
-        todos_equipamentos.extend(comp_expandida["equipamentos"])
+    # Processa cada item do escopo, acumulando os resumos na mesma passada
+    for idx, item in enumerate(escopo.get("itens", []), start=1):
+        with span("expandir_item"):
+            item_orcamento, observacao = expandir_item_escopo(idx, item, indice)
+        if observacao:
+            observacoes.append(observacao)
+        else:
+            itens_orcamento.append(item_orcamento)
+            consolidador.adicionar_item(item_orcamento)
 
-    # Consolida resumos
-    resultado["resumo_materiais"] = consolidar_itens(todos_materiais)
-    resultado["resumo_mao_obra"] = consolidar_itens(toda_mao_obra)
-    resultado["resumo_ferramentas"] = consolidar_itens(todas_ferramentas)
-    resultado["resumo_equipamentos"] = consolidar_itens(todos_equipamentos)
+    contar("itens_expandidos", len(itens_orcamento))
 
-    return resultado
+    return montar_composicao(escopo, itens_orcamento, observacoes, consolidador)
 
 
 def main():
@@ -277,10 +356,10 @@ def main():
 
     # Carrega bases
     bases_dir = Path(args.bases_dir) if args.bases_dir else None
-    bases = carregar_bases(bases_dir)
+    indice = IndiceCatalogo.carregar(bases_dir)
 
     # Processa
-    composicao = processar(escopo, bases)
+    composicao = processar(escopo, indice=indice)
 
     # Salva resultado
     output_path = Path(args.output)
@@ -0,0 +1,420 @@
+#!/usr/bin/env python3
+"""
+Indice reverso de dependencias: insumo do catalogo -> orcamentos
+
+Mapeia cada codigo de insumo (ex: TUB_14_FLEX) para os orcamentos gravados
+pelo pipeline que o utilizam, com o id do item e a quantidade. O indice e
+atualizado sempre que o pipeline grava a saida de um orcamento, de modo que
+saber quais propostas sao afetadas por uma mudanca de preco e uma consulta
+ao indice em vez de uma varredura de todos os precificado.json. Execucoes
+unicas, a CLI e reconstruir usam o indice padrao (output/indice_dependencias.json,
+ou HVAC_INDICE_DEPENDENCIAS); o modo lote usa o do seu diretorio de saida.
+
+Formato (indice_dependencias.json):
+    {
+        "versao": 1,
+        "orcamentos": {orcamento: {"escopo", "atualizado_em", "valor_total", "codigos"}},
+        "insumos": {codigo: {orcamento: [[tipo, item_id, quantidade], ...]}}
+    }
+
+orcamento e o diretorio de saida, relativo ao diretorio do indice quando
+estiver dentro dele. A gravacao e atomica (arquivo temporario + rename);
+execucoes concorrentes sobre o mesmo indice devem ser serializadas pelo
+chamador (o modo lote atualiza o indice apenas no processo principal).
+
+Uso:
+    python -m hvac.dependencias listar -c TUB_14_FLEX
+    python -m hvac.dependencias reprecificar -c TUB_14_FLEX
+    python -m hvac.dependencias reprecificar -x output/lote/indice_dependencias.json -c TUB_14_FLEX
+    python -m hvac.dependencias reconstruir
+"""
+
+import argparse
+import json
+import os
+import sys
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Any, Iterable, List, Optional
+
+from .precificador import CATEGORIAS
+from .utils.catalogo import IndiceCatalogo, TIPOS
+
+
+# Nome padrao do arquivo de indice (na raiz do diretorio de saida)
+ARQUIVO_INDICE = "indice_dependencias.json"
+
+# Diretorio de saida padrao (gerador_propostas/output); o indice padrao fica na sua raiz
+DIR_SAIDA_PADRAO = Path(__file__).resolve().parent.parent / "output"
+
+# Versao do formato do indice
+VERSAO_INDICE = 1
+
+
+def indice_padrao() -> Path:
+    """Indice de dependencias padrao (HVAC_INDICE_DEPENDENCIAS sobrescreve)"""
+    return Path(os.environ.get("HVAC_INDICE_DEPENDENCIAS") or DIR_SAIDA_PADRAO / ARQUIVO_INDICE)
+
+
+def extrair_referencias(precificado: Dict[str, Any]) -> List[List[Any]]:
+    """
+    Extrai as referencias a insumos de um orcamento precificado
+
+    Args:
+        precificado: Orcamento precificado (precificado.json)
+
+    Returns:
+        Lista de [tipo, codigo, item_id, quantidade] na ordem dos itens
+    """
+    referencias = []
+    for item in precificado.get("itens_precificados", []):
+        item_id = item.get("id")
+        for tipo, categoria in zip(TIPOS, CATEGORIAS):
+            for linha in item.get(categoria, []):
+                referencias.append([tipo, linha["codigo"], item_id, linha.get("quantidade", 0)])
+    return referencias
+
+
+class IndiceDependencias:
+    """Indice reverso insumo -> orcamentos persistido em JSON"""
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.orcamentos: Dict[str, Dict[str, Any]] = {}
+        self.insumos: Dict[str, Dict[str, List[List[Any]]]] = {}
+
+    @classmethod
+    def carregar(cls, path: Path) -> "IndiceDependencias":
+        """
+        Carrega o indice (vazio se o arquivo nao existir)
+
+        Args:
+            path: Caminho do indice_dependencias.json
+
+        Returns:
+            Indice carregado
+        """
+        indice = cls(path)
+        if indice.path.exists():
+            with open(indice.path, 'r', encoding='utf-8') as f:
+                dados = json.load(f)
+            if dados.get("versao") == VERSAO_INDICE:
+                indice.orcamentos = dados.get("orcamentos", {})
+                indice.insumos = dados.get("insumos", {})
+        return indice
+
+    def chave_orcamento(self, output_dir: Path) -> str:
+        """Chave do orcamento: diretorio relativo ao indice, se possivel"""
+        output_dir = Path(output_dir).resolve()
+        try:
+            return output_dir.relative_to(self.path.parent.resolve()).as_posix()
+        except ValueError:
+            return output_dir.as_posix()
+
+    def caminho_orcamento(self, orcamento: str) -> Path:
+        """Diretorio de saida de um orcamento do indice"""
+        return self.path.parent / orcamento
+
+    def remover(self, orcamento: str):
+        """Remove todas as referencias de um orcamento"""
+        anterior = self.orcamentos.pop(orcamento, None)
+        if not anterior:
+            return
+        for codigo in anterior.get("codigos", []):
+            usos = self.insumos.get(codigo)
+            if usos is None:
+                continue
+            usos.pop(orcamento, None)
+            if not usos:
+                del self.insumos[codigo]
+
+    def registrar(
+        self,
+        output_dir: Path,
+        referencias: List[List[Any]],
+        escopo_path: Optional[Path] = None,
+        valor_total: Optional[float] = None
+    ) -> str:
+        """
+        Registra (ou substitui) as referencias de um orcamento
+
+        Args:
+            output_dir: Diretorio de saida do orcamento
+            referencias: Saida de extrair_referencias()
+            escopo_path: Escopo de origem (usado para reprecificar)
+            valor_total: Valor total atual do orcamento
+
+        Returns:
+            Chave do orcamento no indice
+        """
+        orcamento = self.chave_orcamento(output_dir)
+        self.remover(orcamento)
+
+        codigos = []
+        for tipo, codigo, item_id, quantidade in referencias:
+            usos = self.insumos.setdefault(codigo, {})
+            if orcamento not in usos:
+                usos[orcamento] = []
+                codigos.append(codigo)
+            usos[orcamento].append([tipo, item_id, quantidade])
+
+        self.orcamentos[orcamento] = {
+            "escopo": str(Path(escopo_path).resolve()) if escopo_path else None,
+            "atualizado_em": datetime.now().isoformat(timespec="seconds"),
+            "valor_total": valor_total,
+            "codigos": codigos
+        }
+        return orcamento
+
+    def registrar_precificado(
+        self,
+        output_dir: Path,
+        precificado: Dict[str, Any],
+        escopo_path: Optional[Path] = None
+    ) -> str:
+        """Registra um orcamento a partir do precificado"""
+        return self.registrar(
+            output_dir,
+            extrair_referencias(precificado),
+            escopo_path,
+            precificado.get("resumo_financeiro", {}).get("valor_total")
+        )
+
+    def afetados(
+        self,
+        codigos: Iterable[str],
+        tipo: Optional[str] = None
+    ) -> Dict[str, List[Dict[str, Any]]]:
+        """
+        Orcamentos que usam algum dos codigos informados
+
+        Args:
+            codigos: Codigos de insumo
+            tipo: Filtra por tipo de insumo (MAT, MO, FER, EQP)
+
+        Returns:
+            Dicionario orcamento -> lista de usos {codigo, tipo, item_id, quantidade}
+        """
+        resultado: Dict[str, List[Dict[str, Any]]] = {}
+        for codigo in codigos:
+            for orcamento, usos in self.insumos.get(codigo, {}).items():
+                for tipo_uso, item_id, quantidade in usos:
+                    if tipo and tipo_uso != tipo:
+                        continue
+                    resultado.setdefault(orcamento, []).append({
+                        "codigo": codigo,
+                        "tipo": tipo_uso,
+                        "item_id": item_id,
+                        "quantidade": quantidade
+                    })
+        return dict(sorted(resultado.items()))
+
+    def salvar(self):
+        """Grava o indice de forma atomica"""
+        dados = {
+            "versao": VERSAO_INDICE,
+            "orcamentos": self.orcamentos,
+            "insumos": self.insumos
+        }
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_name(self.path.name + ".tmp")
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(dados, f, ensure_ascii=False)
+        os.replace(tmp_path, self.path)
+
+
+def atualizar_indice(
+    indice_path: Path,
+    output_dir: Path,
+    precificado: Dict[str, Any],
+    escopo_path: Optional[Path] = None
+):
+    """
+    Carrega, atualiza e grava o indice para um orcamento
+
+    Args:
+        indice_path: Caminho do indice_dependencias.json
+        output_dir: Diretorio de saida do orcamento
+        precificado: Orcamento precificado
+        escopo_path: Escopo de origem
+    """
+    indice = IndiceDependencias.carregar(indice_path)
+    indice.registrar_precificado(output_dir, precificado, escopo_path)
+    indice.salvar()
+
+
+def reconstruir_indice(output_dir: Path, indice_path: Optional[Path] = None) -> IndiceDependencias:
+    """
+    Reconstroi o indice varrendo os precificado.json de output_dir
+
+    Args:
+        output_dir: Diretorio base de saida
+        indice_path: Caminho do indice (padrao: output_dir/indice_dependencias.json)
+
+    Returns:
+        Indice reconstruido (ja gravado)
+    """
+    output_dir = Path(output_dir)
+    indice = IndiceDependencias(indice_path or output_dir / ARQUIVO_INDICE)
+
+    for precificado_path in sorted(output_dir.glob("**/precificado.json")):
+        with open(precificado_path, 'r', encoding='utf-8') as f:
+            precificado = json.load(f)
+        escopo_path = precificado_path.parent / "escopo.json"
+        indice.registrar_precificado(
+            precificado_path.parent,
+            precificado,
+            escopo_path if escopo_path.exists() else None
+        )
+
+    indice.salvar()
+    return indice
+
+
+def reprecificar_afetados(
+    indice: IndiceDependencias,
+    codigos: Iterable[str],
+    tipo: Optional[str] = None,
+    catalogo: Optional[IndiceCatalogo] = None,
+    verbose: bool = True
+) -> List[Dict[str, Any]]:
+    """
+    Reprecifica apenas os orcamentos que usam os codigos informados
+
+    Com o escopo de origem disponivel o pipeline e reexecutado (de forma
+    incremental se houver cache); caso contrario o composicao.json gravado
+    e reprecificado. O indice e atualizado e gravado ao final.
+
+    Args:
+        indice: Indice de dependencias
+        codigos: Codigos de insumo alterados
+        tipo: Filtra por tipo de insumo
+        catalogo: Indice do catalogo (carrega se nao informado)
+        verbose: Exibe progresso
+
+    Returns:
+        Lista com {orcamento, valor_anterior, valor_novo} ou {orcamento, erro}
+    """
+    from .incremental import ARQUIVO_CACHE
+    from .pipeline import executar_pipeline, serializar
+    from .precificador import processar as processar_precificador
+
+    if catalogo is None:
+        catalogo = IndiceCatalogo.carregar()
+
+    resultados = []
+    for orcamento in indice.afetados(codigos, tipo):
+        registro = indice.orcamentos.get(orcamento, {})
+        output_dir = indice.caminho_orcamento(orcamento)
+        escopo = registro.get("escopo")
+        valor_anterior = registro.get("valor_total")
+
+        try:
+            if escopo and Path(escopo).exists():
+                resultado = executar_pipeline(
+                    escopo,
+                    str(output_dir),
+                    verbose=False,
+                    indice=catalogo,
+                    incremental=(output_dir / ARQUIVO_CACHE).exists(),
+                    atualizar_dependencias=False
+                )
+                precificado = resultado["precificado"]
+            else:
+                with open(output_dir / "composicao.json", 'r', encoding='utf-8') as f:
+                    composicao = json.load(f)
+                precificado = processar_precificador(composicao, indice=catalogo)
+                with open(output_dir / "precificado.json", 'w', encoding='utf-8') as f:
+                    f.write(serializar(precificado))
+        except Exception as e:
+            # Falha em um orcamento nao interrompe a reprecificacao dos demais
+            resultados.append({"orcamento": orcamento, "erro": f"{type(e).__name__}: {e}"})
+            if verbose:
+                print(f"  FALHA {orcamento}: {e}")
+            continue
+
+        indice.registrar_precificado(output_dir, precificado, escopo)
+        valor_novo = precificado["resumo_financeiro"]["valor_total"]
+        resultados.append({
+            "orcamento": orcamento,
+            "valor_anterior": valor_anterior,
+            "valor_novo": valor_novo
+        })
+        if verbose:
+            anterior = f"R$ {valor_anterior:,.2f}" if valor_anterior is not None else "N/A"
+            print(f"  {orcamento}: {anterior} -> R$ {valor_novo:,.2f}")
+
+    indice.salvar()
+    return resultados
+
+
+def main():
+    """CLI principal"""
+    parser = argparse.ArgumentParser(
+        description="Indice de dependencias insumo -> orcamentos"
+    )
+    subparsers = parser.add_subparsers(dest="comando", help="Comando a executar")
+
+    for nome, ajuda in (
+        ("listar", "Lista orcamentos afetados por codigos de insumo"),
+        ("reprecificar", "Reprecifica os orcamentos afetados")
+    ):
+        sub = subparsers.add_parser(nome, help=ajuda)
+        sub.add_argument(
+            "--indice", "-x",
+            help=f"Arquivo do indice (padrao: HVAC_INDICE_DEPENDENCIAS ou output/{ARQUIVO_INDICE})"
+        )
+        sub.add_argument(
+            "--codigo", "-c",
+            action="append",
+            required=True,
+            help="Codigo do insumo (pode repetir)"
+        )
+        sub.add_argument(
+            "--tipo", "-t",
+            choices=TIPOS,
+            help="Filtra por tipo de insumo"
+        )
+
+    sub = subparsers.add_parser("reconstruir", help="Reconstroi o indice varrendo a saida")
+    sub.add_argument(
+        "--output-dir", "-d",
+        help="Diretorio base de saida do pipeline (padrao: diretorio do indice padrao)"
+    )
+
+    args = parser.parse_args()
+
+    if not args.comando:
+        parser.print_help()
+        sys.exit(1)
+
+    if args.comando == "reconstruir":
+        if args.output_dir:
+            indice = reconstruir_indice(Path(args.output_dir))
+        else:
+            indice = reconstruir_indice(indice_padrao().parent, indice_padrao())
+        print(f"Indice reconstruido: {len(indice.orcamentos)} orcamento(s), "
+              f"{len(indice.insumos)} insumo(s) -> {indice.path}")
+        return
+
+    indice = IndiceDependencias.carregar(Path(args.indice) if args.indice else indice_padrao())
+
+    if args.comando == "listar":
+        afetados = indice.afetados(args.codigo, args.tipo)
+        for orcamento, usos in afetados.items():
+            print(orcamento)
+            for uso in usos:
+                print(f"  item {uso['item_id']}: {uso['codigo']} ({uso['tipo']}) x {uso['quantidade']}")
+        print(f"\n{len(afetados)} orcamento(s) afetado(s)")
+        return
+
+    print(f"Reprecificando orcamentos afetados por {', '.join(args.codigo)}...")
+    resultados = reprecificar_afetados(indice, args.codigo, args.tipo)
+    falhas = [r for r in resultados if "erro" in r]
+    print(f"\n{len(resultados) - len(falhas)} orcamento(s) reprecificado(s), {len(falhas)} falha(s)")
+    if falhas:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -3,10 +3,18 @@ Geradores de documentos HVAC
 
 - proposta_pdf: Gera PDF da proposta comercial (cliente)
 - planilha_interna: Gera Excel com custos detalhados (equipe)
+- renderizador: Renderizador HTML -> PDF reaproveitado entre propostas
+- proposta_fpdf: Renderizador rapido da proposta com fpdf2 (backend="fpdf")
+- servico_render: Renderizacao de varias propostas em paralelo
+- numeracao: Numeros de orcamento com trava de arquivo e reserva em bloco
+- indice_revisoes: Indice persistente de revisoes por pasta de cliente
 """
 
 from .proposta_pdf import gerar_proposta_pdf
+from .renderizador import RenderizadorProposta, obter_renderizador
+from .servico_render import ServicoRenderizacao, TarefaRender, renderizar_lote
 from .planilha_interna import gerar_planilha_interna
+from .numeracao import AlocadorNumeros, BlocoNumeros, obter_alocador
 from .utils import (
     carregar_configs,
     proximo_numero_orcamento,
@@ -17,7 +25,15 @@ from .utils import (
 
 __all__ = [
     "gerar_proposta_pdf",
+    "RenderizadorProposta",
+    "obter_renderizador",
+    "ServicoRenderizacao",
+    "TarefaRender",
+    "renderizar_lote",
     "gerar_planilha_interna",
+    "AlocadorNumeros",
+    "BlocoNumeros",
+    "obter_alocador",
     "carregar_configs",
     "proximo_numero_orcamento",
     "formatar_moeda",
@@ -0,0 +1,274 @@
+#!/usr/bin/env python3
+"""
+Indice persistente de revisoes por cliente
+
+Cada pasta de cliente em output/ guarda um .revisoes.json com a ultima
+revisao de cada orcamento (numero -> revisao, arquivo, hash). O indice e
+atualizado quando uma proposta e gravada, entao detectar a proxima
+revisao e a leitura de um JSON pequeno, sem listar nem interpretar os
+nomes de todos os PDFs da pasta.
+
+Se o indice nao existir (pastas antigas) ele e reconstruido uma vez a
+partir dos nomes dos arquivos (ORC_<aa>.<num>_<cliente>_<servico>_Rnn.pdf).
+Arquivos apagados ou copiados a mao so entram com o comando reconstruir.
+
+Uso:
+    python -m hvac.generators.indice_revisoes reconstruir
+    python -m hvac.generators.indice_revisoes reconstruir output/cliente_x
+    python -m hvac.generators.indice_revisoes mostrar output/cliente_x
+"""
+
+import hashlib
+import json
+import re
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Any, List, Optional, Tuple
+
+from .numeracao import gravar_json_atomico, travar_arquivo
+from .utils import BASE_DIR
+
+
+# Arquivo do indice dentro da pasta do cliente
+ARQUIVO_INDICE = ".revisoes.json"
+
+# Versao do formato (outra versao no disco forca reconstrucao)
+VERSAO_INDICE = 1
+
+# Nome gerado por gerar_nome_arquivo (rascunhos e outros sufixos nao casam)
+PADRAO_ARQUIVO = re.compile(r"^ORC_(?P<numero>[^_]+)_.+_R(?P<revisao>\d+)\.pdf$")
+
+# Bloco de leitura para o hash dos PDFs
+TAMANHO_BLOCO_HASH = 1024 * 1024
+
+
+def chave_numero(numero_orcamento: str) -> str:
+    """
+    Chave do orcamento no indice, igual ao trecho do nome do arquivo
+
+    Ex: "2026/101-R02" -> "26.101"
+    """
+    partes = numero_orcamento.replace("-", "/").split("/")
+    ano = partes[0][-2:]
+    num = partes[1] if len(partes) > 1 else "000"
+    return f"{ano}.{num}"
+
+
+def hash_arquivo(caminho: Path) -> str:
+    """SHA-256 do conteudo de um arquivo"""
+    resumo = hashlib.sha256()
+    with open(caminho, "rb") as f:
+        for bloco in iter(lambda: f.read(TAMANHO_BLOCO_HASH), b""):
+            resumo.update(bloco)
+    return resumo.hexdigest()
+
+
+class IndiceRevisoes:
+    """Indice de revisoes da pasta de um cliente"""
+
+    def __init__(self, cliente_dir: Path):
+        """
+        Args:
+            cliente_dir: Pasta do cliente (ver criar_pasta_cliente)
+        """
+        self.cliente_dir = Path(cliente_dir)
+        self.caminho = self.cliente_dir / ARQUIVO_INDICE
+        self.caminho_trava = self.cliente_dir / f"{ARQUIVO_INDICE}.lock"
+
+    def _ler(self) -> Optional[Dict[str, Any]]:
+        try:
+            with open(self.caminho, "r", encoding="utf-8") as f:
+                dados = json.load(f)
+        except (FileNotFoundError, ValueError):
+            return None
+        if dados.get("versao") != VERSAO_INDICE:
+            return None
+        return dados
+
+    def carregar(self) -> Dict[str, Any]:
+        """
+        Conteudo do indice (reconstruido da pasta se ausente ou invalido)
+
+        Returns:
+            {"versao", "maior_revisao", "orcamentos": {numero: {revisao, arquivo, hash, atualizado}}}
+        """
+        dados = self._ler()
+        if dados is None:
+            with travar_arquivo(self.caminho_trava):
+                dados = self._ler()
+                if dados is None:
+                    dados = self._varrer()
+                    gravar_json_atomico(self.caminho, dados)
+        return dados
+
+    def _varrer(self) -> Dict[str, Any]:
+        """Monta o indice a partir dos nomes dos PDFs da pasta"""
+        orcamentos: Dict[str, Dict[str, Any]] = {}
+        for arquivo in sorted(self.cliente_dir.glob("ORC_*.pdf")):
+            encontrado = PADRAO_ARQUIVO.match(arquivo.name)
+            if not encontrado:
+                continue
+            numero = encontrado.group("numero")
+            revisao = int(encontrado.group("revisao"))
+            atual = orcamentos.get(numero)
+            if atual is None or revisao > atual["revisao"]:
+                orcamentos[numero] = self._entrada(arquivo, revisao)
+
+        return {
+            "versao": VERSAO_INDICE,
+            "maior_revisao": max((e["revisao"] for e in orcamentos.values()), default=None),
+            "orcamentos": orcamentos
+        }
+
+    @staticmethod
+    def _entrada(arquivo: Path, revisao: int) -> Dict[str, Any]:
+        return {
+            "revisao": revisao,
+            "arquivo": arquivo.name,
+            "hash": hash_arquivo(arquivo),
+            "atualizado": datetime.now().isoformat(timespec="seconds")
+        }
+
+    def reconstruir(self) -> Dict[str, Any]:
+        """Descarta o indice e o recria a partir dos arquivos da pasta"""
+        with travar_arquivo(self.caminho_trava):
+            dados = self._varrer()
+            gravar_json_atomico(self.caminho, dados)
+        return dados
+
+    def ultima_revisao(self, numero_orcamento: Optional[str] = None) -> Optional[int]:
+        """
+        Ultima revisao gravada
+
+        Args:
+            numero_orcamento: Orcamento especifico (None: qualquer orcamento do cliente)
+
+        Returns:
+            Numero da revisao ou None se nao houver proposta gravada
+        """
+        dados = self.carregar()
+        if numero_orcamento is None:
+            return dados.get("maior_revisao")
+        entrada = dados["orcamentos"].get(chave_numero(numero_orcamento))
+        return entrada["revisao"] if entrada else None
+
+    def registrar(self, arquivo: Path, numero_orcamento: str, revisao: str) -> Dict[str, Any]:
+        """
+        Registra uma proposta recem-gravada na pasta do cliente
+
+        Uma revisao menor que a ja registrada para o numero nao substitui
+        a entrada (regeracao de uma revisao antiga).
+
+        Args:
+            arquivo: PDF gravado
+            numero_orcamento: Numero do orcamento (com ou sem revisao)
+            revisao: Revisao do arquivo (ex: "R02")
+
+        Returns:
+            Entrada do orcamento no indice
+        """
+        arquivo = Path(arquivo)
+        numero_revisao = int(revisao.lstrip("Rr"))
+        entrada = self._entrada(arquivo, numero_revisao)
+        chave = chave_numero(numero_orcamento)
+
+        with travar_arquivo(self.caminho_trava):
+            # Sem indice ainda: parte da pasta inteira (que ja inclui o arquivo)
+            dados = self._ler() or self._varrer()
+            atual = dados["orcamentos"].get(chave)
+            if atual is None or numero_revisao >= atual["revisao"]:
+                dados["orcamentos"][chave] = entrada
+            maior = dados.get("maior_revisao")
+            if maior is None or numero_revisao > maior:
+                dados["maior_revisao"] = numero_revisao
+            gravar_json_atomico(self.caminho, dados)
+            return dados["orcamentos"][chave]
+
+
+def proxima_revisao(cliente_dir: Path, numero_orcamento: Optional[str] = None) -> Tuple[str, int]:
+    """
+    Proxima revisao pelo indice da pasta do cliente
+
+    Args:
+        cliente_dir: Pasta do cliente
+        numero_orcamento: Orcamento especifico (None: qualquer orcamento do cliente)
+
+    Returns:
+        Tupla (sufixo_revisao, numero_revisao). Ex: ("R01", 1)
+    """
+    if not Path(cliente_dir).exists():
+        return "R00", 0
+    ultima = IndiceRevisoes(cliente_dir).ultima_revisao(numero_orcamento)
+    if ultima is None:
+        return "R00", 0
+    return f"R{ultima + 1:02d}", ultima + 1
+
+
+def registrar_proposta(cliente_dir: Path, arquivo: Path, numero_orcamento: str, revisao: str) -> bool:
+    """
+    Registra o PDF no indice se ele foi gravado na pasta do cliente
+
+    Returns:
+        True se registrado (PDFs gravados em outro lugar nao entram no indice)
+    """
+    arquivo = Path(arquivo)
+    if arquivo.parent.resolve() != Path(cliente_dir).resolve():
+        return False
+    IndiceRevisoes(cliente_dir).registrar(arquivo, numero_orcamento, revisao)
+    return True
+
+
+def reconstruir_todos(output_dir: Optional[Path] = None) -> List[Tuple[Path, int]]:
+    """
+    Reconstroi o indice de todas as pastas de cliente
+
+    Returns:
+        Lista de (pasta, orcamentos indexados)
+    """
+    output_dir = Path(output_dir) if output_dir is not None else BASE_DIR / "output"
+    if not output_dir.exists():
+        return []
+    return [
+        (pasta, len(IndiceRevisoes(pasta).reconstruir()["orcamentos"]))
+        for pasta in sorted(output_dir.iterdir())
+        if pasta.is_dir()
+    ]
+
+
+def main():
+    """CLI principal"""
+    import argparse
+    import sys
+
+    parser = argparse.ArgumentParser(description="Indice de revisoes das propostas por cliente")
+    subparsers = parser.add_subparsers(dest="comando", help="Comando a executar")
+
+    parser_reconstruir = subparsers.add_parser("reconstruir", help="Recria o indice a partir dos PDFs")
+    parser_reconstruir.add_argument("pastas", nargs="*", help="Pastas de cliente (padrao: todas em output/)")
+
+    parser_mostrar = subparsers.add_parser("mostrar", help="Exibe o indice de uma pasta")
+    parser_mostrar.add_argument("pasta", help="Pasta do cliente")
+
+    args = parser.parse_args()
+
+    if not args.comando:
+        parser.print_help()
+        sys.exit(1)
+
+    if args.comando == "reconstruir":
+        if args.pastas:
+            pastas = [(Path(p), len(IndiceRevisoes(Path(p)).reconstruir()["orcamentos"])) for p in args.pastas]
+        else:
+            pastas = reconstruir_todos()
+        for pasta, quantidade in pastas:
+            print(f"{pasta}: {quantidade} orcamento(s)")
+        return
+
+    dados = IndiceRevisoes(Path(args.pasta)).carregar()
+    print(f"Maior revisao: {dados.get('maior_revisao')}")
+    for numero, entrada in sorted(dados["orcamentos"].items()):
+        print(f"{numero:<10} R{entrada['revisao']:02d}  {entrada['arquivo']}  {entrada['hash'][:12]}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,305 @@
+#!/usr/bin/env python3
+"""
+Numeracao de orcamentos segura para processos paralelos
+
+O contador (config/contador.json) e lido, incrementado e regravado sob uma
+trava exclusiva em um arquivo auxiliar (contador.json.lock): fcntl.flock
+no Linux/macOS, msvcrt.locking no Windows. A gravacao e atomica (arquivo
+temporario + os.replace), entao um leitor nunca ve o JSON pela metade e
+dois workers nunca recebem o mesmo numero.
+
+Para pools de workers, reservar(n) avanca o contador uma unica vez para n
+numeros; BlocoNumeros consome a faixa localmente e so volta ao arquivo
+quando ela acaba. Numeros nao usados podem ser devolvidos se ninguem
+reservou depois (senao ficam como lacuna na sequencia).
+
+Uso:
+    python -m hvac.generators.numeracao status
+    python -m hvac.generators.numeracao reservar 10
+"""
+
+import json
+import os
+import tempfile
+import threading
+from contextlib import contextmanager
+from dataclasses import dataclass
+from datetime import date
+from pathlib import Path
+from typing import Dict, Any, Iterator, Optional, Tuple
+
+from .utils import BASE_DIR
+
+
+# Arquivo do contador (o mesmo lido por carregar_configs)
+CAMINHO_CONTADOR = BASE_DIR / "config" / "contador.json"
+
+# Sufixo do arquivo de trava, criado ao lado do contador
+SUFIXO_TRAVA = ".lock"
+
+
+def formatar_numero_orcamento(ano: int, sequencial: int, revisao: str = "R00") -> str:
+    """Formata o numero do orcamento. Ex: (2025, 868) -> "2025/868-R00" """
+    return f"{ano}/{sequencial:03d}-{revisao}"
+
+
+@contextmanager
+def travar_arquivo(caminho: Path) -> Iterator[None]:
+    """
+    Trava exclusiva entre processos sobre um arquivo auxiliar
+
+    Bloqueia ate obter a trava. A trava pertence ao arquivo aberto, entao
+    tambem exclui threads do mesmo processo.
+
+    Args:
+        caminho: Arquivo de trava (criado se nao existir)
+    """
+    caminho.parent.mkdir(parents=True, exist_ok=True)
+    with open(caminho, "a+b") as f:
+        try:
+            import fcntl
+        except ImportError:
+            fcntl = None
+
+        if fcntl is not None:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+        else:
+            import msvcrt
+
+            f.seek(0)
+            # LK_LOCK tenta por ~10s e entao levanta OSError
+            msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+            else:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+def gravar_json_atomico(caminho: Path, dados: Any):
+    """Grava JSON em arquivo temporario no mesmo diretorio e substitui o destino"""
+    caminho.parent.mkdir(parents=True, exist_ok=True)
+    descritor, tmp = tempfile.mkstemp(prefix=f".{caminho.name}.", suffix=".tmp", dir=caminho.parent)
+    try:
+        with os.fdopen(descritor, "w", encoding="utf-8") as f:
+            json.dump(dados, f, ensure_ascii=False, indent=2)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, caminho)
+    except BaseException:
+        try:
+            os.unlink(tmp)
+        except OSError:
+            pass
+        raise
+
+
+@dataclass(frozen=True)
+class FaixaNumeros:
+    """Faixa de sequenciais reservada de uma vez (inicio e fim inclusos)"""
+
+    ano: int
+    inicio: int
+    fim: int
+
+    def __len__(self) -> int:
+        return self.fim - self.inicio + 1
+
+    def __iter__(self) -> Iterator[Tuple[str, int]]:
+        for sequencial in range(self.inicio, self.fim + 1):
+            yield formatar_numero_orcamento(self.ano, sequencial), sequencial
+
+
+class AlocadorNumeros:
+    """Alocador de numeros de orcamento sobre o contador JSON"""
+
+    def __init__(self, caminho: Optional[Path] = None):
+        """
+        Args:
+            caminho: Arquivo do contador (padrao: config/contador.json)
+        """
+        self.caminho = Path(caminho) if caminho is not None else CAMINHO_CONTADOR
+        self.caminho_trava = self.caminho.with_name(self.caminho.name + SUFIXO_TRAVA)
+
+    def ler(self) -> Dict[str, Any]:
+        """Estado atual do contador (vazio se o arquivo nao existir)"""
+        try:
+            with open(self.caminho, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+
+    def reservar(self, quantidade: int = 1, hoje: Optional[date] = None) -> FaixaNumeros:
+        """
+        Reserva uma faixa de numeros consecutivos em uma unica gravacao
+
+        Na virada do ano o ultimo sequencial vai para o historico e a
+        contagem recomeca.
+
+        Args:
+            quantidade: Numeros a reservar
+            hoje: Data de referencia (padrao: hoje)
+
+        Returns:
+            Faixa reservada
+        """
+        if quantidade < 1:
+            raise ValueError(f"quantidade deve ser positiva: {quantidade}")
+        ano_atual = (hoje or date.today()).year
+
+        with travar_arquivo(self.caminho_trava):
+            contador = self.ler()
+
+            # Verifica virada de ano
+            ano_contador = contador.get("ano_corrente", ano_atual)
+            if ano_atual != ano_contador:
+                contador["historico"] = contador.get("historico", {})
+                contador["historico"][str(ano_contador)] = contador.get("ultimo_sequencial", 0)
+                contador["ultimo_sequencial"] = 0
+
+            inicio = contador.get("ultimo_sequencial", 0) + 1
+            contador["ultimo_sequencial"] = inicio + quantidade - 1
+            contador["ano_corrente"] = ano_atual
+
+            gravar_json_atomico(self.caminho, contador)
+
+        return FaixaNumeros(ano_atual, inicio, inicio + quantidade - 1)
+
+    def proximo(self) -> Tuple[str, int]:
+        """
+        Reserva um unico numero
+
+        Returns:
+            Tupla (numero_formatado, sequencial). Ex: ("2025/868-R00", 868)
+        """
+        return next(iter(self.reservar(1)))
+
+    def devolver(self, faixa: FaixaNumeros) -> bool:
+        """
+        Devolve o final nao usado de uma faixa
+
+        So tem efeito se a faixa ainda for a ultima reservada no ano (nenhum
+        outro processo reservou depois); caso contrario os numeros ficam
+        como lacuna.
+
+        Args:
+            faixa: Sequenciais nao usados (final de uma faixa reservada)
+
+        Returns:
+            True se o contador voltou para antes da faixa
+        """
+        with travar_arquivo(self.caminho_trava):
+            contador = self.ler()
+            if contador.get("ano_corrente") != faixa.ano or contador.get("ultimo_sequencial") != faixa.fim:
+                return False
+            contador["ultimo_sequencial"] = faixa.inicio - 1
+            gravar_json_atomico(self.caminho, contador)
+        return True
+
+
+class BlocoNumeros:
+    """
+    Distribui numeros a partir de faixas reservadas em bloco
+
+    Cada faixa custa uma unica passagem pela trava do contador. Seguro entre
+    threads do mesmo processo; cada processo deve ter o seu bloco.
+    """
+
+    def __init__(self, alocador: Optional[AlocadorNumeros] = None, tamanho: int = 1):
+        """
+        Args:
+            alocador: Alocador do contador (padrao: obter_alocador())
+            tamanho: Numeros reservados por vez
+        """
+        self.alocador = alocador or obter_alocador()
+        self.tamanho = max(1, tamanho)
+        self._faixa: Optional[FaixaNumeros] = None
+        self._proximo = 0
+        self._lock = threading.Lock()
+
+    def proximo(self) -> Tuple[str, int]:
+        """Proximo numero (reserva nova faixa quando a atual acaba)"""
+        with self._lock:
+            if self._faixa is None or self._proximo > self._faixa.fim:
+                self._faixa = self.alocador.reservar(self.tamanho)
+                self._proximo = self._faixa.inicio
+            sequencial = self._proximo
+            self._proximo += 1
+            return formatar_numero_orcamento(self._faixa.ano, sequencial), sequencial
+
+    def restantes(self) -> int:
+        """Numeros ainda disponiveis na faixa atual"""
+        with self._lock:
+            if self._faixa is None:
+                return 0
+            return max(0, self._faixa.fim - self._proximo + 1)
+
+    def liberar(self) -> bool:
+        """
+        Devolve ao contador os numeros nao usados da faixa atual
+
+        Returns:
+            True se havia sobra e ela foi devolvida
+        """
+        with self._lock:
+            if self._faixa is None or self._proximo > self._faixa.fim:
+                return False
+            sobra = FaixaNumeros(self._faixa.ano, self._proximo, self._faixa.fim)
+            self._faixa = None
+            return self.alocador.devolver(sobra)
+
+
+# Instancia padrao do processo (criada sob demanda)
+_alocador_padrao: Optional[AlocadorNumeros] = None
+_lock_padrao = threading.Lock()
+
+
+def obter_alocador() -> AlocadorNumeros:
+    """Alocador padrao do processo (config/contador.json)"""
+    global _alocador_padrao
+    with _lock_padrao:
+        if _alocador_padrao is None:
+            _alocador_padrao = AlocadorNumeros()
+        return _alocador_padrao
+
+
+def main():
+    """CLI principal"""
+    import argparse
+    import sys
+
+    parser = argparse.ArgumentParser(description="Numeracao de orcamentos HVAC")
+    parser.add_argument("--contador", help="Arquivo do contador (padrao: config/contador.json)")
+    subparsers = parser.add_subparsers(dest="comando", help="Comando a executar")
+
+    subparsers.add_parser("status", help="Mostra o estado do contador")
+
+    parser_reservar = subparsers.add_parser("reservar", help="Reserva uma faixa de numeros")
+    parser_reservar.add_argument("quantidade", type=int, nargs="?", default=1, help="Numeros a reservar")
+
+    args = parser.parse_args()
+
+    if not args.comando:
+        parser.print_help()
+        sys.exit(1)
+
+    alocador = AlocadorNumeros(args.contador) if args.contador else obter_alocador()
+
+    if args.comando == "status":
+        contador = alocador.ler()
+        print(f"Contador: {alocador.caminho}")
+        print(f"Ano corrente: {contador.get('ano_corrente', '-')}")
+        print(f"Ultimo sequencial: {contador.get('ultimo_sequencial', 0)}")
+        return
+
+    faixa = alocador.reservar(args.quantidade)
+    for numero, _ in faixa:
+        print(numero)
+
+
+if __name__ == "__main__":
+    main()
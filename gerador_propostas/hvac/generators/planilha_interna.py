@@ -5,13 +5,19 @@ Gerador de Planilha Interna HVAC
 Gera Excel com custos detalhados para controle interno.
 Inclui estrutura hierarquica e listas consolidadas para compras.
 Possui colunas para controle orcado x realizado.
+
+Dois motores produzem a mesma planilha: o padrao monta o workbook em
+memoria; o write_only grava as linhas a medida que sao geradas, com
+estilos pre-montados, e e indicado para orcamentos grandes.
 """
 
+from copy import copy
 from datetime import date
 from pathlib import Path
-from typing import Dict, Any, Optional, List
+from typing import Dict, Any, Optional, List, Iterator, Tuple
 
 from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
 from openpyxl.styles import Font, Alignment, Border, Side, PatternFill, NamedStyle
 from openpyxl.utils import get_column_letter
 from openpyxl.worksheet.worksheet import Worksheet
@@ -32,6 +38,68 @@ CINZA_MEDIO = "E0E0E0"
 VERDE_POSITIVO = "C6EFCE"
 VERMELHO_NEGATIVO = "FFC7CE"
 
+# Formato das colunas de valores
+FORMATO_MOEDA = '#,##0.00'
+
+# Linha do cabecalho das tabelas (apos referencia, cliente, data e uma linha em branco)
+LINHA_CABECALHO_TABELA = 5
+
+# Linha da tabela: (estilo, valores a partir da coluna A); estilo None = linha em branco
+Linha = Tuple[Optional[str], List[Any]]
+
+# Colunas (titulo, largura) de cada aba
+COLUNAS_RESUMO = [
+    ("Item", 8),
+    ("Descricao", 45),
+    ("Tipo", 12),
+    ("Unidade", 8),
+    ("Qtd", 8),
+    ("Custo Unit. Orcado", 15),
+    ("Custo Total Orcado", 15),
+    ("Custo Unit. Real", 15),
+    ("Custo Total Real", 15),
+    ("Diferenca (R$)", 14),
+    ("Diferenca (%)", 12)
+]
+
+COLUNAS_MATERIAIS = [
+    ("Codigo", 15),
+    ("Descricao", 40),
+    ("Unidade", 10),
+    ("Qtd Total", 12),
+    ("Custo Unit. Orcado", 16),
+    ("Custo Total Orcado", 16),
+    ("Fornecedor Ref.", 25),
+    ("Custo Unit. Real", 16),
+    ("Custo Total Real", 16),
+    ("Diferenca", 14)
+]
+
+COLUNAS_MAO_OBRA = [
+    ("Categoria", 20),
+    ("Descricao", 35),
+    ("Horas Totais", 14),
+    ("Custo/Hora Orcado", 16),
+    ("Custo Total Orcado", 16),
+    ("Custo/Hora Real", 16),
+    ("Custo Total Real", 16),
+    ("Diferenca", 14)
+]
+
+COLUNAS_FERRAMENTAS = [
+    ("Codigo", 15),
+    ("Descricao", 35),
+    ("Horas Uso", 12),
+    ("Custo/Hora Orcado", 16),
+    ("Custo Total Orcado", 16),
+    ("Custo/Hora Real", 16),
+    ("Custo Total Real", 16),
+    ("Diferenca", 14)
+]
+
+# Resumo: colunas F a J (custos e diferenca) em formato moeda
+FORMATOS_RESUMO = {col: FORMATO_MOEDA for col in range(6, 11)}
+
 
 def criar_estilos(wb: Workbook) -> Dict[str, NamedStyle]:
     """Cria estilos padronizados para a planilha"""
@@ -90,7 +158,7 @@ def criar_estilos(wb: Workbook) -> Dict[str, NamedStyle]:
     estilo_moeda = NamedStyle(name="moeda")
     estilo_moeda.font = Font(size=9)
     estilo_moeda.border = borda_fina
-    estilo_moeda.number_format = '#,##0.00'
+    estilo_moeda.number_format = FORMATO_MOEDA
     estilo_moeda.alignment = Alignment(horizontal="right")
     wb.add_named_style(estilo_moeda)
     estilos["moeda"] = estilo_moeda
@@ -100,27 +168,200 @@ def criar_estilos(wb: Workbook) -> Dict[str, NamedStyle]:
 
 def criar_cabecalho_planilha(ws: Worksheet, numero_orcamento: str, cliente: str, data: str):
     """Adiciona cabecalho padrao na planilha"""
-    ws["A1"] = f"Referencia: ORC {numero_orcamento}"
-    ws["A1"].font = Font(bold=True, size=12, color=AZUL_ARMANT)
+    for celula, (texto, fonte) in zip(("A1", "A2", "A3"), _linhas_cabecalho(numero_orcamento, cliente, data)):
+        ws[celula] = texto
+        ws[celula].font = fonte
 
-    ws["A2"] = f"Cliente: {cliente}"
-    ws["A2"].font = Font(size=10)
+    # Linha em branco
+    return LINHA_CABECALHO_TABELA  # Proxima linha disponivel
 
-    ws["A3"] = f"Data: {data}"
-    ws["A3"].font = Font(size=10)
 
-    # Linha em branco
-    return 5  # Proxima linha disponivel
+def _linhas_cabecalho(numero_orcamento: str, cliente: str, data: str) -> List[Tuple[str, Font]]:
+    """Textos e fontes das tres linhas de identificacao do orcamento"""
+    return [
+        (f"Referencia: ORC {numero_orcamento}", Font(bold=True, size=12, color=AZUL_ARMANT)),
+        (f"Cliente: {cliente}", Font(size=10)),
+        (f"Data: {data}", Font(size=10))
+    ]
 
 
-def criar_aba_resumo(
-    wb: Workbook,
-    precificado: Dict[str, Any],
+def _escrever_linha(ws: Worksheet, linha: int, estilo: str, valores: List[Any], total_colunas: int):
+    """Escreve uma linha da tabela aplicando o estilo em todas as colunas"""
+    for col in range(1, total_colunas + 1):
+        celula = ws.cell(row=linha, column=col)
+        if col <= len(valores) and valores[col - 1] is not None:
+            celula.value = valores[col - 1]
+        celula.style = estilo
+
+
+def _escrever_aba(
+    ws: Worksheet,
+    colunas: List[Tuple[str, int]],
+    linhas: Iterator[Linha],
     numero_orcamento: str,
-    cliente: str
+    cliente: str,
+    formatos: Optional[Dict[int, str]] = None
 ) -> Worksheet:
     """
-    Cria aba com resumo hierarquico por item
+    Preenche uma aba em memoria (motor padrao)
+
+    Args:
+        ws: Aba de destino
+        colunas: Titulo e largura de cada coluna da tabela
+        linhas: Linhas da tabela (estilo, valores) a partir da linha seguinte ao cabecalho
+        numero_orcamento: Numero do orcamento
+        cliente: Nome do cliente
+        formatos: Formato numerico por coluna (1 = A) aplicado a todas as linhas da tabela
+
+    Returns:
+        A propria aba
+    """
+    linha = criar_cabecalho_planilha(ws, numero_orcamento, cliente, date.today().strftime("%d/%m/%Y"))
+
+    for col, (titulo, largura) in enumerate(colunas, 1):
+        celula = ws.cell(row=linha, column=col, value=titulo)
+        celula.style = "cabecalho"
+        ws.column_dimensions[get_column_letter(col)].width = largura
+
+    for linha, (estilo, valores) in enumerate(linhas, linha + 1):
+        if estilo is not None:
+            _escrever_linha(ws, linha, estilo, valores, len(colunas))
+        for col, formato in (formatos or {}).items():
+            ws.cell(row=linha, column=col).number_format = formato
+
+    return ws
+
+
+class EstilosStreaming:
+    """
+    Estilos pre-montados para o modo write_only
+
+    Cada combinacao (estilo nomeado, formato numerico) e resolvida uma unica
+    vez no workbook; as celulas seguintes apenas copiam o indice de estilo
+    pronto, sem nova busca pelo nome nem registro de fontes/bordas.
+    """
+
+    def __init__(self):
+        self._estilos: Dict[Tuple[Optional[str], Optional[str]], Any] = {}
+
+    def celula(
+        self,
+        ws: Worksheet,
+        valor: Any = None,
+        estilo: Optional[str] = None,
+        formato: Optional[str] = None
+    ) -> WriteOnlyCell:
+        """
+        Cria uma celula write_only com o estilo pre-montado
+
+        Args:
+            ws: Aba write_only de destino
+            valor: Valor da celula
+            estilo: Nome do NamedStyle (registrado por criar_estilos)
+            formato: Formato numerico sobreposto ao do estilo
+
+        Returns:
+            Celula pronta para ws.append
+        """
+        celula = WriteOnlyCell(ws, valor)
+        if estilo is None and formato is None:
+            return celula
+
+        chave = (estilo, formato)
+        base = self._estilos.get(chave)
+        if base is None:
+            modelo = WriteOnlyCell(ws)
+            if estilo is not None:
+                modelo.style = estilo
+            if formato is not None:
+                modelo.number_format = formato
+            base = self._estilos[chave] = modelo._style
+        celula._style = copy(base)
+        return celula
+
+
+def _escrever_aba_streaming(
+    wb: Workbook,
+    titulo: str,
+    colunas: List[Tuple[str, int]],
+    linhas: Iterator[Linha],
+    numero_orcamento: str,
+    cliente: str,
+    estilos: EstilosStreaming,
+    formatos: Optional[Dict[int, str]] = None
+):
+    """
+    Grava uma aba linha a linha em um workbook write_only
+
+    Mesmo layout de _escrever_aba; as linhas sao serializadas a medida que
+    sao geradas, sem manter as celulas em memoria.
+    """
+    ws = wb.create_sheet(titulo)
+    formatos = formatos or {}
+
+    # Larguras precisam ser definidas antes da primeira linha
+    for col, (_, largura) in enumerate(colunas, 1):
+        ws.column_dimensions[get_column_letter(col)].width = largura
+
+    for texto, fonte in _linhas_cabecalho(numero_orcamento, cliente, date.today().strftime("%d/%m/%Y")):
+        celula = WriteOnlyCell(ws, texto)
+        celula.font = fonte
+        ws.append([celula])
+    ws.append([])
+
+    ws.append([estilos.celula(ws, titulo_coluna, "cabecalho") for titulo_coluna, _ in colunas])
+
+    for estilo, valores in linhas:
+        if estilo is None:
+            ws.append([
+                estilos.celula(ws, formato=formatos[col]) if col in formatos else None
+                for col in range(1, max(formatos, default=0) + 1)
+            ])
+            continue
+
+        celulas = []
+        for col in range(1, len(colunas) + 1):
+            valor = valores[col - 1] if col <= len(valores) else None
+            celulas.append(estilos.celula(ws, valor, estilo, formatos.get(col)))
+        ws.append(celulas)
+
+
+def consolidar_insumos(precificado: Dict[str, Any], categoria: str) -> List[Dict[str, Any]]:
+    """
+    Consolida os insumos de uma categoria por codigo
+
+    Args:
+        precificado: Dados do orcamento precificado
+        categoria: "materiais", "mao_de_obra" ou "ferramentas"
+
+    Returns:
+        Insumos somados (quantidade e custo) ordenados por codigo
+    """
+    consolidados = {}
+
+    for item in precificado.get("itens_precificados", []):
+        for insumo in item.get(categoria, []):
+            codigo = insumo.get("codigo", "")
+            if codigo in consolidados:
+                consolidados[codigo]["quantidade"] += insumo.get("quantidade", 0)
+                consolidados[codigo]["custo"] += insumo.get("custo", 0)
+            else:
+                consolidados[codigo] = {
+                    "codigo": codigo,
+                    "descricao": insumo.get("descricao", ""),
+                    "unidade": insumo.get("unidade", "UN"),
+                    "quantidade": insumo.get("quantidade", 0),
+                    "preco_unitario": insumo.get("preco_unitario", 0),
+                    "custo": insumo.get("custo", 0),
+                    "fornecedor": insumo.get("fornecedor_referencia", "")
+                }
+
+    return sorted(consolidados.values(), key=lambda x: x["codigo"])
+
+
+def _linhas_resumo(precificado: Dict[str, Any], linha: int) -> Iterator[Linha]:
+    """
+    Linhas da aba de resumo hierarquico por item
 
     Estrutura:
     - Grupos de servico
@@ -129,34 +370,6 @@ def criar_aba_resumo(
         - Mao de obra
         - Ferramentas
     """
-    ws = wb.active
-    ws.title = "Resumo por Item"
-
-    # Cabecalho
-    linha = criar_cabecalho_planilha(ws, numero_orcamento, cliente, date.today().strftime("%d/%m/%Y"))
-
-    # Cabecalho da tabela
-    colunas = [
-        ("A", "Item", 8),
-        ("B", "Descricao", 45),
-        ("C", "Tipo", 12),
-        ("D", "Unidade", 8),
-        ("E", "Qtd", 8),
-        ("F", "Custo Unit. Orcado", 15),
-        ("G", "Custo Total Orcado", 15),
-        ("H", "Custo Unit. Real", 15),
-        ("I", "Custo Total Real", 15),
-        ("J", "Diferenca (R$)", 14),
-        ("K", "Diferenca (%)", 12)
-    ]
-
-    for col, titulo, largura in colunas:
-        celula = ws[f"{col}{linha}"]
-        celula.value = titulo
-        celula.style = "cabecalho"
-        ws.column_dimensions[col].width = largura
-
-    linha += 1
     linha_inicio_dados = linha
 
     # Processa itens
@@ -165,224 +378,208 @@ def criar_aba_resumo(
 
     # Se tem agrupamento
     if agrupamento:
+        # Primeiro item de cada id, como na busca linear
+        por_id = {}
+        for item in itens:
+            por_id.setdefault(item.get("id"), item)
+
         for idx_grupo, grupo in enumerate(agrupamento, 1):
             # Linha do grupo
-            ws[f"A{linha}"] = str(idx_grupo)
-            ws[f"B{linha}"] = grupo.get("nome", f"GRUPO {idx_grupo}")
-            ws[f"C{linha}"] = "GRUPO"
-
-            for col in "ABCDEFGHIJK":
-                ws[f"{col}{linha}"].style = "grupo"
-
+            yield "grupo", [str(idx_grupo), grupo.get("nome", f"GRUPO {idx_grupo}"), "GRUPO"]
             linha += 1
 
             # Itens do grupo
             for item_id in grupo.get("itens_ids", []):
-                for item in itens:
-                    if item.get("id") == item_id:
-                        linha = adicionar_item_hierarquico(ws, item, idx_grupo, linha)
-                        break
+                if item_id in por_id:
+                    for registro in _linhas_item(por_id[item_id], idx_grupo, linha):
+                        yield registro
+                        linha += 1
     else:
         # Sem agrupamento - lista direta
         for idx, item in enumerate(itens, 1):
-            linha = adicionar_item_hierarquico(ws, item, idx, linha)
+            for registro in _linhas_item(item, idx, linha):
+                yield registro
+                linha += 1
 
     # Linha de total
+    yield None, []
     linha += 1
-    ws[f"A{linha}"] = ""
-    ws[f"B{linha}"] = "TOTAL GERAL"
-    ws[f"F{linha}"] = ""
-    ws[f"G{linha}"] = f"=SUM(G{linha_inicio_dados}:G{linha-2})"
-    ws[f"H{linha}"] = ""
-    ws[f"I{linha}"] = f"=SUM(I{linha_inicio_dados}:I{linha-2})"
-    ws[f"J{linha}"] = f"=I{linha}-G{linha}"
-    ws[f"K{linha}"] = f"=IF(G{linha}=0,0,(J{linha}/G{linha})*100)"
-
-    for col in "ABCDEFGHIJK":
-        ws[f"{col}{linha}"].style = "total"
-
-    # Formata colunas de moeda
-    for row in ws.iter_rows(min_row=linha_inicio_dados, max_row=linha, min_col=6, max_col=10):
-        for cell in row:
-            cell.number_format = '#,##0.00'
-
-    # Formatacao condicional para diferenca
-    for row in range(linha_inicio_dados, linha + 1):
-        celula_dif = ws[f"J{row}"]
-        celula_dif.number_format = '#,##0.00'
-
-    return ws
+    yield "total", [
+        "",
+        "TOTAL GERAL",
+        None,
+        None,
+        None,
+        "",
+        f"=SUM(G{linha_inicio_dados}:G{linha-2})",
+        "",
+        f"=SUM(I{linha_inicio_dados}:I{linha-2})",
+        f"=I{linha}-G{linha}",
+        f"=IF(G{linha}=0,0,(J{linha}/G{linha})*100)"
+    ]
 
 
-def adicionar_item_hierarquico(ws: Worksheet, item: Dict, idx_grupo: int, linha: int) -> int:
-    """Adiciona item com seus subitens (materiais, MO, ferramentas)"""
+def _linhas_item(item: Dict, idx_grupo: int, linha: int) -> Iterator[Linha]:
+    """Linhas de um item com seus subitens (materiais, MO, ferramentas)"""
 
     item_num = f"{idx_grupo}.{item.get('id', 1)}"
 
     # Linha do servico
-    ws[f"A{linha}"] = item_num
-    ws[f"B{linha}"] = item.get("descricao", "")
-    ws[f"C{linha}"] = "SERVICO"
-    ws[f"D{linha}"] = item.get("unidade", "pc")
-    ws[f"E{linha}"] = item.get("quantidade", 1)
-    ws[f"F{linha}"] = ""  # Unitario calculado
-    ws[f"G{linha}"] = item.get("custo_direto", 0)
-    ws[f"H{linha}"] = ""  # Real - editavel
-    ws[f"I{linha}"] = ""  # Total real - formula
-    ws[f"J{linha}"] = f"=IF(I{linha}=\"\",\"\",I{linha}-G{linha})"
-    ws[f"K{linha}"] = f"=IF(OR(G{linha}=0,J{linha}=\"\"),\"\",(J{linha}/G{linha})*100)"
-
-    for col in "ABCDEFGHIJK":
-        ws[f"{col}{linha}"].style = "item"
-
+    yield "item", [
+        item_num,
+        item.get("descricao", ""),
+        "SERVICO",
+        item.get("unidade", "pc"),
+        item.get("quantidade", 1),
+        "",  # Unitario calculado
+        item.get("custo_direto", 0),
+        "",  # Real - editavel
+        "",  # Total real - formula
+        f"=IF(I{linha}=\"\",\"\",I{linha}-G{linha})",
+        f"=IF(OR(G{linha}=0,J{linha}=\"\"),\"\",(J{linha}/G{linha})*100)"
+    ]
     linha += 1
 
-    # Materiais
-    for idx_mat, mat in enumerate(item.get("materiais", []), 1):
-        ws[f"A{linha}"] = f"{item_num}.{idx_mat}"
-        ws[f"B{linha}"] = mat.get("descricao", mat.get("codigo", ""))
-        ws[f"C{linha}"] = "MATERIAL"
-        ws[f"D{linha}"] = mat.get("unidade", "UN")
-        ws[f"E{linha}"] = mat.get("quantidade", 0)
-        ws[f"F{linha}"] = mat.get("preco_unitario", 0)
-        ws[f"G{linha}"] = mat.get("custo", 0)
-        ws[f"H{linha}"] = ""
-        ws[f"I{linha}"] = f"=IF(H{linha}=\"\",\"\",H{linha}*E{linha})"
-        ws[f"J{linha}"] = f"=IF(I{linha}=\"\",\"\",I{linha}-G{linha})"
-        ws[f"K{linha}"] = f"=IF(OR(G{linha}=0,J{linha}=\"\"),\"\",(J{linha}/G{linha})*100)"
-
-        for col in "ABCDEFGHIJK":
-            ws[f"{col}{linha}"].style = "subitem"
+    subitens = [
+        # (categoria, prefixo do numero, tipo, unidade fixa)
+        ("materiais", "", "MATERIAL", None),
+        ("mao_de_obra", "MO", "MAO_OBRA", "h"),
+        ("ferramentas", "FE", "FERRAMENTA", "h")
+    ]
 
-        linha += 1
+    for categoria, prefixo, tipo, unidade in subitens:
+        for idx, insumo in enumerate(item.get(categoria, []), 1):
+            yield "subitem", [
+                f"{item_num}.{prefixo}{idx}",
+                insumo.get("descricao", insumo.get("codigo", "")),
+                tipo,
+                unidade or insumo.get("unidade", "UN"),
+                insumo.get("quantidade", 0),
+                insumo.get("preco_unitario", 0),
+                insumo.get("custo", 0),
+                "",
+                f"=IF(H{linha}=\"\",\"\",H{linha}*E{linha})",
+                f"=IF(I{linha}=\"\",\"\",I{linha}-G{linha})",
+                f"=IF(OR(G{linha}=0,J{linha}=\"\"),\"\",(J{linha}/G{linha})*100)"
+            ]
+            linha += 1
 
-    # Mao de obra
-    for idx_mo, mo in enumerate(item.get("mao_de_obra", []), 1):
-        ws[f"A{linha}"] = f"{item_num}.MO{idx_mo}"
-        ws[f"B{linha}"] = mo.get("descricao", mo.get("codigo", ""))
-        ws[f"C{linha}"] = "MAO_OBRA"
-        ws[f"D{linha}"] = "h"
-        ws[f"E{linha}"] = mo.get("quantidade", 0)
-        ws[f"F{linha}"] = mo.get("preco_unitario", 0)
-        ws[f"G{linha}"] = mo.get("custo", 0)
-        ws[f"H{linha}"] = ""
-        ws[f"I{linha}"] = f"=IF(H{linha}=\"\",\"\",H{linha}*E{linha})"
-        ws[f"J{linha}"] = f"=IF(I{linha}=\"\",\"\",I{linha}-G{linha})"
-        ws[f"K{linha}"] = f"=IF(OR(G{linha}=0,J{linha}=\"\"),\"\",(J{linha}/G{linha})*100)"
-
-        for col in "ABCDEFGHIJK":
-            ws[f"{col}{linha}"].style = "subitem"
 
+def _linhas_materiais(precificado: Dict[str, Any], linha: int) -> Iterator[Linha]:
+    """Linhas da lista consolidada de materiais"""
+    linha_inicio = linha
+
+    for mat in consolidar_insumos(precificado, "materiais"):
+        yield "item", [
+            mat["codigo"],
+            mat["descricao"],
+            mat["unidade"],
+            mat["quantidade"],
+            mat["preco_unitario"],
+            mat["custo"],
+            mat["fornecedor"],
+            "",
+            f"=IF(H{linha}=\"\",\"\",H{linha}*D{linha})",
+            f"=IF(I{linha}=\"\",\"\",I{linha}-F{linha})"
+        ]
         linha += 1
 
-    # Ferramentas
-    for idx_fer, fer in enumerate(item.get("ferramentas", []), 1):
-        ws[f"A{linha}"] = f"{item_num}.FE{idx_fer}"
-        ws[f"B{linha}"] = fer.get("descricao", fer.get("codigo", ""))
-        ws[f"C{linha}"] = "FERRAMENTA"
-        ws[f"D{linha}"] = "h"
-        ws[f"E{linha}"] = fer.get("quantidade", 0)
-        ws[f"F{linha}"] = fer.get("preco_unitario", 0)
-        ws[f"G{linha}"] = fer.get("custo", 0)
-        ws[f"H{linha}"] = ""
-        ws[f"I{linha}"] = f"=IF(H{linha}=\"\",\"\",H{linha}*E{linha})"
-        ws[f"J{linha}"] = f"=IF(I{linha}=\"\",\"\",I{linha}-G{linha})"
-        ws[f"K{linha}"] = f"=IF(OR(G{linha}=0,J{linha}=\"\"),\"\",(J{linha}/G{linha})*100)"
-
-        for col in "ABCDEFGHIJK":
-            ws[f"{col}{linha}"].style = "subitem"
+    # Total
+    yield None, []
+    linha += 1
+    yield "total", [
+        "",
+        "TOTAL",
+        None,
+        None,
+        None,
+        f"=SUM(F{linha_inicio}:F{linha-2})",
+        None,
+        None,
+        f"=SUM(I{linha_inicio}:I{linha-2})",
+        f"=I{linha}-F{linha}"
+    ]
+
 
+def _linhas_horas(
+    precificado: Dict[str, Any],
+    linha: int,
+    categoria: str,
+    total_vazio: bool = True
+) -> Iterator[Linha]:
+    """Linhas das listas consolidadas por hora (mao de obra e ferramentas)"""
+    linha_inicio = linha
+
+    for insumo in consolidar_insumos(precificado, categoria):
+        yield "item", [
+            insumo["codigo"],
+            insumo["descricao"],
+            insumo["quantidade"],
+            insumo["preco_unitario"],
+            insumo["custo"],
+            "",
+            f"=IF(F{linha}=\"\",\"\",F{linha}*C{linha})",
+            f"=IF(G{linha}=\"\",\"\",G{linha}-E{linha})"
+        ]
         linha += 1
 
-    return linha
+    # Total
+    if total_vazio or linha > linha_inicio:
+        yield None, []
+        linha += 1
+        yield "total", [
+            "",
+            "TOTAL",
+            f"=SUM(C{linha_inicio}:C{linha-2})",
+            None,
+            f"=SUM(E{linha_inicio}:E{linha-2})",
+            None,
+            f"=SUM(G{linha_inicio}:G{linha-2})",
+            f"=G{linha}-E{linha}"
+        ]
+
+
+def _abas(precificado: Dict[str, Any]) -> List[Tuple[str, List[Tuple[str, int]], Iterator[Linha], Dict[int, str]]]:
+    """Titulo, colunas, linhas e formatos de cada aba, na ordem da planilha"""
+    inicio = LINHA_CABECALHO_TABELA + 1
+    return [
+        ("Resumo por Item", COLUNAS_RESUMO, _linhas_resumo(precificado, inicio), FORMATOS_RESUMO),
+        ("Materiais", COLUNAS_MATERIAIS, _linhas_materiais(precificado, inicio), {}),
+        ("Mao de Obra", COLUNAS_MAO_OBRA, _linhas_horas(precificado, inicio, "mao_de_obra"), {}),
+        ("Ferramentas", COLUNAS_FERRAMENTAS, _linhas_horas(precificado, inicio, "ferramentas", False), {})
+    ]
 
 
-def criar_aba_materiais(
+def criar_aba_resumo(
     wb: Workbook,
     precificado: Dict[str, Any],
     numero_orcamento: str,
     cliente: str
 ) -> Worksheet:
-    """Cria aba com lista consolidada de materiais"""
-
-    ws = wb.create_sheet("Materiais")
-
-    # Cabecalho
-    linha = criar_cabecalho_planilha(ws, numero_orcamento, cliente, date.today().strftime("%d/%m/%Y"))
-
-    # Cabecalho da tabela
-    colunas = [
-        ("A", "Codigo", 15),
-        ("B", "Descricao", 40),
-        ("C", "Unidade", 10),
-        ("D", "Qtd Total", 12),
-        ("E", "Custo Unit. Orcado", 16),
-        ("F", "Custo Total Orcado", 16),
-        ("G", "Fornecedor Ref.", 25),
-        ("H", "Custo Unit. Real", 16),
-        ("I", "Custo Total Real", 16),
-        ("J", "Diferenca", 14)
-    ]
-
-    for col, titulo, largura in colunas:
-        celula = ws[f"{col}{linha}"]
-        celula.value = titulo
-        celula.style = "cabecalho"
-        ws.column_dimensions[col].width = largura
-
-    linha += 1
-    linha_inicio = linha
-
-    # Consolida materiais
-    materiais_consolidados = {}
-
-    for item in precificado.get("itens_precificados", []):
-        for mat in item.get("materiais", []):
-            codigo = mat.get("codigo", "")
-            if codigo in materiais_consolidados:
-                materiais_consolidados[codigo]["quantidade"] += mat.get("quantidade", 0)
-                materiais_consolidados[codigo]["custo"] += mat.get("custo", 0)
-            else:
-                materiais_consolidados[codigo] = {
-                    "codigo": codigo,
-                    "descricao": mat.get("descricao", ""),
-                    "unidade": mat.get("unidade", "UN"),
-                    "quantidade": mat.get("quantidade", 0),
-                    "preco_unitario": mat.get("preco_unitario", 0),
-                    "custo": mat.get("custo", 0),
-                    "fornecedor": mat.get("fornecedor_referencia", "")
-                }
+    """Cria aba com resumo hierarquico por item (grupos, itens e subitens)"""
+    ws = wb.active
+    ws.title = "Resumo por Item"
+    linhas = _linhas_resumo(precificado, LINHA_CABECALHO_TABELA + 1)
+    return _escrever_aba(ws, COLUNAS_RESUMO, linhas, numero_orcamento, cliente, FORMATOS_RESUMO)
 
-    # Adiciona linhas
-    for mat in sorted(materiais_consolidados.values(), key=lambda x: x["codigo"]):
-        ws[f"A{linha}"] = mat["codigo"]
-        ws[f"B{linha}"] = mat["descricao"]
-        ws[f"C{linha}"] = mat["unidade"]
-        ws[f"D{linha}"] = mat["quantidade"]
-        ws[f"E{linha}"] = mat["preco_unitario"]
-        ws[f"F{linha}"] = mat["custo"]
-        ws[f"G{linha}"] = mat["fornecedor"]
-        ws[f"H{linha}"] = ""
-        ws[f"I{linha}"] = f"=IF(H{linha}=\"\",\"\",H{linha}*D{linha})"
-        ws[f"J{linha}"] = f"=IF(I{linha}=\"\",\"\",I{linha}-F{linha})"
-
-        for col in "ABCDEFGHIJ":
-            ws[f"{col}{linha}"].style = "item"
 
+def adicionar_item_hierarquico(ws: Worksheet, item: Dict, idx_grupo: int, linha: int) -> int:
+    """Adiciona item com seus subitens (materiais, MO, ferramentas)"""
+    for estilo, valores in _linhas_item(item, idx_grupo, linha):
+        _escrever_linha(ws, linha, estilo, valores, len(COLUNAS_RESUMO))
         linha += 1
+    return linha
 
-    # Total
-    linha += 1
-    ws[f"A{linha}"] = ""
-    ws[f"B{linha}"] = "TOTAL"
-    ws[f"F{linha}"] = f"=SUM(F{linha_inicio}:F{linha-2})"
-    ws[f"I{linha}"] = f"=SUM(I{linha_inicio}:I{linha-2})"
-    ws[f"J{linha}"] = f"=I{linha}-F{linha}"
-
-    for col in "ABCDEFGHIJ":
-        ws[f"{col}{linha}"].style = "total"
 
-    return ws
+def criar_aba_materiais(
+    wb: Workbook,
+    precificado: Dict[str, Any],
+    numero_orcamento: str,
+    cliente: str
+) -> Worksheet:
+    """Cria aba com lista consolidada de materiais"""
+    linhas = _linhas_materiais(precificado, LINHA_CABECALHO_TABELA + 1)
+    return _escrever_aba(wb.create_sheet("Materiais"), COLUNAS_MATERIAIS, linhas, numero_orcamento, cliente)
 
 
 def criar_aba_mao_obra(
@@ -392,80 +589,8 @@ def criar_aba_mao_obra(
     cliente: str
 ) -> Worksheet:
     """Cria aba com lista consolidada de mao de obra"""
-
-    ws = wb.create_sheet("Mao de Obra")
-
-    # Cabecalho
-    linha = criar_cabecalho_planilha(ws, numero_orcamento, cliente, date.today().strftime("%d/%m/%Y"))
-
-    # Cabecalho da tabela
-    colunas = [
-        ("A", "Categoria", 20),
-        ("B", "Descricao", 35),
-        ("C", "Horas Totais", 14),
-        ("D", "Custo/Hora Orcado", 16),
-        ("E", "Custo Total Orcado", 16),
-        ("F", "Custo/Hora Real", 16),
-        ("G", "Custo Total Real", 16),
-        ("H", "Diferenca", 14)
-    ]
-
-    for col, titulo, largura in colunas:
-        celula = ws[f"{col}{linha}"]
-        celula.value = titulo
-        celula.style = "cabecalho"
-        ws.column_dimensions[col].width = largura
-
-    linha += 1
-    linha_inicio = linha
-
-    # Consolida mao de obra
-    mo_consolidada = {}
-
-    for item in precificado.get("itens_precificados", []):
-        for mo in item.get("mao_de_obra", []):
-            codigo = mo.get("codigo", "")
-            if codigo in mo_consolidada:
-                mo_consolidada[codigo]["quantidade"] += mo.get("quantidade", 0)
-                mo_consolidada[codigo]["custo"] += mo.get("custo", 0)
-            else:
-                mo_consolidada[codigo] = {
-                    "codigo": codigo,
-                    "descricao": mo.get("descricao", ""),
-                    "quantidade": mo.get("quantidade", 0),
-                    "preco_unitario": mo.get("preco_unitario", 0),
-                    "custo": mo.get("custo", 0)
-                }
-
-    # Adiciona linhas
-    for mo in sorted(mo_consolidada.values(), key=lambda x: x["codigo"]):
-        ws[f"A{linha}"] = mo["codigo"]
-        ws[f"B{linha}"] = mo["descricao"]
-        ws[f"C{linha}"] = mo["quantidade"]
-        ws[f"D{linha}"] = mo["preco_unitario"]
-        ws[f"E{linha}"] = mo["custo"]
-        ws[f"F{linha}"] = ""
-        ws[f"G{linha}"] = f"=IF(F{linha}=\"\",\"\",F{linha}*C{linha})"
-        ws[f"H{linha}"] = f"=IF(G{linha}=\"\",\"\",G{linha}-E{linha})"
-
-        for col in "ABCDEFGH":
-            ws[f"{col}{linha}"].style = "item"
-
-        linha += 1
-
-    # Total
-    linha += 1
-    ws[f"A{linha}"] = ""
-    ws[f"B{linha}"] = "TOTAL"
-    ws[f"C{linha}"] = f"=SUM(C{linha_inicio}:C{linha-2})"
-    ws[f"E{linha}"] = f"=SUM(E{linha_inicio}:E{linha-2})"
-    ws[f"G{linha}"] = f"=SUM(G{linha_inicio}:G{linha-2})"
-    ws[f"H{linha}"] = f"=G{linha}-E{linha}"
-
-    for col in "ABCDEFGH":
-        ws[f"{col}{linha}"].style = "total"
-
-    return ws
+    linhas = _linhas_horas(precificado, LINHA_CABECALHO_TABELA + 1, "mao_de_obra")
+    return _escrever_aba(wb.create_sheet("Mao de Obra"), COLUNAS_MAO_OBRA, linhas, numero_orcamento, cliente)
 
 
 def criar_aba_ferramentas(
@@ -474,89 +599,17 @@ def criar_aba_ferramentas(
     numero_orcamento: str,
     cliente: str
 ) -> Worksheet:
-    """Cria aba com lista consolidada de ferramentas"""
-
-    ws = wb.create_sheet("Ferramentas")
-
-    # Cabecalho
-    linha = criar_cabecalho_planilha(ws, numero_orcamento, cliente, date.today().strftime("%d/%m/%Y"))
-
-    # Cabecalho da tabela
-    colunas = [
-        ("A", "Codigo", 15),
-        ("B", "Descricao", 35),
-        ("C", "Horas Uso", 12),
-        ("D", "Custo/Hora Orcado", 16),
-        ("E", "Custo Total Orcado", 16),
-        ("F", "Custo/Hora Real", 16),
-        ("G", "Custo Total Real", 16),
-        ("H", "Diferenca", 14)
-    ]
-
-    for col, titulo, largura in colunas:
-        celula = ws[f"{col}{linha}"]
-        celula.value = titulo
-        celula.style = "cabecalho"
-        ws.column_dimensions[col].width = largura
-
-    linha += 1
-    linha_inicio = linha
-
-    # Consolida ferramentas
-    fer_consolidadas = {}
-
-    for item in precificado.get("itens_precificados", []):
-        for fer in item.get("ferramentas", []):
-            codigo = fer.get("codigo", "")
-            if codigo in fer_consolidadas:
-                fer_consolidadas[codigo]["quantidade"] += fer.get("quantidade", 0)
-                fer_consolidadas[codigo]["custo"] += fer.get("custo", 0)
-            else:
-                fer_consolidadas[codigo] = {
-                    "codigo": codigo,
-                    "descricao": fer.get("descricao", ""),
-                    "quantidade": fer.get("quantidade", 0),
-                    "preco_unitario": fer.get("preco_unitario", 0),
-                    "custo": fer.get("custo", 0)
-                }
-
-    # Adiciona linhas
-    for fer in sorted(fer_consolidadas.values(), key=lambda x: x["codigo"]):
-        ws[f"A{linha}"] = fer["codigo"]
-        ws[f"B{linha}"] = fer["descricao"]
-        ws[f"C{linha}"] = fer["quantidade"]
-        ws[f"D{linha}"] = fer["preco_unitario"]
-        ws[f"E{linha}"] = fer["custo"]
-        ws[f"F{linha}"] = ""
-        ws[f"G{linha}"] = f"=IF(F{linha}=\"\",\"\",F{linha}*C{linha})"
-        ws[f"H{linha}"] = f"=IF(G{linha}=\"\",\"\",G{linha}-E{linha})"
-
-        for col in "ABCDEFGH":
-            ws[f"{col}{linha}"].style = "item"
-
-        linha += 1
-
-    # Total
-    if linha > linha_inicio:
-        linha += 1
-        ws[f"A{linha}"] = ""
-        ws[f"B{linha}"] = "TOTAL"
-        ws[f"C{linha}"] = f"=SUM(C{linha_inicio}:C{linha-2})"
-        ws[f"E{linha}"] = f"=SUM(E{linha_inicio}:E{linha-2})"
-        ws[f"G{linha}"] = f"=SUM(G{linha_inicio}:G{linha-2})"
-        ws[f"H{linha}"] = f"=G{linha}-E{linha}"
-
-        for col in "ABCDEFGH":
-            ws[f"{col}{linha}"].style = "total"
-
-    return ws
+    """Cria aba com lista consolidada de ferramentas (total so se houver ferramentas)"""
+    linhas = _linhas_horas(precificado, LINHA_CABECALHO_TABELA + 1, "ferramentas", False)
+    return _escrever_aba(wb.create_sheet("Ferramentas"), COLUNAS_FERRAMENTAS, linhas, numero_orcamento, cliente)
 
 
 def gerar_planilha_interna(
     precificado: Dict[str, Any],
     numero_orcamento: str,
     output_path: Optional[str] = None,
-    configs: Optional[Dict] = None
+    configs: Optional[Dict] = None,
+    write_only: bool = False
 ) -> Dict[str, Any]:
     """
     Gera planilha Excel interna com custos detalhados
@@ -566,6 +619,7 @@ def gerar_planilha_interna(
         numero_orcamento: Numero do orcamento
         output_path: Caminho de saida (gera automatico se nao informado)
         configs: Configuracoes
+        write_only: Grava as linhas em streaming (menos memoria em orcamentos grandes)
 
     Returns:
         Dicionario com resultado:
@@ -585,16 +639,23 @@ def gerar_planilha_interna(
         cliente_nome = dados_cliente.get("razao_social") or precificado.get("cliente", "Cliente")
 
         # Cria workbook
-        wb = Workbook()
+        wb = Workbook(write_only=write_only)
 
         # Cria estilos
         criar_estilos(wb)
 
         # Cria abas
-        criar_aba_resumo(wb, precificado, numero_orcamento, cliente_nome)
-        criar_aba_materiais(wb, precificado, numero_orcamento, cliente_nome)
-        criar_aba_mao_obra(wb, precificado, numero_orcamento, cliente_nome)
-        criar_aba_ferramentas(wb, precificado, numero_orcamento, cliente_nome)
+        if write_only:
+            estilos = EstilosStreaming()
+            for titulo, colunas, linhas, formatos in _abas(precificado):
+                _escrever_aba_streaming(
+                    wb, titulo, colunas, linhas, numero_orcamento, cliente_nome, estilos, formatos
+                )
+        else:
+            criar_aba_resumo(wb, precificado, numero_orcamento, cliente_nome)
+            criar_aba_materiais(wb, precificado, numero_orcamento, cliente_nome)
+            criar_aba_mao_obra(wb, precificado, numero_orcamento, cliente_nome)
+            criar_aba_ferramentas(wb, precificado, numero_orcamento, cliente_nome)
 
         # Define caminho de saida
         if output_path is None:
@@ -649,6 +710,11 @@ def main():
     parser.add_argument("--input", "-i", required=True, help="Arquivo precificado.json")
     parser.add_argument("--output", "-o", help="Arquivo Excel de saida")
     parser.add_argument("--numero", "-n", required=True, help="Numero do orcamento")
+    parser.add_argument(
+        "--streaming",
+        action="store_true",
+        help="Grava em modo write_only (menos memoria em orcamentos grandes)"
+    )
 
     args = parser.parse_args()
 
@@ -658,7 +724,8 @@ def main():
     resultado = gerar_planilha_interna(
         precificado,
         args.numero,
-        args.output
+        args.output,
+        write_only=args.streaming
     )
 
     if resultado["sucesso"]:
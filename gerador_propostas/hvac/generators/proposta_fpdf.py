@@ -0,0 +1,702 @@
+"""
+Renderizador rapido da proposta comercial com fpdf2
+
+Desenha a proposta a partir do mesmo contexto do template HTML
+(proposta_base.html): cabecalhos, marca d'agua, dados do cliente, itens por
+grupo, investimento, qualificacoes, condicoes, exclusoes, responsavel,
+assinaturas e rodape. O layout segue o CSS do template (cores, tamanhos e
+margens A4), sem paridade exata de pixels: usa a fonte Helvetica embutida
+(texto fora de latin-1 e aproximado) e nao precisa do WeasyPrint nem das
+bibliotecas do sistema, gerando cada PDF em poucas dezenas de milissegundos.
+
+Mesma interface de RenderizadorProposta (carregar_asset_base64, chave_cache
+e gerar_pdf), selecionada em gerar_proposta_pdf(..., backend="fpdf").
+"""
+
+import base64
+import re
+import threading
+import unicodedata
+from io import BytesIO
+from pathlib import Path
+from typing import Dict, Any, List, Optional, Tuple
+
+from fpdf import FPDF, FPDF_VERSION
+from fpdf.enums import MethodReturnValue
+
+from ..utils.cache_pdf import hash_arquivos, hash_chave
+from ..utils.perfil import span
+from .renderizador import obter_renderizador
+from .utils import formatar_moeda, formatar_numero
+
+
+# Cores do template (proposta_styles.css)
+COR_PRIMARIA = (10, 148, 214)
+COR_SECUNDARIA = (0, 168, 89)
+COR_TEXTO_SECUNDARIO = (51, 51, 51)
+COR_CABECALHO_TABELA = (241, 242, 246)
+COR_FUNDO_CLARO = (248, 249, 250)
+COR_FUNDO_REFERENCIA = (249, 249, 249)
+COR_LINHA_TABELA = (224, 230, 237)
+COR_SEPARADOR = (170, 170, 170)
+
+# Pagina A4 (mm): margens do @page do CSS
+MARGEM_LATERAL = 15
+MARGEM_TOPO = 20
+MARGEM_TOPO_PRIMEIRA = 10
+MARGEM_RODAPE = 30
+
+# Espacamento interno das celulas da tabela de itens (mm)
+PADDING_X = 2.1
+PADDING_Y = 1.3
+
+# Largura maxima (px) das imagens embutidas (reduzidas uma vez por processo)
+LARGURA_MAX_IMAGEM = 800
+QUALIDADE_JPEG = 88
+
+FONTE = "Helvetica"
+
+# Caracteres comuns fora de latin-1 (fonte embutida)
+_SUBSTITUICOES = str.maketrans({
+    "–": "-", "—": "-", "‘": "'", "’": "'",
+    "“": '"', "”": '"', "•": "-", "…": "...",
+    "▪": "-", " ": " "
+})
+
+
+def _texto(valor: Any) -> str:
+    """Texto compativel com a fonte embutida (latin-1)"""
+    if valor is None:
+        return ""
+    texto = str(valor).translate(_SUBSTITUICOES)
+    try:
+        texto.encode("latin-1")
+        return texto
+    except UnicodeEncodeError:
+        pass
+    # Remove acentos de caracteres fora de latin-1; o restante vira "?"
+    normalizado = "".join(
+        c if ord(c) < 256 else unicodedata.normalize("NFKD", c)[0]
+        for c in texto
+    )
+    return normalizado.encode("latin-1", "replace").decode("latin-1")
+
+
+# Marcadores de enfase do markdown do fpdf2 e o caractere de escape
+_PADRAO_MARKDOWN = re.compile(
+    "|".join(re.escape(m) for m in (FPDF.MARKDOWN_ESCAPE_CHARACTER, *FPDF.MARKDOWN_MARKERS))
+)
+
+
+def _texto_literal(valor: Any) -> str:
+    """
+    Texto do usuario para celulas com markdown=True
+
+    Escapa os marcadores ("**", "__", "--", "~~") e o proprio escape, para
+    que o valor seja impresso como digitado (ex: "Obras civis -- alvenaria").
+    """
+    return _PADRAO_MARKDOWN.sub(lambda m: FPDF.MARKDOWN_ESCAPE_CHARACTER + m.group(0), _texto(valor))
+
+
+def _quebrar_texto(pdf: FPDF, texto: str, largura: float) -> List[str]:
+    """
+    Quebra o texto em linhas que cabem na largura (fonte atual)
+
+    Soma as larguras das palavras (a fonte embutida nao tem kerning), sem
+    remedir a linha inteira a cada caractere.
+    """
+    espaco = pdf.get_string_width(" ")
+    linhas = []
+    atual = []
+    largura_atual = 0.0
+    for palavra in texto.split():
+        largura_palavra = pdf.get_string_width(palavra)
+        if atual and largura_atual + espaco + largura_palavra <= largura:
+            atual.append(palavra)
+            largura_atual += espaco + largura_palavra
+            continue
+        if atual:
+            linhas.append(" ".join(atual))
+        # Palavra maior que a coluna: corta por caractere
+        while largura_palavra > largura and len(palavra) > 1:
+            corte = len(palavra) - 1
+            while corte > 1 and pdf.get_string_width(palavra[:corte]) > largura:
+                corte -= 1
+            linhas.append(palavra[:corte])
+            palavra = palavra[corte:]
+            largura_palavra = pdf.get_string_width(palavra)
+        atual = [palavra]
+        largura_atual = largura_palavra
+    if atual or not linhas:
+        linhas.append(" ".join(atual))
+    return linhas
+
+
+def _pt(tamanho: float) -> float:
+    """Altura de linha (mm) para um tamanho de fonte em pt (line-height 1.35)"""
+    return tamanho * 1.35 * 0.3528
+
+
+class _DocumentoProposta(FPDF):
+    """Documento fpdf2 com cabecalho, marca d'agua e rodape do template"""
+
+    def __init__(self, contexto: Dict[str, Any], imagem):
+        super().__init__(orientation="P", unit="mm", format="A4")
+        self.contexto = contexto
+        self.imagem = imagem
+        self.set_margins(MARGEM_LATERAL, MARGEM_TOPO_PRIMEIRA, MARGEM_LATERAL)
+        self.set_auto_page_break(auto=True, margin=MARGEM_RODAPE)
+        self.set_title(_texto(f"Orcamento {contexto.get('numero_orcamento', '')}"))
+        self.set_creator("hvac.generators.proposta_fpdf")
+
+    def header(self):
+        contexto = self.contexto
+
+        # Marca d'agua: 140% da largura, centrada em 70% x 50%, opacidade 5%
+        marca = self.imagem(contexto.get("marca_dagua_base64"))
+        if marca is not None:
+            largura = self.w * 1.4
+            altura = largura * marca[2]
+            with self.local_context(fill_opacity=0.05):
+                self.image(marca[0], x=self.w * 0.7 - largura / 2, y=self.h / 2 - altura / 2, w=largura)
+
+        if contexto.get("rascunho"):
+            with self.local_context(fill_opacity=0.08, text_color=(0, 0, 0)):
+                self.set_font(FONTE, "B", 110)
+                with self.rotation(45, x=self.w / 2, y=self.h / 2):
+                    largura_texto = self.get_string_width("RASCUNHO")
+                    self.text(self.w / 2 - largura_texto / 2, self.h / 2 + 14, "RASCUNHO")
+
+        if self.page_no() == 1:
+            self.set_y(MARGEM_TOPO_PRIMEIRA)
+            return
+
+        # Cabecalho compacto (paginas seguintes)
+        topo = 8
+        logo = self.imagem(contexto.get("logo_secundario_base64") or contexto.get("logo_base64"))
+        if logo is not None:
+            self.image(logo[0], x=MARGEM_LATERAL, y=topo, h=7.4)
+        self.set_text_color(0, 0, 0)
+        self.set_xy(self.w / 2, topo)
+        self.set_font(FONTE, "B", 8.5)
+        self.cell(self.w / 2 - MARGEM_LATERAL, 4, _texto(f"ORÇAMENTO {contexto.get('numero_orcamento', '')}"),
+                  align="R", new_x="LEFT", new_y="NEXT")
+        self.set_font(FONTE, "", 7)
+        self.cell(self.w / 2 - MARGEM_LATERAL, 3.4,
+                  _texto(f"{contexto.get('cidade', '')}, {contexto.get('data_extenso', '')}"), align="R")
+        self.set_draw_color(*COR_PRIMARIA)
+        self.set_line_width(0.32)
+        self.line(MARGEM_LATERAL, topo + 8.8, self.w - MARGEM_LATERAL, topo + 8.8)
+        self.set_y(MARGEM_TOPO)
+
+    def footer(self):
+        empresa = self.contexto.get("empresa") or {}
+        endereco = empresa.get("endereco") or {}
+        topo = self.h - MARGEM_RODAPE + 4
+
+        self.set_draw_color(*COR_PRIMARIA)
+        self.set_line_width(0.66)
+        self.line(MARGEM_LATERAL, topo, self.w - MARGEM_LATERAL, topo)
+
+        # Logos a direita (altura maxima 37px)
+        x_logo = self.w - MARGEM_LATERAL - 2.6
+        for chave in ("logo_asbrav_base64", "logo_abrava_base64"):
+            logo = self.imagem(self.contexto.get(chave))
+            if logo is None:
+                continue
+            largura = 9.8 / logo[2]
+            x_logo -= largura
+            self.image(logo[0], x=x_logo, y=topo + 3, w=largura)
+            x_logo -= 3.2
+
+        largura_texto = x_logo - MARGEM_LATERAL - 5
+        linha = _pt(7.2) * 1.1
+        self.set_xy(MARGEM_LATERAL, topo + 2.6)
+        self.set_font(FONTE, "B", 8)
+        self.set_text_color(*COR_PRIMARIA)
+        self.cell(self.get_string_width(_texto(empresa.get("razao_social"))) + 1, linha,
+                  _texto(empresa.get("razao_social")))
+        self.set_font(FONTE, "", 7.2)
+        self.set_text_color(*COR_SEPARADOR)
+        self.cell(6, linha, "|", align="C")
+        self.set_text_color(0, 0, 0)
+        self.cell(0, linha, _texto(f"CNPJ: {empresa.get('cnpj', '')}"), new_x="LMARGIN", new_y="NEXT")
+
+        self.set_font(FONTE, "", 7.2)
+        texto_endereco = (
+            f"{endereco.get('logradouro', '')} - {endereco.get('bairro', '')}, "
+            f"{endereco.get('cidade', '')} - {endereco.get('estado', '')}, {endereco.get('cep', '')}"
+        )
+        self.cell(largura_texto, linha, _texto(texto_endereco), new_x="LMARGIN", new_y="NEXT")
+
+        self.set_font(FONTE, "B", 7.2)
+        self.cell(self.get_string_width(_texto(empresa.get("telefone"))) + 1, linha, _texto(empresa.get("telefone")))
+        self.set_font(FONTE, "", 7.2)
+        self.cell(largura_texto, linha, _texto(f"  |  {empresa.get('email', '')}  |  {empresa.get('site', '')}"))
+
+
+class RenderizadorPropostaFPDF:
+    """Renderizador fpdf2 da proposta (imagens decodificadas e reduzidas em cache)"""
+
+    def __init__(self, largura_max_imagem: int = LARGURA_MAX_IMAGEM):
+        """
+        Args:
+            largura_max_imagem: Largura maxima (px) das imagens embutidas
+        """
+        self.largura_max_imagem = largura_max_imagem
+        # base64 -> (bytes JPEG, largura px, proporcao altura/largura)
+        self._imagens: Dict[str, Optional[Tuple[bytes, int, float]]] = {}
+        self._lock = threading.Lock()
+
+    def carregar_asset_base64(self, caminho: str) -> Optional[str]:
+        """Imagem em base64 (cache de imagens compartilhado com o renderizador HTML)"""
+        return obter_renderizador().carregar_asset_base64(caminho)
+
+    def chave_cache(self, contexto: Dict[str, Any]) -> str:
+        """
+        Chave do cache de PDFs para um contexto
+
+        Args:
+            contexto: Contexto do template (o campo rascunho e ignorado)
+
+        Returns:
+            Hash do contexto, do codigo deste layout e da versao do fpdf2
+        """
+        with span("cache_pdf.chave"):
+            return hash_chave(
+                "proposta_fpdf",
+                {**contexto, "rascunho": False},
+                hash_arquivos([Path(__file__)]),
+                FPDF_VERSION
+            )
+
+    def imagem(self, conteudo_base64: Optional[str]) -> Optional[Tuple[BytesIO, int, float]]:
+        """
+        Imagem pronta para o fpdf2 a partir do base64 do contexto
+
+        A decodificacao e a reducao sao feitas uma vez por imagem.
+
+        Returns:
+            (BytesIO com JPEG, largura px, proporcao altura/largura) ou None
+        """
+        if not conteudo_base64:
+            return None
+        with self._lock:
+            em_cache = self._imagens.get(conteudo_base64, False)
+        if em_cache is False:
+            with span("fpdf.preparar_imagem"):
+                em_cache = self._preparar_imagem(conteudo_base64)
+            with self._lock:
+                self._imagens[conteudo_base64] = em_cache
+        if em_cache is None:
+            return None
+        return BytesIO(em_cache[0]), em_cache[1], em_cache[2]
+
+    def _preparar_imagem(self, conteudo_base64: str) -> Optional[Tuple[bytes, int, float]]:
+        """
+        Decodifica, reduz e converte a imagem para JPEG (None se invalida)
+
+        O fpdf2 embute JPEG sem recomprimir; PNG seria recomprimido (zlib)
+        a cada documento. A transparencia e achatada sobre fundo branco,
+        que e o fundo de todas as imagens da proposta.
+        """
+        from PIL import Image
+
+        try:
+            with Image.open(BytesIO(base64.b64decode(conteudo_base64))) as original:
+                imagem = original.convert("RGBA")
+        except (OSError, ValueError):
+            return None
+
+        if imagem.width > self.largura_max_imagem:
+            altura = round(imagem.height * self.largura_max_imagem / imagem.width)
+            imagem = imagem.resize((self.largura_max_imagem, altura), Image.LANCZOS)
+
+        fundo = Image.new("RGB", imagem.size, (255, 255, 255))
+        fundo.paste(imagem, mask=imagem.getchannel("A"))
+        saida = BytesIO()
+        fundo.save(saida, format="JPEG", quality=QUALIDADE_JPEG)
+        return saida.getvalue(), fundo.width, fundo.height / fundo.width
+
+    def renderizar(self, contexto: Dict[str, Any]) -> FPDF:
+        """
+        Monta o documento da proposta
+
+        Args:
+            contexto: Contexto do template (mesmo de proposta_base.html)
+
+        Returns:
+            Documento fpdf2 (use .output(caminho) para gravar)
+        """
+        pdf = _DocumentoProposta(contexto, self.imagem)
+        pdf.add_page()
+
+        with span("fpdf.cabecalho"):
+            self._cabecalho_primeira_pagina(pdf, contexto)
+            self._cliente(pdf, contexto)
+        with span("fpdf.itens"):
+            self._itens(pdf, contexto)
+        with span("fpdf.fechamento"):
+            self._investimento(pdf, contexto)
+            self._fechamento(pdf, contexto)
+        return pdf
+
+    def gerar_pdf(
+        self,
+        contexto: Dict[str, Any],
+        output_path: Path,
+        rascunho_path: Optional[Path] = None
+    ):
+        """
+        Gera o PDF da proposta (e, opcionalmente, o rascunho)
+
+        Args:
+            contexto: Contexto do template (rascunho e ignorado/forcado)
+            output_path: PDF principal
+            rascunho_path: PDF rascunho (None para nao gerar)
+        """
+        for rascunho, caminho in ((False, output_path), (True, rascunho_path)):
+            if caminho is None:
+                continue
+            pdf = self.renderizar({**contexto, "rascunho": rascunho})
+            with span("fpdf.output", arquivo=Path(caminho).name):
+                pdf.output(str(caminho))
+
+    # Secoes do documento
+
+    def _cabecalho_primeira_pagina(self, pdf: FPDF, contexto: Dict[str, Any]):
+        topo = pdf.get_y()
+        logo = self.imagem(contexto.get("logo_base64"))
+        if logo is not None:
+            pdf.image(logo[0], x=MARGEM_LATERAL, y=topo, h=15.9)
+
+        pdf.set_text_color(0, 0, 0)
+        pdf.set_xy(pdf.w / 2, topo + 5)
+        pdf.set_font(FONTE, "B", 10.5)
+        pdf.cell(pdf.w / 2 - MARGEM_LATERAL, 5, _texto(f"ORÇAMENTO Nº {contexto.get('numero_orcamento', '')}"),
+                 align="R", new_x="LEFT", new_y="NEXT")
+        pdf.set_font(FONTE, "", 7.5)
+        pdf.cell(pdf.w / 2 - MARGEM_LATERAL, 4,
+                 _texto(f"{contexto.get('cidade', '')}, {contexto.get('data_extenso', '')}"), align="R")
+
+        linha_y = topo + 18.5
+        pdf.set_draw_color(*COR_PRIMARIA)
+        pdf.set_line_width(0.66)
+        pdf.line(MARGEM_LATERAL, linha_y, pdf.w - MARGEM_LATERAL, linha_y)
+
+        # Titulo sublinhado em verde
+        pdf.set_y(linha_y + 4)
+        pdf.set_font(FONTE, "B", 14)
+        pdf.set_text_color(*COR_PRIMARIA)
+        pdf.set_char_spacing(0.4)
+        titulo = "PROPOSTA COMERCIAL"
+        largura = pdf.get_string_width(titulo) + 10.6
+        pdf.cell(0, 7, titulo, align="C", new_x="LMARGIN", new_y="NEXT")
+        pdf.set_char_spacing(0)
+        pdf.set_draw_color(*COR_SECUNDARIA)
+        pdf.set_line_width(0.53)
+        pdf.line(pdf.w / 2 - largura / 2, pdf.get_y() + 0.8, pdf.w / 2 + largura / 2, pdf.get_y() + 0.8)
+        pdf.set_y(pdf.get_y() + 5)
+
+    def _cliente(self, pdf: FPDF, contexto: Dict[str, Any]):
+        cliente = contexto.get("cliente") or {}
+        colunas = [
+            [
+                ("Cliente / Razão Social", cliente.get("razao_social")),
+                ("CNPJ / CPF", cliente.get("cnpj") or cliente.get("cpf") or "N/I"),
+                ("Endereço de Atendimento", cliente.get("endereco"))
+            ],
+            [
+                ("Aos cuidados de", cliente.get("contato_nome")),
+                ("E-mail", cliente.get("contato_email") or "N/I"),
+                ("Telefone", cliente.get("contato_telefone") or "N/I")
+            ]
+        ]
+
+        topo = pdf.get_y()
+        largura_util = pdf.w - 2 * MARGEM_LATERAL
+        largura_coluna = (largura_util - 2 * 2.6 - 4) / 2
+        fundo = topo
+        pdf.set_text_color(0, 0, 0)
+        for indice, campos in enumerate(colunas):
+            x = MARGEM_LATERAL + 2.6 + indice * (largura_coluna + 4)
+            pdf.set_xy(x, topo + 2.6)
+            for rotulo, valor in campos:
+                pdf.set_x(x)
+                pdf.set_font(FONTE, "B", 7)
+                pdf.cell(largura_coluna, _pt(7), _texto(rotulo.upper()), new_x="LEFT", new_y="NEXT")
+                pdf.set_font(FONTE, "", 8.8)
+                pdf.multi_cell(largura_coluna, _pt(8.8), _texto(valor), new_x="LEFT", new_y="NEXT")
+                pdf.set_y(pdf.get_y() + 1)
+            fundo = max(fundo, pdf.get_y())
+
+        pdf.set_draw_color(*COR_PRIMARIA)
+        pdf.set_line_width(0.26)
+        pdf.rect(MARGEM_LATERAL, topo, largura_util, fundo - topo + 1.6)
+        pdf.set_y(fundo + 4.8)
+
+        # Referencia: barra lateral azul e fundo cinza
+        pdf.set_font(FONTE, "B", 9)
+        rotulo = "Referência: "
+        texto = _texto(contexto.get("referencia"))
+        topo = pdf.get_y()
+        pdf.set_fill_color(*COR_FUNDO_REFERENCIA)
+        pdf.rect(MARGEM_LATERAL, topo, largura_util, 7.4, style="F")
+        pdf.set_fill_color(*COR_PRIMARIA)
+        pdf.rect(MARGEM_LATERAL, topo, 1.06, 7.4, style="F")
+        pdf.set_xy(MARGEM_LATERAL + 4.2, topo + 1.6)
+        pdf.cell(pdf.get_string_width(_texto(rotulo)), _pt(9), _texto(rotulo))
+        pdf.set_font(FONTE, "", 9)
+        pdf.cell(largura_util - 6, _pt(9), texto)
+        pdf.set_y(topo + 7.4 + 3.2)
+
+    def _titulo_secao(self, pdf: FPDF, titulo: str, largura: float, x: Optional[float] = None):
+        pdf.set_x(MARGEM_LATERAL if x is None else x)
+        pdf.set_font(FONTE, "B", 8.5)
+        pdf.set_fill_color(*COR_PRIMARIA)
+        pdf.set_text_color(255, 255, 255)
+        pdf.cell(largura, 5.4, "  " + _texto(titulo.upper()), fill=True, new_x="LEFT", new_y="NEXT")
+        pdf.set_text_color(0, 0, 0)
+        pdf.set_y(pdf.get_y() + 1.6)
+
+    def _itens(self, pdf: FPDF, contexto: Dict[str, Any]):
+        """
+        Tabela de itens por grupo
+
+        Desenhada linha a linha (cell + quebra de palavras propria) em vez
+        de FPDF.table: a quebra de linha generica do fpdf2 mede o texto
+        caractere a caractere e domina o tempo em propostas com muitos itens.
+        """
+        self._titulo_secao(pdf, "1. Descrição dos Serviços e Valores", pdf.w - 2 * MARGEM_LATERAL)
+
+        mostrar_unitario = contexto.get("mostrar_unitario")
+        larguras = [10.6, 0, 9.3, 11.9] + ([23.8] if mostrar_unitario else []) + [23.8]
+        larguras[1] = pdf.w - 2 * MARGEM_LATERAL - sum(larguras)
+        alinhamentos = ["C", "L", "C", "C"] + (["R"] if mostrar_unitario else []) + ["R"]
+        cabecalho = ["ITEM", "DESCRIÇÃO DETALHADA DOS SERVIÇOS", "UN.", "QTD."]
+        cabecalho += (["UNITÁRIO"] if mostrar_unitario else []) + ["TOTAL"]
+        cabecalho = [_texto(titulo) for titulo in cabecalho]
+
+        # Linha de grupo: numero + nome ocupando as demais colunas
+        larguras_grupo = [larguras[0], sum(larguras[1:])]
+
+        def desenhar_cabecalho():
+            pdf.set_font(FONTE, "B", 8)
+            self._linha_tabela(pdf, larguras, alinhamentos, cabecalho,
+                               fundo=COR_CABECALHO_TABELA, borda=COR_PRIMARIA, espessura=0.53)
+
+        desenhar_cabecalho()
+        for grupo in contexto.get("grupos", []):
+            numero = grupo.get("numero", "")
+            pdf.set_font(FONTE, "B", 8.5)
+            self._linha_tabela(pdf, larguras_grupo, ["C", "L"], [str(numero), _texto(grupo.get("nome"))],
+                               fundo=COR_FUNDO_CLARO, borda=COR_PRIMARIA, repetir=desenhar_cabecalho)
+
+            pdf.set_font(FONTE, "", 8.5)
+            for posicao, item in enumerate(grupo.get("itens", []), start=1):
+                valores = [
+                    f"{numero}.{posicao}",
+                    _texto(item.get("descricao")),
+                    _texto(item.get("unidade")),
+                    formatar_numero(item.get("quantidade", 0))
+                ]
+                if mostrar_unitario:
+                    valores.append(formatar_moeda(item.get("valor_unitario", 0)))
+                valores.append(formatar_moeda(item.get("valor_total", 0)))
+                self._linha_tabela(pdf, larguras, alinhamentos, valores, repetir=desenhar_cabecalho)
+
+        pdf.set_y(pdf.get_y() + 3.2)
+
+    def _linha_tabela(
+        self,
+        pdf: FPDF,
+        larguras: List[float],
+        alinhamentos: List[str],
+        valores: List[str],
+        fundo: Optional[Tuple[int, int, int]] = None,
+        borda: Tuple[int, int, int] = COR_LINHA_TABELA,
+        espessura: float = 0.26,
+        repetir=None
+    ):
+        """
+        Desenha uma linha da tabela; a segunda coluna quebra em varias linhas
+
+        Se a linha nao couber na pagina, abre uma nova e chama repetir()
+        (cabecalho da tabela) antes de desenha-la.
+        """
+        altura_linha = _pt(pdf.font_size_pt)
+        linhas_texto = _quebrar_texto(pdf, valores[1], larguras[1] - 2 * PADDING_X)
+        altura = len(linhas_texto) * altura_linha + 2 * PADDING_Y
+
+        if pdf.get_y() + altura > pdf.page_break_trigger:
+            estilo = pdf.font_style
+            tamanho = pdf.font_size_pt
+            pdf.add_page()
+            if repetir is not None:
+                repetir()
+            pdf.set_font(FONTE, estilo, tamanho)
+
+        topo = pdf.get_y()
+        largura_total = sum(larguras)
+        if fundo is not None:
+            pdf.set_fill_color(*fundo)
+            pdf.rect(MARGEM_LATERAL, topo, largura_total, altura, style="F")
+
+        x = MARGEM_LATERAL
+        for indice, (largura, alinhamento, valor) in enumerate(zip(larguras, alinhamentos, valores)):
+            textos = linhas_texto if indice == 1 else [valor]
+            for posicao, texto in enumerate(textos):
+                pdf.set_xy(x + PADDING_X, topo + PADDING_Y + posicao * altura_linha)
+                pdf.cell(largura - 2 * PADDING_X, altura_linha, texto, align=alinhamento)
+            x += largura
+
+        pdf.set_draw_color(*borda)
+        pdf.set_line_width(espessura)
+        pdf.line(MARGEM_LATERAL, topo + altura, MARGEM_LATERAL + largura_total, topo + altura)
+        pdf.set_y(topo + altura)
+
+    def _investimento(self, pdf: FPDF, contexto: Dict[str, Any]):
+        altura = 19
+        if pdf.get_y() + altura > pdf.page_break_trigger:
+            pdf.add_page()
+
+        largura_util = pdf.w - 2 * MARGEM_LATERAL
+        topo = pdf.get_y()
+        pdf.set_fill_color(*COR_FUNDO_CLARO)
+        pdf.set_draw_color(*COR_PRIMARIA)
+        pdf.set_line_width(0.53)
+        pdf.rect(MARGEM_LATERAL, topo, largura_util, altura, style="DF")
+
+        largura_texto = largura_util - 6.4
+        pdf.set_xy(MARGEM_LATERAL + 3.2, topo + 2)
+        pdf.set_font(FONTE, "B", 9)
+        pdf.set_text_color(0, 0, 0)
+        pdf.cell(largura_texto, _pt(9), "INVESTIMENTO TOTAL:", align="R", new_x="LEFT", new_y="NEXT")
+        pdf.set_font(FONTE, "B", 15)
+        pdf.set_text_color(*COR_PRIMARIA)
+        pdf.cell(largura_texto, _pt(15), formatar_moeda(contexto.get('valor_total', 0)),
+                 align="R", new_x="LEFT", new_y="NEXT")
+        pdf.set_font(FONTE, "I", 8)
+        pdf.set_text_color(*COR_TEXTO_SECUNDARIO)
+        pdf.cell(largura_texto, _pt(8), _texto(f"({contexto.get('valor_extenso', '')})"), align="R")
+        pdf.set_text_color(0, 0, 0)
+        pdf.set_y(topo + altura + 4)
+
+    def _lista(self, pdf: FPDF, itens: List[Tuple[str, str]], x: float, largura: float, medir: bool = False) -> float:
+        """Lista com marcadores verdes; retorna a altura (sem desenhar se medir)"""
+        altura_total = 0.0
+        linha = _pt(8)
+        for rotulo, valor in itens:
+            texto = f"**{_texto_literal(rotulo)}** {_texto_literal(valor)}" if rotulo else _texto_literal(valor)
+            if not medir:
+                y = pdf.get_y()
+                pdf.set_fill_color(*COR_SECUNDARIA)
+                pdf.rect(x + 4, y + linha / 2 - 0.7, 1.4, 1.4, style="F")
+                pdf.set_xy(x + 7.2, y)
+            altura = pdf.multi_cell(
+                largura - 7.2, linha, texto,
+                markdown=True,
+                align="L",
+                dry_run=medir,
+                output=MethodReturnValue.HEIGHT,
+                new_x="LEFT",
+                new_y="NEXT"
+            )
+            if not medir:
+                pdf.set_y(pdf.get_y() + 0.8)
+            altura_total += altura + 0.8
+        return altura_total
+
+    def _grade(self, pdf: FPDF, colunas: List[Tuple[str, List[Tuple[str, str]]]]):
+        """Duas secoes lado a lado (grade-secoes); quebra a pagina antes se nao couber"""
+        largura = (pdf.w - 2 * MARGEM_LATERAL - 4) / 2
+        pdf.set_font(FONTE, "", 8)
+        altura = max(self._lista(pdf, itens, 0, largura, medir=True) for _, itens in colunas) + 9.6
+        if pdf.get_y() + altura > pdf.page_break_trigger:
+            pdf.add_page()
+
+        topo = pdf.get_y()
+        fundo = topo
+        for indice, (titulo, itens) in enumerate(colunas):
+            x = MARGEM_LATERAL + indice * (largura + 4)
+            pdf.set_y(topo)
+            self._titulo_secao(pdf, titulo, largura, x=x)
+            pdf.set_font(FONTE, "", 8)
+            self._lista(pdf, itens, x, largura)
+            fundo = max(fundo, pdf.get_y())
+        pdf.set_y(fundo + 2.6)
+
+    def _fechamento(self, pdf: FPDF, contexto: Dict[str, Any]):
+        condicoes = contexto.get("condicoes") or {}
+        responsavel = contexto.get("responsavel") or {}
+
+        self._grade(pdf, [
+            ("2. Qualificações e Diferenciais", [("", d) for d in contexto.get("destaques", [])]),
+            ("3. Condições Comerciais", [
+                ("Pagamento:", condicoes.get("forma_pagamento")),
+                ("Prazo:", condicoes.get("prazo_execucao")),
+                ("Garantia:", condicoes.get("garantia")),
+                ("Validade:", f"{condicoes.get('validade_dias', '')} dias")
+            ])
+        ])
+        self._grade(pdf, [
+            ("4. Exclusões Técnicas", [("", e) for e in contexto.get("exclusoes", [])]),
+            ("5. Elaboração e Atendimento", [
+                ("Responsável:", responsavel.get("nome")),
+                ("E-mail:", responsavel.get("email")),
+                ("Telefone:", responsavel.get("telefone"))
+            ])
+        ])
+        self._assinaturas(pdf, contexto.get("assinaturas", []))
+
+    def _assinaturas(self, pdf: FPDF, assinaturas: List[Dict[str, Any]]):
+        if not assinaturas:
+            return
+        altura_imagem = 22
+        altura = altura_imagem + 18
+        pdf.set_y(pdf.get_y() + 5)
+        if pdf.get_y() + altura > pdf.page_break_trigger:
+            pdf.add_page()
+
+        largura_util = pdf.w - 2 * MARGEM_LATERAL
+        largura_caixa = largura_util * 0.4
+        espaco = (largura_util - largura_caixa * len(assinaturas)) / len(assinaturas)
+        topo = pdf.get_y()
+
+        for indice, assinatura in enumerate(assinaturas):
+            x = MARGEM_LATERAL + espaco / 2 + indice * (largura_caixa + espaco)
+            imagem = self.imagem(assinatura.get("assinatura_img_base64"))
+            if imagem is not None:
+                largura = min(largura_caixa, altura_imagem / imagem[2])
+                altura_img = largura * imagem[2]
+                pdf.image(imagem[0], x=x + (largura_caixa - largura) / 2,
+                          y=topo + altura_imagem - altura_img, w=largura)
+
+            linha_y = topo + altura_imagem + 1.3
+            pdf.set_draw_color(*COR_PRIMARIA)
+            pdf.set_line_width(0.4)
+            pdf.line(x + largura_caixa * 0.05, linha_y, x + largura_caixa * 0.95, linha_y)
+
+            pdf.set_xy(x, linha_y + 1.3)
+            pdf.set_font(FONTE, "B", 9)
+            pdf.cell(largura_caixa, _pt(9), _texto(assinatura.get("nome")), align="C", new_x="LEFT", new_y="NEXT")
+            pdf.set_font(FONTE, "", 8)
+            pdf.cell(largura_caixa, _pt(8), _texto(assinatura.get("cargo")), align="C", new_x="LEFT", new_y="NEXT")
+            if assinatura.get("registro"):
+                pdf.cell(largura_caixa, _pt(8), _texto(assinatura.get("registro")), align="C")
+
+        pdf.set_y(topo + altura)
+
+
+# Instancia compartilhada do processo (criada sob demanda)
+_renderizador_padrao: Optional[RenderizadorPropostaFPDF] = None
+_lock_padrao = threading.Lock()
+
+
+def obter_renderizador_fpdf() -> RenderizadorPropostaFPDF:
+    """Renderizador fpdf2 padrao do processo (mantido entre propostas)"""
+    global _renderizador_padrao
+    with _lock_padrao:
+        if _renderizador_padrao is None:
+            _renderizador_padrao = RenderizadorPropostaFPDF()
+        return _renderizador_padrao
@@ -3,135 +3,250 @@
 Gerador de PDF da Proposta Comercial HVAC
 
 Gera PDF estilizado a partir do orcamento precificado.
-Usa template HTML + CSS e converte para PDF via weasyprint.
+Usa template HTML + CSS e converte para PDF via weasyprint (ver
+renderizador.RenderizadorProposta, reaproveitado entre propostas) ou, com
+backend="fpdf", desenha o mesmo contexto com fpdf2 (proposta_fpdf), mais
+rapido e sem dependencias do sistema.
+PDFs ja gerados com o mesmo contexto sao reaproveitados do cache
+(utils.cache_pdf). Propostas gravadas na pasta do cliente entram no indice
+de revisoes (indice_revisoes), usado para detectar a proxima revisao.
 """
 
-import base64
 from datetime import date, datetime
 from pathlib import Path
 from typing import Dict, Any, Optional, List
 
-from jinja2 import Environment, FileSystemLoader, select_autoescape
-
+from ..utils.cache_pdf import CachePDF, hash_chave, obter_cache_pdf, preparar_destino
+from .indice_revisoes import registrar_proposta
+from .renderizador import RenderizadorProposta, obter_renderizador
 from .utils import (
     carregar_configs,
     proximo_numero_orcamento,
     detectar_revisao,
-    formatar_moeda,
-    formatar_numero,
     valor_por_extenso,
     data_por_extenso,
     obter_exclusoes,
     obter_condicoes,
     criar_pasta_cliente,
-    gerar_nome_arquivo,
-    BASE_DIR
+    gerar_nome_arquivo
 )
 
 
+# Backends de renderizacao da proposta
+BACKENDS_PDF = ("weasyprint", "fpdf")
+
+# Grupo dos itens que o agrupamento nao atribuiu a nenhum grupo
+NOME_GRUPO_RESIDUAL = "OUTROS SERVICOS"
+
+
 def carregar_logo_base64(logo_path: str) -> Optional[str]:
-    """Carrega logo como base64 para embedar no HTML"""
-    full_path = BASE_DIR / logo_path
-    if full_path.exists():
-        with open(full_path, "rb") as f:
-            return base64.b64encode(f.read()).decode("utf-8")
-    return None
+    """Carrega logo como base64 para embedar no HTML (em cache por mtime)"""
+    return obter_renderizador().carregar_asset_base64(logo_path)
+
+
+class IndiceItens:
+    """
+    Itens precificados indexados por id, montado em uma unica passada
+
+    Na mesma passada conta os tipos de servico e verifica se algum item tem
+    quantidade maior que 1 (coluna de valor unitario), entao o contexto da
+    proposta nao percorre os itens de novo para cada informacao.
+    """
+
+    def __init__(self, precificado: Dict[str, Any]):
+        self.itens: List[Dict] = precificado.get("itens_precificados", [])
+
+        # id -> posicao do primeiro item com o id (como a antiga busca linear)
+        self.posicoes: Dict[Any, int] = {}
+        self.ids_repetidos: List[Any] = []
+        self.tipos: Dict[str, int] = {}
+        self.mostrar_unitario = False
+
+        for posicao, item in enumerate(self.itens):
+            item_id = item.get("id")
+            if item_id in self.posicoes:
+                self.ids_repetidos.append(item_id)
+            else:
+                self.posicoes[item_id] = posicao
+
+            tipo = item.get("tipo_servico", "instalacao")
+            self.tipos[tipo] = self.tipos.get(tipo, 0) + 1
+
+            if item.get("quantidade", 1) > 1:
+                self.mostrar_unitario = True
 
+    def obter_posicao(self, item_id: Any) -> Optional[int]:
+        """Posicao do item com o id (None se nao existir)"""
+        return self.posicoes.get(item_id)
 
-def preparar_grupos(precificado: Dict[str, Any]) -> List[Dict]:
+
+def _formatar_item(item: Dict[str, Any]) -> Dict[str, Any]:
+    """Item precificado no formato da tabela da proposta"""
+    valor_total = item.get("preco_total", 0)
+    quantidade = item.get("quantidade", 1)
+    valor_unit = valor_total / quantidade if quantidade > 0 else 0
+
+    return {
+        "descricao": item.get("descricao", ""),
+        "unidade": item.get("unidade", "pc"),
+        "quantidade": quantidade,
+        "valor_unitario": valor_unit,
+        "valor_total": valor_total
+    }
+
+
+def _montar_grupo(numero: int, nome: str, itens: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Grupo do template a partir dos itens precificados"""
+    grupo_itens = [_formatar_item(item) for item in itens]
+    return {
+        "numero": numero,
+        "nome": nome,
+        "itens": grupo_itens,
+        "subtotal": sum(item["valor_total"] for item in grupo_itens)
+    }
+
+
+def preparar_grupos(
+    precificado: Dict[str, Any],
+    indice: Optional[IndiceItens] = None,
+    avisos: Optional[List[str]] = None
+) -> List[Dict]:
     """
     Prepara dados dos grupos/itens para o template
 
+    Com agrupamento, cada id e resolvido pelo indice. Ids inexistentes,
+    ids em mais de um grupo e ids repetidos entre os itens geram avisos;
+    itens fora de todos os grupos vao para um grupo residual no final.
+
     Args:
         precificado: Dados do orcamento precificado
+        indice: Indice dos itens (montado aqui se nao informado)
+        avisos: Lista para adicionar avisos do agrupamento
 
     Returns:
         Lista de grupos com itens formatados
     """
-    grupos = []
-    itens = precificado.get("itens_precificados", [])
+    if indice is None:
+        indice = IndiceItens(precificado)
+    if avisos is None:
+        avisos = []
+
+    itens = indice.itens
     agrupamento = precificado.get("agrupamento", [])
 
-    # Se tem agrupamento definido, usa
-    if agrupamento:
-        for idx, grupo in enumerate(agrupamento, 1):
-            grupo_itens = []
-            subtotal = 0
-
-            for item_id in grupo.get("itens_ids", []):
-                # Busca item pelo id
-                for item in itens:
-                    if item.get("id") == item_id:
-                        valor_total = item.get("preco_total", 0)
-                        quantidade = item.get("quantidade", 1)
-                        valor_unit = valor_total / quantidade if quantidade > 0 else 0
-
-                        grupo_itens.append({
-                            "descricao": item.get("descricao", ""),
-                            "unidade": item.get("unidade", "pc"),
-                            "quantidade": quantidade,
-                            "valor_unitario": valor_unit,
-                            "valor_total": valor_total
-                        })
-                        subtotal += valor_total
-                        break
-
-            grupos.append({
-                "numero": idx,
-                "nome": grupo.get("nome", f"GRUPO {idx}"),
-                "itens": grupo_itens,
-                "subtotal": subtotal
-            })
-    else:
-        # Sem agrupamento - cria grupo unico
+    # Sem agrupamento - cria grupo unico
+    if not agrupamento:
+        return [_montar_grupo(1, "SERVICOS", itens)]
+
+    # So o primeiro item de cada id e alcancavel pelos grupos
+    for item_id in dict.fromkeys(indice.ids_repetidos):
+        avisos.append(f"Agrupamento: id {item_id} repetido nos itens precificados")
+
+    grupos = []
+    atribuidos = set()
+
+    for idx, grupo in enumerate(agrupamento, 1):
+        nome = grupo.get("nome", f"GRUPO {idx}")
         grupo_itens = []
-        subtotal = 0
-
-        for item in itens:
-            valor_total = item.get("preco_total", 0)
-            quantidade = item.get("quantidade", 1)
-            valor_unit = valor_total / quantidade if quantidade > 0 else 0
-
-            grupo_itens.append({
-                "descricao": item.get("descricao", ""),
-                "unidade": item.get("unidade", "pc"),
-                "quantidade": quantidade,
-                "valor_unitario": valor_unit,
-                "valor_total": valor_total
-            })
-            subtotal += valor_total
-
-        grupos.append({
-            "numero": 1,
-            "nome": "SERVICOS",
-            "itens": grupo_itens,
-            "subtotal": subtotal
-        })
+
+        for item_id in grupo.get("itens_ids", []):
+            posicao = indice.obter_posicao(item_id)
+            if posicao is None:
+                avisos.append(f"Agrupamento: item {item_id} do grupo {nome} nao existe no orcamento")
+                continue
+            if posicao in atribuidos:
+                avisos.append(f"Agrupamento: item {item_id} aparece em mais de um grupo")
+            atribuidos.add(posicao)
+            grupo_itens.append(itens[posicao])
+
+        grupos.append(_montar_grupo(idx, nome, grupo_itens))
+
+    # Itens fora de todos os grupos nao somem da proposta
+    residuais = [item for posicao, item in enumerate(itens) if posicao not in atribuidos]
+    if residuais:
+        avisos.append(
+            f"Agrupamento: {len(residuais)} item(ns) sem grupo incluido(s) em {NOME_GRUPO_RESIDUAL}"
+        )
+        grupos.append(_montar_grupo(len(grupos) + 1, NOME_GRUPO_RESIDUAL, residuais))
 
     return grupos
 
 
-def detectar_tipo_servico(precificado: Dict[str, Any]) -> str:
+def detectar_tipo_servico(precificado: Dict[str, Any], indice: Optional[IndiceItens] = None) -> str:
     """Detecta o tipo de servico predominante"""
-    itens = precificado.get("itens_precificados", [])
-
-    tipos = {}
-    for item in itens:
-        tipo = item.get("tipo_servico", "instalacao")
-        tipos[tipo] = tipos.get(tipo, 0) + 1
+    if indice is None:
+        indice = IndiceItens(precificado)
 
+    tipos = indice.tipos
     if tipos:
         return max(tipos, key=tipos.get)
     return "instalacao"
 
 
+def resolver_numero_orcamento(
+    cliente: str,
+    numero_orcamento: Optional[str],
+    revisao: Optional[str],
+    cliente_dir: Path,
+    configs: Dict[str, Any]
+) -> str:
+    """
+    Numero final do orcamento com revisao (ex: "2026/102-R01")
+
+    A revisao detectada conta apenas as emissoes anteriores do mesmo numero
+    base: um numero novo de um cliente recorrente comeca em R00.
+
+    Args:
+        cliente: Nome do cliente
+        numero_orcamento: Numero informado (com ou sem -Rxx) ou None para gerar
+        revisao: Revisao explicita (ex: "R01" ou "1") ou None para detectar
+        cliente_dir: Pasta do cliente
+        configs: Configuracoes (contador)
+
+    Returns:
+        Numero no formato "AAAA/NNN-Rxx"
+    """
+    # 1. Se numero nao informado, gera proximo
+    if numero_orcamento is None:
+        numero_base, _ = proximo_numero_orcamento(configs)
+        # Remove a revisao padrao do gerador (-R00) para recalcular
+        numero_base = numero_base.split("-R")[0]
+    else:
+        # Se informado manualmente, usa ele
+        numero_base = numero_orcamento.split("-R")[0]
+
+        # Se o numero manual ja tiver revisao e revisao nao foi passada explicita, usa a do numero
+        if "-R" in numero_orcamento and revisao is None:
+            revisao = "R" + numero_orcamento.split("-R")[1]
+
+    # 2. Se revisao nao informada, detecta automatica
+    if revisao is None:
+        revisao_sufixo, _ = detectar_revisao(cliente, cliente_dir, numero_base)
+        revisao = revisao_sufixo
+    else:
+        # Formata revisao se necessario (ex: "1" -> "R01")
+        if not revisao.startswith("R"):
+            try:
+                val = int(revisao)
+                revisao = f"R{val:02d}"
+            except ValueError:
+                if not revisao.startswith("R"):
+                    revisao = f"R{revisao}"
+
+    return f"{numero_base}-{revisao}"
+
+
 def gerar_proposta_pdf(
     precificado: Dict[str, Any],
     rascunho: bool = False,
     numero_orcamento: Optional[str] = None,
     revisao: Optional[str] = None,
     output_path: Optional[str] = None,
-    configs: Optional[Dict] = None
+    configs: Optional[Dict] = None,
+    renderizador: Optional[RenderizadorProposta] = None,
+    cache: Optional[CachePDF] = None,
+    usar_cache: bool = True,
+    backend: str = "weasyprint"
 ) -> Dict[str, Any]:
     """
     Gera PDF da proposta comercial
@@ -143,6 +258,12 @@ def gerar_proposta_pdf(
         revisao: Numero da revisao (ex: "R01"). Se nao informado, detecta automatico.
         output_path: Caminho de saida (gera automatico se nao informado)
         configs: Configuracoes (carrega se nao informado)
+        renderizador: Renderizador a reutilizar (padrao: instancia do processo
+            do backend)
+        cache: Cache de PDFs (padrao: cache do processo)
+        usar_cache: Se False, sempre renderiza (e nao grava no cache)
+        backend: "weasyprint" (template HTML) ou "fpdf" (rapido, sem
+            paridade exata de pixels)
 
     Returns:
         Dicionario com resultado:
@@ -151,22 +272,45 @@ def gerar_proposta_pdf(
             "numero_orcamento": str,
             "arquivo_pdf": str,
             "arquivo_rascunho": str (se rascunho=True),
+            "cache": bool (True se reaproveitado do cache),
+            "avisos": list (problemas do agrupamento, se houver),
             "erro": str (se falhou)
         }
     """
-    try:
-        # Importa weasyprint aqui para nao falhar se nao estiver instalado
-        from weasyprint import HTML, CSS
-    except ImportError:
+    if backend not in BACKENDS_PDF:
         return {
             "sucesso": False,
-            "erro": "weasyprint nao instalado. Execute: pip install weasyprint"
+            "erro": f"Backend invalido: {backend}. Use: {', '.join(BACKENDS_PDF)}"
         }
 
+    if backend == "fpdf":
+        try:
+            from .proposta_fpdf import obter_renderizador_fpdf
+        except ImportError:
+            return {
+                "sucesso": False,
+                "erro": "fpdf2 nao instalado. Execute: pip install fpdf2"
+            }
+        if renderizador is None:
+            renderizador = obter_renderizador_fpdf()
+    else:
+        try:
+            # Importa weasyprint aqui para nao falhar se nao estiver instalado
+            import weasyprint  # noqa: F401
+        except ImportError:
+            return {
+                "sucesso": False,
+                "erro": "weasyprint nao instalado. Execute: pip install weasyprint"
+            }
+        if renderizador is None:
+            renderizador = obter_renderizador()
+
     # Carrega configs
     if configs is None:
         configs = carregar_configs()
 
+    carregar_asset = renderizador.carregar_asset_base64
+
     empresa = configs.get("empresa", {})
     usuario = configs.get("usuario", {})
 
@@ -179,47 +323,19 @@ def gerar_proposta_pdf(
     # Determina numero e revisao
     cliente_dir = criar_pasta_cliente(cliente_nome_bruto) # Mantem nome bruto para pasta para consistencia
 
-    # 1. Se numero nao informado, gera proximo
-    if numero_orcamento is None:
-        numero_base, _ = proximo_numero_orcamento(configs)
-        # Remove a revisao padrao do gerador (-R00) para recalcular
-        numero_base = numero_base.split("-R")[0]
-    else:
-        # Se informado manualmente, usa ele
-        numero_base = numero_orcamento.split("-R")[0]
-        
-        # Se o numero manual ja tiver revisao e revisao nao foi passada explicita, usa a do numero
-        if "-R" in numero_orcamento and revisao is None:
-            revisao = "R" + numero_orcamento.split("-R")[1]
-
-    # 2. Se revisao nao informada, detecta automatica
-    if revisao is None:
-        revisao_sufixo, _ = detectar_revisao(cliente_nome_bruto, cliente_dir)
-        revisao = revisao_sufixo
-    else:
-        # Formata revisao se necessario (ex: "1" -> "R01")
-        if not revisao.startswith("R"):
-            try:
-                val = int(revisao)
-                revisao = f"R{val:02d}"
-            except ValueError:
-                if not revisao.startswith("R"):
-                    revisao = f"R{revisao}"
-
-    # 3. Monta numero final
-    numero_orcamento = f"{numero_base}-{revisao}"
+    numero_orcamento = resolver_numero_orcamento(
+        cliente_nome_bruto, numero_orcamento, revisao, cliente_dir, configs
+    )
 
-    # Prepara dados para template
-    grupos = preparar_grupos(precificado)
+    # Prepara dados para template (itens indexados uma unica vez)
+    indice_itens = IndiceItens(precificado)
+    avisos: List[str] = []
+    grupos = preparar_grupos(precificado, indice_itens, avisos)
     valor_total = sum(g["subtotal"] for g in grupos)
-    tipo_servico = detectar_tipo_servico(precificado)
+    tipo_servico = detectar_tipo_servico(precificado, indice_itens)
 
     # Verifica se precisa mostrar coluna unitario
-    mostrar_unitario = any(
-        item["quantidade"] > 1
-        for grupo in grupos
-        for item in grupo["itens"]
-    )
+    mostrar_unitario = indice_itens.mostrar_unitario
 
     # Condicoes comerciais
     condicoes = obter_condicoes(tipo_cliente, configs)
@@ -233,13 +349,13 @@ def gerar_proposta_pdf(
     exclusoes = obter_exclusoes(tipo_servico, configs)
 
     # Carrega logo
-    logo_base64 = carregar_logo_base64(empresa.get("logo_path", ""))
+    logo_base64 = carregar_asset(empresa.get("logo_path", ""))
     
     # Carrega logos adicionais e marca d'agua
-    logo_abrava_base64 = carregar_logo_base64("templates/html/abrava_2025.png")
-    logo_asbrav_base64 = carregar_logo_base64("templates/html/asbrav_2025.png")
-    logo_secundario_base64 = carregar_logo_base64("templates/html/logo_secundario.png")
-    marca_dagua_base64 = carregar_logo_base64("templates/html/helice_armant.png")
+    logo_abrava_base64 = carregar_asset("templates/html/abrava_2025.png")
+    logo_asbrav_base64 = carregar_asset("templates/html/asbrav_2025.png")
+    logo_secundario_base64 = carregar_asset("templates/html/logo_secundario.png")
+    marca_dagua_base64 = carregar_asset("templates/html/helice_armant.png")
 
     # Carrega assinaturas com base64
     assinaturas = []
@@ -247,7 +363,7 @@ def gerar_proposta_pdf(
         ass_copia = ass.copy()
         img_path = ass.get("assinatura_img")
         if img_path:
-            ass_copia["assinatura_img_base64"] = carregar_logo_base64(img_path)
+            ass_copia["assinatura_img_base64"] = carregar_asset(img_path)
         assinaturas.append(ass_copia)
 
     # Força data atual conforme solicitado
@@ -287,28 +403,6 @@ def gerar_proposta_pdf(
         "rascunho": False # Sempre gera o principal limpo primeiro
     }
 
-    # Configura Jinja2
-    template_dir = BASE_DIR / "templates" / "html"
-    env = Environment(
-        loader=FileSystemLoader(template_dir),
-        autoescape=select_autoescape(["html", "xml"])
-    )
-
-    # Adiciona filtros customizados
-    env.filters["formatar_moeda"] = formatar_moeda
-    env.filters["formatar_numero"] = formatar_numero
-
-    # Carrega e renderiza template
-    template = env.get_template("proposta_base.html")
-    html_content = template.render(**contexto)
-
-    # Carrega CSS
-    css_path = template_dir / "proposta_styles.css"
-    css_content = ""
-    if css_path.exists():
-        with open(css_path, "r", encoding="utf-8") as f:
-            css_content = f.read()
-
     # Gera nome do arquivo
     nome_arquivo = gerar_nome_arquivo(
         numero_orcamento,
@@ -325,29 +419,46 @@ def gerar_proposta_pdf(
 
     output_path.parent.mkdir(parents=True, exist_ok=True)
 
-    # Gera PDF
-    html = HTML(string=html_content, base_url=str(template_dir))
-    css = CSS(string=css_content)
-    html.write_pdf(str(output_path), stylesheets=[css])
+    # Gera PDF (e rascunho, reaproveitando o layout do principal)
+    rascunho_path = output_path.parent / f"{nome_arquivo}_RASCUNHO.pdf" if rascunho else None
+
+    # Mesmo contexto, templates e opcoes: reaproveita o PDF do cache
+    em_cache = False
+    if usar_cache:
+        if cache is None:
+            cache = obter_cache_pdf()
+        chave = renderizador.chave_cache(contexto)
+        arquivos = [(chave, output_path)]
+        if rascunho_path is not None:
+            arquivos.append((hash_chave(chave, "rascunho"), rascunho_path))
+        em_cache = cache.obter_todos(arquivos)
+
+    if not em_cache:
+        preparar_destino(output_path)
+        if rascunho_path is not None:
+            preparar_destino(rascunho_path)
+        renderizador.gerar_pdf(contexto, output_path, rascunho_path)
+        if usar_cache:
+            for chave_arquivo, caminho in arquivos:
+                cache.guardar(chave_arquivo, caminho)
+
+    # Proxima deteccao de revisao le o indice, sem listar a pasta
+    registrar_proposta(cliente_dir, output_path, numero_orcamento, revisao)
 
     resultado = {
         "sucesso": True,
         "numero_orcamento": numero_orcamento,
         "arquivo_pdf": str(output_path),
-        "valor_total": valor_total
+        "valor_total": valor_total,
+        "cache": em_cache
     }
 
-    # Gera versao rascunho se solicitado
-    if rascunho:
-        contexto["rascunho"] = True
-        html_rascunho = template.render(**contexto)
-
-        rascunho_path = output_path.parent / f"{nome_arquivo}_RASCUNHO.pdf"
-        html_rasc = HTML(string=html_rascunho, base_url=str(template_dir))
-        html_rasc.write_pdf(str(rascunho_path), stylesheets=[css])
-
+    if rascunho_path is not None:
         resultado["arquivo_rascunho"] = str(rascunho_path)
 
+    if avisos:
+        resultado["avisos"] = avisos
+
     return resultado
 
 
@@ -362,6 +473,13 @@ def main():
     parser.add_argument("--rascunho", action="store_true", help="Gera versao rascunho")
     parser.add_argument("--numero", "-n", help="Numero do orcamento (ex: 2026/001)")
     parser.add_argument("--revisao", "-r", help="Numero da revisao (ex: R01 ou 1)")
+    parser.add_argument("--sem-cache", action="store_true", help="Renderiza mesmo se o PDF estiver em cache")
+    parser.add_argument(
+        "--backend",
+        choices=BACKENDS_PDF,
+        default="weasyprint",
+        help="weasyprint (template HTML) ou fpdf (rapido, para rascunhos em volume)"
+    )
 
     args = parser.parse_args()
 
@@ -373,13 +491,18 @@ def main():
         rascunho=args.rascunho,
         numero_orcamento=args.numero,
         revisao=args.revisao,
-        output_path=args.output
+        output_path=args.output,
+        usar_cache=not args.sem_cache,
+        backend=args.backend
     )
 
     if resultado["sucesso"]:
-        print(f"PDF gerado: {resultado['arquivo_pdf']}")
+        origem = " (cache)" if resultado.get("cache") else ""
+        print(f"PDF gerado{origem}: {resultado['arquivo_pdf']}")
         if resultado.get("arquivo_rascunho"):
             print(f"Rascunho: {resultado['arquivo_rascunho']}")
+        for aviso in resultado.get("avisos", []):
+            print(f"Aviso: {aviso}")
     else:
         print(f"Erro: {resultado.get('erro')}")
 
@@ -0,0 +1,265 @@
+"""
+Renderizador de propostas de longa duracao (HTML -> PDF via WeasyPrint)
+
+Mantem entre propostas o que nao muda de uma para outra:
+- Environment Jinja2 com o template compilado (recompilado se o arquivo mudar);
+- CSS ja interpretado em um objeto weasyprint.CSS (reinterpretado se mudar);
+- imagens (logos, marca d'agua, assinaturas) em base64, chaveadas por
+  caminho + mtime + tamanho.
+
+O rascunho reaproveita o layout da versao principal: a marca "RASCUNHO"
+(elemento fixo, que nao altera a paginacao) e renderizada uma unica vez em
+um PDF transparente de duas paginas, a primeira e a de continuacao (cada uma
+com as margens do seu @page), e aplicada com pypdf sob o conteudo da pagina
+correspondente do PDF principal, como o z-index negativo do CSS. Sem pypdf
+instalado, o rascunho e renderizado por completo (ainda reaproveitando
+template, CSS e imagens).
+
+chave_cache() identifica o PDF que sera gerado (contexto, conteudo dos
+templates/CSS, versoes do WeasyPrint/pypdf e modo do rascunho) para o cache
+de PDFs (utils.cache_pdf).
+"""
+
+import base64
+import threading
+from io import BytesIO
+from pathlib import Path
+from typing import Dict, Any, Optional, Tuple
+
+from jinja2 import Environment, FileSystemLoader, select_autoescape
+
+from ..utils.cache_pdf import hash_arquivos, hash_chave
+from ..utils.perfil import span
+from .utils import BASE_DIR, formatar_moeda, formatar_numero
+
+
+# Diretorio padrao dos templates HTML/CSS
+TEMPLATE_DIR = BASE_DIR / "templates" / "html"
+
+# Arquivos do template
+TEMPLATE_PROPOSTA = "proposta_base.html"
+CSS_PROPOSTA = "proposta_styles.css"
+
+# Marca de rascunho sozinha (mesmo CSS, fundo transparente) em duas paginas:
+# @page :first tem margem superior menor que as paginas seguintes
+HTML_OVERLAY_RASCUNHO = """<!DOCTYPE html>
+<html><head><meta charset="utf-8">
+<style>html, body { background: transparent !important; }</style>
+</head><body><div class="watermark-text">RASCUNHO</div>
+<div style="break-before: page"></div></body></html>"""
+
+
+def _versao_pacote(nome: str) -> Optional[str]:
+    """Versao instalada de um pacote ou None"""
+    from importlib.metadata import PackageNotFoundError, version
+
+    try:
+        return version(nome)
+    except PackageNotFoundError:
+        return None
+
+
+def _assinatura(path: Path) -> Optional[Tuple[int, int]]:
+    """(mtime_ns, tamanho) do arquivo ou None se nao existir"""
+    try:
+        stat = path.stat()
+    except OSError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+class RenderizadorProposta:
+    """Renderizador reutilizavel entre propostas (template, CSS e imagens em cache)"""
+
+    def __init__(self, template_dir: Optional[Path] = None, usar_overlay: bool = True):
+        """
+        Args:
+            template_dir: Diretorio dos templates (padrao: templates/html)
+            usar_overlay: Gera o rascunho sobrepondo a marca ao PDF principal
+                (requer pypdf; se False, faz um segundo layout completo)
+        """
+        self.template_dir = Path(template_dir) if template_dir else TEMPLATE_DIR
+        self.usar_overlay = usar_overlay
+
+        # auto_reload: o Jinja recompila o template se o mtime mudar
+        self.env = Environment(
+            loader=FileSystemLoader(self.template_dir),
+            autoescape=select_autoescape(["html", "xml"]),
+            auto_reload=True
+        )
+        self.env.filters["formatar_moeda"] = formatar_moeda
+        self.env.filters["formatar_numero"] = formatar_numero
+
+        self._assets: Dict[Path, Tuple[Tuple[int, int], Optional[str]]] = {}
+        self._css: Optional[Tuple[Optional[Tuple[int, int]], Any]] = None
+        self._overlay: Optional[Tuple[Optional[Tuple[int, int]], bytes]] = None
+        self._lock = threading.Lock()
+
+    def carregar_asset_base64(self, caminho: str) -> Optional[str]:
+        """
+        Carrega uma imagem como base64, reaproveitando a leitura anterior
+
+        Args:
+            caminho: Caminho relativo a raiz do projeto (ou absoluto)
+
+        Returns:
+            Conteudo em base64 ou None se o arquivo nao existir
+        """
+        if not caminho:
+            return None
+        full_path = BASE_DIR / caminho
+        assinatura = _assinatura(full_path)
+        if assinatura is None or not full_path.is_file():
+            return None
+
+        with self._lock:
+            em_cache = self._assets.get(full_path)
+        if em_cache and em_cache[0] == assinatura:
+            return em_cache[1]
+
+        with span("carregar_asset", arquivo=full_path.name):
+            with open(full_path, "rb") as f:
+                conteudo = base64.b64encode(f.read()).decode("utf-8")
+
+        with self._lock:
+            self._assets[full_path] = (assinatura, conteudo)
+        return conteudo
+
+    def renderizar_html(self, contexto: Dict[str, Any]) -> str:
+        """Renderiza o template da proposta com o contexto"""
+        with span("jinja.carregar_template"):
+            template = self.env.get_template(TEMPLATE_PROPOSTA)
+        with span("jinja.render"):
+            return template.render(**contexto)
+
+    def chave_cache(self, contexto: Dict[str, Any]) -> str:
+        """
+        Chave do cache de PDFs para um contexto
+
+        Args:
+            contexto: Contexto do template (o campo rascunho e ignorado)
+
+        Returns:
+            Hash do contexto, dos templates/CSS e das opcoes de renderizacao
+        """
+        with span("cache_pdf.chave"):
+            templates = hash_arquivos(
+                list(self.template_dir.glob("*.html")) + list(self.template_dir.glob("*.css"))
+            )
+            return hash_chave(
+                "proposta_pdf",
+                {**contexto, "rascunho": False},
+                templates,
+                _versao_pacote("weasyprint"),
+                _versao_pacote("pypdf") if self.usar_overlay else None,
+                HTML_OVERLAY_RASCUNHO if self.usar_overlay else None
+            )
+
+    def css(self):
+        """Objeto weasyprint.CSS da proposta (reinterpretado apenas se o arquivo mudar)"""
+        from weasyprint import CSS
+
+        css_path = self.template_dir / CSS_PROPOSTA
+        assinatura = _assinatura(css_path)
+
+        with self._lock:
+            if self._css is not None and self._css[0] == assinatura:
+                return self._css[1]
+
+        with span("weasyprint.css"):
+            css_content = ""
+            if assinatura is not None:
+                with open(css_path, "r", encoding="utf-8") as f:
+                    css_content = f.read()
+            css = CSS(string=css_content)
+
+        with self._lock:
+            self._css = (assinatura, css)
+        return css
+
+    def renderizar_documento(self, html_content: str):
+        """Faz o layout do HTML (weasyprint.Document)"""
+        from weasyprint import HTML
+
+        css = self.css()
+        with span("weasyprint.parse"):
+            html = HTML(string=html_content, base_url=str(self.template_dir))
+        with span("weasyprint.layout"):
+            return html.render(stylesheets=[css])
+
+    def _overlay_rascunho(self) -> bytes:
+        """PDF com a marca RASCUNHO na primeira pagina e na de continuacao (um por versao do CSS)"""
+        assinatura = _assinatura(self.template_dir / CSS_PROPOSTA)
+        with self._lock:
+            if self._overlay is not None and self._overlay[0] == assinatura:
+                return self._overlay[1]
+
+        with span("rascunho.overlay"):
+            conteudo = self.renderizar_documento(HTML_OVERLAY_RASCUNHO).write_pdf()
+
+        with self._lock:
+            self._overlay = (assinatura, conteudo)
+        return conteudo
+
+    def _gravar_rascunho_overlay(self, pdf_principal: bytes, rascunho_path: Path) -> bool:
+        """Aplica a marca de rascunho sob cada pagina do PDF principal; False sem pypdf"""
+        try:
+            from pypdf import PdfReader, PdfWriter
+        except ImportError:
+            return False
+
+        primeira, continuacao = PdfReader(BytesIO(self._overlay_rascunho())).pages[:2]
+        with span("rascunho.sobrepor"):
+            writer = PdfWriter(clone_from=BytesIO(pdf_principal))
+            for indice, pagina in enumerate(writer.pages):
+                # over=False: a marca fica atras do conteudo (z-index: -999)
+                pagina.merge_page(primeira if indice == 0 else continuacao, over=False)
+            with open(rascunho_path, "wb") as f:
+                writer.write(f)
+        return True
+
+    def gerar_pdf(
+        self,
+        contexto: Dict[str, Any],
+        output_path: Path,
+        rascunho_path: Optional[Path] = None
+    ):
+        """
+        Gera o PDF da proposta (e, opcionalmente, o rascunho)
+
+        Args:
+            contexto: Contexto do template (rascunho e ignorado/forcado)
+            output_path: PDF principal
+            rascunho_path: PDF rascunho (None para nao gerar)
+        """
+        documento = self.renderizar_documento(self.renderizar_html({**contexto, "rascunho": False}))
+
+        with span("weasyprint.write_pdf", arquivo=output_path.name):
+            pdf_principal = documento.write_pdf()
+            with open(output_path, "wb") as f:
+                f.write(pdf_principal)
+
+        if rascunho_path is None:
+            return
+
+        if self.usar_overlay and self._gravar_rascunho_overlay(pdf_principal, rascunho_path):
+            return
+
+        # Sem pypdf: segundo layout completo
+        documento_rasc = self.renderizar_documento(self.renderizar_html({**contexto, "rascunho": True}))
+        with span("weasyprint.write_pdf", arquivo=rascunho_path.name):
+            documento_rasc.write_pdf(str(rascunho_path))
+
+
+# Instancia compartilhada do processo (criada sob demanda)
+_renderizador_padrao: Optional[RenderizadorProposta] = None
+_lock_padrao = threading.Lock()
+
+
+def obter_renderizador() -> RenderizadorProposta:
+    """Renderizador padrao do processo (mantido entre propostas)"""
+    global _renderizador_padrao
+    with _lock_padrao:
+        if _renderizador_padrao is None:
+            _renderizador_padrao = RenderizadorProposta()
+        return _renderizador_padrao
@@ -0,0 +1,435 @@
+"""
+Servico de renderizacao de propostas em paralelo (varios PDFs por lote)
+
+O layout do WeasyPrint e limitado por CPU e e, de longe, a etapa mais lenta
+da geracao de propostas. Este servico recebe uma fila de orcamentos
+precificados e distribui a renderizacao em um pool de processos:
+
+- cada worker mantem um RenderizadorProposta "quente" (template compilado,
+  CSS interpretado, imagens em base64) entre documentos;
+- cada worker e reciclado apos N documentos (max_tasks_per_child), limitando
+  a memoria acumulada pelo WeasyPrint/fontes;
+- a fila e consumida sob demanda, com no maximo max_pendentes documentos em
+  andamento (back-pressure): um gerador de tarefas nao e lido por inteiro;
+- cada documento retorna seu tempo de renderizacao, pid e posicao no worker.
+
+Os numeros de orcamento sao reservados no processo principal antes do
+envio, em blocos (uma passagem pela trava do contador por bloco; a sobra
+e devolvida ao encerrar), e os workers nao disputam o contador.
+
+    with ServicoRenderizacao(workers=4, documentos_por_worker=50) as servico:
+        for resultado in servico.renderizar(tarefas):
+            print(resultado["identificador"], resultado["tempo_s"])
+    print(formatar_resumo_render(servico.resumo()))
+"""
+
+import argparse
+import glob
+import json
+import os
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from dataclasses import dataclass, asdict
+from pathlib import Path
+from typing import Dict, Any, Callable, Iterable, Iterator, List, Optional
+
+from ..utils.metricas import percentil
+from .numeracao import AlocadorNumeros, BlocoNumeros
+from .proposta_pdf import BACKENDS_PDF, gerar_proposta_pdf
+from .utils import carregar_configs
+
+
+# Documentos renderizados por worker antes de ser substituido
+DOCUMENTOS_POR_WORKER = 50
+
+# Documentos em andamento por worker (limite da fila interna)
+PENDENTES_POR_WORKER = 2
+
+
+@dataclass
+class TarefaRender:
+    """Uma proposta a renderizar"""
+
+    # Orcamento precificado (dict) ou caminho do precificado.json
+    precificado: Any
+    output_path: Optional[str] = None
+    rascunho: bool = False
+    numero_orcamento: Optional[str] = None
+    revisao: Optional[str] = None
+    identificador: Optional[str] = None
+    # "weasyprint" ou "fpdf" (ver proposta_pdf.BACKENDS_PDF)
+    backend: str = "weasyprint"
+
+
+# Estado do processo worker (preenchido por _inicializar_worker)
+_funcao_worker: Optional[Callable[..., Dict[str, Any]]] = None
+_configs_worker: Optional[Dict] = None
+_renderizador_worker = None
+_documentos_worker = 0
+
+
+def _inicializar_worker(funcao: Callable[..., Dict[str, Any]], configs: Dict, aquecer: bool):
+    """Prepara o worker: configs, funcao de renderizacao e renderizador quente"""
+    global _funcao_worker, _configs_worker, _renderizador_worker, _documentos_worker
+    _funcao_worker = funcao
+    _configs_worker = configs
+    _documentos_worker = 0
+
+    if not aquecer:
+        return
+
+    from .renderizador import TEMPLATE_PROPOSTA, obter_renderizador
+
+    _renderizador_worker = obter_renderizador()
+    _renderizador_worker.env.get_template(TEMPLATE_PROPOSTA)
+    try:
+        _renderizador_worker.css()
+    except (ImportError, OSError):
+        # WeasyPrint indisponivel: o erro e reportado por documento
+        pass
+
+
+def _renderizar_tarefa(tarefa: Dict[str, Any]) -> Dict[str, Any]:
+    """Renderiza uma proposta dentro do worker e mede o tempo"""
+    global _documentos_worker
+    _documentos_worker += 1
+
+    resultado = {
+        "identificador": tarefa["identificador"],
+        "pid": os.getpid(),
+        "documento_no_worker": _documentos_worker
+    }
+
+    inicio = time.perf_counter()
+    try:
+        precificado = tarefa["precificado"]
+        if not isinstance(precificado, dict):
+            with open(precificado, 'r', encoding='utf-8') as f:
+                precificado = json.load(f)
+
+        kwargs = {
+            "rascunho": tarefa["rascunho"],
+            "numero_orcamento": tarefa["numero_orcamento"],
+            "revisao": tarefa["revisao"],
+            "output_path": tarefa["output_path"],
+            "configs": _configs_worker
+        }
+        if tarefa["backend"] != "weasyprint":
+            kwargs["backend"] = tarefa["backend"]
+        elif _renderizador_worker is not None:
+            kwargs["renderizador"] = _renderizador_worker
+
+        saida = _funcao_worker(precificado, **kwargs)
+        resultado.update(saida)
+        resultado.setdefault("sucesso", False)
+    except Exception as e:
+        resultado["sucesso"] = False
+        resultado["erro"] = f"{type(e).__name__}: {e}"
+
+    resultado["tempo_s"] = round(time.perf_counter() - inicio, 4)
+    return resultado
+
+
+class ServicoRenderizacao:
+    """
+    Pool de workers que renderizam propostas em paralelo
+
+    Com workers=1 a renderizacao e feita no proprio processo, em serie
+    (mesmos resultados e medicoes, sem pool).
+    """
+
+    def __init__(
+        self,
+        workers: Optional[int] = None,
+        documentos_por_worker: Optional[int] = DOCUMENTOS_POR_WORKER,
+        max_pendentes: Optional[int] = None,
+        configs: Optional[Dict] = None,
+        funcao: Callable[..., Dict[str, Any]] = gerar_proposta_pdf,
+        aquecer: bool = True,
+        alocador: Optional[AlocadorNumeros] = None,
+        bloco_numeros: Optional[int] = None
+    ):
+        """
+        Args:
+            workers: Numero de processos (padrao: CPUs)
+            documentos_por_worker: Documentos por worker antes de recicla-lo
+                (None para nunca reciclar)
+            max_pendentes: Documentos em andamento (padrao: 2 por worker)
+            configs: Configuracoes (carrega se nao informado)
+            funcao: Funcao de renderizacao (padrao: gerar_proposta_pdf)
+            aquecer: Prepara template e CSS ao iniciar cada worker
+            alocador: Contador de numeros de orcamento (padrao: config/contador.json)
+            bloco_numeros: Numeros reservados por vez (padrao: max_pendentes)
+        """
+        self.workers = max(1, workers or os.cpu_count() or 1)
+        self.documentos_por_worker = documentos_por_worker
+        self.max_pendentes = max(1, max_pendentes or self.workers * PENDENTES_POR_WORKER)
+        self.configs = configs if configs is not None else carregar_configs()
+        self.funcao = funcao
+        self.aquecer = aquecer
+        self._numeros = BlocoNumeros(alocador, bloco_numeros or self.max_pendentes)
+
+        self.resultados: List[Dict[str, Any]] = []
+        self.duracao = 0.0
+        self._executor: Optional[ProcessPoolExecutor] = None
+
+    def __enter__(self) -> "ServicoRenderizacao":
+        return self
+
+    def __exit__(self, *exc):
+        self.encerrar()
+        return False
+
+    def _iniciar_executor(self) -> ProcessPoolExecutor:
+        """Cria o pool (reciclagem de workers requer Python 3.11+)"""
+        argumentos = {
+            "max_workers": self.workers,
+            "initializer": _inicializar_worker,
+            "initargs": (self.funcao, self.configs, self.aquecer)
+        }
+        if self.documentos_por_worker and sys.version_info >= (3, 11):
+            argumentos["max_tasks_per_child"] = self.documentos_por_worker
+        return ProcessPoolExecutor(**argumentos)
+
+    def encerrar(self):
+        """Encerra os workers (aguarda documentos em andamento) e devolve numeros nao usados"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+        self._numeros.liberar()
+
+    def _preparar(self, tarefa: TarefaRender, posicao: int) -> Dict[str, Any]:
+        """Converte a tarefa em dict e reserva o numero do orcamento"""
+        dados = asdict(tarefa)
+        if dados["identificador"] is None:
+            if isinstance(tarefa.precificado, dict):
+                dados["identificador"] = str(posicao)
+            else:
+                dados["identificador"] = str(tarefa.precificado)
+        if dados["numero_orcamento"] is None:
+            numero, _ = self._numeros.proximo()
+            dados["numero_orcamento"] = numero.split("-R")[0]
+        return dados
+
+    def renderizar(self, tarefas: Iterable[TarefaRender]) -> Iterator[Dict[str, Any]]:
+        """
+        Renderiza as tarefas, devolvendo os resultados conforme concluem
+
+        A fila e lida sob demanda: nunca ha mais de max_pendentes
+        documentos enviados e nao concluidos.
+
+        Args:
+            tarefas: Iteravel de TarefaRender (pode ser um gerador)
+
+        Yields:
+            Resultado de cada documento (resultado de gerar_proposta_pdf
+            mais identificador, pid, documento_no_worker e tempo_s)
+        """
+        inicio = time.perf_counter()
+        try:
+            if self.workers == 1:
+                yield from self._renderizar_em_serie(tarefas)
+                return
+
+            if self._executor is None:
+                self._executor = self._iniciar_executor()
+
+            pendentes = set()
+            for posicao, tarefa in enumerate(tarefas, start=1):
+                if len(pendentes) >= self.max_pendentes:
+                    concluidos, pendentes = wait(pendentes, return_when=FIRST_COMPLETED)
+                    for futuro in concluidos:
+                        yield self._registrar(futuro.result())
+                pendentes.add(self._executor.submit(_renderizar_tarefa, self._preparar(tarefa, posicao)))
+
+            while pendentes:
+                concluidos, pendentes = wait(pendentes, return_when=FIRST_COMPLETED)
+                for futuro in concluidos:
+                    yield self._registrar(futuro.result())
+        finally:
+            self.duracao += time.perf_counter() - inicio
+
+    def _renderizar_em_serie(self, tarefas: Iterable[TarefaRender]) -> Iterator[Dict[str, Any]]:
+        """Renderiza no proprio processo (workers=1)"""
+        _inicializar_worker(self.funcao, self.configs, self.aquecer)
+        for posicao, tarefa in enumerate(tarefas, start=1):
+            yield self._registrar(_renderizar_tarefa(self._preparar(tarefa, posicao)))
+
+    def _registrar(self, resultado: Dict[str, Any]) -> Dict[str, Any]:
+        self.resultados.append(resultado)
+        return resultado
+
+    def resumo(self) -> Dict[str, Any]:
+        """
+        Consolida os tempos dos documentos renderizados
+
+        Returns:
+            Dicionario com totais, vazao, p50/p95/max por documento e
+            documentos por worker (pid)
+        """
+        tempos = [r["tempo_s"] for r in self.resultados]
+        concluidos = sum(1 for r in self.resultados if r["sucesso"])
+        por_worker: Dict[str, int] = {}
+        for r in self.resultados:
+            por_worker[str(r["pid"])] = por_worker.get(str(r["pid"]), 0) + 1
+
+        return {
+            "documentos": len(self.resultados),
+            "concluidos": concluidos,
+            "falhas": len(self.resultados) - concluidos,
+            "workers": self.workers,
+            "documentos_por_worker": self.documentos_por_worker,
+            "duracao_total": round(self.duracao, 3),
+            "vazao_por_segundo": round(len(tempos) / self.duracao, 2) if self.duracao > 0 else 0.0,
+            "tempo_documento": {
+                "p50": round(percentil(tempos, 50), 3),
+                "p95": round(percentil(tempos, 95), 3),
+                "max": round(max(tempos), 3) if tempos else 0.0,
+                "soma": round(sum(tempos), 3)
+            },
+            "por_worker": por_worker
+        }
+
+
+def renderizar_lote(
+    tarefas: Iterable[TarefaRender],
+    workers: Optional[int] = None,
+    documentos_por_worker: Optional[int] = DOCUMENTOS_POR_WORKER,
+    verbose: bool = True
+) -> Dict[str, Any]:
+    """
+    Renderiza um lote de propostas e consolida os tempos
+
+    Args:
+        tarefas: Iteravel de TarefaRender
+        workers: Numero de processos (padrao: CPUs)
+        documentos_por_worker: Documentos por worker antes de recicla-lo
+        verbose: Se deve exibir progresso
+
+    Returns:
+        Dicionario com resumo e resultados por documento
+    """
+    with ServicoRenderizacao(workers=workers, documentos_por_worker=documentos_por_worker) as servico:
+        for resultado in servico.renderizar(tarefas):
+            if verbose:
+                _exibir_progresso(resultado, len(servico.resultados))
+
+    resumo = servico.resumo()
+    if verbose:
+        print(formatar_resumo_render(resumo))
+        for r in servico.resultados:
+            if not r["sucesso"]:
+                print(f"  FALHA {r['identificador']}: {r.get('erro')}")
+
+    return {"resumo": resumo, "documentos": servico.resultados}
+
+
+def _exibir_progresso(resultado: Dict[str, Any], concluidos: int):
+    """Exibe uma linha de progresso do lote"""
+    status = "ok" if resultado["sucesso"] else "FALHA"
+    print(f"[{concluidos}] {status} {resultado['tempo_s']:.2f}s {resultado['identificador']}")
+
+
+def formatar_resumo_render(resumo: Dict[str, Any]) -> str:
+    """Formata o resumo da renderizacao em lote para exibicao"""
+    tempo = resumo["tempo_documento"]
+    return "\n".join([
+        "",
+        "### Renderizacao em lote",
+        "",
+        f"Documentos:   {resumo['documentos']} ({resumo['falhas']} falha(s))",
+        f"Workers:      {resumo['workers']} (reciclados a cada {resumo['documentos_por_worker'] or '-'} documento(s))",
+        f"Duracao:      {resumo['duracao_total']:.2f}s ({resumo['vazao_por_segundo']:.2f} documento(s)/s)",
+        f"Por documento: p50 {tempo['p50']:.2f}s | p95 {tempo['p95']:.2f}s | max {tempo['max']:.2f}s",
+        f"Tempo somado: {tempo['soma']:.2f}s"
+    ])
+
+
+def listar_precificados(padrao: str) -> List[Path]:
+    """
+    Lista arquivos precificado a partir de um diretorio ou glob
+
+    Args:
+        padrao: Diretorio (busca **/precificado.json) ou padrao glob
+
+    Returns:
+        Lista ordenada de caminhos
+    """
+    caminho = Path(padrao)
+    if caminho.is_dir():
+        return sorted(caminho.glob("**/precificado.json"))
+    return sorted(Path(p) for p in glob.glob(padrao, recursive=True))
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Renderiza varias propostas em paralelo"
+    )
+    parser.add_argument(
+        "entrada",
+        help="Diretorio (busca **/precificado.json) ou glob de arquivos precificados"
+    )
+    parser.add_argument(
+        "--workers", "-w",
+        type=int,
+        help="Numero de processos (padrao: CPUs)"
+    )
+    parser.add_argument(
+        "--por-worker",
+        type=int,
+        default=DOCUMENTOS_POR_WORKER,
+        help=f"Documentos por worker antes de recicla-lo (padrao: {DOCUMENTOS_POR_WORKER})"
+    )
+    parser.add_argument(
+        "--rascunho",
+        action="store_true",
+        help="Gera tambem a versao rascunho"
+    )
+    parser.add_argument(
+        "--backend",
+        choices=BACKENDS_PDF,
+        default="weasyprint",
+        help="weasyprint (template HTML) ou fpdf (rapido, para rascunhos em volume)"
+    )
+    parser.add_argument(
+        "--ao-lado",
+        action="store_true",
+        help="Grava proposta.pdf ao lado de cada precificado.json"
+    )
+    parser.add_argument(
+        "--resumo",
+        help="Arquivo JSON para gravar resumo e tempos por documento"
+    )
+
+    args = parser.parse_args()
+
+    arquivos = listar_precificados(args.entrada)
+    if not arquivos:
+        print(f"Nenhum precificado encontrado em: {args.entrada}")
+        sys.exit(1)
+
+    tarefas = (
+        TarefaRender(
+            precificado=str(arquivo),
+            output_path=str(arquivo.parent / "proposta.pdf") if args.ao_lado else None,
+            rascunho=args.rascunho,
+            backend=args.backend
+        )
+        for arquivo in arquivos
+    )
+
+    print(f"Renderizando {len(arquivos)} proposta(s)")
+    resultado = renderizar_lote(tarefas, workers=args.workers, documentos_por_worker=args.por_worker)
+
+    if args.resumo:
+        with open(args.resumo, 'w', encoding='utf-8') as f:
+            json.dump(resultado, f, ensure_ascii=False, indent=2)
+        print(f"\nResumo salvo em: {args.resumo}")
+
+    if resultado["resumo"]["falhas"]:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -4,13 +4,19 @@ Utilitarios para geracao de documentos HVAC
 """
 
 import json
+import re
 from datetime import date, datetime
+from functools import lru_cache
 from pathlib import Path
 from typing import Dict, Any, Optional, Tuple
 
 # Diretorio base do projeto
 BASE_DIR = Path(__file__).parent.parent.parent
 
+# Slugs de cliente: pontuacao removida e separadores trocados por "_"
+_RE_PONTUACAO = re.compile(r'[^\w\s-]')
+_RE_SEPARADORES = re.compile(r'[-\s]+')
+
 
 def carregar_configs() -> Dict[str, Any]:
     """
@@ -57,92 +63,64 @@ def carregar_configs() -> Dict[str, Any]:
 
 
 def salvar_contador(contador: Dict[str, Any]) -> None:
-    """Salva o contador atualizado"""
-    config_dir = BASE_DIR / "config"
-    contador_path = config_dir / "contador.json"
+    """Salva o contador atualizado (gravacao atomica, sob a trava do contador)"""
+    from .numeracao import gravar_json_atomico, obter_alocador, travar_arquivo
 
-    with open(contador_path, "w", encoding="utf-8") as f:
-        json.dump(contador, f, ensure_ascii=False, indent=2)
+    alocador = obter_alocador()
+    with travar_arquivo(alocador.caminho_trava):
+        gravar_json_atomico(alocador.caminho, contador)
 
 
 def proximo_numero_orcamento(configs: Optional[Dict] = None) -> Tuple[str, int]:
     """
     Gera o proximo numero de orcamento
 
+    Le e incrementa o contador em disco sob trava (ver numeracao), entao
+    processos paralelos nunca recebem o mesmo numero.
+
     Args:
-        configs: Configuracoes (carrega se nao fornecido)
+        configs: Configuracoes (o contador em configs e atualizado, se houver)
 
     Returns:
         Tupla (numero_formatado, sequencial)
         Ex: ("2025/868-R00", 868)
     """
-    if configs is None:
-        configs = carregar_configs()
+    from .numeracao import obter_alocador
 
-    contador = configs.get("contador", {})
-    ano_atual = date.today().year
+    alocador = obter_alocador()
+    numero, novo_seq = alocador.proximo()
 
-    # Verifica virada de ano
-    ano_contador = contador.get("ano_corrente", ano_atual)
-
-    if ano_atual != ano_contador:
-        # Virou o ano - salva historico e reseta
-        contador["historico"] = contador.get("historico", {})
-        contador["historico"][str(ano_contador)] = contador.get("ultimo_sequencial", 0)
-        contador["ano_corrente"] = ano_atual
-        contador["ultimo_sequencial"] = 0
-
-    # Incrementa sequencial
-    novo_seq = contador.get("ultimo_sequencial", 0) + 1
-    contador["ultimo_sequencial"] = novo_seq
-    contador["ano_corrente"] = ano_atual
-
-    # Salva contador atualizado
-    salvar_contador(contador)
-
-    # Formata numero
-    numero = f"{ano_atual}/{novo_seq:03d}-R00"
+    # Mantem configs coerente com o arquivo para quem reutiliza o dicionario
+    if configs is not None:
+        configs["contador"] = alocador.ler()
 
     return numero, novo_seq
 
 
-def detectar_revisao(cliente: str, output_dir: Path) -> Tuple[str, int]:
+def detectar_revisao(
+    cliente: str,
+    output_dir: Path,
+    numero_orcamento: Optional[str] = None
+) -> Tuple[str, int]:
     """
     Detecta se existe orcamento anterior para o cliente e gera revisao
 
+    Consulta o indice de revisoes da pasta (ver indice_revisoes), sem
+    listar os PDFs a cada proposta.
+
     Args:
         cliente: Nome do cliente
-        output_dir: Diretorio de output
+        output_dir: Diretorio de output (pasta do cliente)
+        numero_orcamento: Considera so as revisoes deste orcamento
+            (padrao: qualquer orcamento do cliente)
 
     Returns:
         Tupla (sufixo_revisao, numero_revisao)
         Ex: ("R01", 1)
     """
-    if not output_dir.exists():
-        return "R00", 0
-
-    # Busca arquivos existentes do cliente
-    cliente_slug = cliente.lower().replace(" ", "_")[:20]
-    arquivos = list(output_dir.glob(f"*{cliente_slug}*_R*.pdf"))
-
-    if not arquivos:
-        return "R00", 0
+    from .indice_revisoes import proxima_revisao
 
-    # Encontra maior revisao
-    max_rev = 0
-    for arq in arquivos:
-        nome = arq.stem
-        if "_R" in nome:
-            try:
-                rev_str = nome.split("_R")[-1].split("_")[0]
-                rev = int(rev_str)
-                if rev > max_rev:
-                    max_rev = rev
-            except (ValueError, IndexError):
-                pass
-
-    nova_rev = max_rev + 1
-    return f"R{nova_rev:02d}", nova_rev
+    return proxima_revisao(output_dir, numero_orcamento)
 
 
 def formatar_moeda(valor: float) -> str:
@@ -358,6 +336,18 @@ def obter_condicoes(tipo_cliente: str, configs: Optional[Dict] = None) -> Dict[s
     return resultado
 
 
+@lru_cache(maxsize=1024)
+def slug_cliente(cliente: str, tamanho: int) -> str:
+    """
+    Slug do nome do cliente para pastas e arquivos
+
+    Remove pontuacao, troca espacos e hifens por "_" e corta no tamanho.
+    O texto nao e convertido: quem chama escolhe lower() ou upper().
+    """
+    slug = _RE_PONTUACAO.sub('', cliente)
+    return _RE_SEPARADORES.sub('_', slug)[:tamanho]
+
+
 def criar_pasta_cliente(cliente: str) -> Path:
     """
     Cria pasta de output para o cliente
@@ -370,12 +360,7 @@ def criar_pasta_cliente(cliente: str) -> Path:
     """
     output_dir = BASE_DIR / "output"
 
-    # Cria slug do cliente
-    import re
-    slug = re.sub(r'[^\w\s-]', '', cliente.lower())
-    slug = re.sub(r'[-\s]+', '_', slug)[:30]
-
-    cliente_dir = output_dir / slug
+    cliente_dir = output_dir / slug_cliente(cliente.lower(), 30)
     cliente_dir.mkdir(parents=True, exist_ok=True)
 
     return cliente_dir
@@ -401,18 +386,15 @@ def gerar_nome_arquivo(
     Returns:
         Nome do arquivo sem extensao
     """
-    import re
-
     # Extrai ano e numero
     partes = numero_orcamento.replace("-", "/").split("/")
     ano = partes[0][-2:]  # Ultimos 2 digitos do ano
     num = partes[1].split("-")[0] if len(partes) > 1 else "000"
 
     # Slug do cliente
-    slug_cliente = re.sub(r'[^\w\s-]', '', cliente.upper())
-    slug_cliente = re.sub(r'[-\s]+', '_', slug_cliente)[:20]
+    slug = slug_cliente(cliente.upper(), 20)
 
     # Slug do servico
     slug_servico = tipo_servico.upper().replace("-", "_")[:15]
 
-    return f"ORC_{ano}.{num}_{slug_cliente}_{slug_servico}_{revisao}{sufixo}"
+    return f"ORC_{ano}.{num}_{slug}_{slug_servico}_{revisao}{sufixo}"
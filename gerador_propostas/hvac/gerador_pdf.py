@@ -1,13 +1,32 @@
 #!/usr/bin/env python3
 """
 Gerador de PDF para orcamentos HVAC
+
+PDFs ja gerados para o mesmo orcamento (e mesma versao deste layout) sao
+reaproveitados do cache (utils.cache_pdf).
 """
 
 import argparse
 import json
-from datetime import datetime
+from datetime import date, datetime
 from pathlib import Path
-from fpdf import FPDF
+from typing import Optional
+
+from fpdf import FPDF, FPDF_VERSION
+
+from .utils.cache_pdf import CachePDF, hash_arquivos, hash_chave, obter_cache_pdf, preparar_destino
+
+
+# Categoria do resumo_financeiro de cada tipo de insumo
+CATEGORIAS_BDI = {
+    'MAT': 'materiais',
+    'MO': 'mao_obra',
+    'FER': 'ferramentas',
+    'EQP': 'equipamentos'
+}
+
+# BDI do equipamento fornecido quando o orcamento nao informa o de EQP
+BDI_EQUIPAMENTO_PADRAO = 0.25
 
 
 class OrcamentoPDF(FPDF):
@@ -28,12 +47,53 @@ class OrcamentoPDF(FPDF):
         self.cell(0, 10, f'Pagina {self.page_no()}', align='C')
 
 
+def percentual_bdi(resumo: dict, tipo: str) -> Optional[float]:
+    """
+    Percentual de BDI aplicado a um tipo de insumo (ex: 0.6 para 60%)
+
+    Usa resumo_financeiro.percentuais_bdi; em orcamentos antigos, sem esse
+    campo, deduz da razao entre BDI e custo da categoria.
+
+    Args:
+        resumo: resumo_financeiro do orcamento precificado
+        tipo: MAT, MO, FER ou EQP
+
+    Returns:
+        Fracao do BDI ou None se nao for possivel determinar
+    """
+    texto = resumo.get('percentuais_bdi', {}).get(tipo)
+    if texto:
+        try:
+            return float(str(texto).rstrip('%').replace(',', '.')) / 100
+        except ValueError:
+            pass
+
+    categoria = CATEGORIAS_BDI[tipo]
+    custo = resumo.get(f'total_{categoria}', 0)
+    if custo:
+        return resumo.get(f'bdi_{categoria}', 0) / custo
+    return None
+
+
+def formatar_percentual(percentual: Optional[float]) -> str:
+    """Formata o percentual de BDI para a tabela ("-" se desconhecido)"""
+    if percentual is None:
+        return '-'
+    return f"{percentual * 100:.0f}%"
+
+
 def formatar_moeda(valor: float) -> str:
     """Formata valor em reais"""
     return f"R$ {valor:,.2f}".replace(",", "X").replace(".", ",").replace("X", ".")
 
 
-def gerar_pdf(precificado: dict, equipamento: dict = None, output_path: str = None) -> str:
+def gerar_pdf(
+    precificado: dict,
+    equipamento: dict = None,
+    output_path: str = None,
+    cache: Optional[CachePDF] = None,
+    usar_cache: bool = True
+) -> str:
     """
     Gera PDF do orcamento
 
@@ -41,10 +101,41 @@ def gerar_pdf(precificado: dict, equipamento: dict = None, output_path: str = No
         precificado: Dados do orcamento precificado
         equipamento: Dados do equipamento (opcional)
         output_path: Caminho para salvar o PDF
+        cache: Cache de PDFs (padrao: cache do processo)
+        usar_cache: Se False, sempre gera (e nao grava no cache)
 
     Returns:
         Caminho do arquivo gerado
     """
+    if output_path is None:
+        output_path = "orcamento.pdf"
+
+    # Uma saida anterior pode ser hardlink de um objeto do cache
+    preparar_destino(Path(output_path))
+    if not usar_cache:
+        return _gerar_pdf(precificado, equipamento, output_path)
+
+    if cache is None:
+        cache = obter_cache_pdf()
+    # O layout esta neste modulo: seu conteudo entra na chave
+    chave = hash_chave(
+        "gerar_pdf",
+        precificado,
+        equipamento,
+        date.today().isoformat(),
+        hash_arquivos([Path(__file__)]),
+        FPDF_VERSION
+    )
+    if cache.obter(chave, Path(output_path)):
+        return output_path
+
+    _gerar_pdf(precificado, equipamento, output_path)
+    cache.guardar(chave, Path(output_path))
+    return output_path
+
+
+def _gerar_pdf(precificado: dict, equipamento: dict, output_path: str) -> str:
+    """Monta e grava o PDF (sem cache)"""
     pdf = OrcamentoPDF()
     pdf.add_page()
 
@@ -92,6 +183,11 @@ def gerar_pdf(precificado: dict, equipamento: dict = None, output_path: str = No
     pdf.cell(145, 8, 'Subtotal Servicos', border=1, align='R')
     pdf.cell(45, 8, formatar_moeda(subtotal_servicos), border=1, align='R', new_x='LMARGIN', new_y='NEXT')
 
+    resumo = precificado.get('resumo_financeiro', {})
+    bdi_equipamento = percentual_bdi(resumo, 'EQP')
+    if bdi_equipamento is None:
+        bdi_equipamento = BDI_EQUIPAMENTO_PADRAO
+
     # Equipamento (se houver)
     valor_equipamento = 0
     if equipamento:
@@ -102,7 +198,7 @@ def gerar_pdf(precificado: dict, equipamento: dict = None, output_path: str = No
         pdf.cell(130, 8, desc_eqp + ' (fornecimento)', border=1)
 
         preco_base = equipamento.get('preco_unitario', 0)
-        valor_equipamento = preco_base * 1.25  # BDI 25%
+        valor_equipamento = preco_base * (1 + bdi_equipamento)
         pdf.cell(45, 8, formatar_moeda(valor_equipamento), border=1, align='R', new_x='LMARGIN', new_y='NEXT')
 
     # Total geral
@@ -119,8 +215,6 @@ def gerar_pdf(precificado: dict, equipamento: dict = None, output_path: str = No
     pdf.set_font('Helvetica', 'B', 12)
     pdf.cell(0, 10, 'COMPOSICAO DE CUSTOS', new_x='LMARGIN', new_y='NEXT')
 
-    resumo = precificado.get('resumo_financeiro', {})
-
     pdf.set_font('Helvetica', 'B', 9)
     pdf.set_fill_color(230, 230, 230)
     pdf.cell(60, 7, 'Categoria', border=1, fill=True)
@@ -133,21 +227,21 @@ def gerar_pdf(precificado: dict, equipamento: dict = None, output_path: str = No
     # Materiais
     pdf.cell(60, 7, 'Materiais', border=1)
     pdf.cell(40, 7, formatar_moeda(resumo.get('total_materiais', 0)), border=1, align='R')
-    pdf.cell(25, 7, '35%', border=1, align='C')
+    pdf.cell(25, 7, formatar_percentual(percentual_bdi(resumo, 'MAT')), border=1, align='C')
     total_mat = resumo.get('total_materiais', 0) + resumo.get('bdi_materiais', 0)
     pdf.cell(40, 7, formatar_moeda(total_mat), border=1, align='R', new_x='LMARGIN', new_y='NEXT')
 
     # Mao de obra
     pdf.cell(60, 7, 'Mao de Obra', border=1)
     pdf.cell(40, 7, formatar_moeda(resumo.get('total_mao_obra', 0)), border=1, align='R')
-    pdf.cell(25, 7, '40%', border=1, align='C')
+    pdf.cell(25, 7, formatar_percentual(percentual_bdi(resumo, 'MO')), border=1, align='C')
     total_mo = resumo.get('total_mao_obra', 0) + resumo.get('bdi_mao_obra', 0)
     pdf.cell(40, 7, formatar_moeda(total_mo), border=1, align='R', new_x='LMARGIN', new_y='NEXT')
 
     # Ferramentas
     pdf.cell(60, 7, 'Ferramentas', border=1)
     pdf.cell(40, 7, formatar_moeda(resumo.get('total_ferramentas', 0)), border=1, align='R')
-    pdf.cell(25, 7, '30%', border=1, align='C')
+    pdf.cell(25, 7, formatar_percentual(percentual_bdi(resumo, 'FER')), border=1, align='C')
     total_fer = resumo.get('total_ferramentas', 0) + resumo.get('bdi_ferramentas', 0)
     pdf.cell(40, 7, formatar_moeda(total_fer), border=1, align='R', new_x='LMARGIN', new_y='NEXT')
 
@@ -156,7 +250,7 @@ def gerar_pdf(precificado: dict, equipamento: dict = None, output_path: str = No
         preco_base = equipamento.get('preco_unitario', 0)
         pdf.cell(60, 7, 'Equipamento', border=1)
         pdf.cell(40, 7, formatar_moeda(preco_base), border=1, align='R')
-        pdf.cell(25, 7, '25%', border=1, align='C')
+        pdf.cell(25, 7, formatar_percentual(bdi_equipamento), border=1, align='C')
         pdf.cell(40, 7, formatar_moeda(valor_equipamento), border=1, align='R', new_x='LMARGIN', new_y='NEXT')
 
     pdf.ln(10)
@@ -185,9 +279,6 @@ def gerar_pdf(precificado: dict, equipamento: dict = None, output_path: str = No
             pdf.cell(0, 6, f"- {alerta}", new_x='LMARGIN', new_y='NEXT')
 
     # Salvar
-    if output_path is None:
-        output_path = "orcamento.pdf"
-
     pdf.output(output_path)
     return output_path
 
@@ -197,6 +288,7 @@ def main():
     parser.add_argument("--input", "-i", required=True, help="Arquivo precificado.json")
     parser.add_argument("--output", "-o", required=True, help="Arquivo PDF de saida")
     parser.add_argument("--equipamento", "-e", help="Arquivo escopo.json com dados do equipamento")
+    parser.add_argument("--sem-cache", action="store_true", help="Gera mesmo se o PDF estiver em cache")
 
     args = parser.parse_args()
 
@@ -212,7 +304,7 @@ def main():
             equipamento = escopo.get('equipamento')
 
     # Gerar PDF
-    output = gerar_pdf(precificado, equipamento, args.output)
+    output = gerar_pdf(precificado, equipamento, args.output, usar_cache=not args.sem_cache)
     print(f"PDF gerado: {output}")
 
 
@@ -0,0 +1,286 @@
+"""
+Reprecificacao incremental de escopos
+
+Guarda, ao lado dos artefatos do pipeline (incremental.json), o resultado
+expandido e precificado de cada item do escopo junto com um hash das suas
+entradas: o proprio item (composicao, variavel, quantidade, descricao), a
+definicao da composicao e cada insumo do catalogo que ela usa (descricao,
+unidade, preco, data de atualizacao). Em uma nova execucao somente os itens
+cujo hash mudou sao recalculados; resumos e resumo_financeiro sao
+reagregados a partir de todos os itens, na ordem do escopo.
+
+As entradas sao indexadas pelo hash do conteudo, sem a posicao: inserir ou
+remover uma linha do escopo nao invalida as seguintes. Ao reaproveitar uma
+entrada, o id (e o prefixo "Item N:" da observacao) e reatribuido.
+
+A saida e identica a de compositor.processar + precificador.processar:
+- os totais por categoria sao somados sequencialmente na ordem dos itens,
+  a partir dos custos nao arredondados guardados no cache;
+- os alertas de cada item sao guardados em ordem (com repeticoes) e
+  concatenados antes da deduplicacao final.
+
+Alteracoes globais (BDI, data do dia, que afeta alertas de preco e datas
+dos cabecalhos) invalidam o cache inteiro.
+"""
+
+import hashlib
+import json
+import os
+import re
+from datetime import date
+from pathlib import Path
+from typing import Dict, Any, Optional
+
+from .compositor import ConsolidadorResumos, expandir_item_escopo, montar_composicao
+from .precificador import montar_precificado, precificar_itens
+from .utils.catalogo import IndiceCatalogo, TIPOS
+
+
+# Nome do arquivo de cache gravado no diretorio de saida
+ARQUIVO_CACHE = "incremental.json"
+
+# Versao do formato do cache (alterar invalida caches antigos)
+VERSAO_CACHE = 3
+
+# Prefixo de observacao com a posicao do item no escopo
+PADRAO_ID_OBSERVACAO = re.compile(r"^Item \d+:")
+
+
+def hash_dados(dados: Any) -> str:
+    """
+    Hash estavel de uma estrutura JSON
+
+    Args:
+        dados: Estrutura serializavel em JSON
+
+    Returns:
+        Hash sha256 em hexadecimal
+    """
+    texto = json.dumps(dados, sort_keys=True, ensure_ascii=False, separators=(",", ":"))
+    return hashlib.sha256(texto.encode("utf-8")).hexdigest()
+
+
+class ProcessadorIncremental:
+    """
+    Compositor + precificador que reaproveita itens inalterados
+
+    Uso:
+        processador = ProcessadorIncremental(output_dir / ARQUIVO_CACHE, indice)
+        composicao = processador.compor(escopo)
+        precificado = processador.precificar(composicao)
+        processador.salvar()
+    """
+
+    def __init__(self, cache_path: Path, indice: Optional[IndiceCatalogo] = None):
+        self.cache_path = Path(cache_path)
+        self.indice = indice if indice is not None else IndiceCatalogo.carregar()
+
+        self.hash_global = hash_dados([VERSAO_CACHE, self.indice.bdi, date.today().isoformat()])
+        self._hashes_composicao: Dict[str, str] = {}
+
+        # Entradas por hash do conteudo do item
+        self._anteriores: Dict[str, Dict[str, Any]] = self._ler_cache()
+        self._entradas: Dict[str, Dict[str, Any]] = {}
+        # Entrada de cada id da composicao atual (posicao no escopo)
+        self._por_id: Dict[str, Dict[str, Any]] = {}
+
+        self.estatisticas = {"itens": 0, "recalculados": 0, "reaproveitados": 0}
+
+    def _ler_cache(self) -> Dict[str, Dict[str, Any]]:
+        """Le o cache anterior (vazio se ausente, corrompido ou de outro contexto)"""
+        try:
+            with open(self.cache_path, 'r', encoding='utf-8') as f:
+                cache = json.load(f)
+        except (FileNotFoundError, ValueError):
+            return {}
+
+        if cache.get("versao") != VERSAO_CACHE or cache.get("hash_global") != self.hash_global:
+            return {}
+        return cache.get("itens", {})
+
+    def hash_composicao(self, codigo: Optional[str]) -> Optional[str]:
+        """
+        Hash da composicao e dos insumos do catalogo que ela usa
+
+        Args:
+            codigo: Codigo da composicao
+
+        Returns:
+            Hash ou None se a composicao nao existe
+        """
+        if codigo in self._hashes_composicao:
+            return self._hashes_composicao[codigo]
+
+        composicao = self.indice.obter_composicao(codigo)
+        if composicao is None:
+            return None
+
+        indice = self.indice
+        insumos = []
+        for codigo_tipo, item_id, codigo_item in zip(composicao.tipos, composicao.ids, composicao.codigos):
+            if item_id < 0:
+                insumos.append([codigo_tipo, codigo_item, None])
+            else:
+                insumos.append([
+                    TIPOS[indice.tipos[item_id]],
+                    codigo_item,
+                    indice.descricoes[item_id],
+                    indice.unidades[item_id],
+                    indice.precos[item_id],
+                    indice.datas_atualizacao[item_id]
+                ])
+
+        resultado = hash_dados([composicao.dados, insumos])
+        self._hashes_composicao[codigo] = resultado
+        return resultado
+
+    def hash_item(self, item: Dict[str, Any]) -> str:
+        """Hash das entradas de um item do escopo (independe da posicao)"""
+        codigo_comp = item.get("composicao")
+        return hash_dados([
+            codigo_comp,
+            item.get("variavel", 0),
+            item.get("quantidade", 1),
+            # Sem "descricao" vale a da composicao; "descricao": null e mantido
+            "descricao" in item,
+            item.get("descricao"),
+            self.hash_composicao(codigo_comp)
+        ])
+
+    def compor(self, escopo: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Gera a composicao, expandindo apenas itens alterados
+
+        Args:
+            escopo: Escopo do orcamento
+
+        Returns:
+            Composicao identica a compositor.processar(escopo)
+        """
+        itens_orcamento = []
+        observacoes = []
+        consolidador = ConsolidadorResumos()
+        self._entradas = {}
+        self._por_id = {}
+        self.estatisticas = {"itens": 0, "recalculados": 0, "reaproveitados": 0}
+
+        for idx, item in enumerate(escopo.get("itens", []), start=1):
+            chave = self.hash_item(item)
+            entrada = self._entradas.get(chave) or self._anteriores.get(chave)
+
+            if entrada is not None:
+                self.estatisticas["reaproveitados"] += 1
+            else:
+                item_orcamento, observacao = expandir_item_escopo(idx, item, self.indice)
+                entrada = {
+                    "item_orcamento": item_orcamento,
+                    "observacao": observacao
+                }
+                self.estatisticas["recalculados"] += 1
+
+            self.estatisticas["itens"] += 1
+            self._entradas[chave] = entrada
+            self._por_id[str(idx)] = entrada
+
+            if entrada["observacao"]:
+                observacoes.append(PADRAO_ID_OBSERVACAO.sub(f"Item {idx}:", entrada["observacao"]))
+            else:
+                item_orcamento = {**entrada["item_orcamento"], "id": idx}
+                itens_orcamento.append(item_orcamento)
+                consolidador.adicionar_item(item_orcamento)
+
+        return montar_composicao(escopo, itens_orcamento, observacoes, consolidador)
+
+    def precificar(self, composicao: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Precifica a composicao, reaproveitando itens com preco em cache
+
+        Itens que nao vieram de compor() (id desconhecido) sao sempre
+        precificados.
+
+        Args:
+            composicao: Composicao gerada por compor()
+
+        Returns:
+            Orcamento identico a precificador.processar(composicao)
+        """
+        itens_precificados = []
+        alertas = []
+        total_mat = 0.0
+        total_mo = 0.0
+        total_fer = 0.0
+        total_eqp = 0.0
+
+        for item in composicao.get("itens_orcamento", []):
+            entrada = self._por_id.get(str(item.get("id")))
+
+            if entrada is not None and "item_precificado" in entrada:
+                item_precificado = {**entrada["item_precificado"], "id": item.get("id")}
+                custos = entrada["custos"]
+                alertas_item = entrada["alertas"]
+            else:
+                alertas_item = []
+                precificados, custos = precificar_itens([item], self.indice, alertas_item)
+                item_precificado = precificados[0]
+                if entrada is not None:
+                    entrada["item_precificado"] = item_precificado
+                    entrada["custos"] = list(custos)
+                    entrada["alertas"] = alertas_item
+
+            itens_precificados.append(item_precificado)
+            alertas.extend(alertas_item)
+
+            # Mesma ordem de acumulacao de precificar_itens
+            custo_mat, custo_mo, custo_fer, custo_eqp = custos
+            total_mat += custo_mat
+            total_mo += custo_mo
+            total_fer += custo_fer
+            total_eqp += custo_eqp
+
+        return montar_precificado(
+            composicao,
+            itens_precificados,
+            (total_mat, total_mo, total_fer, total_eqp),
+            alertas,
+            self.indice
+        )
+
+    def salvar(self):
+        """Grava o cache de forma atomica (arquivo temporario + rename)"""
+        cache = {
+            "versao": VERSAO_CACHE,
+            "hash_global": self.hash_global,
+            "itens": self._entradas
+        }
+        self.cache_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.cache_path.with_name(self.cache_path.name + ".tmp")
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(cache, f, ensure_ascii=False)
+        os.replace(tmp_path, self.cache_path)
+
+
+def processar_incremental(
+    escopo: Dict[str, Any],
+    cache_path: Path,
+    indice: Optional[IndiceCatalogo] = None
+) -> Dict[str, Any]:
+    """
+    Executa compositor e precificador incrementais e atualiza o cache
+
+    Args:
+        escopo: Escopo do orcamento
+        cache_path: Caminho do cache (ex: output_dir / ARQUIVO_CACHE)
+        indice: Indice do catalogo (carrega se nao informado)
+
+    Returns:
+        Dicionario com composicao, precificado e estatisticas
+    """
+    processador = ProcessadorIncremental(cache_path, indice)
+    composicao = processador.compor(escopo)
+    precificado = processador.precificar(composicao)
+    processador.salvar()
+    return {
+        "composicao": composicao,
+        "precificado": precificado,
+        "estatisticas": processador.estatisticas
+    }
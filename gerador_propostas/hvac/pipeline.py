@@ -4,144 +4,558 @@ Pipeline completo de orcamento HVAC com rastreamento de metricas
 """
 
 import argparse
+import contextvars
+import glob
 import json
+import os
 import sys
+import time
+from contextlib import nullcontext
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
 from pathlib import Path
+from typing import List, Optional, Tuple
 
 from .compositor import processar as processar_compositor
+from .dependencias import (
+    ARQUIVO_INDICE,
+    IndiceDependencias,
+    atualizar_indice,
+    extrair_referencias,
+    indice_padrao
+)
+from .incremental import ARQUIVO_CACHE, ProcessadorIncremental
 from .precificador import processar as processar_precificador
-from .utils.loader import carregar_bases
-from .utils.metricas import RastreadorMetricas, formatar_metricas
+from .utils.catalogo import IndiceCatalogo
+from .utils.metricas import (
+    RastreadorMetricas,
+    formatar_metricas,
+    resumir_lote,
+    formatar_resumo_lote
+)
+from .utils.perfil import Perfilador, formatar_perfil, span
+
+
+# Indice do catalogo de cada worker do modo lote (carregado uma vez por processo)
+_indice_worker: Optional[IndiceCatalogo] = None
+
+
+class EscritorArtefatos:
+    """
+    Grava artefatos de texto do pipeline
+
+    Em modo assincrono as gravacoes rodam em uma thread de fundo (em paralelo
+    com as etapas seguintes, ex: PDF), no contexto de quem agendou (os spans
+    "gravar" vao para o perfilador ativo); concluir() aguarda todas terminarem.
+    Como gerenciador de contexto, concluir() e chamado tambem quando uma
+    etapa falha (a thread e encerrada; o erro da etapa prevalece sobre
+    eventuais erros de gravacao).
+    """
+
+    def __init__(self, assincrono: bool = False):
+        self._executor = ThreadPoolExecutor(max_workers=1) if assincrono else None
+        self._pendentes = []
+
+    def gravar(self, path: Path, conteudo: str):
+        """Grava (ou agenda a gravacao de) um arquivo texto"""
+        if self._executor is None:
+            _gravar_texto(path, conteudo)
+        else:
+            contexto = contextvars.copy_context()
+            self._pendentes.append(self._executor.submit(contexto.run, _gravar_texto, path, conteudo))
+
+    def concluir(self):
+        """Aguarda gravacoes pendentes e propaga erros"""
+        if self._executor is None:
+            return
+        try:
+            for futuro in self._pendentes:
+                futuro.result()
+        finally:
+            self._executor.shutdown()
+            self._pendentes = []
+
+    def __enter__(self) -> "EscritorArtefatos":
+        return self
+
+    def __exit__(self, tipo, valor, rastro) -> bool:
+        if tipo is None:
+            self.concluir()
+            return False
+        try:
+            self.concluir()
+        except Exception:
+            # A falha da etapa e a que deve ser propagada
+            pass
+        return False
+
+
+def _gravar_texto(path: Path, conteudo: str):
+    with span("gravar", arquivo=path.name):
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(conteudo)
+
+
+def serializar(dados: dict) -> str:
+    """Serializa um artefato no formato dos arquivos do pipeline"""
+    return json.dumps(dados, ensure_ascii=False, indent=2)
+
+
+def executar_etapas(
+    escopo: dict,
+    indice: Optional[IndiceCatalogo] = None,
+    rastreador: Optional[RastreadorMetricas] = None,
+    incremental: Optional[ProcessadorIncremental] = None
+) -> Tuple[dict, dict]:
+    """
+    Encadeia compositor e precificador em memoria, sem I/O
+
+    Args:
+        escopo: Escopo do orcamento
+        indice: Indice do catalogo (carrega se nao informado)
+        rastreador: Rastreador para registrar o tempo das etapas (opcional)
+        incremental: Processador incremental; se informado, apenas itens
+            alterados desde a ultima execucao sao recalculados
+
+    Returns:
+        Tupla (composicao, precificado)
+    """
+    if indice is None:
+        indice = IndiceCatalogo.carregar()
+
+    if rastreador:
+        rastreador.iniciar_etapa()
+    with span("compositor"):
+        if incremental is not None:
+            composicao = incremental.compor(escopo)
+        else:
+            composicao = processar_compositor(escopo, indice=indice)
+    if rastreador:
+        rastreador.finalizar_etapa("compositor")
+
+    if rastreador:
+        rastreador.iniciar_etapa()
+    with span("precificador"):
+        if incremental is not None:
+            precificado = incremental.precificar(composicao)
+        else:
+            precificado = processar_precificador(composicao, indice=indice)
+    if rastreador:
+        rastreador.finalizar_etapa("precificador")
+
+    return composicao, precificado
 
 
 def executar_pipeline(
     escopo_path: str,
     output_dir: str,
     gerar_pdf: bool = False,
-    verbose: bool = True
+    verbose: bool = True,
+    indice: Optional[IndiceCatalogo] = None,
+    salvar_intermediarios: bool = True,
+    escrita_assincrona: bool = False,
+    incremental: bool = False,
+    atualizar_dependencias: bool = True,
+    indice_dependencias: Optional[str] = None,
+    perfil: bool = False,
+    perfil_memoria: bool = False
 ) -> dict:
     """
     Executa pipeline completo de orcamento
 
+    As etapas trocam objetos Python em memoria. composicao.json e
+    precificado.json sao serializados uma unica vez, e as metricas de
+    tamanho/tokens saem desse mesmo buffer (sem reler o disco).
+
     Args:
         escopo_path: Caminho para escopo.json
         output_dir: Diretorio de saida
         gerar_pdf: Se deve gerar PDF
         verbose: Se deve exibir output
+        indice: Indice do catalogo ja carregado (carrega se nao informado)
+        salvar_intermediarios: Grava composicao.json e precificado.json
+            (se False, nao serializa e as metricas de tamanho ficam zeradas)
+        escrita_assincrona: Grava os artefatos em segundo plano, aguardando
+            a conclusao antes de retornar
+        incremental: Reaproveita itens inalterados da execucao anterior
+            (cache em output_dir/incremental.json)
+        atualizar_dependencias: Registra os insumos usados no indice de
+            dependencias (apenas quando precificado.json e gravado)
+        indice_dependencias: Caminho do indice de dependencias (padrao:
+            dependencias.indice_padrao(); o modo lote usa
+            output_dir/indice_dependencias.json)
+        perfil: Registra spans por etapa (tabela em metricas.json e
+            output_dir/perfil_trace.json no formato Chrome Trace)
+        perfil_memoria: Como perfil, incluindo alocacoes (tracemalloc)
 
     Returns:
         Dicionario com resultado e metricas
     """
+    perfilador = Perfilador(rastrear_memoria=perfil_memoria) if perfil or perfil_memoria else None
+
+    with perfilador.ativar() if perfilador else nullcontext():
+        return _executar_pipeline(
+            escopo_path, output_dir, gerar_pdf, verbose, indice, salvar_intermediarios,
+            escrita_assincrona, incremental, atualizar_dependencias, indice_dependencias,
+            perfilador
+        )
+
+
+def _executar_pipeline(
+    escopo_path: str,
+    output_dir: str,
+    gerar_pdf: bool,
+    verbose: bool,
+    indice: Optional[IndiceCatalogo],
+    salvar_intermediarios: bool,
+    escrita_assincrona: bool,
+    incremental: bool,
+    atualizar_dependencias: bool,
+    indice_dependencias: Optional[str],
+    perfilador: Optional[Perfilador]
+) -> dict:
+    """Corpo de executar_pipeline (executado com o perfilador ja ativo)"""
     escopo_path = Path(escopo_path)
     output_dir = Path(output_dir)
     output_dir.mkdir(parents=True, exist_ok=True)
 
     # Iniciar rastreamento
     rastreador = RastreadorMetricas(orcamento_id=output_dir.name)
+    with EscritorArtefatos(assincrono=escrita_assincrona) as escritor:
+        # Carregar bases e montar indice do catalogo uma vez
+        if indice is None:
+            if verbose:
+                print("Carregando bases de dados...")
+            with span("carregar_bases"):
+                indice = IndiceCatalogo.carregar()
+
+        # 1. Carregar escopo (lido uma vez; metricas a partir do mesmo conteudo)
+        if verbose:
+            print(f"Lendo escopo: {escopo_path}")
+        with span("ler_escopo"):
+            conteudo_escopo = escopo_path.read_bytes()
+            texto_escopo = conteudo_escopo.decode('utf-8')
+            escopo = json.loads(texto_escopo)
+
+        rastreador.registrar_conteudo("escopo", texto_escopo, tamanho=len(conteudo_escopo))
+
+        # 2-3. Compositor e precificador encadeados em memoria
+        if verbose:
+            print("Executando compositor e precificador...")
+        processador = ProcessadorIncremental(output_dir / ARQUIVO_CACHE, indice) if incremental else None
+        composicao, precificado = executar_etapas(escopo, indice, rastreador, processador)
+
+        if processador is not None:
+            processador.salvar()
+            if verbose:
+                estatisticas = processador.estatisticas
+                print(f"Incremental: {estatisticas['recalculados']} recalculado(s), "
+                      f"{estatisticas['reaproveitados']} reaproveitado(s)")
+
+        if salvar_intermediarios:
+            for nome, dados in (("composicao", composicao), ("precificado", precificado)):
+                with span("serializar", artefato=nome):
+                    texto = serializar(dados)
+                rastreador.registrar_conteudo(nome, texto)
+                escritor.gravar(output_dir / f"{nome}.json", texto)
+
+        rastreador.registrar_resultado(precificado)
+
+        if salvar_intermediarios and atualizar_dependencias:
+            with span("indice_dependencias"):
+                atualizar_indice(
+                    Path(indice_dependencias) if indice_dependencias else indice_padrao(),
+                    output_dir,
+                    precificado,
+                    escopo_path
+                )
+
+        # 4. Gerar PDF (opcional)
+        if gerar_pdf:
+            try:
+                from .gerador_pdf import gerar_pdf as gerar_pdf_func
+
+                if verbose:
+                    print("Gerando PDF...")
+                rastreador.iniciar_etapa()
+
+                equipamento = escopo.get('equipamento')
+                pdf_path = output_dir / "proposta.pdf"
+                with span("pdf"):
+                    gerar_pdf_func(precificado, equipamento, str(pdf_path))
+
+                rastreador.finalizar_etapa("pdf")
+                rastreador.registrar_arquivo("pdf", pdf_path)
+            except ImportError:
+                if verbose:
+                    print("Aviso: fpdf2 nao instalado, PDF nao gerado")
+
+        # 5. Finalizar metricas
+        with span("aguardar_gravacao"):
+            escritor.concluir()
 
-    # Carregar bases uma vez
-    if verbose:
-        print("Carregando bases de dados...")
-    bases = carregar_bases()
+    metricas = rastreador.finalizar()
 
-    # 1. Carregar escopo
-    if verbose:
-        print(f"Lendo escopo: {escopo_path}")
-    with open(escopo_path, 'r', encoding='utf-8') as f:
-        escopo = json.load(f)
+    if perfilador is not None:
+        metricas.perfil = perfilador.to_dict()
+        perfilador.exportar_chrome_trace(output_dir / "perfil_trace.json")
 
-    rastreador.registrar_arquivo("escopo", escopo_path)
+    metricas_path = output_dir / "metricas.json"
+    metricas.salvar(metricas_path)
 
-    # 2. Executar compositor
     if verbose:
-        print("Executando compositor...")
-    rastreador.iniciar_etapa()
+        print(formatar_metricas(metricas))
+        if perfilador is not None:
+            print(formatar_perfil(metricas.perfil["spans"]))
 
-    composicao = processar_compositor(escopo, bases)
+        resumo = precificado['resumo_financeiro']
+        print(f"\n{'='*50}")
+        print(f"VALOR TOTAL: R$ {resumo['valor_total']:,.2f}")
+        print(f"{'='*50}")
+        print(f"\nArquivos salvos em: {output_dir}")
 
-    rastreador.finalizar_etapa("compositor")
+    return {
+        "composicao": composicao,
+        "precificado": precificado,
+        "metricas": metricas.to_dict()
+    }
 
-    composicao_path = output_dir / "composicao.json"
-    with open(composicao_path, 'w', encoding='utf-8') as f:
-        json.dump(composicao, f, ensure_ascii=False, indent=2)
 
-    rastreador.registrar_arquivo("composicao", composicao_path)
+def listar_escopos(padrao: str) -> List[Path]:
+    """
+    Lista os arquivos de escopo do modo lote
 
-    # 3. Executar precificador
-    if verbose:
-        print("Executando precificador...")
-    rastreador.iniciar_etapa()
+    Args:
+        padrao: Diretorio (busca recursiva por escopo*.json) ou glob
 
-    precificado = processar_precificador(composicao, bases)
+    Returns:
+        Caminhos ordenados dos escopos encontrados
+    """
+    caminho = Path(padrao)
+    if caminho.is_dir():
+        return sorted(caminho.glob("**/escopo*.json"))
+    return sorted(Path(p) for p in glob.glob(padrao, recursive=True) if Path(p).is_file())
 
-    rastreador.finalizar_etapa("precificador")
 
-    precificado_path = output_dir / "precificado.json"
-    with open(precificado_path, 'w', encoding='utf-8') as f:
-        json.dump(precificado, f, ensure_ascii=False, indent=2)
+def nome_saida_escopo(escopo_path: Path) -> str:
+    """
+    Nome do diretorio de saida de um escopo no modo lote
 
-    rastreador.registrar_arquivo("precificado", precificado_path)
-    rastreador.registrar_resultado(precificado)
+    escopo.json usa o nome da pasta (clientes/acme/escopo.json -> acme);
+    demais arquivos usam o proprio nome (acme_escopo.json -> acme_escopo).
+    """
+    if escopo_path.stem == "escopo":
+        return escopo_path.parent.name or escopo_path.stem
+    return escopo_path.stem
 
-    # 4. Gerar PDF (opcional)
-    if gerar_pdf:
-        try:
-            from .gerador_pdf import gerar_pdf as gerar_pdf_func
 
-            if verbose:
-                print("Gerando PDF...")
-            rastreador.iniciar_etapa()
+def _inicializar_worker(indice: Optional[IndiceCatalogo] = None):
+    """Prepara o indice do catalogo no processo worker"""
+    global _indice_worker
+    _indice_worker = indice if indice is not None else IndiceCatalogo.carregar()
 
-            equipamento = escopo.get('equipamento')
-            pdf_path = output_dir / "proposta.pdf"
-            gerar_pdf_func(precificado, equipamento, str(pdf_path))
 
-            rastreador.finalizar_etapa("pdf")
-            rastreador.registrar_arquivo("pdf", pdf_path)
-        except ImportError:
-            if verbose:
-                print("Aviso: fpdf2 nao instalado, PDF nao gerado")
+def _executar_escopo_lote(
+    escopo_path: str,
+    output_dir: str,
+    gerar_pdf: bool,
+    salvar_intermediarios: bool
+) -> dict:
+    """Executa o pipeline de um escopo dentro do worker"""
+    try:
+        resultado = executar_pipeline(
+            escopo_path,
+            output_dir,
+            gerar_pdf=gerar_pdf,
+            verbose=False,
+            indice=_indice_worker,
+            salvar_intermediarios=salvar_intermediarios,
+            atualizar_dependencias=False
+        )
+        return {
+            "escopo": escopo_path,
+            "output_dir": output_dir,
+            "sucesso": True,
+            "metricas": resultado["metricas"],
+            "referencias": extrair_referencias(resultado["precificado"]),
+            "valor_total": resultado["precificado"]["resumo_financeiro"]["valor_total"]
+        }
+    except Exception as e:
+        return {
+            "escopo": escopo_path,
+            "output_dir": output_dir,
+            "sucesso": False,
+            "erro": f"{type(e).__name__}: {e}"
+        }
+
+
+def executar_lote(
+    padrao: str,
+    output_dir: str,
+    workers: Optional[int] = None,
+    gerar_pdf: bool = False,
+    verbose: bool = True,
+    salvar_intermediarios: bool = True
+) -> dict:
+    """
+    Executa o pipeline para varios escopos em um unico processo/pool
 
-    # 5. Finalizar metricas
-    metricas = rastreador.finalizar()
+    As bases sao carregadas uma vez; os escopos sao distribuidos em um pool
+    de processos (a geracao de PDF e limitada por CPU) e cada um grava seu
+    proprio diretorio em output_dir. Ao final grava resumo_lote.json e
+    atualiza output_dir/indice_dependencias.json (no processo principal).
 
-    metricas_path = output_dir / "metricas.json"
-    metricas.salvar(metricas_path)
+    Args:
+        padrao: Diretorio ou glob dos arquivos de escopo
+        output_dir: Diretorio base de saida (um subdiretorio por escopo)
+        workers: Numero de processos (padrao: CPUs; 1 executa em serie)
+        gerar_pdf: Se deve gerar PDF de cada escopo
+        verbose: Se deve exibir progresso
+        salvar_intermediarios: Grava composicao.json e precificado.json
+
+    Returns:
+        Dicionario com resultados por escopo e resumo consolidado
+    """
+    escopos = listar_escopos(padrao)
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+
+    # Um diretorio de saida por escopo (nomes repetidos recebem sufixo)
+    tarefas = []
+    usados = {}
+    for escopo_path in escopos:
+        nome = nome_saida_escopo(escopo_path)
+        usados[nome] = usados.get(nome, 0) + 1
+        if usados[nome] > 1:
+            nome = f"{nome}_{usados[nome]}"
+        tarefas.append((str(escopo_path), str(output_dir / nome), gerar_pdf, salvar_intermediarios))
+
+    if workers is None:
+        workers = os.cpu_count() or 1
+    workers = max(1, min(workers, len(tarefas) or 1))
 
     if verbose:
-        print(formatar_metricas(metricas))
+        print(f"Lote: {len(tarefas)} escopo(s), {workers} worker(s)")
 
-        resumo = precificado['resumo_financeiro']
-        print(f"\n{'='*50}")
-        print(f"VALOR TOTAL: R$ {resumo['valor_total']:,.2f}")
-        print(f"{'='*50}")
-        print(f"\nArquivos salvos em: {output_dir}")
+    # Carrega bases uma vez; os workers recebem o indice pronto via initargs
+    # (herdado no fork, serializado uma vez por worker no spawn)
+    indice = IndiceCatalogo.carregar()
 
-    return {
-        "precificado": precificado,
-        "metricas": metricas.to_dict()
-    }
+    inicio = time.perf_counter()
+    resultados = []
+
+    if workers == 1:
+        _inicializar_worker(indice)
+        for tarefa in tarefas:
+            resultados.append(_executar_escopo_lote(*tarefa))
+            if verbose:
+                _exibir_progresso(resultados[-1], len(resultados), len(tarefas))
+    else:
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            initializer=_inicializar_worker,
+            initargs=(indice,)
+        ) as executor:
+            futuros = [executor.submit(_executar_escopo_lote, *tarefa) for tarefa in tarefas]
+            for futuro in as_completed(futuros):
+                resultados.append(futuro.result())
+                if verbose:
+                    _exibir_progresso(resultados[-1], len(resultados), len(tarefas))
+
+    duracao = time.perf_counter() - inicio
+
+    resultados.sort(key=lambda r: r["escopo"])
+
+    # Indice de dependencias atualizado uma vez, sem concorrencia entre workers
+    dependencias = IndiceDependencias.carregar(output_dir / ARQUIVO_INDICE)
+    for r in resultados:
+        referencias = r.pop("referencias", None)
+        if r["sucesso"] and salvar_intermediarios:
+            dependencias.registrar(Path(r["output_dir"]), referencias, Path(r["escopo"]), r["valor_total"])
+    if salvar_intermediarios:
+        dependencias.salvar()
+    resumo = resumir_lote(
+        [r["metricas"] for r in resultados if r["sucesso"]],
+        duracao,
+        falhas=sum(1 for r in resultados if not r["sucesso"])
+    )
+    resumo["workers"] = workers
+
+    with open(output_dir / "resumo_lote.json", 'w', encoding='utf-8') as f:
+        json.dump({"resumo": resumo, "escopos": resultados}, f, ensure_ascii=False, indent=2)
+
+    if verbose:
+        print(formatar_resumo_lote(resumo))
+        for r in resultados:
+            if not r["sucesso"]:
+                print(f"  FALHA {r['escopo']}: {r['erro']}")
+        print(f"\nResumo salvo em: {output_dir / 'resumo_lote.json'}")
+
+    return {"resumo": resumo, "escopos": resultados}
+
+
+def _exibir_progresso(resultado: dict, concluidos: int, total: int):
+    """Exibe uma linha de progresso do lote"""
+    status = "ok" if resultado["sucesso"] else "FALHA"
+    print(f"[{concluidos}/{total}] {status} {resultado['escopo']}")
 
 
 def main():
     parser = argparse.ArgumentParser(
         description="Pipeline completo de orcamento HVAC"
     )
-    parser.add_argument(
+    entrada = parser.add_mutually_exclusive_group(required=True)
+    entrada.add_argument(
         "--input", "-i",
-        required=True,
         help="Arquivo escopo.json"
     )
+    entrada.add_argument(
+        "--batch", "-b",
+        help="Diretorio (busca escopo*.json recursivamente) ou glob de escopos"
+    )
     parser.add_argument(
         "--output-dir", "-o",
         required=True,
-        help="Diretorio de saida"
+        help="Diretorio de saida (no modo lote, um subdiretorio por escopo)"
+    )
+    parser.add_argument(
+        "--workers", "-w",
+        type=int,
+        help="Processos do modo lote (padrao: numero de CPUs)"
     )
     parser.add_argument(
         "--pdf",
         action="store_true",
         help="Gerar PDF da proposta"
     )
+    parser.add_argument(
+        "--sem-intermediarios",
+        action="store_true",
+        help="Nao grava composicao.json/precificado.json (etapas apenas em memoria)"
+    )
+    parser.add_argument(
+        "--escrita-assincrona",
+        action="store_true",
+        help="Grava os artefatos em segundo plano"
+    )
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="Recalcula apenas itens alterados desde a ultima execucao (cache no diretorio de saida)"
+    )
+    parser.add_argument(
+        "--indice-dependencias", "-x",
+        help=f"Indice de dependencias (padrao: HVAC_INDICE_DEPENDENCIAS ou output/{ARQUIVO_INDICE})"
+    )
+    parser.add_argument(
+        "--perfil",
+        action="store_true",
+        help="Perfil por etapa (tabela em metricas.json e perfil_trace.json para chrome://tracing)"
+    )
+    parser.add_argument(
+        "--perfil-memoria",
+        action="store_true",
+        help="Como --perfil, incluindo variacao de memoria por etapa (tracemalloc)"
+    )
     parser.add_argument(
         "--quiet", "-q",
         action="store_true",
@@ -150,11 +564,34 @@ def main():
 
     args = parser.parse_args()
 
+    if args.batch:
+        resultado = executar_lote(
+            padrao=args.batch,
+            output_dir=args.output_dir,
+            workers=args.workers,
+            gerar_pdf=args.pdf,
+            verbose=not args.quiet,
+            salvar_intermediarios=not args.sem_intermediarios
+        )
+
+        if args.quiet:
+            print(json.dumps(resultado["resumo"], indent=2))
+
+        if resultado["resumo"]["falhas"]:
+            sys.exit(1)
+        return
+
     resultado = executar_pipeline(
         escopo_path=args.input,
         output_dir=args.output_dir,
         gerar_pdf=args.pdf,
-        verbose=not args.quiet
+        verbose=not args.quiet,
+        salvar_intermediarios=not args.sem_intermediarios,
+        escrita_assincrona=args.escrita_assincrona,
+        incremental=args.incremental,
+        indice_dependencias=args.indice_dependencias,
+        perfil=args.perfil,
+        perfil_memoria=args.perfil_memoria
     )
 
     if args.quiet:
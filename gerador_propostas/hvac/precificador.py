@@ -3,22 +3,47 @@
 Precificador HVAC - Aplica precos e BDI para gerar orcamento final
 
 Entrada: composicao.json
-Saida: precificado.json
+Saida: precificado.json (ou precificado.jsonl no modo streaming)
 """
 
 import argparse
 import json
 import sys
-from datetime import date, datetime
+from datetime import date
 from pathlib import Path
-from typing import Dict, Any, List, Optional, Tuple
+from typing import Dict, Any, IO, Iterable, Iterator, List, Optional, Tuple
 
-from .utils.loader import carregar_bases, obter_item, obter_bdi
+# Limites de desatualizacao vivem no catalogo; reexportados por compatibilidade
+from .utils.catalogo import DIAS_ALERTA_PRECO, DIAS_CRITICO_PRECO  # noqa: F401
+from .utils.catalogo import (
+    IndiceCatalogo,
+    TIPOS,
+    classificar_preco,
+    extrair_preco,
+    ler_data_atualizacao,
+    texto_alerta_preco
+)
+from .utils.loader import obter_item
+from .utils.perfil import contar, span
 
 
-# Dias para considerar preco desatualizado
-DIAS_ALERTA_PRECO = 90
-DIAS_CRITICO_PRECO = 180
+# Backends de precificacao
+BACKENDS = ("auto", "python", "numpy")
+
+# Quantidade minima de linhas para o modo auto usar NumPy
+LIMIAR_LINHAS_NUMPY = 500
+
+# Listas de insumos de cada item, na ordem de catalogo.TIPOS
+CATEGORIAS = ("materiais", "mao_de_obra", "ferramentas", "equipamentos")
+
+# Formatos de saida do modo streaming
+FORMATOS_STREAM = ("json", "jsonl")
+
+# Situacoes de preco do relatorio de atualizacao (None do catalogo vira "ok")
+STATUS_PRECO = ("ok", "alerta", "critico")
+
+# Insumos desatualizados listados no relatorio (maiores custos)
+LIMITE_INSUMOS_RELATORIO = 10
 
 
 def obter_preco_item(bases: Dict, tipo: str, codigo: str) -> Tuple[float, Optional[str]]:
@@ -38,16 +63,7 @@ def obter_preco_item(bases: Dict, tipo: str, codigo: str) -> Tuple[float, Option
         return 0.0, None
 
     # Campo de preco varia por tipo
-    if tipo == "MAT":
-        preco = item.get("preco", 0.0)
-    elif tipo == "MO":
-        preco = item.get("custo_hora", 0.0)
-    elif tipo == "FER":
-        preco = item.get("custo_hora", 0.0)
-    elif tipo == "EQP":
-        preco = item.get("comercial", {}).get("preco", 0.0)
-    else:
-        preco = 0.0
+    preco = extrair_preco(tipo, item)
 
     data_atualizacao = item.get("data_atualizacao")
     return preco, data_atualizacao
@@ -63,27 +79,47 @@ def verificar_preco_desatualizado(data_str: Optional[str]) -> Optional[str]:
     Returns:
         None se OK, "alerta" ou "critico" se desatualizado
     """
-    if not data_str:
-        return "critico"
+    data = ler_data_atualizacao(data_str)
+    dias = None if data is None else (date.today() - data).days
+    return classificar_preco(dias)
 
-    try:
-        data = datetime.fromisoformat(data_str).date()
-        dias = (date.today() - data).days
 
-        if dias > DIAS_CRITICO_PRECO:
-            return "critico"
-        elif dias > DIAS_ALERTA_PRECO:
-            return "alerta"
-        return None
-    except ValueError:
-        return "critico"
+class ColetorAlertas:
+    """
+    Alertas distintos na ordem da primeira ocorrencia
+
+    Aceita append/extend como uma lista, entao pode ser passado onde as
+    funcoes de precificacao esperam a lista de alertas.
+    """
+
+    def __init__(self):
+        self._alertas: Dict[str, None] = {}
+
+    def append(self, alerta: str):
+        self._alertas.setdefault(alerta)
+
+    def extend(self, alertas: Iterable[str]):
+        for alerta in alertas:
+            self._alertas.setdefault(alerta)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._alertas)
+
+    def __len__(self) -> int:
+        return len(self._alertas)
+
+    def lista(self) -> List[str]:
+        """Copia dos alertas em ordem"""
+        return list(self._alertas)
 
 
 def precificar_lista(
     itens: List[Dict],
     tipo: str,
-    bases: Dict,
-    alertas: List[str]
+    bases: Optional[Dict],
+    alertas: List[str],
+    indice: Optional[IndiceCatalogo] = None,
+    alertas_preco: Optional[List[Optional[str]]] = None
 ) -> Tuple[List[Dict], float]:
     """
     Precifica uma lista de itens
@@ -92,11 +128,23 @@ def precificar_lista(
         itens: Lista de itens com codigo e quantidade
         tipo: Tipo dos itens (MAT, MO, FER, EQP)
         bases: Bases de dados
-        alertas: Lista para adicionar alertas
+        alertas: Lista (ou ColetorAlertas) para adicionar alertas
+        indice: Indice do catalogo (construido a partir de bases se nao informado;
+            informe-o ao precificar varias listas)
+        alertas_preco: Coluna indice.obter_alertas_preco() (obtida aqui se nao
+            informada; informe-a ao precificar varias listas)
 
     Returns:
         Tupla (lista_precificada, custo_total)
     """
+    if indice is None:
+        indice = IndiceCatalogo.de_bases(bases)
+    if alertas_preco is None:
+        alertas_preco = indice.obter_alertas_preco()
+
+    ids = indice.ids
+    precos = indice.precos
+
     resultado = []
     custo_total = 0.0
 
@@ -104,13 +152,18 @@ def precificar_lista(
         codigo = item["codigo"]
         quantidade = item["quantidade"]
 
-        preco_unit, data_atualizacao = obter_preco_item(bases, tipo, codigo)
+        item_id = ids.get((tipo, codigo), -1)
+        if item_id < 0:
+            preco_unit = 0.0
+            alerta = texto_alerta_preco("critico", tipo, codigo, None)
+        else:
+            preco_unit = precos[item_id]
+            alerta = alertas_preco[item_id]
         custo = preco_unit * quantidade
 
-        # Verifica desatualizacao
-        status = verificar_preco_desatualizado(data_atualizacao)
-        if status:
-            alertas.append(f"Preco {status}: {codigo} ({tipo}) - atualizado em {data_atualizacao or 'N/A'}")
+        # Situacao do preco ja calculada por insumo no indice
+        if alerta:
+            alertas.append(alerta)
 
         resultado.append({
             "codigo": codigo,
@@ -126,101 +179,178 @@ def precificar_lista(
     return resultado, custo_total
 
 
-def processar(composicao: Dict[str, Any], bases: Optional[Dict] = None) -> Dict[str, Any]:
+def montar_item_precificado(
+    item: Dict[str, Any],
+    listas: Tuple[List[Dict], List[Dict], List[Dict], List[Dict]],
+    custos: Tuple[float, float, float, float],
+    custo_direto: float,
+    bdi_total: float,
+    preco_total: float
+) -> Dict[str, Any]:
     """
-    Processa uma composicao e gera o orcamento precificado
+    Monta o registro de um item precificado
 
     Args:
-        composicao: Dicionario com a composicao
-        bases: Bases de dados (carrega automaticamente se nao informado)
+        item: Item do orcamento (composicao.json)
+        listas: Listas precificadas (materiais, mao de obra, ferramentas, equipamentos)
+        custos: Custos por categoria na mesma ordem das listas
+        custo_direto: Soma dos custos
+        bdi_total: Valor de BDI do item
+        preco_total: Custo direto + BDI
 
     Returns:
-        Dicionario com o orcamento precificado
+        Dicionario do item em precificado.json
     """
-    if bases is None:
-        bases = carregar_bases()
+    mat_prec, mo_prec, fer_prec, eqp_prec = listas
+    custo_mat, custo_mo, custo_fer, custo_eqp = custos
+
+    return {
+        "id": item.get("id"),
+        "descricao": item.get("descricao", ""),
+        "composicao": item.get("composicao"),
+        "quantidade": item.get("quantidade", 1),
+        "variavel": item.get("variavel", 0),
+        "materiais": mat_prec,
+        "mao_de_obra": mo_prec,
+        "ferramentas": fer_prec,
+        "equipamentos": eqp_prec,
+        "custo_materiais": round(custo_mat, 2),
+        "custo_mao_obra": round(custo_mo, 2),
+        "custo_ferramentas": round(custo_fer, 2),
+        "custo_equipamentos": round(custo_eqp, 2),
+        "custo_direto": round(custo_direto, 2),
+        "bdi": round(bdi_total, 2),
+        "preco_total": round(preco_total, 2)
+    }
 
-    alertas = []
 
-    resultado = {
-        "projeto": composicao.get("projeto", "Sem nome"),
-        "cliente": composicao.get("cliente"),
-        "data_orcamento": date.today().isoformat(),
-        "validade_dias": 15,
-        "itens_precificados": [],
-        "resumo_financeiro": {
-            "total_materiais": 0.0,
-            "total_mao_obra": 0.0,
-            "total_ferramentas": 0.0,
-            "total_equipamentos": 0.0,
-            "custo_direto": 0.0,
-            "bdi_materiais": 0.0,
-            "bdi_mao_obra": 0.0,
-            "bdi_ferramentas": 0.0,
-            "bdi_equipamentos": 0.0,
-            "total_bdi": 0.0,
-            "valor_total": 0.0
-        },
-        "alertas": []
-    }
+def iterar_itens_precificados(
+    itens_orcamento: Iterable[Dict],
+    indice: IndiceCatalogo,
+    alertas: List[str]
+) -> Iterator[Tuple[Dict[str, Any], Tuple[float, float, float, float]]]:
+    """
+    Precifica os itens do orcamento um a um (gerador)
 
+    Args:
+        itens_orcamento: Itens da composicao (qualquer iteravel)
+        indice: Indice do catalogo
+        alertas: Lista para adicionar alertas
+
+    Yields:
+        Tupla (item_precificado, custos nao arredondados MAT/MO/FER/EQP)
+    """
     # Obtem percentuais de BDI
-    bdi_mat = obter_bdi(bases, "MAT")
-    bdi_mo = obter_bdi(bases, "MO")
-    bdi_fer = obter_bdi(bases, "FER")
-    bdi_eqp = obter_bdi(bases, "EQP")
+    bdi_mat = indice.obter_bdi("MAT")
+    bdi_mo = indice.obter_bdi("MO")
+    bdi_fer = indice.obter_bdi("FER")
+    bdi_eqp = indice.obter_bdi("EQP")
+
+    # Alertas de preco do dia, uma vez por execucao
+    alertas_preco = indice.obter_alertas_preco()
+
+    # Processa cada item do orcamento
+    for item in itens_orcamento:
+        # Span fecha antes do yield (nao mede o consumidor)
+        with span("precificar_item"):
+            # Precifica cada categoria
+            mat_prec, custo_mat = precificar_lista(
+                item.get("materiais", []), "MAT", None, alertas, indice, alertas_preco
+            )
+            mo_prec, custo_mo = precificar_lista(
+                item.get("mao_de_obra", []), "MO", None, alertas, indice, alertas_preco
+            )
+            fer_prec, custo_fer = precificar_lista(
+                item.get("ferramentas", []), "FER", None, alertas, indice, alertas_preco
+            )
+            eqp_prec, custo_eqp = precificar_lista(
+                item.get("equipamentos", []), "EQP", None, alertas, indice, alertas_preco
+            )
+
+            custo_direto = custo_mat + custo_mo + custo_fer + custo_eqp
+
+            # Calcula BDI por categoria
+            bdi_val_mat = custo_mat * bdi_mat
+            bdi_val_mo = custo_mo * bdi_mo
+            bdi_val_fer = custo_fer * bdi_fer
+            bdi_val_eqp = custo_eqp * bdi_eqp
+            bdi_total = bdi_val_mat + bdi_val_mo + bdi_val_fer + bdi_val_eqp
+
+            preco_total = custo_direto + bdi_total
+
+            custos = (custo_mat, custo_mo, custo_fer, custo_eqp)
+            item_precificado = montar_item_precificado(
+                item,
+                (mat_prec, mo_prec, fer_prec, eqp_prec),
+                custos,
+                custo_direto,
+                bdi_total,
+                preco_total
+            )
+        contar("itens_precificados")
+        yield item_precificado, custos
+
+
+def precificar_itens(
+    itens_orcamento: List[Dict],
+    indice: IndiceCatalogo,
+    alertas: List[str]
+) -> Tuple[List[Dict], Tuple[float, float, float, float]]:
+    """
+    Precifica os itens do orcamento item a item (backend Python puro)
+
+    Args:
+        itens_orcamento: Itens da composicao
+        indice: Indice do catalogo
+        alertas: Lista para adicionar alertas
 
+    Returns:
+        Tupla (itens_precificados, totais por categoria MAT/MO/FER/EQP)
+    """
     # Totais acumulados
     total_mat = 0.0
     total_mo = 0.0
     total_fer = 0.0
     total_eqp = 0.0
 
-    # Processa cada item do orcamento
-    for item in composicao.get("itens_orcamento", []):
-        # Precifica cada categoria
-        mat_prec, custo_mat = precificar_lista(item.get("materiais", []), "MAT", bases, alertas)
-        mo_prec, custo_mo = precificar_lista(item.get("mao_de_obra", []), "MO", bases, alertas)
-        fer_prec, custo_fer = precificar_lista(item.get("ferramentas", []), "FER", bases, alertas)
-        eqp_prec, custo_eqp = precificar_lista(item.get("equipamentos", []), "EQP", bases, alertas)
-
-        custo_direto = custo_mat + custo_mo + custo_fer + custo_eqp
-
-        # Calcula BDI por categoria
-        bdi_val_mat = custo_mat * bdi_mat
-        bdi_val_mo = custo_mo * bdi_mo
-        bdi_val_fer = custo_fer * bdi_fer
-        bdi_val_eqp = custo_eqp * bdi_eqp
-        bdi_total = bdi_val_mat + bdi_val_mo + bdi_val_fer + bdi_val_eqp
-
-        preco_total = custo_direto + bdi_total
-
-        resultado["itens_precificados"].append({
-            "id": item.get("id"),
-            "descricao": item.get("descricao", ""),
-            "composicao": item.get("composicao"),
-            "quantidade": item.get("quantidade", 1),
-            "variavel": item.get("variavel", 0),
-            "materiais": mat_prec,
-            "mao_de_obra": mo_prec,
-            "ferramentas": fer_prec,
-            "equipamentos": eqp_prec,
-            "custo_materiais": round(custo_mat, 2),
-            "custo_mao_obra": round(custo_mo, 2),
-            "custo_ferramentas": round(custo_fer, 2),
-            "custo_equipamentos": round(custo_eqp, 2),
-            "custo_direto": round(custo_direto, 2),
-            "bdi": round(bdi_total, 2),
-            "preco_total": round(preco_total, 2)
-        })
+    itens_precificados = []
+
+    for item_precificado, custos in iterar_itens_precificados(itens_orcamento, indice, alertas):
+        itens_precificados.append(item_precificado)
 
         # Acumula totais
+        custo_mat, custo_mo, custo_fer, custo_eqp = custos
         total_mat += custo_mat
         total_mo += custo_mo
         total_fer += custo_fer
         total_eqp += custo_eqp
 
-    # Calcula resumo financeiro
+    return itens_precificados, (total_mat, total_mo, total_fer, total_eqp)
+
+
+def montar_resumo_financeiro(
+    totais: Tuple[float, float, float, float],
+    indice: Optional[IndiceCatalogo],
+    percentuais_bdi: Optional[Tuple[float, float, float, float]] = None
+) -> Dict[str, Any]:
+    """
+    Calcula o resumo financeiro a partir dos totais por categoria
+
+    Args:
+        totais: Custos totais (MAT, MO, FER, EQP)
+        indice: Indice do catalogo (percentuais de BDI)
+        percentuais_bdi: Percentuais MAT/MO/FER/EQP no lugar dos do indice
+            (ex: cenarios com outro BDI)
+
+    Returns:
+        Dicionario resumo_financeiro
+    """
+    total_mat, total_mo, total_fer, total_eqp = totais
+
+    if percentuais_bdi is None:
+        percentuais_bdi = tuple(indice.bdi)
+    bdi_mat, bdi_mo, bdi_fer, bdi_eqp = percentuais_bdi
+
     custo_direto_total = total_mat + total_mo + total_fer + total_eqp
 
     bdi_total_mat = total_mat * bdi_mat
@@ -231,7 +361,7 @@ def processar(composicao: Dict[str, Any], bases: Optional[Dict] = None) -> Dict[
 
     valor_total = custo_direto_total + bdi_total
 
-    resultado["resumo_financeiro"] = {
+    return {
         "total_materiais": round(total_mat, 2),
         "total_mao_obra": round(total_mo, 2),
         "total_ferramentas": round(total_fer, 2),
@@ -251,9 +381,347 @@ def processar(composicao: Dict[str, Any], bases: Optional[Dict] = None) -> Dict[
         }
     }
 
-    # Remove alertas duplicados
-    resultado["alertas"] = list(set(alertas))
 
+def usar_backend_numpy(itens_orcamento: List[Dict], backend: str = "auto") -> bool:
+    """
+    Decide se a precificacao usa o backend vetorizado (NumPy)
+
+    Args:
+        itens_orcamento: Itens da composicao
+        backend: "auto", "python" ou "numpy"
+
+    Returns:
+        True para usar o backend NumPy
+    """
+    if backend not in BACKENDS:
+        raise ValueError(f"Backend desconhecido: {backend} (use {', '.join(BACKENDS)})")
+
+    if backend == "python":
+        return False
+
+    try:
+        import numpy  # noqa: F401
+    except ImportError:
+        if backend == "numpy":
+            raise ImportError("numpy nao instalado. Execute: pip install numpy")
+        return False
+
+    if backend == "numpy":
+        return True
+
+    # auto: vetoriza apenas quando compensa o custo de montar os arrays
+    linhas = 0
+    for item in itens_orcamento:
+        for categoria in CATEGORIAS:
+            linhas += len(item.get(categoria, []))
+    return linhas >= LIMIAR_LINHAS_NUMPY
+
+
+def processar(
+    composicao: Dict[str, Any],
+    bases: Optional[Dict] = None,
+    indice: Optional[IndiceCatalogo] = None,
+    backend: str = "auto"
+) -> Dict[str, Any]:
+    """
+    Processa uma composicao e gera o orcamento precificado
+
+    Args:
+        composicao: Dicionario com a composicao
+        bases: Bases de dados (carrega automaticamente se nao informado)
+        indice: Indice do catalogo (construido a partir de bases se nao informado)
+        backend: "auto" (NumPy para composicoes grandes, se instalado),
+            "python" (forca o caminho Python puro) ou "numpy"
+
+    Returns:
+        Dicionario com o orcamento precificado
+    """
+    if indice is None:
+        indice = IndiceCatalogo.carregar() if bases is None else IndiceCatalogo.de_bases(bases)
+
+    alertas = ColetorAlertas()
+
+    itens_orcamento = composicao.get("itens_orcamento", [])
+
+    if usar_backend_numpy(itens_orcamento, backend):
+        from .precificador_vetorizado import precificar_itens_vetorizado
+        with span("precificar_vetorizado"):
+            itens_precificados, totais = precificar_itens_vetorizado(itens_orcamento, indice, alertas)
+    else:
+        itens_precificados, totais = precificar_itens(itens_orcamento, indice, alertas)
+
+    return montar_precificado(composicao, itens_precificados, totais, alertas, indice)
+
+
+def montar_precificado(
+    composicao: Dict[str, Any],
+    itens_precificados: List[Dict[str, Any]],
+    totais: Tuple[float, float, float, float],
+    alertas: List[str],
+    indice: IndiceCatalogo
+) -> Dict[str, Any]:
+    """
+    Monta o orcamento precificado a partir dos itens ja precificados
+
+    Args:
+        composicao: Composicao de origem (projeto/cliente)
+        itens_precificados: Itens precificados, na ordem da composicao
+        totais: Custos totais nao arredondados (MAT, MO, FER, EQP)
+        alertas: Alertas gerados, na ordem em que ocorreram (lista ou ColetorAlertas)
+        indice: Indice do catalogo (percentuais de BDI)
+
+    Returns:
+        Dicionario com o orcamento precificado
+    """
+    resultado = {
+        "projeto": composicao.get("projeto", "Sem nome"),
+        "cliente": composicao.get("cliente"),
+        "data_orcamento": date.today().isoformat(),
+        "validade_dias": 15,
+        "itens_precificados": [],
+        "resumo_financeiro": {
+            "total_materiais": 0.0,
+            "total_mao_obra": 0.0,
+            "total_ferramentas": 0.0,
+            "total_equipamentos": 0.0,
+            "custo_direto": 0.0,
+            "bdi_materiais": 0.0,
+            "bdi_mao_obra": 0.0,
+            "bdi_ferramentas": 0.0,
+            "bdi_equipamentos": 0.0,
+            "total_bdi": 0.0,
+            "valor_total": 0.0
+        },
+        "alertas": []
+    }
+
+    resultado["itens_precificados"] = itens_precificados
+    with span("resumo_financeiro"):
+        resultado["resumo_financeiro"] = montar_resumo_financeiro(totais, indice)
+
+    # Remove alertas duplicados mantendo a ordem da primeira ocorrencia
+    resultado["alertas"] = list(dict.fromkeys(alertas))
+
+    return resultado
+
+
+def relatorio_precos(
+    precificado: Dict[str, Any],
+    indice: IndiceCatalogo,
+    limite: int = LIMITE_INSUMOS_RELATORIO
+) -> Dict[str, Any]:
+    """
+    Quanto do custo da proposta depende de precos desatualizados
+
+    Usa a situacao de preco ja calculada por insumo no indice; cada linha
+    precificada so soma seu custo na situacao do insumo.
+
+    Args:
+        precificado: Orcamento gerado por processar()
+        indice: Indice do catalogo
+        limite: Insumos desatualizados listados (maiores custos primeiro)
+
+    Returns:
+        Dicionario com custo e percentual por situacao (ok, alerta,
+        critico) e os insumos desatualizados de maior custo; custos sao
+        somas dos custos arredondados das linhas
+    """
+    indice.obter_alertas_preco()
+    status_precos = indice.status_precos
+    dias_atualizacao = indice.dias_atualizacao
+    ids = indice.ids
+
+    por_status = {status: {"linhas": 0, "custo": 0.0} for status in STATUS_PRECO}
+    insumos: Dict[Tuple[str, str], Dict[str, Any]] = {}
+
+    for item in precificado.get("itens_precificados", []):
+        for tipo, categoria in zip(TIPOS, CATEGORIAS):
+            for linha in item.get(categoria, []):
+                codigo = linha["codigo"]
+                item_id = ids.get((tipo, codigo), -1)
+                if item_id < 0:
+                    status, dias = "critico", None
+                else:
+                    status = status_precos[item_id] or "ok"
+                    dias = dias_atualizacao[item_id]
+
+                custo = linha["custo"]
+                por_status[status]["linhas"] += 1
+                por_status[status]["custo"] += custo
+
+                if status != "ok":
+                    insumo = insumos.setdefault((tipo, codigo), {
+                        "tipo": tipo,
+                        "codigo": codigo,
+                        "status": status,
+                        "dias": dias,
+                        "custo": 0.0
+                    })
+                    insumo["custo"] += custo
+
+    custo_total = sum(dados["custo"] for dados in por_status.values())
+    custo_desatualizado = por_status["alerta"]["custo"] + por_status["critico"]["custo"]
+
+    def percentual(valor: float) -> float:
+        return round(valor / custo_total * 100, 1) if custo_total else 0.0
+
+    for dados in por_status.values():
+        dados["percentual"] = percentual(dados["custo"])
+        dados["custo"] = round(dados["custo"], 2)
+
+    maiores = sorted(insumos.values(), key=lambda insumo: (-insumo["custo"], insumo["codigo"]))[:limite]
+    for insumo in maiores:
+        insumo["custo"] = round(insumo["custo"], 2)
+
+    return {
+        "data_referencia": indice.data_referencia.isoformat(),
+        "custo_linhas": round(custo_total, 2),
+        "custo_desatualizado": round(custo_desatualizado, 2),
+        "percentual_desatualizado": percentual(custo_desatualizado),
+        "por_status": por_status,
+        "insumos_desatualizados": maiores
+    }
+
+
+def formatar_relatorio_precos(relatorio: Dict[str, Any]) -> str:
+    """Texto do relatorio de atualizacao de precos para o terminal"""
+    linhas = [
+        f"  Precos desatualizados: {relatorio['percentual_desatualizado']:.1f}% do custo direto "
+        f"(R$ {relatorio['custo_desatualizado']:,.2f})"
+    ]
+    for status in STATUS_PRECO:
+        dados = relatorio["por_status"][status]
+        linhas.append(f"    {status:<8} {dados['linhas']:>6} linhas  R$ {dados['custo']:>14,.2f}  {dados['percentual']:5.1f}%")
+    for insumo in relatorio["insumos_desatualizados"]:
+        dias = "sem data" if insumo["dias"] is None else f"{insumo['dias']} dias"
+        linhas.append(
+            f"    - {insumo['codigo']} ({insumo['tipo']}, {insumo['status']}, {dias}): R$ {insumo['custo']:,.2f}"
+        )
+    return "\n".join(linhas)
+
+
+def _json_aninhado(valor: Any, nivel: int) -> str:
+    """Serializa um valor como json.dump(indent=2) o faria no nivel informado"""
+    return json.dumps(valor, ensure_ascii=False, indent=2).replace("\n", "\n" + "  " * nivel)
+
+
+def gravar_precificado_stream(
+    composicao: Dict[str, Any],
+    destino: IO[str],
+    indice: IndiceCatalogo,
+    formato: str = "json",
+    itens_orcamento: Optional[Iterable[Dict]] = None
+) -> Dict[str, Any]:
+    """
+    Precifica e grava os itens um a um, sem montar o orcamento em memoria
+
+    Apenas os totais por categoria e os alertas distintos sao mantidos.
+    No formato "json" o arquivo e identico ao gerado por
+    json.dump(processar(composicao), indent=2, ensure_ascii=False). No formato
+    "jsonl" cada linha e um registro: cabecalho ({"registro": "cabecalho"}),
+    um item precificado por linha e, ao final, {"registro": "resumo"} com
+    resumo_financeiro e alertas (ver ler_precificado_jsonl).
+
+    Args:
+        composicao: Composicao (cabecalho; itens_orcamento se nao informados)
+        destino: Arquivo texto aberto para escrita
+        indice: Indice do catalogo
+        formato: "json" ou "jsonl"
+        itens_orcamento: Iteravel de itens (ex: gerador lendo de outra fonte)
+
+    Returns:
+        Dicionario com qtd_itens, resumo_financeiro e alertas
+    """
+    if formato not in FORMATOS_STREAM:
+        raise ValueError(f"Formato desconhecido: {formato} (use {', '.join(FORMATOS_STREAM)})")
+
+    if itens_orcamento is None:
+        itens_orcamento = composicao.get("itens_orcamento", [])
+
+    # Esqueleto com a ordem das chaves de precificado.json
+    cabecalho = montar_precificado(composicao, [], (0.0, 0.0, 0.0, 0.0), [], indice)
+    chaves = list(cabecalho)
+    pos_itens = chaves.index("itens_precificados")
+
+    if formato == "json":
+        destino.write("{")
+        for chave in chaves[:pos_itens]:
+            destino.write(f"\n  {json.dumps(chave)}: {_json_aninhado(cabecalho[chave], 1)},")
+        destino.write('\n  "itens_precificados": [')
+    else:
+        registro = {"registro": "cabecalho"}
+        registro.update((chave, cabecalho[chave]) for chave in chaves[:pos_itens])
+        destino.write(json.dumps(registro, ensure_ascii=False) + "\n")
+
+    total_mat = 0.0
+    total_mo = 0.0
+    total_fer = 0.0
+    total_eqp = 0.0
+    alertas = ColetorAlertas()
+    qtd_itens = 0
+
+    for item_precificado, custos in iterar_itens_precificados(itens_orcamento, indice, alertas):
+        if formato == "json":
+            separador = "\n    " if qtd_itens == 0 else ",\n    "
+            destino.write(separador + _json_aninhado(item_precificado, 2))
+        else:
+            destino.write(json.dumps(item_precificado, ensure_ascii=False) + "\n")
+        qtd_itens += 1
+
+        # Mesma ordem de acumulacao de precificar_itens
+        custo_mat, custo_mo, custo_fer, custo_eqp = custos
+        total_mat += custo_mat
+        total_mo += custo_mo
+        total_fer += custo_fer
+        total_eqp += custo_eqp
+
+    final = {
+        "resumo_financeiro": montar_resumo_financeiro((total_mat, total_mo, total_fer, total_eqp), indice),
+        "alertas": alertas.lista()
+    }
+    final.update((chave, cabecalho[chave]) for chave in chaves[pos_itens + 1:] if chave not in final)
+
+    if formato == "json":
+        destino.write("\n  ]" if qtd_itens else "]")
+        for chave in chaves[pos_itens + 1:]:
+            destino.write(f",\n  {json.dumps(chave)}: {_json_aninhado(final[chave], 1)}")
+        destino.write("\n}")
+    else:
+        registro = {"registro": "resumo"}
+        registro.update(final)
+        destino.write(json.dumps(registro, ensure_ascii=False) + "\n")
+
+    return {
+        "qtd_itens": qtd_itens,
+        "resumo_financeiro": final["resumo_financeiro"],
+        "alertas": final["alertas"]
+    }
+
+
+def ler_precificado_jsonl(linhas: Iterable[str]) -> Dict[str, Any]:
+    """
+    Reconstroi o orcamento precificado a partir do formato JSON Lines
+
+    Args:
+        linhas: Linhas do arquivo .jsonl
+
+    Returns:
+        Dicionario igual ao de processar()
+    """
+    resultado: Dict[str, Any] = {}
+    itens = []
+    for linha in linhas:
+        if not linha.strip():
+            continue
+        registro = json.loads(linha)
+        tipo = registro.pop("registro", None)
+        if tipo == "cabecalho":
+            resultado.update(registro)
+            resultado["itens_precificados"] = itens
+        elif tipo == "resumo":
+            resultado.update(registro)
+        else:
+            itens.append(registro)
     return resultado
 
 
@@ -276,6 +744,28 @@ def main():
         "--bases-dir",
         help="Diretorio das bases de dados (opcional)"
     )
+    parser.add_argument(
+        "--backend",
+        choices=BACKENDS,
+        default="auto",
+        help="Backend de calculo: auto, python (forca Python puro) ou numpy"
+    )
+    parser.add_argument(
+        "--stream",
+        action="store_true",
+        help="Grava os itens um a um, sem montar o orcamento em memoria"
+    )
+    parser.add_argument(
+        "--formato",
+        choices=FORMATOS_STREAM,
+        default="json",
+        help="Formato do modo streaming: json (array) ou jsonl (um item por linha)"
+    )
+    parser.add_argument(
+        "--relatorio-precos",
+        action="store_true",
+        help="Exibe quanto do custo depende de precos desatualizados (fora do modo --stream)"
+    )
 
     args = parser.parse_args()
 
@@ -290,15 +780,27 @@ def main():
 
     # Carrega bases
     bases_dir = Path(args.bases_dir) if args.bases_dir else None
-    bases = carregar_bases(bases_dir)
+    indice = IndiceCatalogo.carregar(bases_dir)
 
-    # Processa
-    precificado = processar(composicao, bases)
-
-    # Salva resultado
     output_path = Path(args.output)
     output_path.parent.mkdir(parents=True, exist_ok=True)
 
+    # Modo streaming: precifica e grava item a item
+    if args.stream:
+        with open(output_path, "w", encoding="utf-8") as f:
+            resultado = gravar_precificado_stream(composicao, f, indice, formato=args.formato)
+
+        resumo = resultado["resumo_financeiro"]
+        print(f"Orcamento precificado ({resultado['qtd_itens']} itens, streaming): {output_path}")
+        print(f"  VALOR TOTAL:  R$ {resumo['valor_total']:,.2f}")
+        if resultado["alertas"]:
+            print(f"\n  Alertas: {len(resultado['alertas'])}")
+        return
+
+    # Processa
+    precificado = processar(composicao, indice=indice, backend=args.backend)
+
+    # Salva resultado
     with open(output_path, "w", encoding="utf-8") as f:
         json.dump(precificado, f, ensure_ascii=False, indent=2)
 
@@ -312,6 +814,10 @@ def main():
     if precificado["alertas"]:
         print(f"\n  Alertas: {len(precificado['alertas'])}")
 
+    if args.relatorio_precos:
+        print()
+        print(formatar_relatorio_precos(relatorio_precos(precificado, indice)))
+
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,143 @@
+"""
+Backend vetorizado (NumPy) do precificador
+
+Precifica todas as linhas expandidas da composicao de uma vez: quantidades
+multiplicadas pelos precos unitarios coletados do indice do catalogo, BDI
+aplicado por um vetor de tipos e somas agrupadas por item/categoria via
+np.bincount. A saida e identica a de precificador.precificar_itens.
+
+Para manter o resultado bit a bit igual ao caminho Python:
+- somas agrupadas usam np.bincount, que acumula sequencialmente na ordem
+  das linhas (mesma ordem do "custo_total += custo" do caminho Python);
+- somas entre categorias sao feitas coluna a coluna, na mesma ordem;
+- arredondamentos usam round() do Python sobre os valores convertidos.
+"""
+
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+from .precificador import CATEGORIAS, montar_item_precificado
+from .utils.catalogo import IndiceCatalogo, TIPOS, texto_alerta_preco
+
+
+def precificar_itens_vetorizado(
+    itens_orcamento: List[Dict],
+    indice: IndiceCatalogo,
+    alertas: List[str]
+) -> Tuple[List[Dict], Tuple[float, float, float, float]]:
+    """
+    Precifica os itens do orcamento como operacoes sobre arrays
+
+    Args:
+        itens_orcamento: Itens da composicao
+        indice: Indice do catalogo
+        alertas: Lista para adicionar alertas
+
+    Returns:
+        Tupla (itens_precificados, totais por categoria MAT/MO/FER/EQP)
+    """
+    n_tipos = len(TIPOS)
+    n_grupos = len(itens_orcamento) * n_tipos
+
+    # 1. Achata as linhas: grupo = item * n_tipos + tipo
+    linhas = []
+    grupos = []
+    ids = []
+    quantidades = []
+
+    obter_id = indice.ids.get
+    for pos_item, item in enumerate(itens_orcamento):
+        for codigo_tipo, categoria in enumerate(CATEGORIAS):
+            tipo = TIPOS[codigo_tipo]
+            grupo = pos_item * n_tipos + codigo_tipo
+            for linha in item.get(categoria, []):
+                linhas.append(linha)
+                grupos.append(grupo)
+                ids.append(obter_id((tipo, linha["codigo"]), -1))
+                quantidades.append(linha["quantidade"])
+
+    # 2. Custos por linha: precos coletados pelo id (-1 aponta para a sentinela 0.0)
+    precos = np.append(np.asarray(indice.precos, dtype=np.float64), 0.0)
+    ids_arr = np.asarray(ids, dtype=np.intp)
+    qtd_arr = np.asarray(quantidades, dtype=np.float64)
+    grupos_arr = np.asarray(grupos, dtype=np.intp)
+
+    custos_linha = qtd_arr * precos[ids_arr]
+
+    # 3. Soma por item/categoria -> matriz (itens x tipos)
+    custos = np.bincount(grupos_arr, weights=custos_linha, minlength=n_grupos)
+    custos = custos.reshape(len(itens_orcamento), n_tipos)
+
+    # 4. BDI por tipo (vetor de percentuais na ordem de TIPOS)
+    bdi_vals = custos * np.asarray(indice.bdi, dtype=np.float64)
+
+    custo_direto = custos[:, 0] + custos[:, 1] + custos[:, 2] + custos[:, 3]
+    bdi_total = bdi_vals[:, 0] + bdi_vals[:, 1] + bdi_vals[:, 2] + bdi_vals[:, 3]
+    preco_total = custo_direto + bdi_total
+
+    totais = tuple(
+        np.bincount(np.zeros(len(itens_orcamento), dtype=np.intp),
+                    weights=custos[:, codigo_tipo], minlength=1)[0].item()
+        for codigo_tipo in range(n_tipos)
+    )
+
+    # 5. Monta a saida (unico laco Python, apenas montagem de dicts)
+    custos_linha_py = custos_linha.tolist()
+    custos_py = custos.tolist()
+    custo_direto_py = custo_direto.tolist()
+    bdi_total_py = bdi_total.tolist()
+    preco_total_py = preco_total.tolist()
+
+    precos_catalogo = indice.precos
+    alertas_preco = indice.obter_alertas_preco()
+
+    itens_precificados = []
+    pos_linha = 0
+    for pos_item, item in enumerate(itens_orcamento):
+        listas = []
+        for codigo_tipo, categoria in enumerate(CATEGORIAS):
+            tipo = TIPOS[codigo_tipo]
+            lista = []
+            for _ in item.get(categoria, []):
+                linha = linhas[pos_linha]
+                item_id = ids[pos_linha]
+                quantidade = quantidades[pos_linha]
+
+                if item_id < 0:
+                    preco_unit = 0.0
+                    alerta = texto_alerta_preco("critico", tipo, linha["codigo"], None)
+                else:
+                    preco_unit = precos_catalogo[item_id]
+                    alerta = alertas_preco[item_id]
+
+                # Situacao do preco ja calculada por insumo no indice
+                if alerta:
+                    alertas.append(alerta)
+
+                custo = custos_linha_py[pos_linha]
+                # int x int no caminho Python gera int; preserva o tipo na saida
+                if type(preco_unit) is int and type(quantidade) is int:
+                    custo = int(custo)
+
+                lista.append({
+                    "codigo": linha["codigo"],
+                    "descricao": linha.get("descricao", ""),
+                    "quantidade": quantidade,
+                    "unidade": linha.get("unidade", "UN"),
+                    "preco_unitario": round(preco_unit, 2),
+                    "custo": round(custo, 2)
+                })
+                pos_linha += 1
+            listas.append(lista)
+
+        itens_precificados.append(montar_item_precificado(
+            item,
+            tuple(listas),
+            tuple(custos_py[pos_item]),
+            custo_direto_py[pos_item],
+            bdi_total_py[pos_item],
+            preco_total_py[pos_item]
+        ))
+
+    return itens_precificados, totais
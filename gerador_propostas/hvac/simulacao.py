@@ -0,0 +1,347 @@
+#!/usr/bin/env python3
+"""
+Simulacao de Monte Carlo do risco de custo do orcamento
+
+Parte da composicao ja expandida (saida do compositor), reaproveitando as
+linhas achatadas de cenarios.MotorCenarios: nenhuma tentativa re-expande o
+escopo. Cada tentativa sorteia multiplicadores triangulares:
+- de preco, um por regra e por tentativa, aplicado a todos os insumos da
+  regra (ex: o cobre sobe junto em todo o projeto);
+- de quantidade, um por item, por regra e por tentativa (ex: metros de
+  linha e horas de mao de obra variam de obra para obra).
+
+O preco de venda fica fixo no valor deterministico (custo base + BDI); o
+custo simulado de cada item define a margem. O relatorio traz P50/P80/P95
+do custo do projeto e, por item, a margem em risco (P95 do custo menos o
+custo base) e a probabilidade de prejuizo.
+
+As regras usam os seletores de cenarios ("MO", "MAT:TUB_*",
+"MAT/Tubulacao") e valem na ordem em que aparecem: cada insumo segue a
+primeira regra de preco e a primeira regra de quantidade que o seleciona.
+A variacao e [minimo, maximo] (moda 0) ou [minimo, moda, maximo], em
+fracao do valor base (ex: [-0.1, 0.3] = de -10% a +30%).
+
+Uso:
+    python -m hvac.simulacao -i composicao.json
+    python -m hvac.simulacao -i composicao.json --incertezas incertezas.json --tentativas 50000
+"""
+
+import argparse
+import json
+import sys
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, Any, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .cenarios import MotorCenarios
+from .utils.catalogo import IndiceCatalogo
+
+
+# Tentativas padrao da simulacao
+TENTATIVAS_PADRAO = 20000
+
+# Percentis reportados do custo
+PERCENTIS = (50, 80, 95)
+
+# Elementos (itens x tentativas) processados por bloco, para limitar a memoria
+ELEMENTOS_POR_BLOCO = 4_000_000
+
+# Incertezas usadas quando nenhum arquivo e informado
+INCERTEZAS_PADRAO = {
+    "quantidade": {"MO": [-0.1, 0.3], "MAT": [-0.05, 0.15]},
+    "preco": {"MAT/Tubulacao": [-0.05, 0.2], "MO": [0.0, 0.08]}
+}
+
+
+@dataclass
+class Incertezas:
+    """Distribuicoes triangulares de quantidade e preco por seletor de insumos"""
+
+    # Seletor -> (minimo, moda, maximo) da variacao da quantidade
+    quantidade: Dict[str, Tuple[float, float, float]] = field(default_factory=dict)
+    # Seletor -> (minimo, moda, maximo) da variacao do preco
+    preco: Dict[str, Tuple[float, float, float]] = field(default_factory=dict)
+
+    @classmethod
+    def de_dict(cls, dados: Dict[str, Any]) -> "Incertezas":
+        """Le {"quantidade": {seletor: [min, max]}, "preco": {...}}"""
+        return cls(
+            quantidade={s: normalizar_variacao(s, v) for s, v in dados.get("quantidade", {}).items()},
+            preco={s: normalizar_variacao(s, v) for s, v in dados.get("preco", {}).items()}
+        )
+
+
+def normalizar_variacao(seletor: str, variacao: Sequence[float]) -> Tuple[float, float, float]:
+    """
+    Converte [min, max] ou [min, moda, max] em (min, moda, max)
+
+    Raises:
+        ValueError: Formato invalido, fora de ordem ou minimo <= -100%
+    """
+    if len(variacao) == 2:
+        minimo, maximo = variacao
+        moda = min(max(0.0, minimo), maximo)
+    elif len(variacao) == 3:
+        minimo, moda, maximo = variacao
+    else:
+        raise ValueError(f"Variacao invalida para {seletor}: {variacao} (use [min, max] ou [min, moda, max])")
+
+    if not minimo <= moda <= maximo:
+        raise ValueError(f"Variacao fora de ordem para {seletor}: {variacao}")
+    if minimo <= -1:
+        raise ValueError(f"Variacao minima deve ser maior que -100% para {seletor}: {variacao}")
+    return float(minimo), float(moda), float(maximo)
+
+
+def _sortear(
+    gerador: np.random.Generator,
+    variacao: Tuple[float, float, float],
+    tamanho: Tuple[int, ...]
+) -> np.ndarray:
+    """Multiplicadores 1 + variacao triangular (constante se a faixa for nula)"""
+    minimo, moda, maximo = variacao
+    if minimo == maximo:
+        return np.full(tamanho, 1.0 + minimo)
+    return 1.0 + gerador.triangular(minimo, moda, maximo, size=tamanho)
+
+
+class SimuladorCusto:
+    """Simulacao vetorizada sobre as linhas de um MotorCenarios"""
+
+    def __init__(self, motor: MotorCenarios, incertezas: Incertezas):
+        """
+        Args:
+            motor: Motor de cenarios da composicao (linhas ja achatadas)
+            incertezas: Distribuicoes de quantidade e preco
+        """
+        self.motor = motor
+        self.incertezas = incertezas
+        n_insumos = len(motor.ids)
+
+        self.regras_preco = list(incertezas.preco.items())
+        self.regras_quantidade = list(incertezas.quantidade.items())
+        self.grupo_preco = self._agrupar([seletor for seletor, _ in self.regras_preco])
+        self.grupo_quantidade = self._agrupar([seletor for seletor, _ in self.regras_quantidade])
+
+        # Colunas de cada grupo de quantidade (o ultimo e "sem incerteza")
+        self.colunas_grupo = [
+            np.flatnonzero(self.grupo_quantidade == grupo)
+            for grupo in range(len(self.regras_quantidade))
+        ] + [np.flatnonzero(self.grupo_quantidade < 0)]
+
+        # Custo base e preco de venda por insumo (BDI do tipo)
+        self.custo_linha = motor.linhas_qtd * motor.precos[motor.linhas_coluna]
+        bdi = np.asarray(motor.indice.bdi, dtype=np.float64)
+        self.fator_venda = 1.0 + bdi[motor.tipos] if n_insumos else np.zeros(0)
+
+    def _agrupar(self, seletores: List[str]) -> np.ndarray:
+        """Primeira regra que seleciona cada insumo (-1 se nenhuma)"""
+        grupo = np.full(len(self.motor.ids), -1, dtype=np.intp)
+        for idx, seletor in enumerate(seletores):
+            grupo[self.motor.selecionar(seletor) & (grupo < 0)] = idx
+        return grupo
+
+    def _custos_item(self, inicio: int, fim: int) -> np.ndarray:
+        """Custo base item x insumo dos itens [inicio, fim)"""
+        motor = self.motor
+        n_insumos = len(motor.ids)
+        # Linhas estao na ordem dos itens: o bloco e um trecho contiguo
+        primeira, ultima = np.searchsorted(motor.linhas_item, [inicio, fim])
+        posicoes = (motor.linhas_item[primeira:ultima] - inicio) * n_insumos + motor.linhas_coluna[primeira:ultima]
+        custos = np.bincount(posicoes, weights=self.custo_linha[primeira:ultima], minlength=(fim - inicio) * n_insumos)
+        return custos.reshape(fim - inicio, n_insumos)
+
+    def simular(self, tentativas: int = TENTATIVAS_PADRAO, semente: Optional[int] = None) -> Dict[str, Any]:
+        """
+        Executa a simulacao
+
+        Args:
+            tentativas: Numero de tentativas
+            semente: Semente do gerador (None: aleatoria)
+
+        Returns:
+            {"tentativas", "semente", "projeto": {...}, "itens": [...]}
+        """
+        if tentativas < 1:
+            raise ValueError(f"tentativas deve ser positivo: {tentativas}")
+
+        gerador = np.random.default_rng(semente)
+        motor = self.motor
+        n_itens = len(motor.itens)
+
+        # Precos: um multiplicador por regra e tentativa, expandido para insumos
+        # (grupo -1, sem regra, cai na ultima linha, de uns)
+        fatores_regra = np.stack(
+            [_sortear(gerador, variacao, (tentativas,)) for _, variacao in self.regras_preco]
+            + [np.ones(tentativas)]
+        )
+        fatores_preco = fatores_regra[self.grupo_preco]
+
+        n_grupos = len(self.regras_quantidade)
+        tamanho_bloco = max(1, ELEMENTOS_POR_BLOCO // (tentativas * (n_grupos + 1)))
+
+        custo_projeto = np.zeros(tentativas)
+        custo_base_total = 0.0
+        preco_total = 0.0
+        itens = []
+        for inicio in range(0, n_itens, tamanho_bloco):
+            fim = min(inicio + tamanho_bloco, n_itens)
+            custos = self._custos_item(inicio, fim)
+
+            # Custo simulado item x tentativa, somado por grupo de quantidade
+            simulado = np.zeros((fim - inicio, tentativas))
+            for grupo, colunas in enumerate(self.colunas_grupo):
+                if not len(colunas):
+                    continue
+                parcial = custos[:, colunas] @ fatores_preco[colunas]
+                if grupo < n_grupos:
+                    parcial *= _sortear(gerador, self.regras_quantidade[grupo][1], parcial.shape)
+                simulado += parcial
+
+            custo_projeto += simulado.sum(axis=0)
+            custo_base = custos.sum(axis=1)
+            preco = custos @ self.fator_venda
+            custo_base_total += float(custo_base.sum())
+            preco_total += float(preco.sum())
+            percentis = np.percentile(simulado, PERCENTIS, axis=1)
+            prejuizo = (simulado > preco[:, None]).mean(axis=1)
+
+            for posicao in range(fim - inicio):
+                item = motor.itens[inicio + posicao]
+                itens.append(_resumo_custo(
+                    {"id": item.get("id"), "descricao": item.get("descricao", "")},
+                    custo_base[posicao],
+                    preco[posicao],
+                    percentis[:, posicao],
+                    prejuizo[posicao]
+                ))
+
+        return {
+            "tentativas": tentativas,
+            "semente": semente,
+            "projeto": _resumo_custo(
+                {},
+                custo_base_total,
+                preco_total,
+                np.percentile(custo_projeto, PERCENTIS),
+                float((custo_projeto > preco_total).mean())
+            ),
+            "itens": itens
+        }
+
+
+def _resumo_custo(
+    registro: Dict[str, Any],
+    custo_base: float,
+    preco: float,
+    percentis: Sequence[float],
+    prob_prejuizo: float
+) -> Dict[str, Any]:
+    """Acrescenta percentis, margem e margem em risco ao registro"""
+    custo_base = float(custo_base)
+    preco = float(preco)
+    registro["custo_base"] = round(custo_base, 2)
+    for percentil, valor in zip(PERCENTIS, percentis):
+        registro[f"custo_p{percentil}"] = round(float(valor), 2)
+    registro["preco"] = round(preco, 2)
+    registro["margem_base"] = round(preco - custo_base, 2)
+    # Margem perdida no P95 do custo
+    registro["margem_em_risco"] = round(float(percentis[-1]) - custo_base, 2)
+    registro["prob_prejuizo"] = round(float(prob_prejuizo), 4)
+    return registro
+
+
+def simular_custos(
+    composicao: Dict[str, Any],
+    incertezas: Optional[Incertezas] = None,
+    tentativas: int = TENTATIVAS_PADRAO,
+    semente: Optional[int] = None,
+    indice: Optional[IndiceCatalogo] = None
+) -> Dict[str, Any]:
+    """
+    Simula o risco de custo de uma composicao (ver SimuladorCusto.simular)
+
+    Args:
+        composicao: Composicao (saida do compositor)
+        incertezas: Distribuicoes (padrao: INCERTEZAS_PADRAO)
+        tentativas: Numero de tentativas
+        semente: Semente do gerador
+        indice: Indice do catalogo (carregado se nao informado)
+    """
+    if indice is None:
+        indice = IndiceCatalogo.carregar()
+    if incertezas is None:
+        incertezas = Incertezas.de_dict(INCERTEZAS_PADRAO)
+    return SimuladorCusto(MotorCenarios(composicao, indice), incertezas).simular(tentativas, semente)
+
+
+def formatar_simulacao(resultado: Dict[str, Any], limite: int = 10) -> str:
+    """Resumo da simulacao para o terminal (itens com maior margem em risco)"""
+    projeto = resultado["projeto"]
+    linhas = [
+        f"Simulacao: {resultado['tentativas']} tentativas",
+        f"  Custo base:  R$ {projeto['custo_base']:,.2f}",
+    ]
+    for percentil in PERCENTIS:
+        linhas.append(f"  Custo P{percentil}:  R$ {projeto[f'custo_p{percentil}']:,.2f}")
+    linhas += [
+        f"  Preco:       R$ {projeto['preco']:,.2f}",
+        f"  Margem base: R$ {projeto['margem_base']:,.2f}  (em risco no P95: R$ {projeto['margem_em_risco']:,.2f})",
+        f"  Prob. prejuizo: {projeto['prob_prejuizo'] * 100:.2f}%",
+        "",
+        "  Itens com maior margem em risco:"
+    ]
+    maiores = sorted(resultado["itens"], key=lambda item: -item["margem_em_risco"])[:limite]
+    for item in maiores:
+        linhas.append(
+            f"    {str(item['id']):>5}  {item['descricao'][:40]:<40}  R$ {item['margem_em_risco']:>12,.2f}"
+            f"  ({item['prob_prejuizo'] * 100:.1f}% prejuizo)"
+        )
+    return "\n".join(linhas)
+
+
+def main():
+    """CLI principal"""
+    parser = argparse.ArgumentParser(description="Simulacao de Monte Carlo do custo do orcamento HVAC")
+    parser.add_argument("--input", "-i", required=True, help="Arquivo JSON de entrada (composicao)")
+    parser.add_argument("--incertezas", help="Arquivo JSON com as distribuicoes (padrao: INCERTEZAS_PADRAO)")
+    parser.add_argument("--tentativas", "-n", type=int, default=TENTATIVAS_PADRAO, help="Numero de tentativas")
+    parser.add_argument("--semente", type=int, help="Semente do gerador aleatorio")
+    parser.add_argument("--output", "-o", help="Arquivo JSON de saida")
+    parser.add_argument("--bases-dir", help="Diretorio das bases de dados (opcional)")
+
+    args = parser.parse_args()
+
+    input_path = Path(args.input)
+    if not input_path.exists():
+        print(f"Erro: Arquivo de entrada nao encontrado: {input_path}", file=sys.stderr)
+        sys.exit(1)
+
+    with open(input_path, "r", encoding="utf-8") as f:
+        composicao = json.load(f)
+
+    try:
+        incertezas = None
+        if args.incertezas:
+            with open(args.incertezas, "r", encoding="utf-8") as f:
+                incertezas = Incertezas.de_dict(json.load(f))
+        indice = IndiceCatalogo.carregar(Path(args.bases_dir) if args.bases_dir else None)
+        resultado = simular_custos(composicao, incertezas, args.tentativas, args.semente, indice)
+    except ValueError as erro:
+        print(f"Erro: {erro}", file=sys.stderr)
+        sys.exit(1)
+
+    if args.output:
+        output_path = Path(args.output)
+        output_path.parent.mkdir(parents=True, exist_ok=True)
+        with open(output_path, "w", encoding="utf-8") as f:
+            json.dump(resultado, f, ensure_ascii=False, indent=2)
+        print(f"Simulacao gravada: {output_path}")
+
+    print(formatar_simulacao(resultado))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,14 @@
+"""
+Configuracao comum dos testes
+"""
+
+import pytest
+from hvac.dependencias import ARQUIVO_INDICE
+
+
+@pytest.fixture(autouse=True)
+def indice_dependencias_temporario(tmp_path, monkeypatch):
+    """O indice de dependencias padrao nao e o de gerador_propostas/output"""
+    caminho = tmp_path / ARQUIVO_INDICE
+    monkeypatch.setenv("HVAC_INDICE_DEPENDENCIAS", str(caminho))
+    return caminho
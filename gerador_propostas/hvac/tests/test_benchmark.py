@@ -0,0 +1,67 @@
+"""
+Testes do benchmark
+"""
+
+from hvac.benchmark import (
+    comparar_motores_planilha,
+    comparar_resultados,
+    contar_linhas_resumo,
+    executar_benchmark,
+    sintetizar_escopo,
+    sintetizar_precificado_linhas
+)
+from hvac.utils.catalogo import IndiceCatalogo
+
+
+def resultado(*registros):
+    return {"resultados": [
+        {"etapa": etapa, "tamanho": tamanho, "mediana_s": mediana, "pico_memoria_kb": 100.0}
+        for etapa, tamanho, mediana in registros
+    ]}
+
+
+class TestBenchmark:
+    """Testes para sintese, execucao e comparacao"""
+
+    def test_escopo_deterministico(self):
+        indice = IndiceCatalogo.carregar()
+        escopo = sintetizar_escopo(indice, 50)
+        assert len(escopo["itens"]) == 50
+        assert escopo == sintetizar_escopo(indice, 50)
+        assert all(item["composicao"] in indice.composicoes for item in escopo["itens"])
+
+    def test_executar(self):
+        dados = executar_benchmark(
+            tamanhos=[5], etapas=["compositor", "precificador"], repeticoes=1, verbose=False
+        )
+        etapas = [r["etapa"] for r in dados["resultados"]]
+        assert etapas == ["compositor", "precificador"]
+        assert all(r["mediana_s"] > 0 and r["pico_memoria_kb"] > 0 for r in dados["resultados"])
+
+    def test_saida_pulada_acima_do_limite(self):
+        dados = executar_benchmark(
+            tamanhos=[5], etapas=["planilha_interna"], repeticoes=1, max_itens_saida=1, verbose=False
+        )
+        assert "pulado" in dados["resultados"][0]
+
+    def test_comparar(self):
+        anterior = resultado(("compositor", 10, 1.0), ("precificador", 10, 1.0))
+        atual = resultado(("compositor", 10, 1.05), ("precificador", 10, 1.5), ("compositor", 100, 2.0))
+
+        comparacao = comparar_resultados(anterior, atual, limite=10.0)
+        assert [(c["etapa"], c["regressao"]) for c in comparacao] == [
+            ("compositor", False),
+            ("precificador", True)
+        ]
+        assert comparacao[1]["variacao_pct"] == 50.0
+
+    def test_precificado_com_linhas_minimas(self):
+        precificado = sintetizar_precificado_linhas(IndiceCatalogo.carregar(), 60)
+        assert contar_linhas_resumo(precificado) >= 60
+
+    def test_comparar_motores_planilha(self):
+        dados = comparar_motores_planilha(linhas=30, repeticoes=1, verbose=False)
+        assert [m["motor"] for m in dados["motores"]] == ["memoria", "write_only"]
+        assert dados["linhas"] >= 30
+        assert all(m["pico_rss_kb"] >= m["rss_dados_kb"] > 0 for m in dados["motores"])
+        assert dados["motores"][0]["arquivo_kb"] == dados["motores"][1]["arquivo_kb"]
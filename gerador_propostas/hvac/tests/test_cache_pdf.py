@@ -0,0 +1,166 @@
+"""
+Testes do cache de PDFs
+"""
+
+import os
+
+import pytest
+from hvac.gerador_pdf import gerar_pdf
+from hvac.generators.renderizador import CSS_PROPOSTA, TEMPLATE_PROPOSTA, RenderizadorProposta
+from hvac.utils.cache_pdf import CachePDF, hash_chave, preparar_destino
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return CachePDF(tmp_path / "cache")
+
+
+def gravar_pdf(caminho, conteudo):
+    caminho.write_bytes(conteudo)
+    return caminho
+
+
+class TestCachePDF:
+    """Testes para acerto, hardlink/copia e remocao LRU"""
+
+    def test_chave_estavel(self):
+        assert hash_chave({"a": 1, "b": [1, 2]}) == hash_chave({"b": [1, 2], "a": 1})
+        assert hash_chave({"a": 1}) != hash_chave({"a": 2})
+
+    def test_falha_e_acerto(self, cache, tmp_path):
+        destino = tmp_path / "saida.pdf"
+        assert cache.obter("ab" * 32, destino) is False
+        assert not destino.exists()
+
+        cache.guardar("ab" * 32, gravar_pdf(tmp_path / "gerado.pdf", b"%PDF-1"))
+        assert cache.obter("ab" * 32, destino) is True
+        assert destino.read_bytes() == b"%PDF-1"
+        assert os.stat(destino).st_ino == os.stat(cache.caminho_objeto("ab" * 32)).st_ino
+
+        estatisticas = cache.estatisticas()
+        assert estatisticas["entradas"] == 1
+        assert estatisticas["acertos"] == 1
+        assert estatisticas["falhas"] == 1
+        assert estatisticas["gravacoes"] == 1
+        assert estatisticas["taxa_acerto"] == 0.5
+
+    def test_modo_copia(self, tmp_path):
+        cache = CachePDF(tmp_path / "cache", modo="copia")
+        cache.guardar("cd" * 32, gravar_pdf(tmp_path / "gerado.pdf", b"%PDF-2"))
+        destino = tmp_path / "saida.pdf"
+        assert cache.obter("cd" * 32, destino)
+        assert os.stat(destino).st_ino != os.stat(cache.caminho_objeto("cd" * 32)).st_ino
+
+    def test_acerto_repetido_nao_deixa_temporario(self, cache, tmp_path):
+        gerado = gravar_pdf(tmp_path / "gerado.pdf", b"%PDF-4")
+        cache.guardar("ab" * 32, gerado)
+        cache.guardar("ab" * 32, gerado)
+        saida = tmp_path / "out"
+        assert cache.obter("ab" * 32, saida / "p.pdf")
+        assert cache.obter("ab" * 32, saida / "p.pdf")
+
+        assert [p.name for p in saida.iterdir()] == ["p.pdf"]
+        assert sorted(p.name for p in cache.caminho_objeto("ab" * 32).parent.iterdir()) == [
+            f"{'ab' * 32}.pdf", f"{'ab' * 32}.uso"
+        ]
+
+    def test_regravar_destino_nao_altera_objeto(self, cache, tmp_path):
+        cache.guardar("ef" * 32, gravar_pdf(tmp_path / "gerado.pdf", b"%PDF-3"))
+        destino = tmp_path / "saida.pdf"
+        cache.obter("ef" * 32, destino)
+
+        preparar_destino(destino)
+        destino.write_bytes(b"outro")
+        assert cache.caminho_objeto("ef" * 32).read_bytes() == b"%PDF-3"
+
+    def test_acerto_nao_altera_mtime_do_destino(self, cache, tmp_path):
+        cache.guardar("ef" * 32, gravar_pdf(tmp_path / "gerado.pdf", b"%PDF-3"))
+        destino = tmp_path / "saida.pdf"
+        cache.obter("ef" * 32, destino)
+        os.utime(destino, (1000, 1000))
+
+        assert cache.obter("ef" * 32, tmp_path / "outra.pdf")
+        assert os.stat(destino).st_mtime == 1000
+        assert os.stat(cache.caminho_uso("ef" * 32)).st_mtime > 1000
+
+    def test_obter_todos_exige_todas_as_chaves(self, cache, tmp_path):
+        cache.guardar("01" * 32, gravar_pdf(tmp_path / "a.pdf", b"a"))
+        pares = [("01" * 32, tmp_path / "x.pdf"), ("02" * 32, tmp_path / "y.pdf")]
+        assert cache.obter_todos(pares) is False
+        assert not (tmp_path / "x.pdf").exists()
+
+        cache.guardar("02" * 32, gravar_pdf(tmp_path / "b.pdf", b"b"))
+        assert cache.obter_todos(pares) is True
+        assert (tmp_path / "y.pdf").read_bytes() == b"b"
+
+    def test_remocao_lru(self, tmp_path):
+        cache = CachePDF(tmp_path / "cache", limite_bytes=25)
+        for i, chave in enumerate(["aa" * 32, "bb" * 32]):
+            cache.guardar(chave, gravar_pdf(tmp_path / f"{i}.pdf", b"x" * 10))
+            os.utime(cache.caminho_uso(chave), (1000 + i, 1000 + i))
+
+        # Acesso recente: "aa" passa a ser o mais novo
+        cache.obter("aa" * 32, tmp_path / "lido.pdf")
+        cache.guardar("cc" * 32, gravar_pdf(tmp_path / "2.pdf", b"x" * 10))
+
+        assert cache.caminho_objeto("aa" * 32).exists()
+        assert not cache.caminho_objeto("bb" * 32).exists()
+        assert not cache.caminho_uso("bb" * 32).exists()
+        assert cache.caminho_objeto("cc" * 32).exists()
+        assert cache.estatisticas()["remocoes"] == 1
+
+        assert cache.limpar() == 2
+        assert not any((tmp_path / "cache" / "objetos").glob("*/*"))
+        assert cache.estatisticas()["entradas"] == 0
+
+
+class TestIntegracao:
+    """Testes para a chave do renderizador e o cache em gerar_pdf"""
+
+    def test_chave_renderizador_inclui_templates(self, tmp_path):
+        (tmp_path / TEMPLATE_PROPOSTA).write_text("<p>{{ valor }}</p>")
+        (tmp_path / CSS_PROPOSTA).write_text("p { color: red; }")
+        renderizador = RenderizadorProposta(template_dir=tmp_path)
+
+        chave = renderizador.chave_cache({"valor": 1, "rascunho": False})
+        assert renderizador.chave_cache({"valor": 1, "rascunho": True}) == chave
+        assert renderizador.chave_cache({"valor": 2}) != chave
+
+        (tmp_path / CSS_PROPOSTA).write_text("p { color: blue; }")
+        assert renderizador.chave_cache({"valor": 1}) != chave
+
+    def test_gerar_pdf_reaproveita(self, cache, tmp_path):
+        precificado = {
+            "cliente": "Cliente Teste",
+            "itens_precificados": [{"id": 1, "descricao": "Instalacao", "preco_total": 100.0}],
+            "resumo_financeiro": {"total_materiais": 10.0}
+        }
+        primeiro = tmp_path / "primeiro.pdf"
+        segundo = tmp_path / "segundo.pdf"
+
+        gerar_pdf(precificado, output_path=str(primeiro), cache=cache)
+        gerar_pdf(precificado, output_path=str(segundo), cache=cache)
+        assert segundo.read_bytes() == primeiro.read_bytes()
+        assert cache.estatisticas()["acertos"] == 1
+
+        precificado["cliente"] = "Outro Cliente"
+        gerar_pdf(precificado, output_path=str(segundo), cache=cache)
+        assert segundo.read_bytes() != primeiro.read_bytes()
+        assert cache.estatisticas()["entradas"] == 2
+
+    def test_sem_cache_nao_altera_objeto(self, cache, tmp_path):
+        precificado = {
+            "cliente": "Cliente Teste",
+            "itens_precificados": [{"id": 1, "descricao": "Instalacao", "preco_total": 100.0}],
+            "resumo_financeiro": {"total_materiais": 10.0}
+        }
+        saida = tmp_path / "saida.pdf"
+        gerar_pdf(precificado, output_path=str(saida), cache=cache)
+        objeto = next((tmp_path / "cache" / "objetos").glob("*/*.pdf"))
+        original = objeto.read_bytes()
+
+        # A saida e hardlink do objeto: regravar sem cache nao pode altera-lo
+        precificado["cliente"] = "Outro Cliente"
+        gerar_pdf(precificado, output_path=str(saida), usar_cache=False)
+        assert saida.read_bytes() != original
+        assert objeto.read_bytes() == original
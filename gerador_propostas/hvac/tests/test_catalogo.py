@@ -0,0 +1,140 @@
+"""
+Testes do indice compilado do catalogo
+"""
+
+import pytest
+from hvac.utils.catalogo import IndiceCatalogo, TIPOS
+from hvac.utils.loader import carregar_bases, obter_item
+from hvac.precificador import obter_preco_item, precificar_lista
+from hvac.compositor import expandir_composicao
+
+
+@pytest.fixture
+def bases():
+    return {
+        "materiais": {
+            "TUB_14": {"descricao": "Tubo 1/4", "unidade": "M", "preco": 18.00, "data_atualizacao": "2025-01-01"}
+        },
+        "mao_de_obra": {
+            "MO_TEC": {"descricao": "Tecnico", "unidade": "H", "custo_hora": 65.00}
+        },
+        "ferramentas": {
+            "FER_VACUO": {"descricao": "Bomba de vacuo", "custo_hora": 0.75}
+        },
+        "equipamentos": {
+            "EQP_9K": {"descricao": "Split 9K", "comercial": {"unidade": "UN", "preco": 1800.00}}
+        },
+        "composicoes": {
+            "COMP_A": {
+                "descricao": "Composicao A",
+                "itens": [
+                    {"tipo": "MAT", "codigo": "TUB_14", "qtd_base": 0, "qtd_var": 1.1},
+                    {"tipo": "MO", "codigo": "MO_TEC", "qtd_base": 2, "qtd_var": 0},
+                    {"tipo": "MAT", "codigo": "NAO_EXISTE", "qtd_base": 1, "qtd_var": 0}
+                ]
+            }
+        },
+        "bdi": {"MAT": {"percentual": 0.35}, "MO": {"percentual": 0.40}}
+    }
+
+
+class TestIndiceCatalogo:
+    """Testes para construcao do indice"""
+
+    def test_ids_e_colunas(self, bases):
+        """Cada insumo recebe um id com colunas alinhadas"""
+        indice = IndiceCatalogo(bases)
+        assert len(indice) == 4
+
+        item_id = indice.obter_id("MAT", "TUB_14")
+        assert indice.codigos[item_id] == "TUB_14"
+        assert indice.unidades[item_id] == "M"
+        assert indice.precos[item_id] == 18.00
+        assert indice.campos_preco[item_id] == "preco"
+        assert indice.datas_atualizacao[item_id] == "2025-01-01"
+        assert TIPOS[indice.tipos[item_id]] == "MAT"
+
+    def test_unidade_padrao(self, bases):
+        """Insumo sem unidade usa UN"""
+        indice = IndiceCatalogo(bases)
+        assert indice.unidades[indice.obter_id("FER", "FER_VACUO")] == "UN"
+
+    def test_preco_equipamento(self, bases):
+        """Equipamento usa comercial.preco"""
+        indice = IndiceCatalogo(bases)
+        assert indice.obter_preco("EQP", "EQP_9K") == (1800.00, None)
+
+    def test_item_inexistente(self, bases):
+        """Insumo inexistente tem id -1 e preco zero"""
+        indice = IndiceCatalogo(bases)
+        assert indice.obter_id("MAT", "NAO_EXISTE") == -1
+        assert indice.obter_preco("MAT", "NAO_EXISTE") == (0.0, None)
+
+    def test_bdi(self, bases):
+        """BDI por tipo, zero quando ausente"""
+        indice = IndiceCatalogo(bases)
+        assert indice.obter_bdi("MAT") == 0.35
+        assert indice.obter_bdi("EQP") == 0.0
+        assert indice.obter_bdi("XYZ") == 0.0
+
+    def test_composicao_compilada(self, bases):
+        """Composicao vira vetores paralelos de ids e quantidades"""
+        indice = IndiceCatalogo(bases)
+        comp = indice.obter_composicao("COMP_A")
+        assert len(comp) == 3
+        assert comp.ids[0] == indice.obter_id("MAT", "TUB_14")
+        assert comp.ids[2] == -1
+        assert comp.qtd_base == [0, 2, 1]
+        assert comp.qtd_var == [1.1, 0, 0]
+
+    def test_nucleo_expansao(self, bases):
+        """Nucleo traz descricao e unidade resolvidas e lista os ausentes"""
+        comp = IndiceCatalogo(bases).obter_composicao("COMP_A")
+        assert comp.nucleo.descricoes == ["Tubo 1/4", "Tecnico", "[NAO ENCONTRADO] NAO_EXISTE"]
+        assert comp.nucleo.unidades == ["M", "H", "UN"]
+        assert comp.nucleo.quantidades(3, 2) == [(0 + 1.1 * 3) * 2, 4, 2]
+        assert comp.ausentes == [("MAT", "NAO_EXISTE")]
+        assert comp.descricao(3) == "Composicao A"
+
+    def test_ausentes_relatados_uma_vez(self, bases, capsys):
+        """Aviso de item ausente sai na compilacao, nao a cada expansao"""
+        indice = IndiceCatalogo(bases)
+        assert indice.relatar_ausentes() == 1
+        for _ in range(3):
+            expandir_composicao("COMP_A", 2, 1, indice=indice)
+
+        avisos = capsys.readouterr().err.splitlines()
+        assert avisos == ["Aviso: Item NAO_EXISTE (MAT) da composicao COMP_A nao encontrado na base"]
+
+    def test_indice_memoizado_por_bases(self, bases, capsys):
+        """Chamadas com bases e sem indice compilam o catalogo uma unica vez"""
+        for _ in range(3):
+            expandir_composicao("COMP_A", 2, 1, bases)
+            precificar_lista([{"codigo": "TUB_14", "quantidade": 1}], "MAT", bases, [])
+
+        assert IndiceCatalogo.de_bases(bases) is IndiceCatalogo.de_bases(bases)
+        assert IndiceCatalogo.de_bases(dict(bases)) is not IndiceCatalogo.de_bases(bases)
+        assert len(capsys.readouterr().err.splitlines()) == 1
+
+    def test_bases_carregadas_usam_indice_de_carregar(self):
+        assert IndiceCatalogo.de_bases(carregar_bases()) is IndiceCatalogo.carregar()
+
+    def test_composicao_inexistente(self, bases):
+        """Composicao inexistente retorna None"""
+        indice = IndiceCatalogo(bases)
+        assert indice.obter_composicao("NAO_EXISTE") is None
+        assert expandir_composicao("NAO_EXISTE", 1, 1, indice=indice) is None
+
+
+class TestParidadeBases:
+    """O indice reproduz as consultas por dict sobre as bases reais"""
+
+    def test_precos_e_descricoes(self):
+        bases = carregar_bases()
+        indice = IndiceCatalogo(bases)
+
+        for (tipo, codigo), item_id in indice.ids.items():
+            item = obter_item(bases, tipo, codigo)
+            assert indice.obter_preco(tipo, codigo) == obter_preco_item(bases, tipo, codigo)
+            assert indice.descricoes[item_id] == item.get("descricao", "")
+            assert indice.unidades[item_id] == item.get("unidade", "UN")
@@ -0,0 +1,103 @@
+"""
+Testes dos cenarios de sensibilidade (BDI e choques de preco)
+"""
+
+import json
+
+import pytest
+
+pytest.importorskip("numpy")
+
+from hvac.cenarios import (
+    Cenario,
+    MotorCenarios,
+    avaliar_cenarios,
+    carregar_cenarios,
+    combinar_cenarios
+)
+from hvac.precificador import processar
+from hvac.utils.catalogo import IndiceCatalogo
+
+
+@pytest.fixture
+def bases():
+    return {
+        "materiais": {
+            "TUB_14": {"categoria": "Tubulacao", "preco": 10.0},
+            "TUB_38": {"categoria": "Tubulacao", "preco": 20.0},
+            "FITA": {"categoria": "Acabamento", "preco": 5.0}
+        },
+        "mao_de_obra": {"MO_TEC": {"custo_hora": 50.0}},
+        "bdi": {"MAT": {"percentual": 0.5}, "MO": {"percentual": 1.0}}
+    }
+
+
+@pytest.fixture
+def composicao():
+    def linha(codigo, quantidade):
+        return {"codigo": codigo, "quantidade": quantidade}
+
+    return {"itens_orcamento": [
+        {"id": 1, "materiais": [linha("TUB_14", 2), linha("FITA", 4)], "mao_de_obra": [linha("MO_TEC", 1)]},
+        {"id": 2, "materiais": [linha("TUB_38", 1), linha("TUB_14", 1), linha("NAO_EXISTE", 3)]}
+    ]}
+
+
+class TestMotorCenarios:
+    """Testes para avaliacao de cenarios em matriz"""
+
+    def test_base_igual_ao_precificador(self, bases, composicao):
+        indice = IndiceCatalogo(bases)
+        resultado = avaliar_cenarios(composicao, [], indice)
+
+        assert [c["nome"] for c in resultado["cenarios"]] == ["base"]
+        assert resultado["cenarios"][0]["resumo_financeiro"] == processar(composicao, indice=indice)["resumo_financeiro"]
+
+    def test_choques_e_bdi(self, bases, composicao):
+        cenarios = [
+            Cenario("cobre +15%", choques={"MAT/tubulacao": 0.15}),
+            Cenario("TUB_14 x2", choques={"MAT:TUB_1*": 0.5, "MAT/Tubulacao": 1 / 3}),
+            Cenario("MO +8%, BDI MO 110%", bdi={"MO": 1.1}, choques={"MO": 0.08})
+        ]
+        resultado = avaliar_cenarios(composicao, cenarios, IndiceCatalogo(bases))
+        resumos = {c["nome"]: c["resumo_financeiro"] for c in resultado["cenarios"]}
+
+        # Base: MAT 30 + 20 + 20 = 70, MO 50
+        assert resumos["base"]["custo_direto"] == 120.0
+        assert resumos["cobre +15%"]["total_materiais"] == 77.5
+        assert resumos["TUB_14 x2"]["total_materiais"] == pytest.approx(106.67, abs=0.01)
+        assert resumos["MO +8%, BDI MO 110%"]["total_mao_obra"] == 54.0
+        assert resumos["MO +8%, BDI MO 110%"]["bdi_mao_obra"] == 59.4
+        assert resumos["MO +8%, BDI MO 110%"]["percentuais_bdi"]["MO"] == "110%"
+
+        comparacao = resultado["comparacao"]
+        assert comparacao[0]["variacao"] == 0.0
+        assert comparacao[1]["variacao"] == 11.25
+        assert comparacao[1]["variacao_percentual"] == pytest.approx(11.25 / 205 * 100, abs=0.01)
+
+    def test_seletor_invalido(self, bases, composicao):
+        motor = MotorCenarios(composicao, IndiceCatalogo(bases))
+        with pytest.raises(ValueError):
+            motor.avaliar([Cenario("x", choques={"COBRE": 0.1})])
+
+
+class TestDefinicaoCenarios:
+    """Testes para leitura e grade de cenarios"""
+
+    def test_grade(self):
+        cenarios = combinar_cenarios({"MO": [0, 0.08]}, {"MAT": [0.5, 0.6, 0.7]})
+        assert len(cenarios) == 6
+        assert cenarios[1].nome == "MO +0%, BDI MAT 60%"
+        assert cenarios[5].choques == {"MO": 0.08} and cenarios[5].bdi == {"MAT": 0.7}
+
+    def test_carregar_com_arquivo_de_bdi(self, tmp_path):
+        (tmp_path / "bdi_alto.json").write_text(json.dumps({"bdi": {"MAT": {"percentual": 0.9}}}))
+        (tmp_path / "cenarios.json").write_text(json.dumps({"cenarios": [
+            {"nome": "BDI alto", "bdi": "bdi_alto.json"},
+            {"choques": {"MO": 0.08}}
+        ]}))
+
+        cenarios = carregar_cenarios(tmp_path / "cenarios.json")
+
+        assert cenarios[0].bdi == {"MAT": 0.9}
+        assert cenarios[1].nome == "Cenario 2"
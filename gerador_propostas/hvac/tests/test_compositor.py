@@ -7,7 +7,9 @@ from hvac.compositor import (
     gerar_descricao,
     calcular_quantidade,
     consolidar_itens,
-    processar
+    montar_composicao,
+    processar,
+    ConsolidadorResumos
 )
 
 
@@ -115,6 +117,28 @@ class TestConsolidarItens:
         codigos = [item["codigo"] for item in resultado]
         assert codigos == ["A", "B", "C"]
 
+    def test_consolidador_por_categoria(self):
+        """Acumular durante a expansao equivale a consolidar no final"""
+        def item(materiais, mao_de_obra):
+            return {"materiais": materiais, "mao_de_obra": mao_de_obra,
+                    "ferramentas": [], "equipamentos": []}
+
+        itens = [
+            item([{"codigo": "B", "descricao": "Item B", "quantidade": 1.25, "unidade": "M"}],
+                 [{"codigo": "MO", "descricao": "Tecnico", "quantidade": 2, "unidade": "H"}]),
+            item([{"codigo": "A", "descricao": "Item A", "quantidade": 1, "unidade": "UN"},
+                  {"codigo": "B", "descricao": "Item B", "quantidade": 0.5, "unidade": "M"}], [])
+        ]
+        consolidador = ConsolidadorResumos()
+        for item_orcamento in itens:
+            consolidador.adicionar_item(item_orcamento)
+
+        resumos = consolidador.resumos()
+        assert [(m["codigo"], m["quantidade"]) for m in resumos["resumo_materiais"]] == [("A", 1), ("B", 1.75)]
+        assert resumos["resumo_mao_obra"][0]["quantidade"] == 2
+        assert resumos["resumo_ferramentas"] == []
+        assert montar_composicao({}, itens, [])["resumo_materiais"] == resumos["resumo_materiais"]
+
 
 class TestProcessar:
     """Testes para processamento completo"""
@@ -0,0 +1,145 @@
+"""
+Testes do indice reverso de dependencias
+"""
+
+import json
+
+import pytest
+from hvac.dependencias import (
+    ARQUIVO_INDICE,
+    DIR_SAIDA_PADRAO,
+    IndiceDependencias,
+    extrair_referencias,
+    indice_padrao,
+    reconstruir_indice,
+    reprecificar_afetados
+)
+from hvac.pipeline import executar_pipeline
+from hvac.utils.catalogo import IndiceCatalogo
+
+
+def escrever_escopo(caminho, composicao, variavel=5):
+    caminho.parent.mkdir(parents=True, exist_ok=True)
+    caminho.write_text(json.dumps({
+        "projeto": {"nome": caminho.parent.name, "cliente": "Teste"},
+        "itens": [{"composicao": composicao, "variavel": variavel}]
+    }))
+
+
+def precificado_exemplo():
+    return {
+        "itens_precificados": [
+            {"id": 1, "materiais": [{"codigo": "TUB_14_FLEX", "quantidade": 5}],
+             "mao_de_obra": [{"codigo": "MO_TEC", "quantidade": 2}],
+             "ferramentas": [], "equipamentos": []},
+            {"id": 2, "materiais": [{"codigo": "TUB_14_FLEX", "quantidade": 3}],
+             "mao_de_obra": [], "ferramentas": [], "equipamentos": []}
+        ],
+        "resumo_financeiro": {"valor_total": 100.0}
+    }
+
+
+class TestIndiceDependencias:
+    """Testes para registro e consulta do indice"""
+
+    def test_extrair_referencias(self):
+        assert extrair_referencias(precificado_exemplo()) == [
+            ["MAT", "TUB_14_FLEX", 1, 5],
+            ["MO", "MO_TEC", 1, 2],
+            ["MAT", "TUB_14_FLEX", 2, 3]
+        ]
+
+    def test_afetados(self, tmp_path):
+        indice = IndiceDependencias(tmp_path / ARQUIVO_INDICE)
+        indice.registrar_precificado(tmp_path / "acme", precificado_exemplo())
+
+        afetados = indice.afetados(["TUB_14_FLEX"])
+        assert list(afetados) == ["acme"]
+        assert [u["item_id"] for u in afetados["acme"]] == [1, 2]
+        assert indice.afetados(["TUB_14_FLEX"], tipo="MO") == {}
+        assert indice.afetados(["NAO_EXISTE"]) == {}
+
+    def test_reregistro_remove_referencias_antigas(self, tmp_path):
+        indice = IndiceDependencias(tmp_path / ARQUIVO_INDICE)
+        indice.registrar_precificado(tmp_path / "acme", precificado_exemplo())
+
+        precificado = precificado_exemplo()
+        precificado["itens_precificados"][0]["mao_de_obra"] = []
+        indice.registrar_precificado(tmp_path / "acme", precificado)
+
+        assert "MO_TEC" not in indice.insumos
+        assert len(indice.afetados(["TUB_14_FLEX"])["acme"]) == 2
+
+    def test_persistencia(self, tmp_path):
+        indice = IndiceDependencias(tmp_path / ARQUIVO_INDICE)
+        indice.registrar_precificado(tmp_path / "acme", precificado_exemplo())
+        indice.salvar()
+
+        carregado = IndiceDependencias.carregar(tmp_path / ARQUIVO_INDICE)
+        assert carregado.afetados(["MO_TEC"]) == indice.afetados(["MO_TEC"])
+        assert carregado.orcamentos["acme"]["valor_total"] == 100.0
+
+
+class TestIntegracaoPipeline:
+    """O pipeline mantem o indice e a reprecificacao usa apenas os afetados"""
+
+    @pytest.fixture
+    def saida(self, tmp_path):
+        indice = IndiceCatalogo.carregar()
+        codigos = sorted(indice.composicoes)
+        saida = tmp_path / "output"
+        for nome, codigo in (("acme", codigos[0]), ("beta", codigos[1])):
+            escrever_escopo(tmp_path / "escopos" / nome / "escopo.json", codigo)
+            executar_pipeline(
+                str(tmp_path / "escopos" / nome / "escopo.json"),
+                str(saida / nome),
+                verbose=False,
+                indice_dependencias=str(saida / ARQUIVO_INDICE)
+            )
+        return saida
+
+    def test_indice_padrao(self, tmp_path, monkeypatch):
+        saida = tmp_path / "output"
+        monkeypatch.setenv("HVAC_INDICE_DEPENDENCIAS", str(saida / ARQUIVO_INDICE))
+        assert indice_padrao() == saida / ARQUIVO_INDICE
+
+        escopo = tmp_path / "escopos" / "acme" / "escopo.json"
+        escrever_escopo(escopo, sorted(IndiceCatalogo.carregar().composicoes)[0])
+        executar_pipeline(str(escopo), str(saida / "acme"), verbose=False)
+
+        assert sorted(IndiceDependencias.carregar(indice_padrao()).orcamentos) == ["acme"]
+
+        monkeypatch.delenv("HVAC_INDICE_DEPENDENCIAS")
+        assert indice_padrao() == DIR_SAIDA_PADRAO / ARQUIVO_INDICE
+
+    def test_pipeline_atualiza_indice(self, saida):
+        indice = IndiceDependencias.carregar(saida / ARQUIVO_INDICE)
+        assert sorted(indice.orcamentos) == ["acme", "beta"]
+
+        reconstruido = reconstruir_indice(saida, saida / "reconstruido.json")
+        assert reconstruido.insumos == indice.insumos
+
+    def test_reprecificar_afetados(self, saida):
+        indice = IndiceDependencias.carregar(saida / ARQUIVO_INDICE)
+        codigo = indice.orcamentos["acme"]["codigos"][0]
+        esperados = sorted(indice.afetados([codigo]))
+
+        resultados = reprecificar_afetados(indice, [codigo], verbose=False)
+
+        assert [r["orcamento"] for r in resultados] == esperados
+        assert all(r["valor_novo"] == r["valor_anterior"] for r in resultados)
+
+    def test_falha_em_um_orcamento_nao_interrompe(self, saida):
+        indice = IndiceDependencias.carregar(saida / ARQUIVO_INDICE)
+        codigo = indice.orcamentos["acme"]["codigos"][0]
+        quebrado = saida / "quebrado"
+        quebrado.mkdir()
+        (quebrado / "composicao.json").write_text("[]")
+        indice.registrar(quebrado, [["MAT", codigo, 1, 1.0]], None, 10.0)
+
+        resultados = reprecificar_afetados(indice, [codigo], verbose=False)
+
+        falhas = [r for r in resultados if "erro" in r]
+        assert [r["orcamento"] for r in falhas] == ["quebrado"]
+        assert len(resultados) == len(indice.afetados([codigo]))
+        assert sorted(IndiceDependencias.carregar(saida / ARQUIVO_INDICE).orcamentos) == ["acme", "beta", "quebrado"]
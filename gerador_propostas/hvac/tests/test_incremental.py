@@ -0,0 +1,144 @@
+"""
+Testes da reprecificacao incremental
+"""
+
+import json
+
+import pytest
+from hvac.compositor import processar as processar_compositor
+from hvac.incremental import ARQUIVO_CACHE, ProcessadorIncremental, processar_incremental
+from hvac.precificador import processar as processar_precificador
+from hvac.utils.catalogo import CAMPO_PRECO, IndiceCatalogo, TIPOS
+from hvac.utils.loader import MAPA_TIPO
+
+
+@pytest.fixture(scope="module")
+def indice():
+    return IndiceCatalogo.carregar()
+
+
+def escopo_exemplo(indice, n=12):
+    codigos = sorted(indice.composicoes)
+    itens = [
+        {"composicao": codigos[i % len(codigos)], "variavel": i + 1, "quantidade": 1 + i % 3}
+        for i in range(n)
+    ]
+    itens.append({"composicao": "NAO_EXISTE"})
+    return {"projeto": {"nome": "Incremental", "cliente": "Teste"}, "itens": itens}
+
+
+def completo(escopo, indice):
+    composicao = processar_compositor(escopo, indice=indice)
+    return composicao, processar_precificador(composicao, indice=indice, backend="python")
+
+
+def serializar(dados):
+    return json.dumps(dados, ensure_ascii=False, indent=2)
+
+
+class TestProcessadorIncremental:
+    """O resultado incremental e identico a uma execucao completa"""
+
+    def test_primeira_execucao(self, tmp_path, indice, capsys):
+        escopo = escopo_exemplo(indice)
+        resultado = processar_incremental(escopo, tmp_path / ARQUIVO_CACHE, indice)
+
+        composicao, precificado = completo(escopo, indice)
+        assert serializar(resultado["composicao"]) == serializar(composicao)
+        assert serializar(resultado["precificado"]) == serializar(precificado)
+        assert resultado["estatisticas"]["recalculados"] == len(escopo["itens"])
+
+    def test_reexecucao_com_item_alterado(self, tmp_path, indice, capsys):
+        escopo = escopo_exemplo(indice)
+        cache_path = tmp_path / ARQUIVO_CACHE
+        processar_incremental(escopo, cache_path, indice)
+
+        escopo["itens"][3]["variavel"] = 40
+        escopo["itens"].append({"composicao": escopo["itens"][0]["composicao"], "variavel": 2})
+        resultado = processar_incremental(escopo, cache_path, indice)
+
+        composicao, precificado = completo(escopo, indice)
+        assert serializar(resultado["composicao"]) == serializar(composicao)
+        assert serializar(resultado["precificado"]) == serializar(precificado)
+        assert resultado["estatisticas"]["recalculados"] == 2
+        assert resultado["estatisticas"]["reaproveitados"] == len(escopo["itens"]) - 2
+
+    def test_linha_inserida_no_inicio(self, tmp_path, indice, capsys):
+        escopo = escopo_exemplo(indice)
+        cache_path = tmp_path / ARQUIVO_CACHE
+        processar_incremental(escopo, cache_path, indice)
+
+        escopo["itens"].insert(0, {"composicao": escopo["itens"][1]["composicao"], "variavel": 99})
+        resultado = processar_incremental(escopo, cache_path, indice)
+
+        composicao, precificado = completo(escopo, indice)
+        assert serializar(resultado["composicao"]) == serializar(composicao)
+        assert serializar(resultado["precificado"]) == serializar(precificado)
+        assert resultado["estatisticas"]["recalculados"] == 1
+        assert resultado["estatisticas"]["reaproveitados"] == len(escopo["itens"]) - 1
+
+    def test_descricao_nula_difere_de_ausente(self, tmp_path, indice, capsys):
+        escopo = escopo_exemplo(indice, n=2)
+        cache_path = tmp_path / ARQUIVO_CACHE
+        processar_incremental(escopo, cache_path, indice)
+
+        escopo["itens"][0]["descricao"] = None
+        resultado = processar_incremental(escopo, cache_path, indice)
+
+        composicao, precificado = completo(escopo, indice)
+        assert resultado["composicao"]["itens_orcamento"][0]["descricao"] is None
+        assert serializar(resultado["composicao"]) == serializar(composicao)
+        assert serializar(resultado["precificado"]) == serializar(precificado)
+        assert resultado["estatisticas"]["recalculados"] == 1
+
+    def test_item_removido(self, tmp_path, indice, capsys):
+        escopo = escopo_exemplo(indice)
+        cache_path = tmp_path / ARQUIVO_CACHE
+        processar_incremental(escopo, cache_path, indice)
+
+        escopo["itens"].pop()
+        resultado = processar_incremental(escopo, cache_path, indice)
+
+        assert resultado["precificado"] == completo(escopo, indice)[1]
+        assert resultado["estatisticas"]["recalculados"] == 0
+
+    def test_bdi_invalida_cache(self, tmp_path, indice, capsys):
+        escopo = escopo_exemplo(indice)
+        cache_path = tmp_path / ARQUIVO_CACHE
+        processar_incremental(escopo, cache_path, indice)
+
+        bases = dict(indice.bases)
+        bases["bdi"] = {"MAT": {"percentual": 0.5}}
+        outro = IndiceCatalogo(bases)
+        processador = ProcessadorIncremental(cache_path, outro)
+        processador.compor(escopo)
+        assert processador.estatisticas["reaproveitados"] == 0
+
+    def test_preco_alterado_recalcula_composicao(self, tmp_path, indice, capsys):
+        escopo = escopo_exemplo(indice)
+        cache_path = tmp_path / ARQUIVO_CACHE
+        processar_incremental(escopo, cache_path, indice)
+
+        # Altera o preco de um insumo usado pela composicao do item 1
+        composicao = indice.obter_composicao(escopo["itens"][0]["composicao"])
+        item_id = composicao.ids[0]
+        tipo = TIPOS[indice.tipos[item_id]]
+        bases = json.loads(json.dumps(indice.bases))
+        item_base = bases[MAPA_TIPO[tipo]][indice.codigos[item_id]]
+        if tipo == "EQP":
+            item_base.setdefault("comercial", {})["preco"] = 12345.0
+        else:
+            item_base[CAMPO_PRECO[tipo]] = 12345.0
+        outro = IndiceCatalogo(bases)
+
+        resultado = processar_incremental(escopo, cache_path, outro)
+        assert serializar(resultado["precificado"]) == serializar(completo(escopo, outro)[1])
+        assert resultado["estatisticas"]["recalculados"] > 0
+
+    def test_cache_corrompido(self, tmp_path, indice, capsys):
+        cache_path = tmp_path / ARQUIVO_CACHE
+        cache_path.write_text("{invalido")
+        escopo = escopo_exemplo(indice, n=2)
+        resultado = processar_incremental(escopo, cache_path, indice)
+        assert resultado["estatisticas"]["reaproveitados"] == 0
+        assert json.loads(cache_path.read_text())["itens"]
@@ -0,0 +1,82 @@
+"""
+Testes do indice de revisoes por cliente
+"""
+
+import json
+
+from hvac.generators.indice_revisoes import (
+    ARQUIVO_INDICE,
+    IndiceRevisoes,
+    chave_numero,
+    registrar_proposta
+)
+from hvac.generators.utils import detectar_revisao, gerar_nome_arquivo, slug_cliente
+
+
+def gravar_proposta(pasta, numero, revisao, conteudo=b"%PDF", sufixo=""):
+    nome = gerar_nome_arquivo(numero, "Cliente S.A.", "instalacao", revisao, sufixo)
+    caminho = pasta / f"{nome}.pdf"
+    caminho.write_bytes(conteudo)
+    return caminho
+
+
+class TestIndiceRevisoes:
+    """Testes para reconstrucao, registro e deteccao de revisoes"""
+
+    def test_pasta_inexistente(self, tmp_path):
+        assert detectar_revisao("Cliente", tmp_path / "nada") == ("R00", 0)
+
+    def test_pasta_vazia(self, tmp_path):
+        assert detectar_revisao("Cliente", tmp_path) == ("R00", 0)
+        assert (tmp_path / ARQUIVO_INDICE).exists()
+
+    def test_reconstroi_a_partir_dos_arquivos(self, tmp_path):
+        gravar_proposta(tmp_path, "2026/101", "R00")
+        gravar_proposta(tmp_path, "2026/101", "R02", b"%PDF-2")
+        gravar_proposta(tmp_path, "2026/101", "R03", sufixo="_RASCUNHO")
+        gravar_proposta(tmp_path, "2026/102", "R00")
+        (tmp_path / "anotacoes.pdf").write_bytes(b"x")
+
+        dados = IndiceRevisoes(tmp_path).carregar()
+
+        assert dados["maior_revisao"] == 2
+        assert dados["orcamentos"]["26.101"]["revisao"] == 2
+        assert dados["orcamentos"]["26.101"]["arquivo"].endswith("_R02.pdf")
+        assert len(dados["orcamentos"]["26.101"]["hash"]) == 64
+        assert detectar_revisao("Cliente S.A.", tmp_path) == ("R03", 3)
+        assert detectar_revisao("Cliente S.A.", tmp_path, "2026/102") == ("R01", 1)
+        assert detectar_revisao("Cliente S.A.", tmp_path, "2026/103") == ("R00", 0)
+
+    def test_indice_nao_relista_a_pasta(self, tmp_path):
+        gravar_proposta(tmp_path, "2026/101", "R00")
+        assert detectar_revisao("Cliente", tmp_path) == ("R01", 1)
+
+        # Arquivo copiado a mao: so entra com reconstruir
+        gravar_proposta(tmp_path, "2026/101", "R05")
+        assert detectar_revisao("Cliente", tmp_path) == ("R01", 1)
+        IndiceRevisoes(tmp_path).reconstruir()
+        assert detectar_revisao("Cliente", tmp_path) == ("R06", 6)
+
+    def test_registrar(self, tmp_path):
+        indice = IndiceRevisoes(tmp_path)
+        indice.registrar(gravar_proposta(tmp_path, "2026/101", "R01"), "2026/101-R01", "R01")
+        indice.registrar(gravar_proposta(tmp_path, "2026/101", "R00"), "2026/101-R00", "R00")
+
+        dados = json.loads((tmp_path / ARQUIVO_INDICE).read_text())
+        assert dados["orcamentos"]["26.101"]["revisao"] == 1
+        assert dados["maior_revisao"] == 1
+
+    def test_registrar_fora_da_pasta_do_cliente(self, tmp_path):
+        outra = tmp_path / "outra"
+        outra.mkdir()
+        arquivo = gravar_proposta(outra, "2026/101", "R00")
+        assert registrar_proposta(tmp_path, arquivo, "2026/101-R00", "R00") is False
+        assert registrar_proposta(outra, arquivo, "2026/101-R00", "R00") is True
+
+    def test_chave_numero(self):
+        assert chave_numero("2026/101-R02") == "26.101"
+        assert chave_numero("2026/101") == "26.101"
+
+    def test_slug_cliente(self):
+        assert slug_cliente("grupo panvel - farmacias s.a.", 30) == "grupo_panvel_farmacias_sa"
+        assert slug_cliente("CLIENTE S.A.", 20) == "CLIENTE_SA"
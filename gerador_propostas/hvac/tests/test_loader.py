@@ -0,0 +1,77 @@
+"""
+Testes do carregador de bases com cache
+"""
+
+import json
+import os
+
+import pytest
+from hvac.utils.catalogo import IndiceCatalogo
+from hvac.utils.loader import carregar_bases, carregar_json, invalidar_cache
+
+
+@pytest.fixture
+def bases_dir(tmp_path):
+    """Diretorio de bases minimo"""
+    (tmp_path / "materiais.json").write_text(json.dumps(
+        {"materiais": {"TUB_14": {"descricao": "Tubo 1/4", "preco": 18.0}}}
+    ))
+    (tmp_path / "bdi.json").write_text(json.dumps({"bdi": {"MAT": {"percentual": 0.35}}}))
+    yield tmp_path
+    invalidar_cache(tmp_path)
+
+
+def reescrever(caminho, conteudo):
+    """Reescreve o arquivo garantindo mtime diferente"""
+    stat = caminho.stat()
+    caminho.write_text(json.dumps(conteudo))
+    os.utime(caminho, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+
+class TestCacheBases:
+    """Testes para o cache de bases"""
+
+    def test_reaproveita_sem_alteracao(self, bases_dir, capsys):
+        """Segunda carga devolve as mesmas bases"""
+        primeira = carregar_bases(bases_dir)
+        segunda = carregar_bases(bases_dir)
+        assert segunda is primeira
+        assert primeira["composicoes"] == {}
+
+    def test_recarrega_arquivo_alterado(self, bases_dir, capsys):
+        """Arquivo alterado e relido; os demais sao reaproveitados"""
+        primeira = carregar_bases(bases_dir)
+        reescrever(bases_dir / "materiais.json", {"materiais": {"TUB_14": {"preco": 20.0}}})
+
+        segunda = carregar_bases(bases_dir)
+        assert segunda is not primeira
+        assert segunda["materiais"]["TUB_14"]["preco"] == 20.0
+        assert segunda["bdi"] is primeira["bdi"]
+
+    def test_invalidar_cache(self, bases_dir, capsys):
+        """Invalidacao explicita forca releitura"""
+        primeira = carregar_bases(bases_dir)
+        invalidar_cache(bases_dir)
+        segunda = carregar_bases(bases_dir)
+        assert segunda is not primeira
+        assert segunda == primeira
+
+    def test_sem_cache(self, bases_dir):
+        """usar_cache=False sempre rele o arquivo"""
+        primeiro = carregar_json("materiais.json", bases_dir, usar_cache=False)
+        segundo = carregar_json("materiais.json", bases_dir, usar_cache=False)
+        assert segundo is not primeiro
+
+    def test_arquivo_inexistente(self, bases_dir):
+        with pytest.raises(FileNotFoundError):
+            carregar_json("nao_existe.json", bases_dir)
+
+    def test_indice_acompanha_bases(self, bases_dir, capsys):
+        """Indice em cache e reconstruido quando as bases mudam"""
+        indice = IndiceCatalogo.carregar(bases_dir)
+        assert IndiceCatalogo.carregar(bases_dir) is indice
+
+        reescrever(bases_dir / "materiais.json", {"materiais": {"TUB_14": {"preco": 20.0}}})
+        novo = IndiceCatalogo.carregar(bases_dir)
+        assert novo is not indice
+        assert novo.obter_preco("MAT", "TUB_14") == (20.0, None)
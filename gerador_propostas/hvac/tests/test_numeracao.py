@@ -0,0 +1,116 @@
+"""
+Testes da numeracao de orcamentos (trava de arquivo e reserva em bloco)
+"""
+
+import json
+import multiprocessing
+from datetime import date
+
+import pytest
+from hvac.generators import numeracao
+from hvac.generators.numeracao import AlocadorNumeros, BlocoNumeros, FaixaNumeros
+from hvac.generators.utils import proximo_numero_orcamento
+
+ANO = date.today().year
+
+
+@pytest.fixture
+def contador(tmp_path):
+    caminho = tmp_path / "contador.json"
+    caminho.write_text(json.dumps({"ano_corrente": ANO, "ultimo_sequencial": 100, "historico": {"1999": 867}}))
+    return caminho
+
+
+def reservar_em_processo(argumentos):
+    """Executado em outro processo: reserva numeros um a um e em bloco"""
+    caminho, vezes = argumentos
+    alocador = AlocadorNumeros(caminho)
+    sequenciais = [alocador.proximo()[1] for _ in range(vezes)]
+    sequenciais.extend(seq for _, seq in alocador.reservar(3))
+    return sequenciais
+
+
+class TestAlocadorNumeros:
+    """Testes para reserva, virada de ano e concorrencia"""
+
+    def test_reservar_faixa(self, contador):
+        alocador = AlocadorNumeros(contador)
+        faixa = alocador.reservar(3)
+
+        assert faixa == FaixaNumeros(ANO, 101, 103)
+        assert list(faixa)[0] == (f"{ANO}/101-R00", 101)
+        assert len(faixa) == 3
+        assert alocador.ler()["ultimo_sequencial"] == 103
+        assert alocador.ler()["historico"] == {"1999": 867}
+
+    def test_virada_de_ano(self, contador):
+        alocador = AlocadorNumeros(contador)
+        faixa = alocador.reservar(1, hoje=date(ANO + 1, 1, 2))
+
+        assert faixa == FaixaNumeros(ANO + 1, 1, 1)
+        estado = alocador.ler()
+        assert estado["ano_corrente"] == ANO + 1
+        assert estado["historico"] == {"1999": 867, str(ANO): 100}
+
+    def test_contador_inexistente(self, tmp_path):
+        alocador = AlocadorNumeros(tmp_path / "novo" / "contador.json")
+        assert alocador.proximo()[1] == 1
+
+    def test_quantidade_invalida(self, contador):
+        with pytest.raises(ValueError):
+            AlocadorNumeros(contador).reservar(0)
+
+    def test_processos_paralelos_sem_repeticao(self, contador):
+        with multiprocessing.get_context("spawn").Pool(4) as pool:
+            resultados = pool.map(reservar_em_processo, [(str(contador), 10)] * 8)
+
+        sequenciais = [seq for lista in resultados for seq in lista]
+        assert len(sequenciais) == 8 * 13
+        assert sorted(sequenciais) == list(range(101, 101 + 8 * 13))
+        assert AlocadorNumeros(contador).ler()["ultimo_sequencial"] == 100 + 8 * 13
+
+
+class TestBlocoNumeros:
+    """Testes para consumo local da faixa e devolucao da sobra"""
+
+    def test_uma_reserva_por_bloco(self, contador):
+        alocador = AlocadorNumeros(contador)
+        bloco = BlocoNumeros(alocador, tamanho=4)
+
+        assert bloco.proximo() == (f"{ANO}/101-R00", 101)
+        assert alocador.ler()["ultimo_sequencial"] == 104
+        assert bloco.restantes() == 3
+
+        assert [bloco.proximo()[1] for _ in range(4)] == [102, 103, 104, 105]
+        assert alocador.ler()["ultimo_sequencial"] == 108
+
+    def test_liberar_devolve_sobra(self, contador):
+        alocador = AlocadorNumeros(contador)
+        bloco = BlocoNumeros(alocador, tamanho=5)
+        _, primeiro = bloco.proximo()
+
+        assert bloco.liberar() is True
+        assert alocador.ler()["ultimo_sequencial"] == primeiro
+        assert bloco.liberar() is False
+
+    def test_liberar_apos_outra_reserva_mantem_lacuna(self, contador):
+        alocador = AlocadorNumeros(contador)
+        bloco = BlocoNumeros(alocador, tamanho=5)
+        bloco.proximo()
+        _, outro = alocador.proximo()
+
+        assert bloco.liberar() is False
+        assert alocador.ler()["ultimo_sequencial"] == outro
+
+
+class TestProximoNumeroOrcamento:
+    """Testes para a funcao de compatibilidade de utils"""
+
+    def test_atualiza_configs(self, contador, monkeypatch):
+        monkeypatch.setattr(numeracao, "_alocador_padrao", AlocadorNumeros(contador))
+        configs = {"contador": {"ultimo_sequencial": 1}}
+
+        numero, sequencial = proximo_numero_orcamento(configs)
+
+        assert sequencial == configs["contador"]["ultimo_sequencial"]
+        assert numero == f"{ANO}/101-R00"
@@ -0,0 +1,79 @@
+"""
+Testes do perfilador hierarquico
+"""
+
+import json
+
+from hvac.compositor import processar
+from hvac.utils.catalogo import IndiceCatalogo
+from hvac.utils.perfil import Perfilador, contar, formatar_perfil, perfilador_ativo, span
+
+
+class TestPerfilador:
+    """Testes para spans aninhados e agregacao"""
+
+    def test_sem_perfilador_ativo(self):
+        assert perfilador_ativo() is None
+        with span("qualquer"):
+            contar("nada")
+
+    def test_spans_aninhados(self):
+        perfilador = Perfilador()
+        with perfilador.ativar():
+            with span("etapa"):
+                for i in range(3):
+                    with span("item", posicao=i):
+                        pass
+            contar("itens", 3)
+        assert perfilador_ativo() is None
+
+        tabela = {linha["caminho"]: linha for linha in perfilador.agregar()}
+        assert list(tabela) == ["etapa", "etapa/item"]
+        assert tabela["etapa/item"]["chamadas"] == 3
+        assert tabela["etapa"]["total_ms"] >= tabela["etapa/item"]["total_ms"]
+        assert tabela["etapa"]["proprio_ms"] <= tabela["etapa"]["total_ms"]
+        assert perfilador.contadores == {"itens": 3}
+
+    def test_memoria(self):
+        perfilador = Perfilador(rastrear_memoria=True)
+        with perfilador.ativar():
+            with span("aloca"):
+                dados = [bytes(1024) for _ in range(100)]
+        assert perfilador.agregar()[0]["memoria_kb"] >= 100
+        assert len(dados) == 100
+
+    def test_chrome_trace(self, tmp_path):
+        perfilador = Perfilador()
+        with perfilador.ativar():
+            with span("etapa", arquivo="x.json"):
+                pass
+
+        path = tmp_path / "trace.json"
+        perfilador.exportar_chrome_trace(path)
+        eventos = json.loads(path.read_text())["traceEvents"]
+        assert eventos[0]["name"] == "etapa"
+        assert eventos[0]["ph"] == "X"
+        assert eventos[0]["args"] == {"arquivo": "x.json"}
+
+    def test_limite_eventos(self):
+        perfilador = Perfilador(max_eventos=2)
+        with perfilador.ativar():
+            for _ in range(5):
+                with span("item"):
+                    pass
+        assert len(perfilador.eventos) == 2
+        assert perfilador.eventos_descartados == 3
+        assert perfilador.agregar()[0]["chamadas"] == 5
+
+    def test_instrumentacao_compositor(self):
+        indice = IndiceCatalogo.carregar()
+        escopo = {"itens": [{"composicao": codigo, "variavel": 2} for codigo in list(indice.composicoes)[:4]]}
+
+        perfilador = Perfilador()
+        with perfilador.ativar():
+            processar(escopo, indice=indice)
+
+        caminhos = [linha["caminho"] for linha in perfilador.agregar()]
+        assert caminhos == ["expandir_item", "consolidar"]
+        assert perfilador.contadores["itens_expandidos"] == 4
+        assert "expandir_item" in formatar_perfil(perfilador.agregar())
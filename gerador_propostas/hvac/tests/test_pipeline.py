@@ -0,0 +1,195 @@
+"""
+Testes do pipeline
+"""
+
+import json
+
+import pytest
+from hvac.pipeline import (
+    EscritorArtefatos,
+    executar_etapas,
+    executar_lote,
+    executar_pipeline,
+    listar_escopos,
+    nome_saida_escopo
+)
+from hvac.utils.metricas import percentil, resumir_lote
+
+
+def escrever_escopo(caminho, composicao="COMP_INST_9K", variavel=5, quantidade=1):
+    caminho.parent.mkdir(parents=True, exist_ok=True)
+    caminho.write_text(json.dumps({
+        "projeto": {"nome": caminho.stem, "cliente": "Teste"},
+        "itens": [{"composicao": composicao, "variavel": variavel, "quantidade": quantidade}]
+    }))
+
+
+class TestListarEscopos:
+    """Testes para descoberta de escopos"""
+
+    def test_diretorio_recursivo(self, tmp_path):
+        escrever_escopo(tmp_path / "acme" / "escopo.json")
+        escrever_escopo(tmp_path / "escopo_beta.json")
+        (tmp_path / "outro.json").write_text("{}")
+
+        escopos = listar_escopos(str(tmp_path))
+        assert [e.name for e in escopos] == ["escopo.json", "escopo_beta.json"]
+
+    def test_glob(self, tmp_path):
+        escrever_escopo(tmp_path / "a.json")
+        escrever_escopo(tmp_path / "b.json")
+        assert len(listar_escopos(str(tmp_path / "*.json"))) == 2
+
+    def test_nome_saida(self, tmp_path):
+        assert nome_saida_escopo(tmp_path / "acme" / "escopo.json") == "acme"
+        assert nome_saida_escopo(tmp_path / "escopo_beta.json") == "escopo_beta"
+
+
+class TestResumoLote:
+    """Testes para consolidacao de metricas"""
+
+    def test_percentil(self):
+        valores = list(range(1, 11))
+        assert percentil(valores, 50) == 5
+        assert percentil(valores, 95) == 10
+        assert percentil([], 95) == 0.0
+
+    def test_resumo(self):
+        metricas = [
+            {"tempo_compositor": 0.1, "tempo_total": 1.0, "qtd_itens": 2, "valor_total": 100.0},
+            {"tempo_compositor": 0.3, "tempo_total": 2.0, "qtd_itens": 3, "valor_total": 50.0}
+        ]
+        resumo = resumir_lote(metricas, duracao_total=2.0, falhas=1)
+        assert resumo["escopos"] == 3
+        assert resumo["vazao_por_segundo"] == 1.0
+        assert resumo["itens"] == 5
+        assert resumo["etapas"]["compositor"]["p95"] == 0.3
+        assert resumo["etapas"]["total"]["media"] == 1.5
+        assert "pdf" not in resumo["etapas"]
+
+        metricas[0]["tempo_pdf"] = 0.4
+        assert resumir_lote(metricas, duracao_total=2.0)["etapas"]["pdf"]["soma"] == 0.4
+
+
+class TestExecutarLote:
+    """Testes para execucao em lote"""
+
+    def test_lote_serial(self, tmp_path):
+        entrada = tmp_path / "entrada"
+        escrever_escopo(entrada / "acme" / "escopo.json")
+        escrever_escopo(entrada / "beta" / "escopo.json", quantidade=2)
+        (entrada / "ruim").mkdir()
+        (entrada / "ruim" / "escopo.json").write_text("{invalido")
+
+        saida = tmp_path / "saida"
+        resultado = executar_lote(str(entrada), str(saida), workers=1, verbose=False)
+
+        assert resultado["resumo"]["concluidos"] == 2
+        assert resultado["resumo"]["falhas"] == 1
+        assert (saida / "acme" / "precificado.json").exists()
+        assert (saida / "beta" / "metricas.json").exists()
+        assert (saida / "resumo_lote.json").exists()
+
+
+class TestEncadeamentoMemoria:
+    """Testes para encadeamento das etapas sem I/O intermediario"""
+
+    def test_executar_etapas(self):
+        escopo = {"projeto": {"nome": "Teste"}, "itens": [{"composicao": "COMP_INST_9K", "variavel": 3}]}
+        composicao, precificado = executar_etapas(escopo)
+        assert len(composicao["itens_orcamento"]) == 1
+        assert precificado["resumo_financeiro"]["valor_total"] > 0
+
+    @pytest.mark.parametrize("assincrona", [False, True])
+    def test_metricas_do_buffer(self, tmp_path, assincrona):
+        """Tamanhos medidos em memoria batem com os arquivos gravados"""
+        escopo_path = tmp_path / "escopo.json"
+        escrever_escopo(escopo_path)
+
+        saida = tmp_path / "saida"
+        resultado = executar_pipeline(
+            str(escopo_path), str(saida), verbose=False, escrita_assincrona=assincrona
+        )
+
+        metricas = resultado["metricas"]
+        assert metricas["tamanho_escopo"] == escopo_path.stat().st_size
+        assert metricas["tamanho_composicao"] == (saida / "composicao.json").stat().st_size
+        assert metricas["tamanho_precificado"] == (saida / "precificado.json").stat().st_size
+        assert json.loads((saida / "precificado.json").read_text()) == resultado["precificado"]
+
+    def test_sem_intermediarios(self, tmp_path):
+        escopo_path = tmp_path / "escopo.json"
+        escrever_escopo(escopo_path)
+
+        saida = tmp_path / "saida"
+        resultado = executar_pipeline(
+            str(escopo_path), str(saida), verbose=False, salvar_intermediarios=False
+        )
+
+        assert not (saida / "composicao.json").exists()
+        assert not (saida / "precificado.json").exists()
+        assert (saida / "metricas.json").exists()
+        assert resultado["composicao"]["itens_orcamento"]
+
+    def test_incremental(self, tmp_path):
+        """Segunda execucao incremental reaproveita o cache e gera a mesma saida"""
+        escopo_path = tmp_path / "escopo.json"
+        escrever_escopo(escopo_path)
+        saida = tmp_path / "saida"
+
+        primeiro = executar_pipeline(str(escopo_path), str(saida), verbose=False, incremental=True)
+        assert (saida / "incremental.json").exists()
+
+        segundo = executar_pipeline(str(escopo_path), str(saida), verbose=False, incremental=True)
+        assert segundo["precificado"] == primeiro["precificado"]
+        assert segundo["precificado"] == executar_etapas(json.loads(escopo_path.read_text()))[1]
+
+    def test_lote_atualiza_dependencias(self, tmp_path):
+        entrada = tmp_path / "entrada"
+        escrever_escopo(entrada / "acme" / "escopo.json")
+        escrever_escopo(entrada / "beta" / "escopo.json", composicao="NAO_EXISTE")
+
+        saida = tmp_path / "saida"
+        executar_lote(str(entrada), str(saida), workers=1, verbose=False)
+
+        indice = json.loads((saida / "indice_dependencias.json").read_text())
+        assert list(indice["orcamentos"]) == ["acme", "beta"]
+        assert indice["orcamentos"]["beta"]["codigos"] == []
+
+    @pytest.mark.parametrize("assincrona", [False, True])
+    def test_perfil(self, tmp_path, assincrona):
+        escopo_path = tmp_path / "escopo.json"
+        escrever_escopo(escopo_path)
+        saida = tmp_path / "saida"
+
+        resultado = executar_pipeline(
+            str(escopo_path), str(saida), verbose=False, perfil=True, escrita_assincrona=assincrona
+        )
+
+        caminhos = [linha["caminho"] for linha in resultado["metricas"]["perfil"]["spans"]]
+        assert "compositor/expandir_item" in caminhos
+        assert "precificador/precificar_item" in caminhos
+        assert "gravar" in caminhos
+        assert json.loads((saida / "metricas.json").read_text())["perfil"]["spans"]
+        assert json.loads((saida / "perfil_trace.json").read_text())["traceEvents"]
+
+
+class TestEscritorArtefatos:
+    """Testes para gravacao assincrona de artefatos"""
+
+    def test_erro_de_gravacao_propagado(self, tmp_path):
+        with pytest.raises(FileNotFoundError):
+            with EscritorArtefatos(assincrono=True) as escritor:
+                escritor.gravar(tmp_path / "nao_existe" / "a.json", "{}")
+
+    def test_falha_da_etapa_encerra_a_thread(self, tmp_path):
+        escritor = EscritorArtefatos(assincrono=True)
+        with pytest.raises(RuntimeError):
+            with escritor:
+                escritor.gravar(tmp_path / "a.json", "{}")
+                escritor.gravar(tmp_path / "nao_existe" / "b.json", "{}")
+                raise RuntimeError("etapa")
+
+        assert (tmp_path / "a.json").read_text() == "{}"
+        assert escritor._executor._shutdown
+
@@ -0,0 +1,96 @@
+"""
+Testes da planilha interna (motores em memoria e write_only)
+"""
+
+import pytest
+from openpyxl import load_workbook
+from hvac.generators.planilha_interna import consolidar_insumos, gerar_planilha_interna
+
+
+@pytest.fixture
+def precificado():
+    def insumo(codigo, quantidade, custo, **extra):
+        return {"codigo": codigo, "descricao": f"Insumo {codigo}", "quantidade": quantidade,
+                "preco_unitario": custo / quantidade, "custo": custo, **extra}
+
+    return {
+        "cliente": "Cliente Teste",
+        "itens_precificados": [
+            {
+                "id": 1,
+                "descricao": "Instalacao split",
+                "quantidade": 2,
+                "custo_direto": 300.0,
+                "materiais": [insumo("MAT-B", 2, 40.0, unidade="m"), insumo("MAT-A", 1, 10.0)],
+                "mao_de_obra": [insumo("MO-1", 4, 200.0)],
+                "ferramentas": []
+            },
+            {
+                "id": 2,
+                "descricao": "Limpeza",
+                "custo_direto": 50.0,
+                "materiais": [insumo("MAT-B", 3, 60.0, unidade="m")],
+                "mao_de_obra": [insumo("MO-1", 1, 50.0)],
+                "ferramentas": [insumo("FE-1", 2, 8.0)]
+            }
+        ]
+    }
+
+
+def celulas(caminho):
+    """Valor, estilo e formato de todas as celulas preenchidas ou estilizadas"""
+    wb = load_workbook(caminho)
+    return {
+        ws.title: [
+            (celula.coordinate, celula.value, celula.style, celula.number_format, celula.font.b)
+            for linha in ws.iter_rows()
+            for celula in linha
+            if celula.value is not None or celula.has_style
+        ]
+        for ws in wb.worksheets
+    }
+
+
+class TestPlanilhaInterna:
+    """Testes para o layout e a equivalencia dos motores"""
+
+    def test_motores_equivalentes(self, precificado, tmp_path):
+        precificado["agrupamento"] = [{"nome": "SPLITS", "itens_ids": [2, 1]}, {"itens_ids": [9]}]
+
+        memoria = gerar_planilha_interna(precificado, "1.001-R00", str(tmp_path / "memoria.xlsx"))
+        streaming = gerar_planilha_interna(
+            precificado, "1.001-R00", str(tmp_path / "streaming.xlsx"), write_only=True
+        )
+
+        assert memoria["sucesso"] and streaming["sucesso"]
+        assert celulas(tmp_path / "memoria.xlsx") == celulas(tmp_path / "streaming.xlsx")
+
+        larguras = load_workbook(tmp_path / "streaming.xlsx")["Resumo por Item"].column_dimensions
+        assert larguras["B"].width == 45
+
+    @pytest.mark.parametrize("write_only", [False, True])
+    def test_resumo_hierarquico(self, precificado, tmp_path, write_only):
+        caminho = tmp_path / "planilha.xlsx"
+        gerar_planilha_interna(precificado, "1.001-R00", str(caminho), write_only=write_only)
+        ws = load_workbook(caminho)["Resumo por Item"]
+
+        assert ws["A1"].value == "Referencia: ORC 1.001-R00"
+        assert [ws[f"A{linha}"].value for linha in range(6, 10)] == ["1.1", "1.1.1", "1.1.2", "1.1.MO1"]
+        assert ws["C8"].value == "MATERIAL" and ws["D9"].value == "h"
+        assert ws["A6"].style == "item" and ws["A7"].style == "subitem"
+        assert ws["G7"].number_format == "#,##0.00"
+        assert ws["B15"].value == "TOTAL GERAL"
+        assert ws["G15"].value == "=SUM(G6:G13)"
+
+    def test_sem_ferramentas_sem_total(self, precificado, tmp_path):
+        precificado["itens_precificados"][1]["ferramentas"] = []
+        caminho = tmp_path / "planilha.xlsx"
+        gerar_planilha_interna(precificado, "1", str(caminho), write_only=True)
+        assert load_workbook(caminho)["Ferramentas"].max_row == 5
+
+    def test_consolidar_insumos(self, precificado):
+        materiais = consolidar_insumos(precificado, "materiais")
+        assert [m["codigo"] for m in materiais] == ["MAT-A", "MAT-B"]
+        assert materiais[1]["quantidade"] == 5
+        assert materiais[1]["custo"] == 100.0
+        assert materiais[1]["unidade"] == "m"
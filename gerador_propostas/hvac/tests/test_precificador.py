@@ -2,14 +2,23 @@
 Testes do modulo precificador
 """
 
+import io
+import json
+
 import pytest
 from datetime import date, timedelta
+from hvac.compositor import processar as processar_compositor
 from hvac.precificador import (
     obter_preco_item,
     verificar_preco_desatualizado,
     precificar_lista,
-    processar
+    processar,
+    gravar_precificado_stream,
+    ler_precificado_jsonl,
+    relatorio_precos,
+    ColetorAlertas
 )
+from hvac.utils.catalogo import IndiceCatalogo
 
 
 class TestObterPrecoItem:
@@ -65,6 +74,67 @@ class TestVerificarPrecoDesatualizado:
         assert verificar_preco_desatualizado(None) == "critico"
 
 
+class TestSituacaoPrecos:
+    """Testes para situacao de preco por insumo e relatorio de atualizacao"""
+
+    @pytest.fixture
+    def bases(self):
+        hoje = date.today()
+        return {
+            "materiais": {
+                "NOVO": {"preco": 10.0, "data_atualizacao": hoje.isoformat()},
+                "VELHO": {"preco": 5.0, "data_atualizacao": (hoje - timedelta(days=100)).isoformat()},
+                "SEM_DATA": {"preco": 1.0}
+            },
+            "bdi": {"MAT": {"percentual": 0.5}}
+        }
+
+    def test_colunas_do_indice(self, bases):
+        """Dias e status sao calculados uma vez por insumo e por dia"""
+        indice = IndiceCatalogo(bases)
+        velho = indice.obter_id("MAT", "VELHO")
+        assert indice.dias_atualizacao[velho] == 100
+        assert indice.status_precos[velho] == "alerta"
+        assert indice.status_precos[indice.obter_id("MAT", "NOVO")] is None
+        assert indice.status_precos[indice.obter_id("MAT", "SEM_DATA")] == "critico"
+
+        alertas = indice.obter_alertas_preco(date.today() + timedelta(days=100))
+        assert indice.status_precos[velho] == "critico"
+        assert alertas[velho].startswith("Preco critico: VELHO (MAT)")
+
+    def test_alertas_ordenados_sem_repeticao(self, bases):
+        """Alertas distintos na ordem da primeira ocorrencia"""
+        linhas = [
+            {"codigo": codigo, "quantidade": 1}
+            for codigo in ("VELHO", "NOVO", "NAO_EXISTE", "VELHO", "SEM_DATA", "NAO_EXISTE")
+        ]
+        coletor = ColetorAlertas()
+        precificar_lista(linhas, "MAT", bases, coletor)
+
+        assert [alerta.split(":")[1].split()[0] for alerta in coletor] == ["VELHO", "NAO_EXISTE", "SEM_DATA"]
+        assert len(coletor) == 3
+
+    def test_relatorio_precos(self, bases):
+        """Relatorio soma o custo das linhas por situacao do preco"""
+        composicao = {"itens_orcamento": [{
+            "id": 1,
+            "materiais": [
+                {"codigo": "NOVO", "quantidade": 6},
+                {"codigo": "VELHO", "quantidade": 4},
+                {"codigo": "SEM_DATA", "quantidade": 20}
+            ]
+        }]}
+        indice = IndiceCatalogo(bases)
+        relatorio = relatorio_precos(processar(composicao, indice=indice), indice)
+
+        assert relatorio["custo_linhas"] == 100.0
+        assert relatorio["custo_desatualizado"] == 40.0
+        assert relatorio["percentual_desatualizado"] == 40.0
+        assert relatorio["por_status"]["ok"] == {"linhas": 1, "custo": 60.0, "percentual": 60.0}
+        assert [i["codigo"] for i in relatorio["insumos_desatualizados"]] == ["SEM_DATA", "VELHO"]
+        assert relatorio["insumos_desatualizados"][0]["dias"] is None
+
+
 class TestPrecificarLista:
     """Testes para precificacao de lista"""
 
@@ -158,3 +228,61 @@ class TestProcessar:
         assert resumo["total_materiais"] == 100.00
         assert resumo["bdi_materiais"] == 35.00  # 100 * 0.35
         assert resumo["valor_total"] == 135.00  # 100 + 35
+
+
+@pytest.fixture(scope="module")
+def indice():
+    return IndiceCatalogo.carregar()
+
+
+@pytest.fixture(scope="module")
+def composicao(indice):
+    itens = [
+        {"composicao": codigo, "variavel": variavel, "quantidade": 2}
+        for codigo in indice.composicoes
+        for variavel in (1, 7.5)
+    ]
+    escopo = {"projeto": {"nome": "Stream", "cliente": "Teste"}, "itens": itens}
+    return processar_compositor(escopo, indice=indice)
+
+
+class TestStreaming:
+    """Testes para gravacao em streaming"""
+
+    def test_json_identico(self, indice, composicao):
+        """Formato json gera o mesmo arquivo que json.dump do processar"""
+        destino = io.StringIO()
+        resultado = gravar_precificado_stream(composicao, destino, indice)
+
+        esperado = processar(composicao, indice=indice, backend="python")
+        assert destino.getvalue() == json.dumps(esperado, ensure_ascii=False, indent=2)
+        assert resultado["qtd_itens"] == len(esperado["itens_precificados"])
+        assert resultado["resumo_financeiro"] == esperado["resumo_financeiro"]
+
+    def test_jsonl(self, indice, composicao):
+        """Formato jsonl reconstroi o mesmo orcamento"""
+        destino = io.StringIO()
+        gravar_precificado_stream(composicao, destino, indice, formato="jsonl")
+
+        linhas = destino.getvalue().splitlines()
+        assert len(linhas) == len(composicao["itens_orcamento"]) + 2
+        assert ler_precificado_jsonl(linhas) == processar(composicao, indice=indice, backend="python")
+
+    def test_composicao_vazia(self, indice):
+        composicao = {"projeto": "Teste", "itens_orcamento": []}
+        destino = io.StringIO()
+        gravar_precificado_stream(composicao, destino, indice)
+        assert destino.getvalue() == json.dumps(processar(composicao, indice=indice), ensure_ascii=False, indent=2)
+
+    def test_itens_de_gerador(self, indice, composicao):
+        """Itens podem vir de um gerador (nao precisam estar em memoria)"""
+        destino = io.StringIO()
+        itens = (item for item in composicao["itens_orcamento"])
+        resultado = gravar_precificado_stream(
+            {"projeto": "Teste"}, destino, indice, formato="jsonl", itens_orcamento=itens
+        )
+        assert resultado["qtd_itens"] == len(composicao["itens_orcamento"])
+
+    def test_formato_invalido(self, indice):
+        with pytest.raises(ValueError):
+            gravar_precificado_stream({}, io.StringIO(), indice, formato="xml")
@@ -0,0 +1,83 @@
+"""
+Testes do backend vetorizado (NumPy) do precificador
+"""
+
+import json
+
+import pytest
+
+pytest.importorskip("numpy")
+
+from hvac.compositor import processar as processar_compositor
+from hvac.precificador import processar, usar_backend_numpy, LIMIAR_LINHAS_NUMPY
+from hvac.utils.catalogo import IndiceCatalogo
+
+
+@pytest.fixture(scope="module")
+def indice():
+    return IndiceCatalogo.carregar()
+
+
+def escopo_todas_composicoes(indice):
+    """Escopo com todas as composicoes das bases em varias variaveis/quantidades"""
+    itens = []
+    for codigo in indice.composicoes:
+        for variavel in (0, 1, 2.5, 12, 37.3):
+            for quantidade in (1, 3):
+                itens.append({"composicao": codigo, "variavel": variavel, "quantidade": quantidade})
+    return {"projeto": {"nome": "Paridade", "cliente": "Teste"}, "itens": itens}
+
+
+class TestParidade:
+    """O backend NumPy gera precificado.json identico ao Python puro"""
+
+    def test_paridade_bases_reais(self, indice):
+        composicao = processar_compositor(escopo_todas_composicoes(indice), indice=indice)
+
+        python = processar(composicao, indice=indice, backend="python")
+        numpy = processar(composicao, indice=indice, backend="numpy")
+
+        assert json.dumps(numpy, ensure_ascii=False, indent=2) == \
+            json.dumps(python, ensure_ascii=False, indent=2)
+
+    def test_paridade_item_inexistente(self, indice):
+        """Insumo fora do catalogo custa zero e gera alerta critico"""
+        composicao = {
+            "projeto": "Teste",
+            "itens_orcamento": [{
+                "id": 1,
+                "descricao": "Item",
+                "materiais": [{"codigo": "NAO_EXISTE", "descricao": "X", "quantidade": 2, "unidade": "UN"}],
+                "mao_de_obra": [],
+                "ferramentas": [],
+                "equipamentos": []
+            }]
+        }
+
+        python = processar(composicao, indice=indice, backend="python")
+        numpy = processar(composicao, indice=indice, backend="numpy")
+
+        assert numpy == python
+        assert numpy["resumo_financeiro"]["valor_total"] == 0.0
+        assert any("NAO_EXISTE" in alerta for alerta in numpy["alertas"])
+
+    def test_composicao_vazia(self, indice):
+        composicao = {"projeto": "Teste", "itens_orcamento": []}
+        assert processar(composicao, indice=indice, backend="numpy") == \
+            processar(composicao, indice=indice, backend="python")
+
+
+class TestSelecaoBackend:
+    """Testes para escolha do backend"""
+
+    def test_python_forcado(self):
+        itens = [{"materiais": [{}] * LIMIAR_LINHAS_NUMPY}]
+        assert usar_backend_numpy(itens, "python") is False
+
+    def test_auto_por_tamanho(self):
+        assert usar_backend_numpy([{"materiais": [{}]}], "auto") is False
+        assert usar_backend_numpy([{"materiais": [{}] * LIMIAR_LINHAS_NUMPY}], "auto") is True
+
+    def test_backend_invalido(self):
+        with pytest.raises(ValueError):
+            usar_backend_numpy([], "fortran")
@@ -0,0 +1,138 @@
+"""
+Testes do backend fpdf2 da proposta e dos percentuais de BDI do gerador_pdf
+"""
+
+import re
+
+import pytest
+from hvac.gerador_pdf import formatar_percentual, percentual_bdi
+from hvac.generators.proposta_fpdf import RenderizadorPropostaFPDF, _texto, _texto_literal
+from hvac.generators.proposta_pdf import gerar_proposta_pdf
+
+
+def contexto_proposta(renderizador, quantidade_itens=3):
+    itens = [
+        {
+            "descricao": f"Instalacao de split {i} — 12.000 BTU",
+            "unidade": "un",
+            "quantidade": 2,
+            "valor_unitario": 500.0,
+            "valor_total": 1000.0
+        }
+        for i in range(quantidade_itens)
+    ]
+    return {
+        "numero_orcamento": "2026/001-R00",
+        "cidade": "Porto Alegre",
+        "data_extenso": "18 de outubro de 2026",
+        "cliente": {"razao_social": "Cliente Teste", "cnpj": "00.000.000/0001-00", "endereco": "Rua A, 1"},
+        "referencia": "Instalacao",
+        "grupos": [{"numero": 1, "nome": "INSTALACAO", "itens": itens, "subtotal": 1000.0 * quantidade_itens}],
+        "mostrar_unitario": True,
+        "valor_total": 1000.0 * quantidade_itens,
+        "valor_extenso": "tres mil reais",
+        "destaques": ["Mao de obra qualificada."],
+        "responsavel": {"nome": "Fulano", "email": "fulano@exemplo.com", "telefone": "(51) 0000-0000"},
+        "exclusoes": ["Pintura;", "Calha plastica para linha frigoригena;"],
+        "condicoes": {"forma_pagamento": "A vista", "prazo_execucao": "10 dias", "garantia": "1 ano", "validade_dias": 10},
+        "assinaturas": [
+            {
+                "nome": "Responsavel Tecnico",
+                "cargo": "Engenheiro",
+                "registro": "CREA 0000",
+                "assinatura_img_base64": renderizador.carregar_asset_base64("templates/html/assinatura_daniel.png")
+            }
+        ],
+        "empresa": {"razao_social": "Empresa", "cnpj": "1", "endereco": {"cidade": "Porto Alegre"}},
+        "logo_base64": renderizador.carregar_asset_base64("templates/html/logo_armant.png"),
+        "marca_dagua_base64": renderizador.carregar_asset_base64("templates/html/helice_armant.png"),
+        "rascunho": False
+    }
+
+
+def paginas(caminho):
+    return len(re.findall(rb"/Type /Page\b", caminho.read_bytes()))
+
+
+class TestRenderizadorPropostaFPDF:
+    """Testes para o layout fpdf2 a partir do contexto do template"""
+
+    def test_gera_pdf_e_rascunho(self, tmp_path):
+        renderizador = RenderizadorPropostaFPDF()
+        contexto = contexto_proposta(renderizador)
+        principal = tmp_path / "proposta.pdf"
+        rascunho = tmp_path / "proposta_RASCUNHO.pdf"
+
+        renderizador.gerar_pdf(contexto, principal, rascunho)
+
+        assert principal.read_bytes().startswith(b"%PDF")
+        assert paginas(principal) == 1
+        assert rascunho.read_bytes() != principal.read_bytes()
+
+    def test_muitos_itens_quebram_pagina(self, tmp_path):
+        renderizador = RenderizadorPropostaFPDF()
+        saida = tmp_path / "proposta.pdf"
+        renderizador.gerar_pdf(contexto_proposta(renderizador, quantidade_itens=80), saida)
+        assert paginas(saida) >= 3
+
+    def test_imagem_preparada_uma_vez(self):
+        renderizador = RenderizadorPropostaFPDF(largura_max_imagem=200)
+        logo = renderizador.carregar_asset_base64("templates/html/logo_armant.png")
+
+        primeira = renderizador.imagem(logo)
+        assert primeira[1] == 200
+        assert primeira[0].getvalue()[:2] == b"\xff\xd8"
+        assert len(renderizador._imagens) == 1
+        renderizador.imagem(logo)
+        assert len(renderizador._imagens) == 1
+        assert renderizador.imagem(None) is None
+        assert renderizador.imagem("bao=") is None
+
+    def test_chave_cache_ignora_rascunho(self):
+        renderizador = RenderizadorPropostaFPDF()
+        assert renderizador.chave_cache({"a": 1, "rascunho": True}) == renderizador.chave_cache({"a": 1})
+        assert renderizador.chave_cache({"a": 1}) != renderizador.chave_cache({"a": 2})
+
+    def test_texto_latin1(self):
+        assert _texto("Orçamento – “teste”") == 'Orçamento - "teste"'
+        assert _texto("frigoригena").encode("latin-1")
+        assert _texto(None) == ""
+
+    def test_marcadores_markdown_literais(self):
+        renderizador = RenderizadorPropostaFPDF()
+        contexto = contexto_proposta(renderizador)
+        contexto["exclusoes"] = ["Obras civis -- alvenaria __x__ **y** ~~z~~ \\-- fim"]
+        contexto["condicoes"]["forma_pagamento"] = "a vista -- sem juros __x__"
+
+        pdf = renderizador.renderizar(contexto)
+        pdf.set_compression(False)
+        conteudo = bytes(pdf.output())
+
+        # Cada valor sai como um unico trecho de texto, sem enfase
+        assert b"(Obras civis -- alvenaria __x__ **y** ~~z~~ \\\\-- fim) Tj" in conteudo
+        assert b"( a vista -- sem juros __x__) Tj" in conteudo
+
+    def test_texto_literal(self):
+        assert _texto_literal("a -- b") == "a \\-- b"
+        assert _texto_literal("a\\b") == "a\\\\b"
+        assert _texto_literal(None) == ""
+
+    def test_backend_invalido(self):
+        resultado = gerar_proposta_pdf({}, backend="latex")
+        assert resultado["sucesso"] is False
+        assert "latex" in resultado["erro"]
+
+
+class TestPercentualBDI:
+    """Testes para os percentuais de BDI do PDF simplificado"""
+
+    def test_percentuais_do_orcamento(self):
+        resumo = {"percentuais_bdi": {"MAT": "60%", "MO": "123%"}}
+        assert percentual_bdi(resumo, "MAT") == pytest.approx(0.6)
+        assert formatar_percentual(percentual_bdi(resumo, "MO")) == "123%"
+
+    def test_deduz_da_razao(self):
+        resumo = {"total_ferramentas": 200.0, "bdi_ferramentas": 60.0}
+        assert percentual_bdi(resumo, "FER") == pytest.approx(0.3)
+        assert percentual_bdi(resumo, "EQP") is None
+        assert formatar_percentual(None) == "-"
@@ -0,0 +1,109 @@
+"""
+Testes da preparacao do contexto da proposta (grupos, indice de itens e numero)
+"""
+
+import json
+from datetime import date
+
+from hvac.generators import numeracao
+from hvac.generators.indice_revisoes import registrar_proposta
+from hvac.generators.numeracao import AlocadorNumeros
+from hvac.generators.proposta_pdf import (
+    NOME_GRUPO_RESIDUAL,
+    IndiceItens,
+    detectar_tipo_servico,
+    preparar_grupos,
+    resolver_numero_orcamento
+)
+from hvac.generators.utils import gerar_nome_arquivo
+
+ANO = date.today().year
+
+
+def precificado(agrupamento=None):
+    itens = [
+        {"id": 1, "descricao": "Instalacao", "quantidade": 2, "preco_total": 200.0},
+        {"id": 2, "descricao": "Limpeza", "preco_total": 50.0, "tipo_servico": "manutencao"},
+        {"id": 3, "descricao": "Carga de gas", "preco_total": 30.0, "tipo_servico": "manutencao"},
+        {"id": 3, "descricao": "Carga de gas (repetida)", "preco_total": 30.0}
+    ]
+    dados = {"itens_precificados": itens}
+    if agrupamento is not None:
+        dados["agrupamento"] = agrupamento
+    return dados
+
+
+class TestPrepararGrupos:
+    """Testes para grupos da proposta e validacao do agrupamento"""
+
+    def test_sem_agrupamento(self):
+        avisos = []
+        grupos = preparar_grupos(precificado(), avisos=avisos)
+
+        assert len(grupos) == 1
+        assert grupos[0]["nome"] == "SERVICOS"
+        assert grupos[0]["subtotal"] == 310.0
+        assert grupos[0]["itens"][0]["valor_unitario"] == 100.0
+        assert avisos == []
+
+    def test_agrupamento_com_residual(self):
+        avisos = []
+        grupos = preparar_grupos(
+            precificado([{"nome": "SPLITS", "itens_ids": [3, 1, 9]}, {"itens_ids": [1]}]),
+            avisos=avisos
+        )
+
+        assert [g["nome"] for g in grupos] == ["SPLITS", "GRUPO 2", NOME_GRUPO_RESIDUAL]
+        assert [i["descricao"] for i in grupos[0]["itens"]] == ["Carga de gas", "Instalacao"]
+        assert [i["descricao"] for i in grupos[2]["itens"]] == ["Limpeza", "Carga de gas (repetida)"]
+        assert grupos[2]["numero"] == 3
+        assert avisos == [
+            "Agrupamento: id 3 repetido nos itens precificados",
+            "Agrupamento: item 9 do grupo SPLITS nao existe no orcamento",
+            "Agrupamento: item 1 aparece em mais de um grupo",
+            f"Agrupamento: 2 item(ns) sem grupo incluido(s) em {NOME_GRUPO_RESIDUAL}"
+        ]
+
+    def test_indice_unico(self):
+        dados = precificado([{"nome": "TUDO", "itens_ids": [1, 2, 3]}])
+        indice = IndiceItens(dados)
+
+        assert indice.obter_posicao(3) == 2
+        assert indice.obter_posicao(9) is None
+        assert indice.mostrar_unitario is True
+        assert detectar_tipo_servico(dados, indice) == "instalacao"
+        assert len(preparar_grupos(dados, indice)) == 2
+
+
+def emitir(cliente_dir, numero):
+    """Grava e registra um PDF ja emitido para o numero (ex: "2026/101-R00")"""
+    numero_base, revisao = numero.split("-")
+    arquivo = cliente_dir / f"{gerar_nome_arquivo(numero_base, 'Cliente', 'instalacao', revisao)}.pdf"
+    arquivo.write_bytes(b"%PDF")
+    registrar_proposta(cliente_dir, arquivo, numero, revisao)
+
+
+class TestNumeroOrcamento:
+    """Testes para numero e revisao da proposta"""
+
+    def test_numero_novo_de_cliente_recorrente_comeca_em_r00(self, tmp_path, monkeypatch):
+        contador = tmp_path / "contador.json"
+        contador.write_text(json.dumps({"ano_corrente": ANO, "ultimo_sequencial": 101}))
+        monkeypatch.setattr(numeracao, "_alocador_padrao", AlocadorNumeros(contador))
+        emitir(tmp_path, f"{ANO}/101-R00")
+        emitir(tmp_path, f"{ANO}/101-R01")
+        emitir(tmp_path, f"{ANO}/101-R02")
+
+        numero = resolver_numero_orcamento("Cliente", None, None, tmp_path, {})
+
+        assert numero == f"{ANO}/102-R00"
+
+    def test_reemissao_do_mesmo_numero_incrementa_revisao(self, tmp_path):
+        emitir(tmp_path, "2026/101-R00")
+
+        assert resolver_numero_orcamento("Cliente", "2026/101", None, tmp_path, {}) == "2026/101-R01"
+        assert resolver_numero_orcamento("Cliente", "2026/102", None, tmp_path, {}) == "2026/102-R00"
+
+    def test_revisao_explicita(self, tmp_path):
+        assert resolver_numero_orcamento("Cliente", "2026/101-R04", None, tmp_path, {}) == "2026/101-R04"
+        assert resolver_numero_orcamento("Cliente", "2026/101", "2", tmp_path, {}) == "2026/101-R02"
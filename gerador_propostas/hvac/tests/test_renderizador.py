@@ -0,0 +1,87 @@
+"""
+Testes do renderizador de propostas (partes que nao dependem do WeasyPrint)
+"""
+
+import base64
+import os
+import sys
+import types
+
+import pytest
+from hvac.generators.renderizador import TEMPLATE_PROPOSTA, RenderizadorProposta
+
+
+@pytest.fixture
+def template_dir(tmp_path):
+    (tmp_path / TEMPLATE_PROPOSTA).write_text(
+        "<p>{{ valor | formatar_moeda }}</p>{% if rascunho %}<div>RASCUNHO</div>{% endif %}"
+    )
+    return tmp_path
+
+
+class TestRenderizadorProposta:
+    """Testes para cache de template e imagens"""
+
+    def test_asset_em_cache(self, tmp_path):
+        imagem = tmp_path / "logo.png"
+        imagem.write_bytes(b"png-1")
+        renderizador = RenderizadorProposta(template_dir=tmp_path)
+
+        primeiro = renderizador.carregar_asset_base64(str(imagem))
+        assert base64.b64decode(primeiro) == b"png-1"
+        assert renderizador.carregar_asset_base64(str(imagem)) is primeiro
+
+    def test_asset_alterado_e_relido(self, tmp_path):
+        imagem = tmp_path / "logo.png"
+        imagem.write_bytes(b"png-1")
+        renderizador = RenderizadorProposta(template_dir=tmp_path)
+        renderizador.carregar_asset_base64(str(imagem))
+
+        stat = imagem.stat()
+        imagem.write_bytes(b"png-22")
+        os.utime(imagem, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+        assert base64.b64decode(renderizador.carregar_asset_base64(str(imagem))) == b"png-22"
+
+    def test_asset_inexistente(self, tmp_path):
+        renderizador = RenderizadorProposta(template_dir=tmp_path)
+        assert renderizador.carregar_asset_base64(str(tmp_path / "nao_existe.png")) is None
+        assert renderizador.carregar_asset_base64("") is None
+
+    def test_template_compilado_uma_vez(self, template_dir):
+        renderizador = RenderizadorProposta(template_dir=template_dir)
+
+        html = renderizador.renderizar_html({"valor": 1234.5, "rascunho": False})
+        assert "1.234,50" in html
+        assert "RASCUNHO" not in html
+
+        template = renderizador.env.get_template(TEMPLATE_PROPOSTA)
+        assert "RASCUNHO" in renderizador.renderizar_html({"valor": 1, "rascunho": True})
+        assert renderizador.env.get_template(TEMPLATE_PROPOSTA) is template
+
+    def test_overlay_por_pagina_sob_o_conteudo(self, tmp_path, monkeypatch):
+        mescladas = []
+
+        class Pagina:
+            def __init__(self, nome):
+                self.nome = nome
+
+            def merge_page(self, outra, over=True):
+                mescladas.append((self.nome, outra.nome, over))
+
+        class PdfReader:
+            def __init__(self, dados):
+                self.pages = [Pagina("primeira"), Pagina("continuacao")]
+
+        class PdfWriter:
+            def __init__(self, clone_from):
+                self.pages = [Pagina(i) for i in range(3)]
+
+            def write(self, f):
+                f.write(b"%PDF")
+
+        monkeypatch.setitem(sys.modules, "pypdf", types.SimpleNamespace(PdfReader=PdfReader, PdfWriter=PdfWriter))
+        renderizador = RenderizadorProposta(template_dir=tmp_path)
+        monkeypatch.setattr(renderizador, "_overlay_rascunho", lambda: b"")
+
+        assert renderizador._gravar_rascunho_overlay(b"", tmp_path / "rascunho.pdf")
+        assert mescladas == [(0, "primeira", False), (1, "continuacao", False), (2, "continuacao", False)]
@@ -0,0 +1,137 @@
+"""
+Testes do servico de renderizacao em lote (sem WeasyPrint: funcao de teste)
+"""
+
+import json
+import os
+from datetime import date
+
+from hvac.generators.numeracao import AlocadorNumeros
+from hvac.generators.servico_render import (
+    ServicoRenderizacao,
+    TarefaRender,
+    formatar_resumo_render,
+    listar_precificados
+)
+
+
+def renderizar_teste(precificado, rascunho=False, numero_orcamento=None, revisao=None,
+                     output_path=None, configs=None, renderizador=None):
+    """Substitui gerar_proposta_pdf: grava um arquivo texto no lugar do PDF"""
+    if precificado.get("falhar"):
+        raise ValueError("falha de teste")
+    with open(output_path, "w", encoding="utf-8") as f:
+        f.write(f"{numero_orcamento}|{precificado['cliente']}")
+    return {"sucesso": True, "numero_orcamento": numero_orcamento, "arquivo_pdf": output_path}
+
+
+def tarefas(tmp_path, quantidade, **extra):
+    return [
+        TarefaRender(
+            precificado={"cliente": f"Cliente {i}"},
+            output_path=str(tmp_path / f"proposta_{i}.pdf"),
+            numero_orcamento=f"2026/{i:03d}",
+            identificador=f"doc{i}",
+            **extra
+        )
+        for i in range(quantidade)
+    ]
+
+
+def criar_servico(**kwargs):
+    return ServicoRenderizacao(configs={}, funcao=renderizar_teste, aquecer=False, **kwargs)
+
+
+class TestServicoRenderizacao:
+    """Testes para renderizacao em serie e em pool"""
+
+    def test_serie(self, tmp_path):
+        with criar_servico(workers=1) as servico:
+            resultados = list(servico.renderizar(tarefas(tmp_path, 3)))
+
+        assert [r["identificador"] for r in resultados] == ["doc0", "doc1", "doc2"]
+        assert all(r["sucesso"] and r["pid"] == os.getpid() for r in resultados)
+        assert (tmp_path / "proposta_1.pdf").read_text() == "2026/001|Cliente 1"
+
+        resumo = servico.resumo()
+        assert resumo["documentos"] == 3
+        assert resumo["falhas"] == 0
+        assert resumo["tempo_documento"]["max"] >= resumo["tempo_documento"]["p50"]
+        assert "Renderizacao em lote" in formatar_resumo_render(resumo)
+
+    def test_falha_isolada(self, tmp_path):
+        lista = tarefas(tmp_path, 2)
+        lista[0].precificado["falhar"] = True
+        with criar_servico(workers=1) as servico:
+            resultados = list(servico.renderizar(lista))
+
+        assert resultados[0]["sucesso"] is False
+        assert "ValueError" in resultados[0]["erro"]
+        assert resultados[1]["sucesso"] is True
+        assert servico.resumo()["falhas"] == 1
+
+    def test_precificado_por_caminho(self, tmp_path):
+        arquivo = tmp_path / "a" / "precificado.json"
+        arquivo.parent.mkdir()
+        arquivo.write_text(json.dumps({"cliente": "Arquivo"}))
+
+        assert listar_precificados(str(tmp_path)) == [arquivo]
+
+        tarefa = TarefaRender(
+            precificado=str(arquivo),
+            output_path=str(tmp_path / "saida.pdf"),
+            numero_orcamento="2026/010"
+        )
+        with criar_servico(workers=1) as servico:
+            resultado = next(servico.renderizar([tarefa]))
+
+        assert resultado["identificador"] == str(arquivo)
+        assert (tmp_path / "saida.pdf").read_text() == "2026/010|Arquivo"
+
+    def test_numero_reservado_no_processo_principal(self, tmp_path):
+        contador = tmp_path / "contador.json"
+        contador.write_text(json.dumps({"ano_corrente": date.today().year, "ultimo_sequencial": 7}))
+        lista = tarefas(tmp_path, 2)
+        for tarefa in lista:
+            tarefa.numero_orcamento = None
+
+        with criar_servico(workers=1, alocador=AlocadorNumeros(contador), bloco_numeros=5) as servico:
+            numeros = [r["numero_orcamento"] for r in servico.renderizar(lista)]
+            assert json.loads(contador.read_text())["ultimo_sequencial"] == 12
+
+        ano = date.today().year
+        assert numeros == [f"{ano}/008", f"{ano}/009"]
+        # Sobra do bloco devolvida ao encerrar
+        assert json.loads(contador.read_text())["ultimo_sequencial"] == 9
+
+    def test_back_pressure(self, tmp_path):
+        lidas = []
+
+        def gerador():
+            for tarefa in tarefas(tmp_path, 8):
+                lidas.append(tarefa.identificador)
+                yield tarefa
+
+        with criar_servico(workers=2, max_pendentes=2) as servico:
+            iterador = servico.renderizar(gerador())
+            next(iterador)
+            # Nao le a fila inteira antes de concluir o primeiro documento
+            assert len(lidas) <= 3
+            restantes = list(iterador)
+
+        assert len(restantes) == 7
+        assert len(lidas) == 8
+
+    def test_pool_recicla_workers(self, tmp_path):
+        with criar_servico(workers=2, documentos_por_worker=2) as servico:
+            resultados = list(servico.renderizar(tarefas(tmp_path, 6)))
+
+        assert sorted(r["identificador"] for r in resultados) == [f"doc{i}" for i in range(6)]
+        assert all(r["sucesso"] for r in resultados)
+        assert all(r["documento_no_worker"] <= 2 for r in resultados)
+
+        resumo = servico.resumo()
+        assert resumo["concluidos"] == 6
+        assert max(resumo["por_worker"].values()) <= 2
+        assert len(resumo["por_worker"]) >= 3
+        assert all((tmp_path / f"proposta_{i}.pdf").exists() for i in range(6))
@@ -0,0 +1,84 @@
+"""
+Testes da simulacao de Monte Carlo do custo
+"""
+
+import pytest
+
+pytest.importorskip("numpy")
+
+from hvac import simulacao
+from hvac.simulacao import Incertezas, normalizar_variacao, simular_custos
+from hvac.utils.catalogo import IndiceCatalogo
+
+
+@pytest.fixture
+def indice():
+    return IndiceCatalogo({
+        "materiais": {
+            "TUB_14": {"categoria": "Tubulacao", "preco": 10.0},
+            "FITA": {"categoria": "Acabamento", "preco": 5.0}
+        },
+        "mao_de_obra": {"MO_TEC": {"custo_hora": 50.0}},
+        "bdi": {"MAT": {"percentual": 0.5}, "MO": {"percentual": 1.0}}
+    })
+
+
+@pytest.fixture
+def composicao():
+    def linha(codigo, quantidade):
+        return {"codigo": codigo, "quantidade": quantidade}
+
+    return {"itens_orcamento": [
+        {"id": 1, "descricao": "Split", "materiais": [linha("TUB_14", 2), linha("FITA", 4)],
+         "mao_de_obra": [linha("MO_TEC", 1)]},
+        {"id": 2, "descricao": "Tubulacao", "materiais": [linha("TUB_14", 3)]},
+        {"id": 3, "descricao": "Sem insumos"}
+    ]}
+
+
+class TestSimulacao:
+    """Testes para percentis, margem em risco e blocos"""
+
+    def test_sem_incerteza(self, indice, composicao):
+        resultado = simular_custos(composicao, Incertezas(), tentativas=100, semente=1, indice=indice)
+
+        projeto = resultado["projeto"]
+        assert projeto["custo_base"] == 120.0
+        assert projeto["custo_p50"] == projeto["custo_p95"] == 120.0
+        # MAT 70 com BDI 50% + MO 50 com BDI 100%
+        assert projeto["preco"] == 205.0
+        assert projeto["margem_em_risco"] == 0.0
+        assert [item["id"] for item in resultado["itens"]] == [1, 2, 3]
+
+    def test_variacao_constante_por_regra(self, indice, composicao, monkeypatch):
+        # Bloco de um item por vez: o resultado nao depende do tamanho do bloco
+        monkeypatch.setattr(simulacao, "ELEMENTOS_POR_BLOCO", 1)
+        incertezas = Incertezas.de_dict({
+            "preco": {"MAT/Tubulacao": [0.1, 0.1]},
+            "quantidade": {"MAT:TUB_*": [1.0, 1.0], "MAT": [0.5, 0.5]}
+        })
+        resultado = simular_custos(composicao, incertezas, tentativas=10, semente=1, indice=indice)
+
+        split, tubulacao, _ = resultado["itens"]
+        # TUB_14: 20 * 1.1 * 2; FITA: 20 * 1.5; MO: 50
+        assert split["custo_p50"] == pytest.approx(44 + 30 + 50)
+        assert split["margem_em_risco"] == pytest.approx(124 - 90)
+        assert tubulacao["custo_p95"] == pytest.approx(30 * 1.1 * 2)
+        assert tubulacao["prob_prejuizo"] == 1.0
+
+    def test_semente_reproduzivel(self, indice, composicao):
+        incertezas = Incertezas.de_dict(simulacao.INCERTEZAS_PADRAO)
+        primeiro = simular_custos(composicao, incertezas, tentativas=500, semente=7, indice=indice)
+        segundo = simular_custos(composicao, incertezas, tentativas=500, semente=7, indice=indice)
+
+        assert primeiro == segundo
+        projeto = primeiro["projeto"]
+        assert projeto["custo_base"] <= projeto["custo_p50"] <= projeto["custo_p80"] <= projeto["custo_p95"]
+
+    def test_variacao_invalida(self):
+        assert normalizar_variacao("MO", [-0.1, 0.3]) == (-0.1, 0.0, 0.3)
+        assert normalizar_variacao("MO", [0.1, 0.3]) == (0.1, 0.1, 0.3)
+        with pytest.raises(ValueError):
+            normalizar_variacao("MO", [0.3, 0.1])
+        with pytest.raises(ValueError):
+            normalizar_variacao("MO", [-1.0, 0.1])
@@ -1,4 +1,6 @@
 """Utilitarios do pacote HVAC"""
 
-from .loader import carregar_bases
+from .loader import carregar_bases, invalidar_cache
+from .catalogo import IndiceCatalogo, ComposicaoCompilada
 from .metricas import Metricas, RastreadorMetricas, formatar_metricas
+from .perfil import Perfilador, span, formatar_perfil
@@ -0,0 +1,392 @@
+"""
+Cache de PDFs gerados, enderecado pelo conteudo das entradas
+
+Uma proposta cujo contexto (precificado, configs, imagens), templates/CSS e
+opcoes de saida nao mudaram produz o mesmo PDF. A chave de cache e o hash
+dessas entradas; em um acerto o PDF anterior e ligado (hardlink) ou copiado
+para o destino, sem novo layout.
+
+Estrutura em disco:
+
+    .cache/pdf/
+        objetos/ab/abcdef....pdf   # um arquivo por chave
+        objetos/ab/abcdef....uso   # marcador de uso (LRU)
+        estatisticas.json          # acertos, falhas, gravacoes, remocoes
+
+O tamanho total e limitado (limite_bytes): ao gravar, os objetos menos
+usados recentemente sao removidos. O uso fica no mtime de um marcador ao
+lado do objeto (abcdef....uso), nunca no proprio objeto. Com hardlink, o
+destino e o objeto sao o mesmo arquivo: quem regrava um destino deve
+remove-lo antes (preparar_destino), nunca sobrescreve-lo no lugar. Os contadores sao aproximados quando varios
+processos usam o mesmo cache.
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import threading
+from pathlib import Path
+from typing import Dict, Any, Iterable, List, Optional, Tuple
+
+from .loader import assinatura_arquivo
+from .perfil import span
+
+
+# Diretorio padrao (gerador_propostas/.cache/pdf); HVAC_CACHE_PDF sobrescreve
+DIR_CACHE_PADRAO = Path(__file__).resolve().parent.parent.parent / ".cache" / "pdf"
+
+# Limite padrao do cache (bytes)
+LIMITE_PADRAO = 512 * 1024 * 1024
+
+# Versao da chave (alterar invalida o cache inteiro)
+VERSAO_CHAVE = 1
+
+MODOS = ("hardlink", "copia")
+
+ARQUIVO_ESTATISTICAS = "estatisticas.json"
+CONTADORES = ("acertos", "falhas", "gravacoes", "remocoes")
+
+
+def hash_chave(*partes: Any) -> str:
+    """
+    Chave de cache a partir de estruturas JSON
+
+    Args:
+        *partes: Estruturas serializaveis (valores nao JSON viram str)
+
+    Returns:
+        Hash sha256 em hexadecimal
+    """
+    texto = json.dumps(
+        [VERSAO_CHAVE, *partes],
+        sort_keys=True,
+        ensure_ascii=False,
+        separators=(",", ":"),
+        default=str
+    )
+    return hashlib.sha256(texto.encode("utf-8")).hexdigest()
+
+
+# Hash de conteudo por arquivo: caminho -> (assinatura, hash)
+_hashes_arquivos: Dict[Path, Tuple[Tuple[int, int], str]] = {}
+_lock_hashes = threading.Lock()
+
+
+def hash_arquivos(caminhos: Iterable[Path]) -> str:
+    """
+    Hash do conteudo de varios arquivos (templates, CSS, codigo do layout)
+
+    O hash de cada arquivo e reaproveitado enquanto (mtime, tamanho) nao
+    mudar. Arquivos inexistentes entram como ausentes.
+
+    Args:
+        caminhos: Arquivos a considerar (a ordem e normalizada)
+
+    Returns:
+        Hash sha256 em hexadecimal
+    """
+    partes = []
+    for caminho in sorted(Path(c) for c in caminhos):
+        assinatura = assinatura_arquivo(caminho)
+        if assinatura is None:
+            partes.append([caminho.name, None])
+            continue
+
+        with _lock_hashes:
+            em_cache = _hashes_arquivos.get(caminho)
+        if em_cache is None or em_cache[0] != assinatura:
+            with open(caminho, "rb") as f:
+                em_cache = (assinatura, hashlib.sha256(f.read()).hexdigest())
+            with _lock_hashes:
+                _hashes_arquivos[caminho] = em_cache
+        partes.append([caminho.name, em_cache[1]])
+
+    return hash_chave(partes)
+
+
+def preparar_destino(destino: Path):
+    """
+    Remove o destino antes de regrava-lo
+
+    Um destino materializado por hardlink compartilha o arquivo com o
+    objeto do cache; sobrescreve-lo no lugar corromperia o objeto.
+    """
+    try:
+        os.unlink(destino)
+    except FileNotFoundError:
+        pass
+
+
+class CachePDF:
+    """Cache de artefatos PDF em disco com remocao LRU"""
+
+    def __init__(
+        self,
+        diretorio: Optional[Path] = None,
+        limite_bytes: int = LIMITE_PADRAO,
+        modo: str = "hardlink"
+    ):
+        """
+        Args:
+            diretorio: Diretorio do cache (padrao: HVAC_CACHE_PDF ou .cache/pdf)
+            limite_bytes: Tamanho maximo dos objetos
+            modo: "hardlink" (copia se o sistema nao suportar) ou "copia"
+        """
+        if modo not in MODOS:
+            raise ValueError(f"Modo invalido: {modo}. Use: {', '.join(MODOS)}")
+        if diretorio is None:
+            diretorio = os.environ.get("HVAC_CACHE_PDF") or DIR_CACHE_PADRAO
+        self.diretorio = Path(diretorio)
+        self.limite_bytes = limite_bytes
+        self.modo = modo
+
+    def caminho_objeto(self, chave: str) -> Path:
+        """Arquivo do objeto de uma chave"""
+        return self.diretorio / "objetos" / chave[:2] / f"{chave}.pdf"
+
+    def caminho_uso(self, chave: str) -> Path:
+        """Marcador de uso de uma chave (mtime = acesso mais recente)"""
+        return self.caminho_objeto(chave).with_suffix(".uso")
+
+    @staticmethod
+    def _marcar_uso(objeto: Path):
+        """
+        Registra o acesso ao objeto para a remocao LRU
+
+        O mtime do objeto nao e alterado: com hardlink ele e o mesmo
+        arquivo dos PDFs de saida.
+        """
+        try:
+            objeto.with_suffix(".uso").touch()
+        except OSError:
+            pass
+
+    def _materializar(self, origem: Path, destino: Path):
+        """Hardlink (ou copia) de origem para destino, substituindo o destino"""
+        destino.parent.mkdir(parents=True, exist_ok=True)
+        # Destino ja ligado ao objeto: rename() entre links do mesmo inode
+        # nao faz nada e deixaria o temporario para tras
+        try:
+            if os.path.samefile(origem, destino):
+                return
+        except FileNotFoundError:
+            if not origem.exists():
+                raise
+        tmp = destino.with_name(f".{destino.name}.{os.getpid()}.tmp")
+        preparar_destino(tmp)
+        if self.modo == "hardlink":
+            try:
+                os.link(origem, tmp)
+            except OSError:
+                shutil.copyfile(origem, tmp)
+        else:
+            shutil.copyfile(origem, tmp)
+        os.replace(tmp, destino)
+        preparar_destino(tmp)
+
+    def obter(self, chave: str, destino: Path) -> bool:
+        """
+        Materializa o PDF da chave no destino
+
+        Args:
+            chave: Chave de cache
+            destino: Arquivo de saida
+
+        Returns:
+            True em acerto, False se a chave nao esta no cache
+        """
+        objeto = self.caminho_objeto(chave)
+        with span("cache_pdf.obter"):
+            try:
+                self._materializar(objeto, Path(destino))
+            except FileNotFoundError:
+                self._contar("falhas")
+                return False
+            self._marcar_uso(objeto)
+        self._contar("acertos")
+        return True
+
+    def obter_todos(self, pares: List[Tuple[str, Path]]) -> bool:
+        """
+        Materializa varias chaves somente se todas estiverem no cache
+
+        Usado quando uma geracao produz mais de um arquivo (ex: PDF e
+        rascunho): um acerto parcial exigiria o mesmo layout.
+
+        Returns:
+            True se todos os destinos foram materializados
+        """
+        if not all(self.caminho_objeto(chave).is_file() for chave, _ in pares):
+            self._contar("falhas")
+            return False
+        for chave, destino in pares:
+            if not self.obter(chave, destino):
+                return False
+        return True
+
+    def guardar(self, chave: str, origem: Path):
+        """
+        Adiciona o PDF gerado ao cache e aplica o limite de tamanho
+
+        Args:
+            chave: Chave de cache
+            origem: PDF recem-gerado
+        """
+        objeto = self.caminho_objeto(chave)
+        with span("cache_pdf.guardar"):
+            self._materializar(Path(origem), objeto)
+            self._marcar_uso(objeto)
+            self._contar("gravacoes")
+            self.podar()
+
+    def _objetos(self) -> List[Tuple[float, int, Path]]:
+        """Objetos do cache como (ultimo uso, tamanho, caminho)"""
+        objetos = []
+        pasta = self.diretorio / "objetos"
+        if not pasta.is_dir():
+            return objetos
+        for caminho in pasta.glob("*/*.pdf"):
+            try:
+                stat = caminho.stat()
+            except OSError:
+                continue
+            # Sem marcador (objeto anterior ao marcador): usa o mtime do objeto
+            try:
+                uso = caminho.with_suffix(".uso").stat().st_mtime
+            except OSError:
+                uso = stat.st_mtime
+            objetos.append((uso, stat.st_size, caminho))
+        return objetos
+
+    def podar(self, limite_bytes: Optional[int] = None) -> int:
+        """
+        Remove os objetos menos usados ate caber no limite
+
+        Args:
+            limite_bytes: Limite a aplicar (padrao: o do cache)
+
+        Returns:
+            Quantidade de objetos removidos
+        """
+        limite = self.limite_bytes if limite_bytes is None else limite_bytes
+        objetos = self._objetos()
+        total = sum(tamanho for _, tamanho, _ in objetos)
+        removidos = 0
+
+        for _, tamanho, caminho in sorted(objetos, key=lambda o: o[0]):
+            if total <= limite:
+                break
+            preparar_destino(caminho)
+            preparar_destino(caminho.with_suffix(".uso"))
+            total -= tamanho
+            removidos += 1
+
+        if removidos:
+            self._contar("remocoes", removidos)
+        return removidos
+
+    def limpar(self) -> int:
+        """Remove todos os objetos e zera os contadores"""
+        removidos = self.podar(0)
+        preparar_destino(self.diretorio / ARQUIVO_ESTATISTICAS)
+        return removidos
+
+    def _ler_contadores(self) -> Dict[str, int]:
+        try:
+            with open(self.diretorio / ARQUIVO_ESTATISTICAS, 'r', encoding='utf-8') as f:
+                dados = json.load(f)
+        except (FileNotFoundError, ValueError):
+            dados = {}
+        return {nome: int(dados.get(nome, 0)) for nome in CONTADORES}
+
+    def _contar(self, nome: str, quantidade: int = 1):
+        """Incrementa um contador persistido (gravacao atomica)"""
+        contadores = self._ler_contadores()
+        contadores[nome] += quantidade
+        self.diretorio.mkdir(parents=True, exist_ok=True)
+        caminho = self.diretorio / ARQUIVO_ESTATISTICAS
+        tmp = caminho.with_name(f"{caminho.name}.{os.getpid()}.tmp")
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(contadores, f)
+        os.replace(tmp, caminho)
+
+    def estatisticas(self) -> Dict[str, Any]:
+        """
+        Estado do cache
+
+        Returns:
+            Dicionario com entradas, tamanho, limite, contadores e taxa de acerto
+        """
+        objetos = self._objetos()
+        contadores = self._ler_contadores()
+        consultas = contadores["acertos"] + contadores["falhas"]
+        return {
+            "diretorio": str(self.diretorio),
+            "entradas": len(objetos),
+            "tamanho_bytes": sum(tamanho for _, tamanho, _ in objetos),
+            "limite_bytes": self.limite_bytes,
+            **contadores,
+            "taxa_acerto": round(contadores["acertos"] / consultas, 4) if consultas else 0.0
+        }
+
+
+# Instancia padrao do processo (criada sob demanda)
+_cache_padrao: Optional[CachePDF] = None
+_lock_padrao = threading.Lock()
+
+
+def obter_cache_pdf() -> CachePDF:
+    """Cache de PDFs padrao do processo"""
+    global _cache_padrao
+    with _lock_padrao:
+        if _cache_padrao is None:
+            _cache_padrao = CachePDF()
+        return _cache_padrao
+
+
+def formatar_estatisticas(estatisticas: Dict[str, Any]) -> str:
+    """Formata as estatisticas do cache para exibicao"""
+    return "\n".join([
+        "",
+        "### Cache de PDF",
+        "",
+        f"Diretorio:   {estatisticas['diretorio']}",
+        f"Entradas:    {estatisticas['entradas']}",
+        f"Tamanho:     {estatisticas['tamanho_bytes'] / 1024 / 1024:.1f} MB "
+        f"de {estatisticas['limite_bytes'] / 1024 / 1024:.0f} MB",
+        f"Acertos:     {estatisticas['acertos']} ({estatisticas['taxa_acerto'] * 100:.1f}%)",
+        f"Falhas:      {estatisticas['falhas']}",
+        f"Gravacoes:   {estatisticas['gravacoes']}",
+        f"Remocoes:    {estatisticas['remocoes']}"
+    ])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Cache de PDFs gerados")
+    parser.add_argument("--dir", help="Diretorio do cache (padrao: HVAC_CACHE_PDF ou .cache/pdf)")
+    parser.add_argument(
+        "--limite-mb",
+        type=float,
+        default=LIMITE_PADRAO / 1024 / 1024,
+        help="Limite de tamanho em MB"
+    )
+    subparsers = parser.add_subparsers(dest="comando", required=True)
+    subparsers.add_parser("stats", help="Exibe estatisticas do cache")
+    subparsers.add_parser("podar", help="Remove objetos menos usados ate caber no limite")
+    subparsers.add_parser("limpar", help="Remove todos os objetos")
+
+    args = parser.parse_args()
+    cache = CachePDF(args.dir, limite_bytes=int(args.limite_mb * 1024 * 1024))
+
+    if args.comando == "stats":
+        print(formatar_estatisticas(cache.estatisticas()))
+    elif args.comando == "podar":
+        print(f"Objetos removidos: {cache.podar()}")
+    elif args.comando == "limpar":
+        print(f"Objetos removidos: {cache.limpar()}")
+
+
+if __name__ == "__main__":
+    main()
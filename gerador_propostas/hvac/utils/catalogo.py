@@ -0,0 +1,455 @@
+"""
+Indice compilado do catalogo de insumos
+
+Construido uma unica vez a partir de carregar_bases(). Cada insumo recebe um
+id inteiro e seus dados ficam em colunas planas (listas indexadas pelo id).
+As composicoes sao pre-compiladas em vetores de ids e quantidades, de modo
+que compositor e precificador nao percorrem dicionarios aninhados por item.
+
+Cada composicao tambem recebe um nucleo de expansao (NucleoExpansao): so
+os itens de tipo conhecido, com categoria, descricao e unidade ja
+resolvidas, e a descricao variavel ja interpretada. Expandir vira uma
+conta qtd_base + qtd_var * variavel por posicao. Codigos nao encontrados
+sao diagnosticados na compilacao (relatar_ausentes), nao a cada expansao.
+
+A situacao do preco de cada insumo (dias desde a atualizacao, status e o
+texto do alerta) tambem e uma coluna, calculada uma vez por dia de
+referencia (obter_alertas_preco), e nao a cada linha precificada.
+"""
+
+import sys
+import threading
+from dataclasses import dataclass
+from datetime import date, datetime
+from pathlib import Path
+from typing import Dict, Any, List, Optional, TextIO, Tuple
+
+from .loader import carregar_bases, get_bases_dir, MAPA_TIPO
+from .perfil import span
+
+
+# Ordem fixa dos tipos de insumo (a posicao e o codigo numerico do tipo)
+TIPOS = ("MAT", "MO", "FER", "EQP")
+CODIGO_TIPO = {tipo: idx for idx, tipo in enumerate(TIPOS)}
+
+# Campo de preco por tipo de insumo
+CAMPO_PRECO = {
+    "MAT": "preco",
+    "MO": "custo_hora",
+    "FER": "custo_hora",
+    "EQP": "comercial.preco"
+}
+
+# Dias para considerar preco desatualizado
+DIAS_ALERTA_PRECO = 90
+DIAS_CRITICO_PRECO = 180
+
+
+# Indices em cache por diretorio de bases (invalidados junto com as bases)
+_indices: Dict[Path, "IndiceCatalogo"] = {}
+_lock_indices = threading.Lock()
+
+# Indices de bases informadas pelo chamador, por id(bases) (ver de_bases)
+_indices_bases: Dict[int, "IndiceCatalogo"] = {}
+
+# Maximo de objetos bases distintos com indice mantido em memoria
+LIMITE_INDICES_BASES = 8
+
+
+def extrair_preco(tipo: str, item: Dict[str, Any]) -> float:
+    """
+    Extrai o preco/custo de um item da base conforme o tipo
+
+    Args:
+        tipo: Tipo do item (MAT, MO, FER, EQP)
+        item: Dados do item na base
+
+    Returns:
+        Preco do item (0.0 se ausente ou tipo desconhecido)
+    """
+    if tipo == "MAT":
+        return item.get("preco", 0.0)
+    elif tipo in ("MO", "FER"):
+        return item.get("custo_hora", 0.0)
+    elif tipo == "EQP":
+        return item.get("comercial", {}).get("preco", 0.0)
+    return 0.0
+
+
+def ler_data_atualizacao(data_str: Optional[str]) -> Optional[date]:
+    """Data de atualizacao em formato ISO (None se ausente ou invalida)"""
+    if not data_str:
+        return None
+    try:
+        return datetime.fromisoformat(data_str).date()
+    except ValueError:
+        return None
+
+
+def classificar_preco(dias: Optional[int]) -> Optional[str]:
+    """
+    Status do preco pelos dias desde a atualizacao
+
+    Args:
+        dias: Dias desde a atualizacao (None se sem data valida)
+
+    Returns:
+        None se OK, "alerta" ou "critico" se desatualizado
+    """
+    if dias is None or dias > DIAS_CRITICO_PRECO:
+        return "critico"
+    if dias > DIAS_ALERTA_PRECO:
+        return "alerta"
+    return None
+
+
+def texto_alerta_preco(status: str, tipo: str, codigo: str, data_str: Optional[str]) -> str:
+    """Texto do alerta de preco desatualizado"""
+    return f"Preco {status}: {codigo} ({tipo}) - atualizado em {data_str or 'N/A'}"
+
+
+def compilar_descricao(composicao: Dict[str, Any]) -> Tuple[str, Optional[Tuple[str, str, str, str]]]:
+    """
+    Interpreta a descricao de uma composicao uma unica vez
+
+    Returns:
+        Tupla (descricao_fixa, partes); partes e (prefixo, unidade_singular,
+        unidade_plural, sufixo) quando ha descricao_variavel, senao None
+    """
+    desc_var = composicao.get("descricao_variavel")
+    if not desc_var:
+        return composicao.get("descricao", ""), None
+    return "", (
+        desc_var.get("prefixo", ""),
+        desc_var.get("unidade_singular", ""),
+        desc_var.get("unidade_plural", ""),
+        desc_var.get("sufixo", "")
+    )
+
+
+def formatar_descricao(
+    fixa: str,
+    partes: Optional[Tuple[str, str, str, str]],
+    variavel: float
+) -> str:
+    """Descricao para um valor da variavel (ver compilar_descricao)"""
+    if partes is None:
+        return fixa
+
+    prefixo, singular, plural, sufixo = partes
+
+    # Escolhe singular ou plural
+    unidade = singular if variavel == 1 else plural
+
+    # Formata numero (inteiro se possivel)
+    if variavel == int(variavel):
+        var_str = str(int(variavel))
+    else:
+        var_str = f"{variavel:.1f}"
+
+    return f"{prefixo}{var_str} {unidade}{sufixo}".strip()
+
+
+@dataclass
+class NucleoExpansao:
+    """
+    Vetores prontos para expandir uma composicao
+
+    Contem apenas os itens de tipo conhecido, na ordem da composicao.
+    Itens ausentes do catalogo ja trazem a descricao "[NAO ENCONTRADO]" e
+    unidade UN.
+    """
+
+    categorias: List[int]
+    codigos: List[str]
+    qtd_base: List[float]
+    qtd_var: List[float]
+    descricoes: List[str]
+    unidades: List[str]
+
+    def quantidades(self, variavel: float, quantidade: float) -> List[float]:
+        """Quantidade total por posicao: (qtd_base + qtd_var * variavel) * quantidade"""
+        return [
+            (base + (var * variavel)) * quantidade
+            for base, var in zip(self.qtd_base, self.qtd_var)
+        ]
+
+
+@dataclass
+class ComposicaoCompilada:
+    """
+    Composicao pre-compilada em vetores paralelos
+
+    Cada posicao i descreve um item da composicao: tipo[i] e o codigo do tipo
+    (posicao em TIPOS, -1 se desconhecido), ids[i] o id do insumo no indice
+    (-1 se nao encontrado). As quantidades mantem os valores originais do
+    JSON (int ou float) para que a saida seja identica a do caminho por dict.
+    """
+
+    codigo: str
+    dados: Dict[str, Any]
+    tipos: List[int]
+    ids: List[int]
+    codigos: List[str]
+    qtd_base: List[float]
+    qtd_var: List[float]
+    nucleo: Optional[NucleoExpansao] = None
+    # (tipo, codigo) dos itens nao encontrados no catalogo
+    ausentes: Optional[List[Tuple[str, str]]] = None
+    descricao_fixa: str = ""
+    partes_descricao: Optional[Tuple[str, str, str, str]] = None
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def descricao(self, variavel: float) -> str:
+        """Descricao da composicao para um valor da variavel"""
+        return formatar_descricao(self.descricao_fixa, self.partes_descricao, variavel)
+
+
+class IndiceCatalogo:
+    """Indice do catalogo com ids inteiros e colunas planas por insumo"""
+
+    def __init__(self, bases: Dict[str, Dict[str, Any]]):
+        self.bases = bases
+
+        # Interning (tipo, codigo) -> id
+        self.ids: Dict[Tuple[str, str], int] = {}
+
+        # Colunas indexadas pelo id
+        self.tipos: List[int] = []
+        self.codigos: List[str] = []
+        self.descricoes: List[str] = []
+        self.categorias: List[str] = []
+        self.unidades: List[str] = []
+        self.precos: List[float] = []
+        self.campos_preco: List[str] = []
+        self.datas_atualizacao: List[Optional[str]] = []
+        self.datas: List[Optional[date]] = []
+
+        for tipo in TIPOS:
+            for codigo, item in bases.get(MAPA_TIPO[tipo], {}).items():
+                self._adicionar(tipo, codigo, item)
+
+        # Situacao dos precos, recalculada quando muda o dia de referencia
+        self.data_referencia: Optional[date] = None
+        self.dias_atualizacao: List[Optional[int]] = []
+        self.status_precos: List[Optional[str]] = []
+        self.alertas_preco: List[Optional[str]] = []
+        self.atualizar_status_precos()
+
+        # BDI por codigo de tipo
+        bdi = bases.get("bdi", {})
+        self.bdi: List[float] = [
+            bdi.get(tipo, {}).get("percentual", 0.0) for tipo in TIPOS
+        ]
+
+        self.composicoes: Dict[str, ComposicaoCompilada] = {
+            codigo: self._compilar(codigo, dados)
+            for codigo, dados in bases.get("composicoes", {}).items()
+        }
+
+    @classmethod
+    def carregar(
+        cls,
+        bases_dir: Optional[Path] = None,
+        usar_cache: bool = True
+    ) -> "IndiceCatalogo":
+        """
+        Carrega as bases e constroi o indice
+
+        Com usar_cache=True o indice e reaproveitado enquanto carregar_bases
+        devolver as mesmas bases (nenhum arquivo alterado em disco).
+        """
+        bases = carregar_bases(bases_dir, usar_cache)
+        if not usar_cache:
+            return cls(bases)
+
+        chave = Path(bases_dir if bases_dir is not None else get_bases_dir()).resolve()
+        with _lock_indices:
+            indice = _indices.get(chave)
+            if indice is None or indice.bases is not bases:
+                with span("compilar_indice"):
+                    indice = cls(bases)
+                indice.relatar_ausentes()
+                _indices[chave] = indice
+        return indice
+
+    @classmethod
+    def de_bases(cls, bases: Dict[str, Dict[str, Any]], relatar: bool = False) -> "IndiceCatalogo":
+        """
+        Indice de um dicionario de bases ja carregado, memoizado pelo objeto
+
+        Usado pelas funcoes que recebem bases sem indice: chamadas repetidas
+        com o mesmo objeto bases reaproveitam o indice (inclusive o de
+        carregar(), quando bases veio de carregar_bases). Alteracoes feitas
+        no proprio dicionario nao sao detectadas; nesse caso construa o
+        indice explicitamente.
+
+        Args:
+            bases: Bases carregadas
+            relatar: Exibe os itens ausentes quando o indice e compilado
+
+        Returns:
+            Indice do catalogo
+        """
+        with _lock_indices:
+            for indice in _indices.values():
+                if indice.bases is bases:
+                    return indice
+            indice = _indices_bases.get(id(bases))
+            if indice is not None and indice.bases is bases:
+                return indice
+
+            with span("compilar_indice"):
+                indice = cls(bases)
+            if len(_indices_bases) >= LIMITE_INDICES_BASES:
+                del _indices_bases[next(iter(_indices_bases))]
+            _indices_bases[id(bases)] = indice
+
+        if relatar:
+            indice.relatar_ausentes()
+        return indice
+
+    def __len__(self) -> int:
+        return len(self.codigos)
+
+    def _adicionar(self, tipo: str, codigo: str, item: Dict[str, Any]):
+        """Registra um insumo e preenche suas colunas"""
+        self.ids[(tipo, codigo)] = len(self.codigos)
+        self.tipos.append(CODIGO_TIPO[tipo])
+        self.codigos.append(codigo)
+        self.descricoes.append(item.get("descricao", ""))
+        self.categorias.append(item.get("categoria", ""))
+        self.unidades.append(item.get("unidade", "UN"))
+        self.precos.append(extrair_preco(tipo, item))
+        self.campos_preco.append(CAMPO_PRECO[tipo])
+        self.datas_atualizacao.append(item.get("data_atualizacao"))
+        self.datas.append(ler_data_atualizacao(item.get("data_atualizacao")))
+
+    def atualizar_status_precos(self, hoje: Optional[date] = None):
+        """
+        Recalcula dias, status e alerta de preco de todos os insumos
+
+        Args:
+            hoje: Dia de referencia (padrao: hoje)
+        """
+        hoje = hoje or date.today()
+        dias = [None if data is None else (hoje - data).days for data in self.datas]
+        status = [classificar_preco(d) for d in dias]
+        alertas = [
+            None if situacao is None else texto_alerta_preco(
+                situacao, TIPOS[self.tipos[item_id]], self.codigos[item_id], self.datas_atualizacao[item_id]
+            )
+            for item_id, situacao in enumerate(status)
+        ]
+        # Colunas trocadas juntas para leitores em outras threads
+        self.dias_atualizacao, self.status_precos, self.alertas_preco = dias, status, alertas
+        self.data_referencia = hoje
+
+    def obter_alertas_preco(self, hoje: Optional[date] = None) -> List[Optional[str]]:
+        """
+        Alerta de preco por id (None se o preco esta em dia)
+
+        Recalcula a coluna so quando o dia de referencia muda. Chame uma vez
+        por execucao, nao por linha.
+        """
+        hoje = hoje or date.today()
+        if hoje != self.data_referencia:
+            self.atualizar_status_precos(hoje)
+        return self.alertas_preco
+
+    def _compilar(self, codigo: str, dados: Dict[str, Any]) -> ComposicaoCompilada:
+        """Compila uma composicao em vetores de ids e quantidades e no nucleo de expansao"""
+        itens = dados.get("itens", [])
+        composicao = ComposicaoCompilada(
+            codigo=codigo,
+            dados=dados,
+            tipos=[CODIGO_TIPO.get(item.get("tipo"), -1) for item in itens],
+            ids=[self.obter_id(item.get("tipo"), item.get("codigo")) for item in itens],
+            codigos=[item.get("codigo") for item in itens],
+            qtd_base=[item.get("qtd_base", 0) for item in itens],
+            qtd_var=[item.get("qtd_var", 0) for item in itens]
+        )
+        composicao.descricao_fixa, composicao.partes_descricao = compilar_descricao(dados)
+
+        nucleo = NucleoExpansao([], [], [], [], [], [])
+        ausentes = []
+        for posicao, item in enumerate(itens):
+            item_id = composicao.ids[posicao]
+            codigo_item = composicao.codigos[posicao]
+            if item_id < 0:
+                ausentes.append((item.get("tipo"), codigo_item))
+
+            # Tipo desconhecido nao pertence a nenhuma categoria
+            if composicao.tipos[posicao] < 0:
+                continue
+
+            nucleo.categorias.append(composicao.tipos[posicao])
+            nucleo.codigos.append(codigo_item)
+            nucleo.qtd_base.append(composicao.qtd_base[posicao])
+            nucleo.qtd_var.append(composicao.qtd_var[posicao])
+            if item_id < 0:
+                nucleo.descricoes.append(f"[NAO ENCONTRADO] {codigo_item}")
+                nucleo.unidades.append("UN")
+            else:
+                nucleo.descricoes.append(self.descricoes[item_id])
+                nucleo.unidades.append(self.unidades[item_id])
+
+        composicao.nucleo = nucleo
+        composicao.ausentes = ausentes
+        return composicao
+
+    def ausentes(self) -> Dict[str, List[Tuple[str, str]]]:
+        """Itens nao encontrados no catalogo, por composicao"""
+        return {
+            codigo: composicao.ausentes
+            for codigo, composicao in self.composicoes.items()
+            if composicao.ausentes
+        }
+
+    def relatar_ausentes(self, arquivo: Optional[TextIO] = None) -> int:
+        """
+        Exibe um aviso por item de composicao nao encontrado no catalogo
+
+        Args:
+            arquivo: Destino (padrao: stderr)
+
+        Returns:
+            Quantidade de avisos
+        """
+        arquivo = arquivo or sys.stderr
+        total = 0
+        for codigo, itens in sorted(self.ausentes().items()):
+            for tipo, codigo_item in itens:
+                print(f"Aviso: Item {codigo_item} ({tipo}) da composicao {codigo} nao encontrado na base",
+                      file=arquivo)
+                total += 1
+        return total
+
+    def obter_id(self, tipo: str, codigo: str) -> int:
+        """Retorna o id do insumo ou -1 se nao encontrado"""
+        return self.ids.get((tipo, codigo), -1)
+
+    def obter_composicao(self, codigo: str) -> Optional[ComposicaoCompilada]:
+        """Retorna a composicao compilada ou None se nao encontrada"""
+        return self.composicoes.get(codigo)
+
+    def obter_preco(self, tipo: str, codigo: str) -> Tuple[float, Optional[str]]:
+        """
+        Obtem preco e data de atualizacao de um insumo
+
+        Returns:
+            Tupla (preco, data_atualizacao); (0.0, None) se nao encontrado
+        """
+        item_id = self.ids.get((tipo, codigo), -1)
+        if item_id < 0:
+            return 0.0, None
+        return self.precos[item_id], self.datas_atualizacao[item_id]
+
+    def obter_bdi(self, tipo: str) -> float:
+        """Percentual de BDI do tipo de insumo (0.0 se desconhecido)"""
+        codigo_tipo = CODIGO_TIPO.get(tipo)
+        if codigo_tipo is None:
+            return 0.0
+        return self.bdi[codigo_tipo]
@@ -1,10 +1,47 @@
 """
 Carregador de bases de dados JSON
+
+As bases sao mantidas em cache no processo, chaveadas por (caminho, mtime,
+tamanho): chamadas repetidas devolvem os mesmos dicionarios sem reler os
+arquivos, e apenas arquivos alterados em disco sao reprocessados. Os
+dicionarios retornados sao compartilhados e devem ser tratados como somente
+leitura (use copy.deepcopy para alterar).
 """
 
 import json
+import threading
 from pathlib import Path
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Optional, Tuple
+
+from .perfil import span
+
+
+# Base correspondente a cada tipo de insumo
+MAPA_TIPO = {
+    "MAT": "materiais",
+    "MO": "mao_de_obra",
+    "FER": "ferramentas",
+    "EQP": "equipamentos"
+}
+
+
+# Arquivos que compoem as bases
+ARQUIVOS_BASES = (
+    "materiais.json",
+    "mao_de_obra.json",
+    "ferramentas.json",
+    "equipamentos.json",
+    "composicoes.json",
+    "bdi.json"
+)
+
+# Cache de arquivos: caminho -> (assinatura, conteudo)
+_cache_json: Dict[Path, Tuple[Tuple[int, int], Dict[str, Any]]] = {}
+
+# Cache de bases: diretorio -> (assinatura das bases, bases)
+_cache_bases: Dict[Path, Tuple[Tuple, Dict[str, Dict[str, Any]]]] = {}
+
+_lock_cache = threading.Lock()
 
 
 def get_bases_dir() -> Path:
@@ -16,13 +53,62 @@ def get_bases_dir() -> Path:
     return projeto_dir / "bases"
 
 
-def carregar_json(nome_arquivo: str, bases_dir: Optional[Path] = None) -> Dict[str, Any]:
+def assinatura_arquivo(caminho: Path) -> Optional[Tuple[int, int]]:
+    """
+    Retorna a assinatura (mtime_ns, tamanho) de um arquivo
+
+    Returns:
+        Tupla (mtime_ns, tamanho) ou None se o arquivo nao existir
+    """
+    try:
+        stat = caminho.stat()
+    except FileNotFoundError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+def assinatura_bases(bases_dir: Optional[Path] = None) -> Tuple:
+    """
+    Retorna a assinatura conjunta dos arquivos das bases
+
+    Muda sempre que algum arquivo e criado, removido ou alterado.
+    """
+    if bases_dir is None:
+        bases_dir = get_bases_dir()
+    return tuple(assinatura_arquivo(Path(bases_dir) / arquivo) for arquivo in ARQUIVOS_BASES)
+
+
+def invalidar_cache(bases_dir: Optional[Path] = None):
+    """
+    Descarta as bases em cache, forcando releitura na proxima carga
+
+    Args:
+        bases_dir: Invalida apenas este diretorio (todos se nao informado)
+    """
+    with _lock_cache:
+        if bases_dir is None:
+            _cache_json.clear()
+            _cache_bases.clear()
+            return
+
+        bases_dir = Path(bases_dir).resolve()
+        _cache_bases.pop(bases_dir, None)
+        for caminho in [c for c in _cache_json if c.parent == bases_dir]:
+            del _cache_json[caminho]
+
+
+def carregar_json(
+    nome_arquivo: str,
+    bases_dir: Optional[Path] = None,
+    usar_cache: bool = True
+) -> Dict[str, Any]:
     """
     Carrega um arquivo JSON das bases
 
     Args:
         nome_arquivo: Nome do arquivo (ex: 'materiais.json')
         bases_dir: Diretorio das bases (opcional, usa padrao se nao informado)
+        usar_cache: Reaproveita o conteudo ja lido se o arquivo nao mudou
 
     Returns:
         Dicionario com o conteudo do JSON
@@ -30,19 +116,43 @@ def carregar_json(nome_arquivo: str, bases_dir: Optional[Path] = None) -> Dict[s
     if bases_dir is None:
         bases_dir = get_bases_dir()
 
-    caminho = bases_dir / nome_arquivo
+    caminho = (Path(bases_dir) / nome_arquivo).resolve()
 
-    if not caminho.exists():
+    assinatura = assinatura_arquivo(caminho)
+    if assinatura is None:
         raise FileNotFoundError(f"Base nao encontrada: {caminho}")
 
-    with open(caminho, "r", encoding="utf-8") as f:
-        return json.load(f)
+    if usar_cache:
+        with _lock_cache:
+            em_cache = _cache_json.get(caminho)
+        if em_cache and em_cache[0] == assinatura:
+            return em_cache[1]
+
+    with span("ler_json", arquivo=nome_arquivo):
+        with open(caminho, "r", encoding="utf-8") as f:
+            dados = json.load(f)
 
+    if usar_cache:
+        with _lock_cache:
+            _cache_json[caminho] = (assinatura, dados)
 
-def carregar_bases(bases_dir: Optional[Path] = None) -> Dict[str, Dict[str, Any]]:
+    return dados
+
+
+def carregar_bases(
+    bases_dir: Optional[Path] = None,
+    usar_cache: bool = True
+) -> Dict[str, Dict[str, Any]]:
     """
     Carrega todas as bases de dados necessarias
 
+    Com usar_cache=True, devolve as mesmas bases ja carregadas enquanto
+    nenhum arquivo mudar (mtime/tamanho); se algum mudar, so ele e relido.
+
+    Args:
+        bases_dir: Diretorio das bases (opcional, usa padrao se nao informado)
+        usar_cache: Usa o cache do processo (False forca releitura completa)
+
     Returns:
         Dicionario com todas as bases carregadas:
         {
@@ -54,20 +164,20 @@ def carregar_bases(bases_dir: Optional[Path] = None) -> Dict[str, Dict[str, Any]
             'bdi': {...}
         }
     """
-    arquivos = [
-        "materiais.json",
-        "mao_de_obra.json",
-        "ferramentas.json",
-        "equipamentos.json",
-        "composicoes.json",
-        "bdi.json"
-    ]
+    bases_dir = Path(bases_dir if bases_dir is not None else get_bases_dir()).resolve()
+
+    if usar_cache:
+        assinatura = assinatura_bases(bases_dir)
+        with _lock_cache:
+            em_cache = _cache_bases.get(bases_dir)
+        if em_cache and em_cache[0] == assinatura:
+            return em_cache[1]
 
     bases = {}
-    for arquivo in arquivos:
+    for arquivo in ARQUIVOS_BASES:
         nome = arquivo.replace(".json", "")
         try:
-            dados = carregar_json(arquivo, bases_dir)
+            dados = carregar_json(arquivo, bases_dir, usar_cache)
             # Remove o wrapper (ex: {"materiais": {...}} -> {...})
             if nome in dados:
                 bases[nome] = dados[nome]
@@ -79,6 +189,10 @@ def carregar_bases(bases_dir: Optional[Path] = None) -> Dict[str, Dict[str, Any]
             print(f"Aviso: Base {arquivo} nao encontrada")
             bases[nome] = {}
 
+    if usar_cache:
+        with _lock_cache:
+            _cache_bases[bases_dir] = (assinatura, bases)
+
     return bases
 
 
@@ -94,14 +208,7 @@ def obter_item(bases: Dict, tipo: str, codigo: str) -> Optional[Dict[str, Any]]:
     Returns:
         Dicionario com os dados do item ou None se nao encontrado
     """
-    mapa_tipo = {
-        "MAT": "materiais",
-        "MO": "mao_de_obra",
-        "FER": "ferramentas",
-        "EQP": "equipamentos"
-    }
-
-    nome_base = mapa_tipo.get(tipo)
+    nome_base = MAPA_TIPO.get(tipo)
     if not nome_base:
         return None
 
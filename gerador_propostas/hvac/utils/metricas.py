@@ -3,10 +3,11 @@ Sistema de metricas para rastreamento de consumo
 """
 
 import json
+import math
 import time
 from datetime import datetime
 from pathlib import Path
-from typing import Dict, Any, Optional
+from typing import Dict, Any, List, Optional
 from dataclasses import dataclass, field, asdict
 
 
@@ -46,6 +47,9 @@ class Metricas:
     # Valores
     valor_total: float = 0.0
 
+    # Perfil por etapa (utils.perfil; vazio se nao solicitado)
+    perfil: Dict[str, Any] = field(default_factory=dict)
+
     def to_dict(self) -> Dict[str, Any]:
         return asdict(self)
 
@@ -71,18 +75,18 @@ class RastreadorMetricas:
             inicio=datetime.now().isoformat()
         )
         self._inicio_etapa: Optional[float] = None
-        self._inicio_total: float = time.time()
+        self._inicio_total: float = time.perf_counter()
 
     def iniciar_etapa(self):
         """Marca inicio de uma etapa"""
-        self._inicio_etapa = time.time()
+        self._inicio_etapa = time.perf_counter()
 
     def finalizar_etapa(self, nome_etapa: str):
         """Finaliza etapa e registra tempo"""
         if self._inicio_etapa is None:
             return
 
-        duracao = time.time() - self._inicio_etapa
+        duracao = time.perf_counter() - self._inicio_etapa
 
         if nome_etapa == "compositor":
             self.metricas.tempo_compositor = round(duracao, 3)
@@ -94,12 +98,17 @@ class RastreadorMetricas:
         self._inicio_etapa = None
 
     def registrar_arquivo(self, nome: str, path: Path):
-        """Registra metricas de um arquivo"""
+        """Registra metricas de um arquivo (le o conteudo do disco)"""
         if not path.exists():
             return
 
         tamanho = path.stat().st_size
 
+        # PDF nao tem tokens; evita ler o binario
+        if nome == "pdf":
+            self._registrar_tamanho(nome, tamanho, 0)
+            return
+
         # Ler conteudo para contar caracteres
         try:
             with open(path, 'r', encoding='utf-8') as f:
@@ -109,6 +118,24 @@ class RastreadorMetricas:
         except:
             tokens_estimados = int(tamanho / 4)
 
+        self._registrar_tamanho(nome, tamanho, tokens_estimados)
+
+    def registrar_conteudo(self, nome: str, conteudo: str, tamanho: Optional[int] = None):
+        """
+        Registra metricas a partir do conteudo serializado em memoria
+
+        Args:
+            nome: Artefato (escopo, composicao, precificado)
+            conteudo: Texto serializado (o mesmo gravado em disco)
+            tamanho: Tamanho em bytes (calculado em UTF-8 se nao informado)
+        """
+        if tamanho is None:
+            tamanho = len(conteudo.encode('utf-8'))
+        tokens_estimados = int(len(conteudo) / 3.5)  # ~3.5 chars por token em PT
+        self._registrar_tamanho(nome, tamanho, tokens_estimados)
+
+    def _registrar_tamanho(self, nome: str, tamanho: int, tokens_estimados: int):
+        """Atribui tamanho e tokens ao artefato correspondente"""
         if nome == "escopo":
             self.metricas.tamanho_escopo = tamanho
             self.metricas.tokens_escopo = tokens_estimados
@@ -137,7 +164,7 @@ class RastreadorMetricas:
     def finalizar(self) -> Metricas:
         """Finaliza rastreamento e retorna metricas"""
         self.metricas.fim = datetime.now().isoformat()
-        self.metricas.tempo_total = round(time.time() - self._inicio_total, 3)
+        self.metricas.tempo_total = round(time.perf_counter() - self._inicio_total, 3)
         self.metricas.tokens_total_dados = (
             self.metricas.tokens_escopo +
             self.metricas.tokens_composicao +
@@ -176,3 +203,99 @@ def formatar_metricas(metricas: Metricas) -> str:
 ### Resultado
 - **Valor Total:** R$ {metricas.valor_total:,.2f}
 """
+
+
+# Etapas consolidadas no resumo do modo lote
+ETAPAS_LOTE = ("compositor", "precificador", "pdf", "total")
+
+# Etapas opcionais: omitidas do resumo quando nao executadas em nenhum escopo
+ETAPAS_OPCIONAIS = ("pdf",)
+
+
+def percentil(valores: List[float], p: float) -> float:
+    """
+    Calcula o percentil p (0-100) pelo metodo nearest-rank
+
+    Args:
+        valores: Amostras
+        p: Percentil desejado (ex: 95)
+
+    Returns:
+        Valor do percentil (0.0 se nao houver amostras)
+    """
+    if not valores:
+        return 0.0
+    ordenados = sorted(valores)
+    posicao = min(len(ordenados), max(1, math.ceil(p / 100 * len(ordenados))))
+    return ordenados[posicao - 1]
+
+
+def resumir_lote(
+    lista_metricas: List[Dict[str, Any]],
+    duracao_total: float,
+    falhas: int = 0
+) -> Dict[str, Any]:
+    """
+    Consolida as metricas de varios orcamentos processados em lote
+
+    Args:
+        lista_metricas: Metricas (to_dict) de cada orcamento concluido
+        duracao_total: Tempo de parede do lote (segundos)
+        falhas: Quantidade de escopos que falharam
+
+    Returns:
+        Dicionario com p50/p95/media por etapa, vazao e totais (etapas
+        opcionais que nao rodaram, como pdf sem --pdf, ficam de fora)
+    """
+    etapas = {}
+    for etapa in ETAPAS_LOTE:
+        tempos = [m.get(f"tempo_{etapa}", 0.0) for m in lista_metricas]
+        if etapa in ETAPAS_OPCIONAIS and not any(tempos):
+            continue
+        etapas[etapa] = {
+            "p50": round(percentil(tempos, 50), 3),
+            "p95": round(percentil(tempos, 95), 3),
+            "media": round(sum(tempos) / len(tempos), 3) if tempos else 0.0,
+            "soma": round(sum(tempos), 3)
+        }
+
+    concluidos = len(lista_metricas)
+
+    return {
+        "escopos": concluidos + falhas,
+        "concluidos": concluidos,
+        "falhas": falhas,
+        "duracao_total": round(duracao_total, 3),
+        "vazao_por_segundo": round(concluidos / duracao_total, 2) if duracao_total > 0 else 0.0,
+        "itens": sum(m.get("qtd_itens", 0) for m in lista_metricas),
+        "valor_total": round(sum(m.get("valor_total", 0.0) for m in lista_metricas), 2),
+        "etapas": etapas
+    }
+
+
+def formatar_resumo_lote(resumo: Dict[str, Any]) -> str:
+    """Formata o resumo do lote para exibicao"""
+    linhas = [
+        "",
+        "## Resumo do Lote",
+        "",
+        "### Tempos por Etapa",
+        "| Etapa | p50 | p95 | Media | Soma |",
+        "|-------|----:|----:|------:|-----:|"
+    ]
+    for etapa, tempos in resumo["etapas"].items():
+        linhas.append(
+            f"| {etapa.capitalize()} | {tempos['p50']:.3f}s | {tempos['p95']:.3f}s "
+            f"| {tempos['media']:.3f}s | {tempos['soma']:.3f}s |"
+        )
+
+    linhas += [
+        "",
+        "### Vazao",
+        f"- Escopos: {resumo['concluidos']}/{resumo['escopos']} ({resumo['falhas']} falha(s))",
+        f"- Duracao: {resumo['duracao_total']:.3f}s",
+        f"- Vazao: {resumo['vazao_por_segundo']:.2f} escopos/s",
+        f"- Itens: {resumo['itens']}",
+        f"- **Valor Total:** R$ {resumo['valor_total']:,.2f}"
+    ]
+    return "\n".join(linhas) + "\n"
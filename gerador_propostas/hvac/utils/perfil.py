@@ -0,0 +1,249 @@
+"""
+Perfilador hierarquico de etapas (spans) do pipeline
+
+Cada span mede tempo com perf_counter_ns e pode conter sub-spans. O
+perfilador ativo fica em uma ContextVar: o codigo instrumentado chama
+span("nome") sem receber o perfilador por parametro e, sem perfilador
+ativo, o custo e apenas o de devolver um contexto nulo.
+
+    perfilador = Perfilador(rastrear_memoria=True)
+    with perfilador.ativar():
+        with span("compositor"):
+            for item in itens:
+                with span("expandir_item"):
+                    ...
+    perfilador.exportar_chrome_trace("perfil_trace.json")  # chrome://tracing
+    tabela = perfilador.agregar()                           # metricas.json
+
+A agregacao e feita por caminho (ex: "compositor/expandir_item") com
+chamadas, tempo total/proprio/medio/maximo e, com rastrear_memoria,
+a variacao de memoria alocada (tracemalloc).
+"""
+
+import json
+import os
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager, nullcontext
+from contextvars import ContextVar
+from pathlib import Path
+from typing import Dict, Any, Iterator, List, Optional
+
+
+# Perfilador ativo no contexto atual
+_ativo: ContextVar[Optional["Perfilador"]] = ContextVar("perfilador_ativo", default=None)
+
+# Contexto devolvido quando nao ha perfilador ativo
+_NULO = nullcontext()
+
+# Limite de eventos individuais guardados para o trace (a agregacao nao tem limite)
+MAX_EVENTOS = 200_000
+
+
+class _Span:
+    """Contexto de um span; registra a duracao ao sair"""
+
+    __slots__ = ("perfilador", "nome", "args", "caminho", "inicio", "memoria", "filhos_ns")
+
+    def __init__(self, perfilador: "Perfilador", nome: str, args: Dict[str, Any]):
+        self.perfilador = perfilador
+        self.nome = nome
+        self.args = args
+        self.filhos_ns = 0
+
+    def __enter__(self):
+        pilha = self.perfilador._pilha()
+        self.caminho = f"{pilha[-1].caminho}/{self.nome}" if pilha else self.nome
+        # Reserva a linha na entrada: a tabela fica na ordem de inicio
+        self.perfilador._agregado.setdefault(self.caminho, [0, 0, 0, 0, 0])
+        pilha.append(self)
+        self.memoria = tracemalloc.get_traced_memory()[0] if self.perfilador.rastrear_memoria else 0
+        self.inicio = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, *exc):
+        fim = time.perf_counter_ns()
+        perfilador = self.perfilador
+        memoria = (
+            tracemalloc.get_traced_memory()[0] - self.memoria
+            if perfilador.rastrear_memoria else 0
+        )
+        pilha = perfilador._pilha()
+        pilha.pop()
+        duracao = fim - self.inicio
+        if pilha:
+            pilha[-1].filhos_ns += duracao
+        perfilador._registrar(self, duracao, memoria)
+        return False
+
+
+class Perfilador:
+    """Coleta spans aninhados e os agrega por caminho"""
+
+    def __init__(self, rastrear_memoria: bool = False, max_eventos: int = MAX_EVENTOS):
+        self.rastrear_memoria = rastrear_memoria
+        self.max_eventos = max_eventos
+
+        self.eventos: List[Dict[str, Any]] = []
+        self.eventos_descartados = 0
+        self.contadores: Dict[str, int] = {}
+
+        # caminho -> [chamadas, total_ns, proprio_ns, max_ns, memoria]
+        self._agregado: Dict[str, List[int]] = {}
+        self._origem_ns = time.perf_counter_ns()
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._iniciou_tracemalloc = False
+
+    def _pilha(self) -> List[_Span]:
+        pilha = getattr(self._local, "pilha", None)
+        if pilha is None:
+            pilha = self._local.pilha = []
+        return pilha
+
+    def span(self, nome: str, **args) -> _Span:
+        """Cria um span filho do span corrente (use com 'with')"""
+        return _Span(self, nome, args)
+
+    def contar(self, nome: str, quantidade: int = 1):
+        """Incrementa um contador (ex: itens expandidos)"""
+        with self._lock:
+            self.contadores[nome] = self.contadores.get(nome, 0) + quantidade
+
+    def _registrar(self, span: _Span, duracao: int, memoria: int):
+        with self._lock:
+            agregado = self._agregado[span.caminho]
+            agregado[0] += 1
+            agregado[1] += duracao
+            agregado[2] += duracao - span.filhos_ns
+            if duracao > agregado[3]:
+                agregado[3] = duracao
+            agregado[4] += memoria
+
+            if len(self.eventos) >= self.max_eventos:
+                self.eventos_descartados += 1
+                return
+            evento = {
+                "name": span.nome,
+                "ph": "X",
+                "ts": (span.inicio - self._origem_ns) / 1000,
+                "dur": duracao / 1000,
+                "pid": os.getpid(),
+                "tid": threading.get_ident()
+            }
+            if span.args or self.rastrear_memoria:
+                evento["args"] = dict(span.args)
+                if self.rastrear_memoria:
+                    evento["args"]["memoria_bytes"] = memoria
+            self.eventos.append(evento)
+
+    @contextmanager
+    def ativar(self) -> Iterator["Perfilador"]:
+        """Torna este o perfilador ativo (e inicia tracemalloc se pedido)"""
+        if self.rastrear_memoria and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._iniciou_tracemalloc = True
+        token = _ativo.set(self)
+        try:
+            yield self
+        finally:
+            _ativo.reset(token)
+            if self._iniciou_tracemalloc:
+                tracemalloc.stop()
+                self._iniciou_tracemalloc = False
+
+    def agregar(self) -> List[Dict[str, Any]]:
+        """
+        Tabela agregada por caminho, na ordem do primeiro inicio
+
+        Returns:
+            Lista de {caminho, chamadas, total_ms, proprio_ms, media_ms, max_ms[, memoria_kb]}
+        """
+        tabela = []
+        with self._lock:
+            for caminho, (chamadas, total, proprio, maximo, memoria) in self._agregado.items():
+                if not chamadas:
+                    continue
+                linha = {
+                    "caminho": caminho,
+                    "chamadas": chamadas,
+                    "total_ms": round(total / 1e6, 3),
+                    "proprio_ms": round(proprio / 1e6, 3),
+                    "media_ms": round(total / chamadas / 1e6, 4),
+                    "max_ms": round(maximo / 1e6, 3)
+                }
+                if self.rastrear_memoria:
+                    linha["memoria_kb"] = round(memoria / 1024, 1)
+                tabela.append(linha)
+        return tabela
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Resumo serializavel (tabela agregada e contadores)"""
+        return {
+            "spans": self.agregar(),
+            "contadores": dict(self.contadores),
+            "eventos_descartados": self.eventos_descartados
+        }
+
+    def exportar_chrome_trace(self, path: Path):
+        """
+        Grava os spans no formato Chrome Trace Event (chrome://tracing, Perfetto)
+
+        Args:
+            path: Arquivo JSON de saida
+        """
+        with self._lock:
+            dados = {
+                "traceEvents": list(self.eventos),
+                "displayTimeUnit": "ms",
+                "otherData": {"contadores": dict(self.contadores)}
+            }
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(dados, f, ensure_ascii=False)
+
+
+def perfilador_ativo() -> Optional[Perfilador]:
+    """Retorna o perfilador ativo ou None"""
+    return _ativo.get()
+
+
+def span(nome: str, **args):
+    """
+    Span no perfilador ativo (contexto nulo se nenhum estiver ativo)
+
+    Args:
+        nome: Nome do span
+        **args: Atributos exportados no trace (ex: arquivo, item)
+    """
+    perfilador = _ativo.get()
+    if perfilador is None:
+        return _NULO
+    return _Span(perfilador, nome, args)
+
+
+def contar(nome: str, quantidade: int = 1):
+    """Incrementa um contador no perfilador ativo (sem efeito se nenhum)"""
+    perfilador = _ativo.get()
+    if perfilador is not None:
+        perfilador.contar(nome, quantidade)
+
+
+def formatar_perfil(tabela: List[Dict[str, Any]]) -> str:
+    """Formata a tabela agregada para exibicao"""
+    com_memoria = any("memoria_kb" in linha for linha in tabela)
+    cabecalho = f"{'Span':<48} {'Chamadas':>9} {'Total ms':>10} {'Proprio ms':>11} {'Max ms':>9}"
+    if com_memoria:
+        cabecalho += f" {'Mem KB':>10}"
+    linhas = ["", "### Perfil por etapa", "", cabecalho, "-" * len(cabecalho)]
+    for linha in tabela:
+        nivel = linha["caminho"].count("/")
+        nome = "  " * nivel + linha["caminho"].rsplit("/", 1)[-1]
+        texto = (
+            f"{nome:<48} {linha['chamadas']:>9} {linha['total_ms']:>10.3f} "
+            f"{linha['proprio_ms']:>11.3f} {linha['max_ms']:>9.3f}"
+        )
+        if com_memoria:
+            texto += f" {linha.get('memoria_kb', 0.0):>10.1f}"
+        linhas.append(texto)
+    return "\n".join(linhas)
@@ -8,24 +8,52 @@ from __future__ import annotations
 import json
 from pathlib import Path
 from datetime import date
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Tuple
 
 ROOT = Path(__file__).resolve().parents[2]
 BASES_DIR = ROOT.parent / "gerador_propostas" / "bases"
+BASE_NAMES = ["materiais", "mao_de_obra", "ferramentas", "equipamentos", "composicoes", "bdi"]
+
+# Parsed bases per file, reused while (mtime_ns, size) is unchanged; one entry
+# per base file, dropped when the file disappears or on invalidate_bases_cache()
+_BASES_CACHE: Dict[Path, Tuple[Tuple[int, int], Any]] = {}
 
 
 def money(v: float) -> str:
     return f"{v:,.2f}".replace(",", "X").replace(".", ",").replace("X", ".")
 
 
+def _load_base(path: Path) -> Any:
+    st = path.stat()
+    signature = (st.st_mtime_ns, st.st_size)
+    cached = _BASES_CACHE.get(path)
+    if cached is None or cached[0] != signature:
+        with open(path) as f:
+            cached = (signature, json.load(f))
+        _BASES_CACHE[path] = cached
+    return cached[1]
+
+
+def invalidate_bases_cache(bases_dir: Path | None = None) -> None:
+    # Forces a re-read on the next load_bases(); only bases_dir when given
+    if bases_dir is None:
+        _BASES_CACHE.clear()
+        return
+    bases_dir = Path(bases_dir)
+    for path in [p for p in _BASES_CACHE if p.parent == bases_dir]:
+        del _BASES_CACHE[path]
+
+
 def load_bases():
+    # Files are only re-parsed when they change; treat the result as read-only.
     bases = {}
-    for nome in ["materiais", "mao_de_obra", "ferramentas", "equipamentos", "composicoes", "bdi"]:
+    for nome in BASE_NAMES:
         path = BASES_DIR / f"{nome}.json"
         if path.exists():
-            with open(path) as f:
-                data = json.load(f)
-                bases[nome] = data.get(nome, data)
+            data = _load_base(path)
+            bases[nome] = data.get(nome, data)
+        else:
+            _BASES_CACHE.pop(path, None)
     return bases
 
 
@@ -0,0 +1,196 @@
+#!/usr/bin/env python3
+from __future__ import annotations
+
+import argparse
+import sqlite3
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from typing import Dict, List
+
+from automations.scripts.kpi_report_weekly_v1 import KpiInput, KpiOutput, build_weekly_kpi, to_markdown
+from automations.scripts.proposal_store_v1 import ProposalStoreV1
+
+ROOT = Path(__file__).resolve().parents[2]
+MIGRATION = ROOT / "standards/db/migration_stage6_kpi_weekly_rollup_v1.sql"
+ROLLUP_NAME = "weekly_v1"
+
+# Transitions in (lo, hi]: creation rows (from_status IS NULL) count towards the
+# total, won/lost rows carry cycle days since creation; margin is the latest
+# pricing of proposals won in the week.
+DELTA_CTE = """
+WITH delta AS (
+  SELECT
+    date(h.changed_at, 'weekday 0', '-6 days') AS week_start,
+    h.from_status,
+    h.to_status,
+    COALESCE(h.reason_code, 'unspecified') AS reason_code,
+    julianday(h.changed_at) - julianday(p.created_at) AS cycle_days,
+    CASE WHEN h.to_status = 'won' THEN (
+      SELECT pr.margin_pct FROM proposal_pricing pr
+      WHERE pr.proposal_id_ref = h.proposal_id_ref
+      ORDER BY pr.id DESC LIMIT 1
+    ) END AS margin_pct
+  FROM proposal_status_history h
+  JOIN proposals p ON p.id = h.proposal_id_ref
+  WHERE h.id > :lo AND h.id <= :hi
+)
+"""
+
+UPSERT_ROLLUP = DELTA_CTE + """
+INSERT INTO kpi_weekly_rollup (
+  week_start, proposals_total, proposals_won, proposals_lost,
+  cycle_days_sum, cycle_count, margin_pct_sum, margin_count
+)
+SELECT
+  week_start,
+  SUM(from_status IS NULL),
+  SUM(to_status = 'won'),
+  SUM(to_status = 'lost'),
+  TOTAL(CASE WHEN to_status IN ('won', 'lost') THEN cycle_days END),
+  SUM(to_status IN ('won', 'lost')),
+  TOTAL(margin_pct),
+  COUNT(margin_pct)
+FROM delta
+WHERE true
+GROUP BY week_start
+ON CONFLICT(week_start) DO UPDATE SET
+  proposals_total = proposals_total + excluded.proposals_total,
+  proposals_won = proposals_won + excluded.proposals_won,
+  proposals_lost = proposals_lost + excluded.proposals_lost,
+  cycle_days_sum = cycle_days_sum + excluded.cycle_days_sum,
+  cycle_count = cycle_count + excluded.cycle_count,
+  margin_pct_sum = margin_pct_sum + excluded.margin_pct_sum,
+  margin_count = margin_count + excluded.margin_count
+"""
+
+UPSERT_LOSS_REASONS = DELTA_CTE + """
+INSERT INTO kpi_weekly_loss_reasons (week_start, reason_code, proposals_lost)
+SELECT week_start, reason_code, COUNT(*)
+FROM delta
+WHERE to_status = 'lost'
+GROUP BY week_start, reason_code
+ON CONFLICT(week_start, reason_code) DO UPDATE SET
+  proposals_lost = proposals_lost + excluded.proposals_lost
+"""
+
+SELECT_TOTALS = """
+SELECT
+  TOTAL(proposals_total) AS proposals_total,
+  TOTAL(proposals_won) AS proposals_won,
+  TOTAL(proposals_lost) AS proposals_lost,
+  TOTAL(cycle_days_sum) AS cycle_days_sum,
+  TOTAL(cycle_count) AS cycle_count,
+  TOTAL(margin_pct_sum) AS margin_pct_sum,
+  TOTAL(margin_count) AS margin_count
+FROM kpi_weekly_rollup
+WHERE week_start >= ? AND week_start < ?
+"""
+
+SELECT_LOSS_REASONS = """
+SELECT reason_code, SUM(proposals_lost) AS n
+FROM kpi_weekly_loss_reasons
+WHERE week_start >= ? AND week_start < ?
+GROUP BY reason_code
+ORDER BY reason_code
+"""
+
+
+def week_start(value: str | date | datetime) -> date:
+    if isinstance(value, str):
+        value = date.fromisoformat(value[:10])
+    elif isinstance(value, datetime):
+        value = value.date()
+    return value - timedelta(days=value.weekday())
+
+
+def _avg(total: float, count: float) -> float:
+    return total / count if count else 0.0
+
+
+class KpiEngineV1:
+    def __init__(self, store: ProposalStoreV1) -> None:
+        self.store = store
+        self.conn = store.conn
+        self.conn.executescript(MIGRATION.read_text(encoding="utf-8"))
+        self.conn.execute(
+            "INSERT OR IGNORE INTO kpi_rollup_state (rollup_name, last_history_id) VALUES (?, 0)",
+            (ROLLUP_NAME,),
+        )
+
+    @property
+    def watermark(self) -> int:
+        row = self.conn.execute(
+            "SELECT last_history_id FROM kpi_rollup_state WHERE rollup_name = ?", (ROLLUP_NAME,)
+        ).fetchone()
+        return row[0]
+
+    def _fold(self, conn: sqlite3.Connection) -> int:
+        lo = self.watermark
+        hi = conn.execute("SELECT COALESCE(MAX(id), 0) FROM proposal_status_history").fetchone()[0]
+        if hi <= lo:
+            return 0
+        params = {"lo": lo, "hi": hi}
+        conn.execute(UPSERT_ROLLUP, params)
+        conn.execute(UPSERT_LOSS_REASONS, params)
+        conn.execute(
+            "UPDATE kpi_rollup_state SET last_history_id = ?, updated_at = datetime('now') WHERE rollup_name = ?",
+            (hi, ROLLUP_NAME),
+        )
+        return hi - lo
+
+    def refresh(self) -> int:
+        # Only history rows added since the last refresh are read
+        with self.store.transaction() as conn:
+            return self._fold(conn)
+
+    def rebuild(self) -> int:
+        # Backfill: the same upsert over the whole history in one pass; readers
+        # never see the cleared rollups since both steps share one transaction
+        with self.store.transaction() as conn:
+            conn.execute("DELETE FROM kpi_weekly_rollup")
+            conn.execute("DELETE FROM kpi_weekly_loss_reasons")
+            conn.execute("UPDATE kpi_rollup_state SET last_history_id = 0 WHERE rollup_name = ?", (ROLLUP_NAME,))
+            return self._fold(conn)
+
+    def weeks(self) -> List[str]:
+        self.refresh()
+        return [r[0] for r in self.conn.execute("SELECT week_start FROM kpi_weekly_rollup ORDER BY week_start")]
+
+    def kpi_input(self, start: str | date | datetime, end: str | date | datetime | None = None) -> KpiInput:
+        # Weeks in [week_start(start), week_start(end)); a single week when end is omitted
+        self.refresh()
+        first = week_start(start)
+        last = week_start(end) if end is not None else first + timedelta(days=7)
+        bounds = (first.isoformat(), last.isoformat())
+
+        totals = self.conn.execute(SELECT_TOTALS, bounds).fetchone()
+        reasons: Dict[str, int] = {r["reason_code"]: r["n"] for r in self.conn.execute(SELECT_LOSS_REASONS, bounds)}
+        return KpiInput(
+            proposals_total=int(totals["proposals_total"]),
+            proposals_won=int(totals["proposals_won"]),
+            proposals_lost=int(totals["proposals_lost"]),
+            avg_cycle_days=_avg(totals["cycle_days_sum"], totals["cycle_count"]),
+            avg_margin_pct=_avg(totals["margin_pct_sum"], totals["margin_count"]),
+            loss_reasons=reasons,
+        )
+
+    def weekly_kpi(self, week: str | date | datetime) -> KpiOutput:
+        return build_weekly_kpi(self.kpi_input(week))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Weekly KPI report from the proposal store")
+    parser.add_argument("database", help="SQLite proposal store")
+    parser.add_argument("--week", help="Any date in the week (default: current week)")
+    parser.add_argument("--rebuild", action="store_true", help="Backfill the rollups from the full history")
+    args = parser.parse_args()
+
+    with ProposalStoreV1(args.database) as store:
+        engine = KpiEngineV1(store)
+        if args.rebuild:
+            engine.rebuild()
+        print(to_markdown(engine.weekly_kpi(args.week or date.today())), end="")
+
+
+if __name__ == "__main__":
+    main()
@@ -7,6 +7,7 @@ from pathlib import Path
 from typing import Dict, List
 
 from automations.scripts.asana_adapter_v1 import AsanaAdapterV1
+from automations.scripts.proposal_store_v1 import ProposalStoreV1
 
 ROOT = Path(__file__).resolve().parents[2]
 STATUS_MAP_PATH = ROOT / "standards/workflow/proposal_status_map_v1.json"
@@ -21,10 +22,15 @@ class LifecycleEvent:
 
 
 class ProposalLifecycleV1:
-    def __init__(self, adapter: AsanaAdapterV1 | None = None) -> None:
+    def __init__(
+        self,
+        adapter: AsanaAdapterV1 | None = None,
+        store: ProposalStoreV1 | None = None,
+    ) -> None:
         raw = json.loads(STATUS_MAP_PATH.read_text(encoding="utf-8"))
         self.allowed_transitions: Dict[str, List[str]] = raw["allowed_transitions"]
         self.adapter = adapter or AsanaAdapterV1()
+        self.store = store
         self.events: List[LifecycleEvent] = []
 
     def can_transition(self, from_status: str, to_status: str) -> bool:
@@ -46,6 +52,8 @@ class ProposalLifecycleV1:
             to_status=to_status,
             reason_code=reason_code,
         )
+        if self.store is not None:
+            self.store.record_transition(proposal_id, from_status, to_status, reason_code)
         self.events.append(event)
         self.adapter.sync_transition(proposal_id, from_status, to_status, reason_code)
         return event
@@ -0,0 +1,276 @@
+#!/usr/bin/env python3
+from __future__ import annotations
+
+import sqlite3
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from datetime import date, datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Sequence
+
+from automations.scripts.pricing_engine_v1 import PricingInput, calculate_price
+
+ROOT = Path(__file__).resolve().parents[2]
+MIGRATIONS = [
+    ROOT / "standards/db/migration_stage1_core_proposal_domain_v1.sql",
+    ROOT / "standards/db/migration_stage1_proposal_store_indexes_v1.sql",
+]
+
+# SQLite default limit on bound parameters is 999 on older builds
+ID_LOOKUP_CHUNK = 900
+
+INSERT_PROPOSAL = (
+    "INSERT INTO proposals (proposal_id, customer_name, title, status, created_at, updated_at) "
+    "VALUES (?, ?, ?, ?, ?, ?)"
+)
+INSERT_ITEM = (
+    "INSERT INTO proposal_items "
+    "(proposal_id_ref, item_code, item_description, quantity, unit, unit_price, total_price, created_at) "
+    "VALUES (?, ?, ?, ?, ?, ?, ?, ?)"
+)
+INSERT_PRICING = (
+    "INSERT INTO proposal_pricing "
+    "(proposal_id_ref, direct_cost_total, overhead_pct, tax_pct, margin_pct, final_price, "
+    "pricing_policy_version, created_at) "
+    "VALUES (?, ?, ?, ?, ?, ?, ?, ?)"
+)
+INSERT_HISTORY = (
+    "INSERT INTO proposal_status_history "
+    "(proposal_id_ref, from_status, to_status, reason_code, actor, changed_at) "
+    "VALUES (?, ?, ?, ?, ?, ?)"
+)
+INSERT_FILE = (
+    "INSERT INTO proposal_files (proposal_id_ref, file_kind, file_path, file_hash, created_at) "
+    "VALUES (?, ?, ?, ?, ?)"
+)
+UPDATE_STATUS = "UPDATE proposals SET status = ?, updated_at = ? WHERE id = ?"
+
+SELECT_PROPOSALS = (
+    "SELECT p.proposal_id, p.customer_name, p.title, p.status, p.created_at, p.updated_at, "
+    "pr.direct_cost_total, pr.final_price, pr.margin_pct, pr.pricing_policy_version "
+    "FROM proposals p "
+    "LEFT JOIN proposal_pricing pr ON pr.id = ("
+    "SELECT MAX(id) FROM proposal_pricing WHERE proposal_id_ref = p.id)"
+)
+
+
+@dataclass
+class ProposalItem:
+    description: str
+    quantity: float = 1.0
+    unit_price: float = 0.0
+    code: str | None = None
+    unit: str | None = None
+
+    @property
+    def total_price(self) -> float:
+        return round(self.quantity * self.unit_price, 2)
+
+
+@dataclass
+class ProposalFile:
+    kind: str
+    path: str
+    file_hash: str | None = None
+
+
+@dataclass
+class PricedProposal:
+    proposal_id: str
+    customer_name: str
+    pricing: PricingInput
+    title: str | None = None
+    status: str = "priced"
+    items: List[ProposalItem] = field(default_factory=list)
+    files: List[ProposalFile] = field(default_factory=list)
+    created_at: str | datetime | date | None = None
+    actor: str | None = None
+
+
+def to_timestamp(value: str | datetime | date | None) -> str:
+    # Same text format as SQLite datetime('now') (UTC), so ranges compare as strings
+    if value is None:
+        return datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M:%S")
+    if isinstance(value, datetime):
+        return value.strftime("%Y-%m-%d %H:%M:%S")
+    if isinstance(value, date):
+        return value.strftime("%Y-%m-%d 00:00:00")
+    return value.replace("T", " ")
+
+
+class ProposalStoreV1:
+    def __init__(self, path: str | Path = ":memory:") -> None:
+        self.path = str(path)
+        self.conn = sqlite3.connect(self.path, isolation_level=None, cached_statements=256)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("PRAGMA journal_mode = WAL")
+        self.conn.execute("PRAGMA synchronous = NORMAL")
+        self.conn.execute("PRAGMA foreign_keys = ON")
+        self.apply_migrations()
+
+    def apply_migrations(self) -> None:
+        for migration in MIGRATIONS:
+            self.conn.executescript(migration.read_text(encoding="utf-8"))
+
+    @property
+    def journal_mode(self) -> str:
+        return self.conn.execute("PRAGMA journal_mode").fetchone()[0]
+
+    def close(self) -> None:
+        self.conn.close()
+
+    def __enter__(self) -> "ProposalStoreV1":
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.close()
+
+    @contextmanager
+    def transaction(self) -> Iterator[sqlite3.Connection]:
+        self.conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield self.conn
+        except BaseException:
+            self.conn.execute("ROLLBACK")
+            raise
+        self.conn.execute("COMMIT")
+
+    def _lookup_refs(self, proposal_ids: Sequence[str]) -> Dict[str, int]:
+        refs: Dict[str, int] = {}
+        for start in range(0, len(proposal_ids), ID_LOOKUP_CHUNK):
+            chunk = proposal_ids[start:start + ID_LOOKUP_CHUNK]
+            marks = ",".join("?" * len(chunk))
+            rows = self.conn.execute(
+                f"SELECT id, proposal_id FROM proposals WHERE proposal_id IN ({marks})", chunk
+            )
+            refs.update((r["proposal_id"], r["id"]) for r in rows)
+        return refs
+
+    def _ref(self, proposal_id: str) -> int:
+        row = self.conn.execute("SELECT id FROM proposals WHERE proposal_id = ?", (proposal_id,)).fetchone()
+        if row is None:
+            raise KeyError(f"unknown proposal: {proposal_id}")
+        return row["id"]
+
+    def insert_priced_proposals(self, proposals: Iterable[PricedProposal]) -> int:
+        batch = list(proposals)
+        if not batch:
+            return 0
+
+        stamps = [to_timestamp(p.created_at) for p in batch]
+        with self.transaction():
+            self.conn.executemany(
+                INSERT_PROPOSAL,
+                [
+                    (p.proposal_id, p.customer_name, p.title, p.status, ts, ts)
+                    for p, ts in zip(batch, stamps)
+                ],
+            )
+            refs = self._lookup_refs([p.proposal_id for p in batch])
+
+            items, pricing, history, files = [], [], [], []
+            for p, ts in zip(batch, stamps):
+                ref = refs[p.proposal_id]
+                priced = calculate_price(p.pricing)
+                pricing.append(
+                    (
+                        ref,
+                        priced.base_cost,
+                        p.pricing.overhead_pct,
+                        p.pricing.tax_pct,
+                        p.pricing.margin_pct,
+                        priced.final_price,
+                        priced.policy_version,
+                        ts,
+                    )
+                )
+                history.append((ref, None, p.status, None, p.actor, ts))
+                items.extend(
+                    (ref, i.code, i.description, i.quantity, i.unit, i.unit_price, i.total_price, ts)
+                    for i in p.items
+                )
+                files.extend((ref, f.kind, f.path, f.file_hash, ts) for f in p.files)
+
+            self.conn.executemany(INSERT_PRICING, pricing)
+            self.conn.executemany(INSERT_HISTORY, history)
+            self.conn.executemany(INSERT_ITEM, items)
+            self.conn.executemany(INSERT_FILE, files)
+        return len(batch)
+
+    def record_transition(
+        self,
+        proposal_id: str,
+        from_status: str | None,
+        to_status: str,
+        reason_code: str | None = None,
+        actor: str | None = None,
+        changed_at: str | datetime | date | None = None,
+    ) -> None:
+        ts = to_timestamp(changed_at)
+        with self.transaction() as conn:
+            row = conn.execute("SELECT id, status FROM proposals WHERE proposal_id = ?", (proposal_id,)).fetchone()
+            if row is None:
+                raise KeyError(f"unknown proposal: {proposal_id}")
+            # The creation row (from_status NULL) is written by insert_priced_proposals
+            if from_status != row["status"]:
+                raise ValueError(
+                    f"stale transition for {proposal_id}: current status is {row['status']}, got from_status={from_status}"
+                )
+            ref = row["id"]
+            conn.execute(INSERT_HISTORY, (ref, from_status, to_status, reason_code, actor, ts))
+            conn.execute(UPDATE_STATUS, (to_status, ts, ref))
+
+    def _select(self, where: str, params: Sequence[Any]) -> List[Dict[str, Any]]:
+        sql = f"{SELECT_PROPOSALS} WHERE {where} ORDER BY p.created_at, p.id"
+        return [dict(r) for r in self.conn.execute(sql, params)]
+
+    def get(self, proposal_id: str) -> Dict[str, Any] | None:
+        rows = self._select("p.proposal_id = ?", (proposal_id,))
+        return rows[0] if rows else None
+
+    def by_status(self, status: str) -> List[Dict[str, Any]]:
+        return self._select("p.status = ?", (status,))
+
+    def by_customer(self, customer_name: str) -> List[Dict[str, Any]]:
+        return self._select("p.customer_name = ?", (customer_name,))
+
+    def created_between(
+        self,
+        start: str | datetime | date,
+        end: str | datetime | date,
+        status: str | None = None,
+    ) -> List[Dict[str, Any]]:
+        # Half-open range: start <= created_at < end
+        if status is None:
+            return self._select("p.created_at >= ? AND p.created_at < ?", (to_timestamp(start), to_timestamp(end)))
+        return self._select(
+            "p.status = ? AND p.created_at >= ? AND p.created_at < ?",
+            (status, to_timestamp(start), to_timestamp(end)),
+        )
+
+    def items(self, proposal_id: str) -> List[Dict[str, Any]]:
+        rows = self.conn.execute(
+            "SELECT item_code, item_description, quantity, unit, unit_price, total_price "
+            "FROM proposal_items WHERE proposal_id_ref = ? ORDER BY id",
+            (self._ref(proposal_id),),
+        )
+        return [dict(r) for r in rows]
+
+    def files(self, proposal_id: str) -> List[Dict[str, Any]]:
+        rows = self.conn.execute(
+            "SELECT file_kind, file_path, file_hash FROM proposal_files WHERE proposal_id_ref = ? ORDER BY id",
+            (self._ref(proposal_id),),
+        )
+        return [dict(r) for r in rows]
+
+    def status_history(self, proposal_id: str) -> List[Dict[str, Any]]:
+        rows = self.conn.execute(
+            "SELECT from_status, to_status, reason_code, actor, changed_at "
+            "FROM proposal_status_history WHERE proposal_id_ref = ? ORDER BY changed_at, id",
+            (self._ref(proposal_id),),
+        )
+        return [dict(r) for r in rows]
+
+    def count_by_status(self) -> Dict[str, int]:
+        rows = self.conn.execute("SELECT status, COUNT(*) AS n FROM proposals GROUP BY status ORDER BY status")
+        return {r["status"]: r["n"] for r in rows}
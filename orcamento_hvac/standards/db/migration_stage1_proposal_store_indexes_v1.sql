@@ -0,0 +1,7 @@
+-- Stage 1 - Proposal store query indexes (v1)
+-- Additive to migration_stage1_core_proposal_domain_v1.sql (idempotent)
+
+CREATE INDEX IF NOT EXISTS idx_proposals_customer_created ON proposals(customer_name, created_at);
+CREATE INDEX IF NOT EXISTS idx_proposals_created_at ON proposals(created_at);
+CREATE INDEX IF NOT EXISTS idx_proposals_status_created ON proposals(status, created_at);
+CREATE INDEX IF NOT EXISTS idx_proposal_pricing_created ON proposal_pricing(proposal_id_ref, created_at);
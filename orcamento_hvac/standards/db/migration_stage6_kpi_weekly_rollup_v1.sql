@@ -0,0 +1,28 @@
+-- Stage 6 - Weekly KPI rollups (v1)
+-- Materialized from proposal_status_history/proposal_pricing (idempotent)
+-- Weeks start on Monday: date(changed_at, 'weekday 0', '-6 days')
+
+CREATE TABLE IF NOT EXISTS kpi_weekly_rollup (
+  week_start TEXT PRIMARY KEY,
+  proposals_total INTEGER NOT NULL DEFAULT 0,
+  proposals_won INTEGER NOT NULL DEFAULT 0,
+  proposals_lost INTEGER NOT NULL DEFAULT 0,
+  cycle_days_sum REAL NOT NULL DEFAULT 0,
+  cycle_count INTEGER NOT NULL DEFAULT 0,
+  margin_pct_sum REAL NOT NULL DEFAULT 0,
+  margin_count INTEGER NOT NULL DEFAULT 0
+);
+
+CREATE TABLE IF NOT EXISTS kpi_weekly_loss_reasons (
+  week_start TEXT NOT NULL,
+  reason_code TEXT NOT NULL,
+  proposals_lost INTEGER NOT NULL DEFAULT 0,
+  PRIMARY KEY (week_start, reason_code)
+);
+
+-- Highest proposal_status_history.id already folded into the rollups
+CREATE TABLE IF NOT EXISTS kpi_rollup_state (
+  rollup_name TEXT PRIMARY KEY,
+  last_history_id INTEGER NOT NULL DEFAULT 0,
+  updated_at TEXT NOT NULL DEFAULT (datetime('now'))
+);
@@ -0,0 +1,37 @@
+import json
+
+from automations.scripts import generate_proposal_from_compositions as gen
+
+
+def _write(path, data):
+    path.write_text(json.dumps(data), encoding="utf-8")
+
+
+def test_load_bases_reuses_parsed_files(tmp_path, monkeypatch):
+    monkeypatch.setattr(gen, "BASES_DIR", tmp_path)
+    gen.invalidate_bases_cache()
+    _write(tmp_path / "bdi.json", {"bdi": {"MAT": {"percentual": 0.3}}})
+
+    first = gen.load_bases()
+    assert gen.get_bdi(first, "MAT") == 0.3
+    assert gen.load_bases()["bdi"] is first["bdi"]
+
+
+def test_invalidate_bases_cache(tmp_path, monkeypatch):
+    monkeypatch.setattr(gen, "BASES_DIR", tmp_path)
+    gen.invalidate_bases_cache()
+    _write(tmp_path / "bdi.json", {"bdi": {"MAT": {"percentual": 0.3}}})
+    _write(tmp_path / "materiais.json", {"materiais": {}})
+    first = gen.load_bases()
+
+    gen.invalidate_bases_cache(tmp_path / "other")
+    assert gen.load_bases()["bdi"] is first["bdi"]
+
+    gen.invalidate_bases_cache(tmp_path)
+    assert not gen._BASES_CACHE
+    assert gen.load_bases()["bdi"] is not first["bdi"]
+
+    (tmp_path / "materiais.json").unlink()
+    assert "materiais" not in gen.load_bases()
+    assert sorted(p.name for p in gen._BASES_CACHE) == ["bdi.json"]
+    gen.invalidate_bases_cache()
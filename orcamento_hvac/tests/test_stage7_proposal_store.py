@@ -0,0 +1,119 @@
+import sqlite3
+
+import pytest
+
+from automations.scripts.asana_adapter_v1 import AsanaAdapterV1, FakeAsanaBackend
+from automations.scripts.pricing_engine_v1 import PricingInput
+from automations.scripts.proposal_lifecycle_v1 import ProposalLifecycleV1
+from automations.scripts.proposal_store_v1 import (
+    PricedProposal,
+    ProposalFile,
+    ProposalItem,
+    ProposalStoreV1,
+)
+
+
+def _proposal(n: int, customer: str, created_at: str, status: str = "priced") -> PricedProposal:
+    return PricedProposal(
+        proposal_id=f"PROP-2026-{n:04d}",
+        customer_name=customer,
+        title=f"Instalacao {n}",
+        status=status,
+        created_at=created_at,
+        pricing=PricingInput(direct_cost=10000, tax_pct=12, overhead_pct=8, fixed_cost=500, margin_pct=15),
+        items=[
+            ProposalItem("Split 12000 BTU", quantity=2, unit_price=2500.0, code="EQP_12K", unit="UN"),
+            ProposalItem("Tubo cobre 1/4", quantity=7.5, unit_price=18.0, code="TUB_14", unit="M"),
+        ],
+        files=[ProposalFile("pdf", f"output/PROP-2026-{n:04d}.pdf", "abc")],
+    )
+
+
+@pytest.fixture
+def store(tmp_path):
+    with ProposalStoreV1(tmp_path / "proposals.db") as s:
+        yield s
+
+
+def test_stage7_store_uses_wal_and_migration(store):
+    assert store.journal_mode == "wal"
+    tables = {r[0] for r in store.conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+    assert {"proposals", "proposal_items", "proposal_status_history", "proposal_pricing", "proposal_files"} <= tables
+
+    # Migrations are idempotent
+    store.apply_migrations()
+
+
+def test_stage7_bulk_insert_and_indexed_queries(store):
+    batch = [
+        _proposal(1, "Cliente A", "2026-01-05 10:00:00"),
+        _proposal(2, "Cliente B", "2026-01-20 09:00:00", status="draft"),
+        _proposal(3, "Cliente A", "2026-02-02 14:30:00"),
+    ]
+    assert store.insert_priced_proposals(batch) == 3
+
+    assert [p["proposal_id"] for p in store.by_customer("Cliente A")] == ["PROP-2026-0001", "PROP-2026-0003"]
+    assert [p["proposal_id"] for p in store.by_status("draft")] == ["PROP-2026-0002"]
+    assert [p["proposal_id"] for p in store.created_between("2026-01-01", "2026-02-01")] == [
+        "PROP-2026-0001",
+        "PROP-2026-0002",
+    ]
+    assert store.created_between("2026-01-01", "2026-02-01", status="draft")[0]["customer_name"] == "Cliente B"
+    assert store.count_by_status() == {"draft": 1, "priced": 2}
+
+    first = store.get("PROP-2026-0001")
+    assert first["direct_cost_total"] == 10500.0
+    assert first["final_price"] == 14490.0
+    assert store.items("PROP-2026-0001")[1]["total_price"] == 135.0
+    assert store.files("PROP-2026-0003")[0]["file_path"] == "output/PROP-2026-0003.pdf"
+    assert store.status_history("PROP-2026-0002") == [
+        {"from_status": None, "to_status": "draft", "reason_code": None, "actor": None, "changed_at": "2026-01-20 09:00:00"}
+    ]
+
+
+def test_stage7_queries_use_indexes(store):
+    plan = " ".join(
+        r[3] for r in store.conn.execute(
+            "EXPLAIN QUERY PLAN SELECT id FROM proposals WHERE customer_name = ? AND created_at >= ?", ("x", "y")
+        )
+    )
+    assert "idx_proposals_customer_created" in plan
+
+
+def test_stage7_bulk_insert_is_atomic(store):
+    store.insert_priced_proposals([_proposal(1, "Cliente A", "2026-01-05")])
+    with pytest.raises(sqlite3.IntegrityError):
+        store.insert_priced_proposals([_proposal(2, "Cliente B", "2026-01-06"), _proposal(1, "Cliente A", "2026-01-07")])
+
+    assert store.get("PROP-2026-0002") is None
+    assert store.count_by_status() == {"priced": 1}
+
+
+def test_stage7_lifecycle_persists_transitions(store):
+    store.insert_priced_proposals([_proposal(42, "Cliente A", "2026-03-01")])
+    backend = FakeAsanaBackend()
+    lifecycle = ProposalLifecycleV1(adapter=AsanaAdapterV1(backend=backend), store=store)
+
+    lifecycle.transition("PROP-2026-0042", "priced", "approval_pending", "pricing_adjustment")
+
+    assert store.get("PROP-2026-0042")["status"] == "approval_pending"
+    assert store.status_history("PROP-2026-0042")[-1]["reason_code"] == "pricing_adjustment"
+    assert len(backend.events) == 1
+
+
+def test_stage7_lifecycle_keeps_log_and_store_in_sync(store):
+    lifecycle = ProposalLifecycleV1(store=store)
+    with pytest.raises(KeyError):
+        lifecycle.transition("PROP-2026-0099", "priced", "approval_pending")
+    assert lifecycle.events == []
+
+
+def test_stage7_transition_must_start_from_current_status(store):
+    store.insert_priced_proposals([_proposal(7, "Cliente A", "2026-03-01")])
+
+    for from_status in (None, "draft"):
+        with pytest.raises(ValueError):
+            store.record_transition("PROP-2026-0007", from_status, "review")
+
+    assert len(store.status_history("PROP-2026-0007")) == 1
+    assert store.get("PROP-2026-0007")["status"] == "priced"
@@ -0,0 +1,136 @@
+import random
+from datetime import date, datetime, timedelta
+
+import pytest
+
+from automations.scripts.kpi_engine_v1 import KpiEngineV1, week_start
+from automations.scripts.pricing_engine_v1 import PricingInput
+from automations.scripts.proposal_store_v1 import PricedProposal, ProposalStoreV1
+
+
+def _proposal(n: int, created_at: str, margin_pct: float = 15.0) -> PricedProposal:
+    return PricedProposal(
+        proposal_id=f"PROP-2026-{n:04d}",
+        customer_name=f"Cliente {n % 3}",
+        created_at=created_at,
+        pricing=PricingInput(direct_cost=1000, tax_pct=12, overhead_pct=8, fixed_cost=0, margin_pct=margin_pct),
+    )
+
+
+def _close(store, n: int, outcome: str, changed_at: str, reason: str | None = None) -> None:
+    pid = f"PROP-2026-{n:04d}"
+    store.record_transition(pid, "priced", "sent", changed_at=changed_at)
+    store.record_transition(pid, "sent", outcome, reason, changed_at=changed_at)
+
+
+@pytest.fixture
+def store(tmp_path):
+    with ProposalStoreV1(tmp_path / "kpi.db") as s:
+        yield s
+
+
+def test_stage8_week_start_is_monday():
+    assert week_start("2026-01-05") == date(2026, 1, 5)
+    assert week_start("2026-01-11 23:59:59") == date(2026, 1, 5)
+    assert week_start(datetime(2026, 1, 12, 8)) == date(2026, 1, 12)
+
+
+def test_stage8_weekly_kpi_from_history(store):
+    store.insert_priced_proposals(
+        [
+            _proposal(1, "2026-01-05 09:00:00", margin_pct=10),
+            _proposal(2, "2026-01-06 09:00:00", margin_pct=20),
+            _proposal(3, "2026-01-07 09:00:00"),
+            _proposal(4, "2026-01-08 09:00:00"),
+        ]
+    )
+    _close(store, 1, "won", "2026-01-15 09:00:00", "closed_success")
+    _close(store, 2, "won", "2026-01-16 09:00:00", "closed_success")
+    _close(store, 3, "lost", "2026-01-17 09:00:00", "budget_rejected")
+
+    engine = KpiEngineV1(store)
+    assert engine.weeks() == ["2026-01-05", "2026-01-12"]
+
+    first = engine.kpi_input("2026-01-07")
+    assert (first.proposals_total, first.proposals_won, first.proposals_lost) == (4, 0, 0)
+
+    closing = engine.weekly_kpi("2026-01-12")
+    assert closing.totals == {"proposals_total": 0, "proposals_won": 2, "proposals_lost": 1}
+    assert closing.avg_cycle_days == 10.0
+    assert closing.avg_margin_pct == 15.0
+    assert closing.top_loss_reason == "budget_rejected"
+
+    month = engine.kpi_input("2026-01-01", "2026-02-01")
+    assert month.proposals_total == 4
+    assert month.loss_reasons == {"budget_rejected": 1}
+
+
+def test_stage8_incremental_refresh_reads_only_new_transitions(store):
+    store.insert_priced_proposals([_proposal(1, "2026-01-05"), _proposal(2, "2026-01-05")])
+    engine = KpiEngineV1(store)
+    assert engine.refresh() == 2
+    assert engine.refresh() == 0
+
+    _close(store, 1, "lost", "2026-01-20", "project_cancelled")
+    assert engine.refresh() == 2
+    _close(store, 2, "lost", "2026-01-21")
+    assert engine.refresh() == 2
+
+    assert engine.kpi_input("2026-01-19").loss_reasons == {"project_cancelled": 1, "unspecified": 1}
+
+
+def test_stage8_incremental_matches_backfill(store):
+    rng = random.Random(7)
+    engine = KpiEngineV1(store)
+    start = datetime(2024, 1, 1)
+    n = 0
+    for _batch in range(6):
+        proposals = []
+        for _ in range(40):
+            n += 1
+            created = start + timedelta(days=rng.randrange(700), hours=rng.randrange(24))
+            proposals.append(_proposal(n, created.isoformat(" "), margin_pct=rng.choice([10, 12.5, 15, 18])))
+        store.insert_priced_proposals(proposals)
+        for p in proposals:
+            if rng.random() < 0.7:
+                closed = datetime.fromisoformat(p.created_at) + timedelta(days=rng.randrange(1, 60))
+                outcome = rng.choice(["won", "lost"])
+                reason = rng.choice(["budget_rejected", "project_cancelled", None]) if outcome == "lost" else None
+                _close(store, int(p.proposal_id[-4:]), outcome, closed.isoformat(" "), reason)
+        engine.refresh()
+
+    incremental = {w: engine.kpi_input(w) for w in engine.weeks()}
+    assert engine.rebuild() > 0
+    backfilled = {w: engine.kpi_input(w) for w in engine.weeks()}
+
+    assert incremental.keys() == backfilled.keys()
+    for week, inp in incremental.items():
+        other = backfilled[week]
+        assert (inp.proposals_total, inp.proposals_won, inp.proposals_lost) == (
+            other.proposals_total,
+            other.proposals_won,
+            other.proposals_lost,
+        )
+        assert inp.avg_cycle_days == pytest.approx(other.avg_cycle_days)
+        assert inp.avg_margin_pct == pytest.approx(other.avg_margin_pct)
+        assert inp.loss_reasons == other.loss_reasons
+
+    everything = engine.kpi_input("2023-12-25", "2026-12-28")
+    assert everything.proposals_total == n
+
+
+def test_stage8_failed_rebuild_keeps_rollups(store, monkeypatch):
+    store.insert_priced_proposals([_proposal(1, "2026-01-05")])
+    engine = KpiEngineV1(store)
+    engine.refresh()
+
+    def fail(conn):
+        raise RuntimeError("backfill failed")
+
+    monkeypatch.setattr(engine, "_fold", fail)
+    with pytest.raises(RuntimeError):
+        engine.rebuild()
+    monkeypatch.undo()
+
+    assert engine.watermark == 1
+    assert engine.kpi_input("2026-01-05").proposals_total == 1